@@ -48,8 +48,8 @@ export default function QuizStart() {
         if (result.success && result.questions.length > 0) {
           setQuestions(result.questions);
           // Initialize answers array
-          setAnswers(result.questions.map((_, idx) => ({
-            questionId: idx + 1,
+          setAnswers(result.questions.map(q => ({
+            questionId: q.id,
             answer: '' as 'A' | 'B' | 'C' | 'D'
           })));
           setStage('ready');
@@ -77,7 +77,7 @@ export default function QuizStart() {
   const selectAnswer = (questionIndex: number, answer: 'A' | 'B' | 'C' | 'D') => {
     const newAnswers = [...answers];
     newAnswers[questionIndex] = {
-      questionId: questionIndex + 1,
+      questionId: questions[questionIndex].id,
       answer
     };
     setAnswers(newAnswers);
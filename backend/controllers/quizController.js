@@ -11,6 +11,7 @@ const quizzesData = JSON.parse(
 const quizQuestions = {};
 quizzesData.quizzes.forEach(quiz => {
   quizQuestions[quiz.subjectCode] = quiz.questions.map(q => ({
+    id: q.id,
     question: q.question,
     option_a: q.options[0],
     option_b: q.options[1],
@@ -43,6 +44,7 @@ exports.getQuizQuestions = async (req, res) => {
         console.log(`✅ Found ${quizData.questions.length} questions in JSON for ${subjectCode}`);
         // Convert to the expected format
         questions = quizData.questions.map(q => ({
+          id: q.id,
           question: q.question,
           option_a: q.options[0],
           option_b: q.options[1],
@@ -62,12 +64,12 @@ exports.getQuizQuestions = async (req, res) => {
       }
     }
 
-    // Shuffle and limit questions
-    const shuffledQuestions = questions.sort(() => 0.5 - Math.random()).slice(0, parseInt(count));
+    // Shuffle a copy and limit questions (sorting in place would reorder the shared cache)
+    const shuffledQuestions = [...questions].sort(() => 0.5 - Math.random()).slice(0, parseInt(count));
 
     // Remove correct_answer and explanation from response (sent after submission)
-    const responseQuestions = shuffledQuestions.map((q, index) => ({
-      id: index + 1,
+    const responseQuestions = shuffledQuestions.map(q => ({
+      id: q.id,
       question: q.question,
       options: {
         A: q.option_a,
@@ -118,24 +120,32 @@ exports.submitQuiz = async (req, res) => {
       });
     }
 
+    // Answers name their question by id; the client may have been sent any shuffled subset.
+    // Unknown ids are ignored and a repeated id counts once (its last answer), so the
+    // score can never exceed the number of questions
+    const questionsById = new Map(questions.map(q => [q.id, q]));
+    const lastAnswerById = new Map();
+    answers.forEach(ans => {
+      const questionId = Number(ans && ans.questionId);
+      if (questionsById.has(questionId)) lastAnswerById.set(questionId, ans);
+    });
+    const answered = [...lastAnswerById].map(([questionId, ans]) => ({ ans, question: questionsById.get(questionId) }));
+
     // Calculate score
     let correctAnswers = 0;
-    const results = answers.map((ans, index) => {
-      const question = questions[index];
-      if (!question) return null;
-
+    const results = answered.map(({ ans, question }) => {
       const isCorrect = ans.answer === question.correct_answer;
       if (isCorrect) correctAnswers++;
 
       return {
-        questionId: ans.questionId || index + 1,
+        questionId: question.id,
         question: question.question,
         userAnswer: ans.answer,
         correctAnswer: question.correct_answer,
         isCorrect,
         explanation: question.explanation
       };
-    }).filter(r => r !== null);
+    });
 
     const scorePercentage = (correctAnswers / questions.length) * 100;
     const passed = scorePercentage >= 60;
@@ -145,12 +155,25 @@ exports.submitQuiz = async (req, res) => {
       // Get subject name from quizzes data for display
       const subjectName = quizzesData.quizzes.find(q => q.subjectCode === subjectCode)?.subjectName || subjectCode;
       
-      await db.query(
+      const [attempt] = await db.query(
         `INSERT INTO quiz_attempts 
         (user_id, subject_code, subject_name, total_questions, correct_answers, score_percentage, time_taken_seconds) 
         VALUES (?, ?, ?, ?, ?, ?, ?)`,
         [userId, subjectCode, subjectName, questions.length, correctAnswers, scorePercentage, timeSpent || 0]
       );
+
+      // Per-question results feed question calibration (ml_analysis/quiz_irt.py)
+      const responseRows = answered.map(({ ans, question }) =>
+        [attempt.insertId, userId, subjectCode, question.id, ans.answer === question.correct_answer]
+      );
+      if (responseRows.length > 0) {
+        await db.query(
+          `INSERT INTO quiz_responses 
+          (attempt_id, user_id, subject_code, question_id, is_correct) 
+          VALUES ?`,
+          [responseRows]
+        );
+      }
     } catch (dbError) {
       console.error('Error saving quiz attempt:', dbError);
       // Continue even if DB save fails
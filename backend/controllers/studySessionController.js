@@ -308,7 +308,9 @@ exports.stopStudySession = async (req, res) => {
       [finalDurationSeconds, completionPercentage, notes || null, sessionId]
     );
 
-    // Update study statistics
+    // Update study statistics (MySQL applies these assignments left to right, so the
+    // average sees the already-incremented totals; ml_analysis/study_rollups.py
+    // recomputes the table in bulk)
     const studyMinutes = Math.floor(finalDurationSeconds / 60);
     const statDate = new Date().toISOString().split('T')[0];
 
@@ -320,12 +322,12 @@ exports.stopStudySession = async (req, res) => {
        total_study_minutes = total_study_minutes + ?,
        total_sessions = total_sessions + 1,
        completed_sessions = completed_sessions + 1,
-       average_session_minutes = (total_study_minutes + ?) / (total_sessions + 1),
+       average_session_minutes = total_study_minutes / total_sessions,
        total_pauses = total_pauses + ?`,
       [
         session.user_id, session.profile_id, session.subject_id, statDate, 
         studyMinutes, studyMinutes, session.pause_count,
-        studyMinutes, studyMinutes, session.pause_count
+        studyMinutes, session.pause_count
       ]
     );
 
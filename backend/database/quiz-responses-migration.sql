@@ -0,0 +1,22 @@
+-- Quiz Responses Table Migration
+-- Per-question results of each quiz attempt, used to calibrate question
+-- difficulty and student ability (ml_analysis/quiz_irt.py)
+
+-- Create quiz_responses table
+CREATE TABLE IF NOT EXISTS quiz_responses (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  attempt_id INT NOT NULL,
+  user_id INT NOT NULL,
+  subject_code VARCHAR(20) NOT NULL,
+  question_id INT NOT NULL,
+  is_correct BOOLEAN NOT NULL,
+  answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  -- Indexes for incremental export and per-question analysis
+  INDEX idx_attempt (attempt_id),
+  INDEX idx_subject_question (subject_code, question_id),
+  INDEX idx_answered_at (answered_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify table creation
+SELECT 'quiz_responses table created successfully!' as status;
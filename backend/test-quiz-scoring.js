@@ -0,0 +1,71 @@
+/**
+ * Test Quiz Scoring
+ * Runs submitQuiz against a stubbed database (no MySQL needed):
+ *   node test-quiz-scoring.js
+ */
+
+const assert = require('assert');
+const path = require('path');
+
+// Stub the MySQL pool before the controller loads it
+const dbPath = require.resolve('./config/db');
+const savedResponses = [];
+require.cache[dbPath] = {
+  id: dbPath,
+  filename: dbPath,
+  loaded: true,
+  exports: {
+    query: async (sql, params) => {
+      if (sql.includes('quiz_responses')) savedResponses.push(...params[0]);
+      return [{ insertId: 1 }];
+    }
+  }
+};
+
+const quizController = require(path.join(__dirname, 'controllers/quizController'));
+const quizzes = require('./data/quizzes.json').quizzes;
+
+function mockResponse() {
+  const res = { statusCode: 200 };
+  res.status = code => { res.statusCode = code; return res; };
+  res.json = body => { res.body = body; return res; };
+  return res;
+}
+
+async function testDuplicateAnswersCountOnce() {
+  console.log('1️⃣ Testing repeated and unknown question ids...');
+  const quiz = quizzes[0];
+  const first = quiz.questions[0];
+  const second = quiz.questions[1];
+  const right = ['A', 'B', 'C', 'D'][first.correctAnswer];
+  const wrong = ['A', 'B', 'C', 'D'][(second.correctAnswer + 1) % 4];
+
+  const res = mockResponse();
+  await quizController.submitQuiz({
+    params: { userId: 1, subjectCode: quiz.subjectCode },
+    body: {
+      answers: [
+        { questionId: first.id, answer: right },
+        { questionId: first.id, answer: right },
+        { questionId: first.id, answer: right },
+        { questionId: second.id, answer: ['A', 'B', 'C', 'D'][second.correctAnswer] },
+        { questionId: second.id, answer: wrong }, // last answer wins
+        { questionId: 9999, answer: 'A' }
+      ],
+      timeSpent: 30
+    }
+  }, res);
+
+  assert.strictEqual(res.statusCode, 200);
+  assert.strictEqual(res.body.score.correctAnswers, 1);
+  assert.deepStrictEqual(res.body.results.map(r => [r.questionId, r.isCorrect]), [[first.id, true], [second.id, false]]);
+  assert.deepStrictEqual(savedResponses.map(row => row[3]), [first.id, second.id]);
+  console.log('   ✅ Each question is scored once\n');
+}
+
+testDuplicateAnswersCountOnce()
+  .then(() => console.log('✅ Quiz scoring tests passed!'))
+  .catch(error => {
+    console.error('❌ Quiz scoring test failed:', error);
+    process.exit(1);
+  });
@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Analysis Core
+========================
+
+Stateless analysis API: pure functions over an immutable ``UsageDataset``.
+
+- ``parse_usage_csv`` / ``dataset_from_frame`` validate and type the app's CSV
+  once; the dataset is never modified afterwards (derived values such as
+  ``screenTimeHours`` are computed at construction)
+- ``analyze(dataset, forecaster, now)`` returns the same dict as
+  ``HabitGuardMLAnalyzer.analyze_patterns``; given the same inputs and ``now``
+  it always returns the same result (per-request models use fixed seeds)
+- ``AnalysisService`` is one warm, thread-safe instance holding only shared
+  read-only artifacts (the published fleet forecaster), so a server thread
+  pool can call it concurrently without building an analyzer per request
+
+No function here touches global warning filters; inputs are shaped so that
+numpy/sklearn have nothing to warn about.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from io import StringIO
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from sklearn.linear_model import LinearRegression
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error, r2_score
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+from anomaly_detection import summarize_user_anomalies
+from behavior_rules import consistency_score, get_rules
+from fleet_distribution import load_distribution
+from fleet_forecaster import MODEL_NAME as FLEET_MODEL_NAME, load_latest as load_fleet_forecaster
+from forecast_features import build_features
+from goal_simulator import goal_outlook, residual_blocks, series_residual_blocks
+from streak_engine import goal_adherence
+
+# Bump whenever analyze() output changes so cached results are invalidated
+ANALYZER_VERSION = "1.8.0"
+
+REQUIRED_COLUMNS = ['date', 'totalScreenTime', 'appCount', 'dayOfWeek', 'isWeekend']
+MS_PER_HOUR = 1000 * 60 * 60
+# Days of daily history kept in the plotted series
+CHART_DAYS = 90
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+
+@dataclass(frozen=True)
+class UsageDataset:
+    """Validated, typed usage rows; treat ``df`` as read-only"""
+    df: pd.DataFrame
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def hours(self) -> pd.Series:
+        return self.df['screenTimeHours']
+
+
+def dataset_from_frame(df: pd.DataFrame) -> UsageDataset:
+    """
+    Validate and type a raw usage frame (the input is not modified)
+
+    Raises:
+        ValueError: required columns are missing
+    """
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    data = df.copy()
+    data['date'] = pd.to_datetime(data['date'])
+    data['totalScreenTime'] = pd.to_numeric(data['totalScreenTime'], errors='coerce')
+    data['appCount'] = pd.to_numeric(data['appCount'], errors='coerce')
+    data['isWeekend'] = data['isWeekend'].astype(bool)
+
+    # Remove rows with invalid data
+    data = data.dropna(subset=['totalScreenTime', 'appCount'])
+    data['screenTimeHours'] = data['totalScreenTime'] / MS_PER_HOUR
+    return UsageDataset(df=data)
+
+
+def parse_usage_csv(csv_content: Optional[str] = None, csv_file: Optional[str] = None) -> UsageDataset:
+    """
+    Parse the app's CSV from a string or a file
+
+    Raises:
+        ValueError: no usable input or missing columns
+    """
+    if csv_content:
+        raw = pd.read_csv(StringIO(csv_content))
+    elif csv_file and os.path.exists(csv_file):
+        raw = pd.read_csv(csv_file)
+    else:
+        raise ValueError("No valid CSV data provided")
+    return dataset_from_frame(raw)
+
+
+# ----------------------------------------------------------------------
+# Analysis stages
+# ----------------------------------------------------------------------
+
+def summarize(dataset: UsageDataset) -> Dict:
+    hours = dataset.hours
+    return {
+        "totalDays": len(dataset),
+        "avgDailyScreenTime": float(hours.mean()),
+        "maxDailyScreenTime": float(hours.max()),
+        "minDailyScreenTime": float(hours.min()),
+        "avgAppsPerDay": float(dataset.df['appCount'].mean()),
+        "totalScreenTimeHours": float(hours.sum())
+    }
+
+
+def weekday_vs_weekend(dataset: UsageDataset) -> Dict:
+    weekend = dataset.df['isWeekend'].to_numpy()
+    hours = dataset.hours.to_numpy()
+    return {
+        "weekday": float(hours[~weekend].mean()) if (~weekend).any() else float('nan'),
+        "weekend": float(hours[weekend].mean()) if weekend.any() else float('nan')
+    }
+
+
+def daily_averages(dataset: UsageDataset) -> Dict[str, float]:
+    """Average hours per day of week (the app's dayOfWeek, Sunday = 0)"""
+    means = dataset.hours.groupby(dataset.df['dayOfWeek']).mean()
+    return {DAY_NAMES[day]: float(means[day]) for day in range(7) if day in means.index}
+
+
+def chart_series(dataset: UsageDataset, days: int = CHART_DAYS) -> Dict:
+    """
+    Series plotted in report charts, rounded so equal data hashes equally
+
+    Returns:
+        dict with "daily" ({"dates", "hours"} for the last `days` days) and,
+        when rows carry an hour, "hourly" (7x24 average hours, Sunday first)
+    """
+    df = dataset.df
+    daily = dataset.hours.groupby(df['date'].dt.normalize()).sum().sort_index().iloc[-days:]
+    series = {
+        "daily": {
+            "dates": [day.strftime('%Y-%m-%d') for day in daily.index],
+            "hours": np.round(daily.to_numpy(), 3).tolist()
+        }
+    }
+
+    if 'hour' in df.columns:
+        hour = pd.to_numeric(df['hour'], errors='coerce').to_numpy()
+        day = pd.to_numeric(df['dayOfWeek'], errors='coerce').to_numpy()
+        valid = (hour >= 0) & (hour < 24) & (day >= 0) & (day < 7)
+        if valid.any():
+            grid = np.zeros((7, 24))
+            np.add.at(grid, (day[valid].astype(int), hour[valid].astype(int)), dataset.hours.to_numpy()[valid])
+            # Average over the number of each weekday seen, not over the rows in a cell
+            weeks = df.loc[valid, 'date'].dt.normalize().groupby(day[valid].astype(int)).nunique()
+            per_day = np.ones(7)
+            per_day[weeks.index.to_numpy()] = weeks.to_numpy()
+            series["hourly"] = np.round(grid / per_day[:, None], 3).tolist()
+    return series
+
+
+def calculate_risk_level(avg_hours: float, consistency: float) -> str:
+    """Calculate overall risk level for mental health impact (see behavior_rules.json)"""
+    # Risk scoring based on research:
+    # - >6h daily associated with depression/anxiety
+    # - High inconsistency indicates compulsive behavior
+    # - Combined factors increase risk
+    return str(get_rules().risk_level(avg_hours, consistency))
+
+
+def calculate_trends(dataset: UsageDataset) -> Dict:
+    """Calculate usage trends over time"""
+    try:
+        if len(dataset) < 3:
+            return {"trend": "insufficient_data"}
+
+        # Sorted view; rolling/EWMA levels come from the shared feature engine
+        df_sorted = dataset.df.sort_values('date')
+        levels = build_features(df_sorted.drop(columns=['userId'], errors='ignore'), 'screenTimeHours',
+                                lags=(), windows=(7,), spans=(7,)).iloc[-1]
+
+        # Calculate trend (simple linear regression on time)
+        x = np.arange(len(df_sorted)).reshape(-1, 1)
+        y = df_sorted['screenTimeHours'].to_numpy()
+
+        if SKLEARN_AVAILABLE:
+            slope = LinearRegression().fit(x, y).coef_[0]
+
+            if slope > 0.1:
+                trend = "increasing"
+            elif slope < -0.1:
+                trend = "decreasing"
+            else:
+                trend = "stable"
+        else:
+            # Simple trend calculation without sklearn
+            first_half = y[:len(y) // 2].mean()
+            second_half = y[len(y) // 2:].mean()
+
+            if second_half > first_half * 1.1:
+                trend = "increasing"
+            elif second_half < first_half * 0.9:
+                trend = "decreasing"
+            else:
+                trend = "stable"
+
+        return {
+            "trend": trend,
+            "recent_avg": float(levels['roll_mean_7']),
+            "overall_avg": float(levels['expanding_mean'])
+        }
+
+    except Exception as e:
+        return {"trend": "error", "message": str(e)}
+
+
+def detect_anomalies(dataset: UsageDataset) -> Dict:
+    """Flag abnormal (binge/low) days and usage regime shifts"""
+    try:
+        return summarize_user_anomalies(dataset.df)
+    except Exception as e:
+        return {"error": f"Anomaly detection failed: {e}"}
+
+
+def classify_behavior(dataset: UsageDataset) -> Dict:
+    """Classify user behavior pattern with detailed insights"""
+    if len(dataset) == 0:
+        return {"category": "unknown", "severity": "low", "action": "insufficient_data"}
+
+    hours = dataset.hours
+    avg_hours = float(hours.mean())
+    max_hours = float(hours.max())
+
+    # Calculate consistency score (lower is better)
+    consistency = float(consistency_score(avg_hours, hours.std()))
+
+    labels = get_rules().classify(avg_hours, consistency)
+    return {
+        "category": str(labels["category"]),
+        "severity": str(labels["severity"]),
+        "action": str(labels["action"]),
+        "message": str(labels["message"]),
+        "avg_hours": avg_hours,
+        "max_hours": max_hours,
+        "consistency_score": consistency,
+        "risk_level": str(labels["risk_level"])
+    }
+
+
+def _accuracy_label(r2: float) -> str:
+    return "good" if r2 > 0.5 else "fair" if r2 > 0.2 else "poor"
+
+
+def _future_days(now: datetime) -> List[Dict]:
+    days = []
+    for i in range(7):
+        future_date = now + timedelta(days=i)
+        day_of_week = (future_date.weekday() + 1) % 7  # Sunday = 0
+        days.append({
+            "date": future_date,
+            "dayOfWeek": day_of_week,
+            "isWeekend": day_of_week in [0, 6]
+        })
+    return days
+
+
+def _prediction_rows(days: List[Dict], hours) -> List[Dict]:
+    return [{
+        "date": day["date"].strftime("%Y-%m-%d"),
+        "dayOfWeek": day["dayOfWeek"],
+        "predictedScreenTimeHours": float(max(0, prediction)),
+        "isWeekend": day["isWeekend"]
+    } for day, prediction in zip(days, hours)]
+
+
+def _user_goal_minutes(dataset: UsageDataset, goal_minutes: Optional[float]) -> Optional[float]:
+    """Explicit goal, else the user's latest dailyGoalMinutes, else None"""
+    if goal_minutes is not None or 'dailyGoalMinutes' not in dataset.df.columns:
+        return goal_minutes
+    goals = pd.to_numeric(dataset.df['dailyGoalMinutes'], errors='coerce').dropna()
+    return float(goals.iloc[-1]) if len(goals) else None
+
+
+def _outlook(future_predictions: List[Dict], blocks: np.ndarray, goal_minutes: Optional[float]) -> Dict:
+    return goal_outlook([p["predictedScreenTimeHours"] for p in future_predictions],
+                        [p["date"] for p in future_predictions], blocks, goal_minutes)
+
+
+def fleet_predictions(dataset: UsageDataset, forecaster, now: datetime,
+                      goal_minutes: Optional[float] = None) -> Dict:
+    """7-day forecast from the pretrained fleet model: feature computation and one predict"""
+    days = _future_days(now)
+    hours = forecaster.forecast(dataset.df, [day["date"].date() for day in days])
+    future_predictions = _prediction_rows(days, hours)
+    # Backtests on the user's own history give the residuals for the goal outlook
+    blocks = residual_blocks(*forecaster.backtest_residuals(dataset.df), days[0]["dayOfWeek"])
+
+    # Accuracy is measured offline on the fleet holdout, not on this user's few rows
+    r2 = forecaster.metrics.get('r2_score', 0.0)
+    return {
+        "model_performance": {
+            "mean_absolute_error_hours": float(forecaster.metrics.get('mean_absolute_error_hours', 0.0)),
+            "r2_score": float(r2),
+            "accuracy": _accuracy_label(r2)
+        },
+        "model": FLEET_MODEL_NAME,
+        "next_7_days": future_predictions,
+        "weekly_prediction": float(sum(p["predictedScreenTimeHours"] for p in future_predictions)),
+        "goal_outlook": _outlook(future_predictions, blocks, goal_minutes)
+    }
+
+
+def forest_predictions(dataset: UsageDataset, now: datetime, goal_minutes: Optional[float] = None) -> Dict:
+    """Fallback: fit a small forest on this user's rows (local, seeded models only)"""
+    df = dataset.df
+    X = np.column_stack([
+        df['dayOfWeek'].to_numpy(dtype=float),
+        df['appCount'].to_numpy(dtype=float),
+        df['isWeekend'].to_numpy(dtype=float),
+        (df['date'] - df['date'].min()).dt.days.to_numpy(dtype=float),
+    ])
+    y = dataset.hours.to_numpy()
+    rows = np.arange(len(X))
+
+    # Split data
+    if len(X) >= 10:
+        X_train, X_test, y_train, y_test, rows_train, rows_test = train_test_split(
+            X, y, rows, test_size=0.3, random_state=42)
+    else:
+        X_train, X_test, y_train, y_test, rows_train, rows_test = X, X, y, y, rows, rows[:0]
+
+    scaler = StandardScaler()
+    # Out-of-bag predictions give honest residuals for the training rows (the fit itself is unchanged)
+    model = RandomForestRegressor(n_estimators=100, random_state=42, oob_score=True)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    y_pred = model.predict(scaler.transform(X_test))
+
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    # Predict next 7 days in one batch
+    days = _future_days(now)
+    start = df['date'].min().date()
+    future_X = np.array([
+        [day["dayOfWeek"], df['appCount'].mean(), int(day["isWeekend"]), (day["date"].date() - start).days]
+        for day in days
+    ], dtype=float)
+    future_predictions = _prediction_rows(days, model.predict(scaler.transform(future_X)))
+
+    # Goal outlook residuals: out-of-bag errors, plus the held-out errors when there was a split
+    residual_rows, residuals = rows_train, y_train - model.oob_prediction_
+    if len(rows_test):
+        residual_rows = np.concatenate([rows_train, rows_test])
+        residuals = np.concatenate([residuals, y_test - y_pred])
+    blocks = series_residual_blocks(df['date'].to_numpy()[residual_rows], residuals, days[0]["dayOfWeek"])
+
+    return {
+        "model_performance": {
+            "mean_absolute_error_hours": float(mae),
+            "r2_score": float(r2),
+            "accuracy": _accuracy_label(r2)
+        },
+        "next_7_days": future_predictions,
+        "weekly_prediction": float(sum(p["predictedScreenTimeHours"] for p in future_predictions)),
+        "goal_outlook": _outlook(future_predictions, blocks, goal_minutes)
+    }
+
+
+def generate_predictions(dataset: UsageDataset, forecaster=None, now: Optional[datetime] = None,
+                         goal_minutes: Optional[float] = None) -> Dict:
+    """
+    Generate ML-based predictions (fleet model when given, else a per-request forest)
+
+    The "goal_outlook" entry simulates next week from the model's residuals on
+    this user's history (goal_simulator.py) for the goal ladder plus the
+    user's own goal
+    """
+    if not SKLEARN_AVAILABLE or len(dataset) < 7:
+        return {"error": "Insufficient data or ML libraries not available"}
+    now = now or datetime.now()
+    goal_minutes = _user_goal_minutes(dataset, goal_minutes)
+
+    if forecaster is not None:
+        try:
+            return fleet_predictions(dataset, forecaster, now, goal_minutes)
+        except Exception as e:
+            print(f"⚠️ Fleet forecast failed, training per-request model: {e}")
+
+    try:
+        return forest_predictions(dataset, now, goal_minutes)
+    except Exception as e:
+        return {"error": f"Prediction failed: {e}"}
+
+
+def generate_recommendations(analysis: Dict) -> List[str]:
+    """Generate personalized recommendations"""
+    recommendations = []
+
+    try:
+        if "summary" not in analysis:
+            return ["Unable to generate recommendations due to insufficient data"]
+
+        behavior = analysis["patterns"]["behaviorClassification"]["category"]
+
+        # General recommendations based on usage level
+        if behavior in ("excessive_user", "very_heavy_user"):
+            recommendations.extend([
+                "🚨 Your screen time is very high. Consider setting app time limits.",
+                "📱 Try the 20-20-20 rule: Every 20 minutes, look at something 20 feet away for 20 seconds.",
+                "🛌 Establish a phone-free bedtime routine to improve sleep quality.",
+                "🎯 Set a daily screen time goal and track your progress."
+            ])
+        elif behavior == "heavy_user":
+            recommendations.extend([
+                "⚠️ Your screen time is above average. Consider reducing by 30 minutes daily.",
+                "📵 Try implementing 'phone-free' periods during meals and family time.",
+                "🔔 Review your notification settings to reduce unnecessary interruptions."
+            ])
+        elif behavior == "moderate_user":
+            recommendations.extend([
+                "✅ Your usage is moderate. Focus on mindful usage quality over quantity.",
+                "🎯 Try batching similar activities to reduce context switching.",
+                "⏰ Use focus modes during work or study periods."
+            ])
+        else:  # light_user
+            recommendations.extend([
+                "🌟 Great job maintaining low screen time!",
+                "📚 Consider using your extra time for offline activities you enjoy.",
+                "👥 Share your digital wellness tips with friends and family."
+            ])
+
+        # Weekend vs weekday recommendations
+        if "weekdayVsWeekend" in analysis["patterns"]:
+            weekend_avg = analysis["patterns"]["weekdayVsWeekend"]["weekend"]
+            weekday_avg = analysis["patterns"]["weekdayVsWeekend"]["weekday"]
+
+            if weekend_avg > weekday_avg * 1.5:
+                recommendations.append(
+                    "📅 Your weekend usage is significantly higher. Plan offline weekend activities."
+                )
+            elif weekday_avg > weekend_avg * 1.5:
+                recommendations.append(
+                    "💼 High weekday usage detected. Consider work-life balance and productivity apps."
+                )
+
+        # Trend-based recommendations
+        if "trends" in analysis["patterns"]:
+            trend = analysis["patterns"]["trends"]["trend"]
+            if trend == "increasing":
+                recommendations.append(
+                    "📈 Your usage is trending upward. Now might be a good time to set boundaries."
+                )
+            elif trend == "decreasing":
+                recommendations.append(
+                    "📉 Great progress! Your usage is decreasing. Keep up the good habits."
+                )
+
+        return recommendations[:6]  # Limit to 6 recommendations
+
+    except Exception as e:
+        return [f"Error generating recommendations: {e}"]
+
+
+def analyze(dataset: UsageDataset, forecaster=None, now: Optional[datetime] = None,
+            goal_minutes: Optional[float] = None, distribution=None) -> Dict:
+    """
+    Full pattern analysis of one user's dataset
+
+    Args:
+        dataset: Parsed usage (never modified)
+        forecaster: Optional shared, read-only FleetForecaster
+        now: Reference time for forecasts and current streaks (default: current time)
+        goal_minutes: Daily screen-time goal; streaks are reported when this or a
+            dailyGoalMinutes column is present
+        distribution: Optional shared FleetDistribution for peer percentiles
+
+    Returns:
+        dict with summary, patterns, predictions, recommendations and chart series,
+        or {"error": ...}
+    """
+    if dataset is None or len(dataset) == 0:
+        return {"error": "No data available for analysis"}
+
+    try:
+        analysis = {
+            "summary": summarize(dataset),
+            "patterns": {
+                "weekdayVsWeekend": weekday_vs_weekend(dataset),
+                "dailyAverages": daily_averages(dataset),
+                "trends": calculate_trends(dataset),
+                "behaviorClassification": classify_behavior(dataset),
+                "anomalies": detect_anomalies(dataset)
+            },
+            "predictions": {},
+            "recommendations": [],
+            "series": chart_series(dataset)
+        }
+
+        if goal_minutes is not None or 'dailyGoalMinutes' in dataset.df.columns:
+            analysis["patterns"]["goalAdherence"] = goal_adherence(
+                dataset.df, goal_minutes, as_of=(now or datetime.now()).date())
+
+        if distribution is not None:
+            analysis["patterns"]["fleetPercentiles"] = distribution.user_percentiles(dataset.df)
+
+        # Generate ML predictions if possible
+        if SKLEARN_AVAILABLE and len(dataset) >= 7:
+            analysis["predictions"] = generate_predictions(dataset, forecaster, now, goal_minutes)
+
+        analysis["recommendations"] = generate_recommendations(analysis)
+        return analysis
+
+    except Exception as e:
+        return {"error": f"Analysis failed: {e}"}
+
+
+class AnalysisService:
+    """Warm, thread-safe analyzer holding only shared read-only artifacts"""
+
+    def __init__(self, registry=None, models_dir: str = 'models'):
+        # Optional ModelRegistry holding the fleet forecaster; otherwise the newest one in models_dir
+        self.registry = registry
+        self.models_dir = models_dir
+
+    def forecaster(self) -> Any:
+        """Current fleet forecaster, if one is published (shared, never mutated)"""
+        try:
+            if self.registry is not None:
+                return self.registry.get_model(FLEET_MODEL_NAME)
+            return load_fleet_forecaster(self.models_dir)
+        except Exception as e:
+            print(f"⚠️ Could not load fleet forecaster, training per-request model: {e}")
+            return None
+
+    def distribution(self) -> Any:
+        """Published fleet screen-time distribution, if any (shared, read-only)"""
+        try:
+            return load_distribution(self.models_dir)
+        except Exception as e:
+            print(f"⚠️ Could not load fleet distribution: {e}")
+            return None
+
+    def analyze(self, dataset: UsageDataset, now: Optional[datetime] = None,
+                goal_minutes: Optional[float] = None) -> Dict:
+        return analyze(dataset, self.forecaster(), now, goal_minutes, self.distribution())
+
+    def analyze_csv(self, csv_content: str, now: Optional[datetime] = None,
+                    goal_minutes: Optional[float] = None) -> Dict:
+        """Parse and analyze raw CSV content"""
+        try:
+            dataset = parse_usage_csv(csv_content=csv_content)
+        except Exception:
+            return {"error": "Failed to load CSV data"}
+        return self.analyze(dataset, now, goal_minutes)
+
+
+_default_service: Optional[AnalysisService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_default_service() -> AnalysisService:
+    """Process-wide warm analysis service"""
+    global _default_service
+    if _default_service is None:
+        with _default_service_lock:
+            if _default_service is None:
+                _default_service = AnalysisService()
+    return _default_service
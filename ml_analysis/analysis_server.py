@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Analysis Server
+==========================
+
+Resident asyncio service for the app's ``/analyze`` calls.
+
+Parsing, cache lookups and response streaming stay on the event loop; the
+CPU-bound stages (pandas parsing, ``analyze_patterns``, model fitting, report
+layout) are dispatched to a process or thread pool.
+
+- Backpressure: CPU jobs (analysis and report rendering) go through a bounded queue drained by one dispatcher
+  per pool worker; when the queue is full the request gets ``429`` at once
+- Deadlines: every request has a deadline; jobs that expire while queued are
+  dropped without running and the client gets ``504``
+- Cancellation: a request that times out cancels its queued job
+- Identical CSV bodies share one computation and hit ``AnalysisResultCache``
+
+Endpoints:
+    POST /analyze              CSV body (or the app's {"csvData": ...} JSON)
+                               -> analysis JSON (gzip/br if accepted)
+    POST /report?format=pdf    CSV body -> streamed PDF/TXT report
+    POST /ingest[?analyze=1]   {"userId": ..., "watermark": ..., "csvData": rows on or
+                                after the watermark} -> merged into the stored
+                                history; new watermark (+ analysis of the stored
+                                window with analyze=1)
+    POST /recommendations      {"weakSubjects": [...] or {code: weakness},
+                                "studyHoursPerWeek": 6, "k": 5} -> top-k courses
+    GET  /health               queue, request and cache metrics
+
+Usage:
+    python analysis_server.py --port 8765 --workers 4 --queue 64 --timeout 30
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from course_recommender import CourseRecommender, get_default_recommender
+from report_charts import warm_chart_backend
+from report_renderer import DEFAULT_CHUNK_SIZE, PDF_AVAILABLE, REPORT_FORMATS, render_report_bytes
+from result_cache import AnalysisResultCache, analyze_csv
+from serialization import choose_encoding, compress, dumps, loads, DEFAULT_MIN_COMPRESS_SIZE
+from shared_artifacts import attach_worker_artifacts
+from usage_history import DEFAULT_HISTORY_PATH, UsageHistoryStore
+
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_BODY_BYTES = 16 * 1024 * 1024
+HEADER_TIMEOUT = 10.0
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    408: 'Request Timeout',
+    413: 'Payload Too Large',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+REPORT_CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'txt': 'text/plain; charset=utf-8',
+}
+
+
+def _init_worker(artifacts_path: Optional[str] = None) -> None:
+    """Pool initializer: load the analysis stack and chart backend once per worker, not on the first request"""
+    import usage_predictor  # noqa: F401
+    warm_chart_backend()
+    if artifacts_path:
+        # Every worker maps the same file, so model weights and tables are shared, not copied
+        attach_worker_artifacts(artifacts_path)
+
+
+class Overloaded(Exception):
+    """Raised when the CPU job queue is full"""
+
+
+class JobDeadline:
+    """Loop-time deadline of a CPU job; requests that join a shared job extend it"""
+
+    def __init__(self, at: float):
+        self.at = at
+
+    def extend(self, at: float) -> None:
+        self.at = max(self.at, at)
+
+
+class StreamAborted(Exception):
+    """Failure after the response headers went out: the connection is closed, no new response"""
+
+
+class HttpError(Exception):
+    """Request that should be answered with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class AnalysisServer:
+    """asyncio HTTP front end with a bounded CPU job queue"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 workers: Optional[int] = None, max_queue: int = DEFAULT_QUEUE_SIZE,
+                 request_timeout: float = DEFAULT_TIMEOUT, use_processes: bool = True,
+                 cache: Optional[AnalysisResultCache] = None,
+                 compute: Callable[[str], Dict] = analyze_csv,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                 artifacts_path: Optional[str] = None,
+                 recommender: Optional[CourseRecommender] = None,
+                 history: Optional[UsageHistoryStore] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        self.use_processes = use_processes
+        self.cache = cache or AnalysisResultCache()
+        self.compute = compute
+        self.max_body_bytes = max_body_bytes
+        self.artifacts_path = artifacts_path
+        # Course index is tiny and queries take microseconds, so it is served on the event loop
+        self.recommender = recommender
+        # Per-user history for delta uploads (in memory unless a store is passed in)
+        self.history = history if history is not None else UsageHistoryStore()
+
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._inflight: Dict[str, Tuple[asyncio.Future, JobDeadline]] = {}
+        self._metrics = {
+            'requests': 0,
+            'completed': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'expired_in_queue': 0,
+            'errors': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> 'AnalysisServer':
+        """Start the pool, the dispatchers and the listening socket"""
+        if self.use_processes:
+            # spawn, not fork: forking after numpy/sklearn started native threads can deadlock workers
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker,
+                                                 initargs=(self.artifacts_path,))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='habitguard-cpu')
+            if self.artifacts_path:
+                attach_worker_artifacts(self.artifacts_path)
+        if self.recommender is None:
+            try:
+                self.recommender = get_default_recommender()
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Course recommendations unavailable: {e}")
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._dispatchers = [asyncio.ensure_future(self._dispatch()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        """Stop accepting connections and shut the pool down"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"🚀 HabitGuard analysis server on http://{self.host}:{self.port} "
+              f"({self.workers} {'processes' if self.use_processes else 'threads'}, queue {self.max_queue})")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def stats(self) -> Dict:
+        """Request counters, queue depth and cache metrics"""
+        metrics = dict(self._metrics)
+        metrics['queued'] = self._queue.qsize() if self._queue is not None else 0
+        metrics['max_queue'] = self.max_queue
+        metrics['workers'] = self.workers
+        metrics['cache'] = self.cache.stats()
+        return metrics
+
+    # ------------------------------------------------------------------
+    # CPU job queue
+    # ------------------------------------------------------------------
+
+    async def _dispatch(self) -> None:
+        """Feed queued jobs to the pool, one at a time per pool worker"""
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline, future, fn, args = await self._queue.get()
+            try:
+                if future.done():
+                    # Caller gave up (timeout or disconnect) while the job was queued
+                    continue
+                if loop.time() >= deadline.at:
+                    self._metrics['expired_in_queue'] += 1
+                    future.cancel()
+                    continue
+                try:
+                    result = await loop.run_in_executor(self._executor, fn, *args)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def run_cpu(self, fn: Callable, *args, deadline: Union[float, JobDeadline]) -> Any:
+        """
+        Run fn(*args) in the pool before the loop-time deadline
+
+        A JobDeadline may be extended while the job waits or runs.
+
+        Raises:
+            Overloaded: the job queue is full
+            asyncio.TimeoutError: the deadline passed (the queued job is cancelled)
+        """
+        loop = asyncio.get_running_loop()
+        if not isinstance(deadline, JobDeadline):
+            deadline = JobDeadline(deadline)
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((deadline, future, fn, args))
+        except asyncio.QueueFull:
+            raise Overloaded()
+        try:
+            # Wake up at the deadline, then re-check it: a later waiter may have extended it
+            while not future.done():
+                remaining = deadline.at - loop.time()
+                if remaining <= 0:
+                    future.cancel()
+                    raise asyncio.TimeoutError()
+                await asyncio.wait({future}, timeout=remaining)
+            return future.result()
+        except asyncio.CancelledError:
+            # Expired in the queue, or this request itself was cancelled
+            future.cancel()
+            if loop.time() >= deadline.at:
+                raise asyncio.TimeoutError()
+            raise
+
+    # ------------------------------------------------------------------
+    # Pipeline stages
+    # ------------------------------------------------------------------
+
+    async def analyze(self, csv_content: bytes, deadline: float) -> Tuple[Dict, bytes]:
+        """Return (result, JSON body): cache hit, shared in-flight computation, or a new job"""
+        key = self.cache.key_for(csv_content)
+        entry = self.cache.get_entry(key)
+        if entry is not None:
+            return entry
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            job_deadline = JobDeadline(deadline)
+            task = asyncio.ensure_future(self._compute(key, csv_content, job_deadline))
+            self._inflight[key] = (task, job_deadline)
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            task, job_deadline = inflight
+            # The shared job runs until its last waiter's deadline, not the first one's
+            job_deadline.extend(deadline)
+        loop = asyncio.get_running_loop()
+        # shield: one waiter timing out must not cancel the job for the others
+        return await asyncio.wait_for(asyncio.shield(task), timeout=max(deadline - loop.time(), 0))
+
+    async def _compute(self, key: str, csv_content: bytes, deadline: JobDeadline) -> Tuple[Dict, bytes]:
+        try:
+            csv_text = csv_content.decode('utf-8')
+        except UnicodeDecodeError:
+            raise HttpError(400, 'CSV body must be UTF-8')
+        result = await self.run_cpu(self.compute, csv_text, deadline=deadline)
+        if "error" in result:
+            return result, dumps(result)
+        loop = asyncio.get_running_loop()
+        # Serialization and the optional disk tier write stay off the loop
+        body = await loop.run_in_executor(None, self.cache.put, key, result)
+        return result, body
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        self._metrics['requests'] += 1
+        try:
+            method, path, query, headers, body = await self._read_request(reader, deadline)
+            await self._route(method, path, query, headers, body, writer, deadline)
+            self._metrics['completed'] += 1
+        except HttpError as e:
+            await self._send_error(writer, e.status, e.message)
+        except Overloaded:
+            self._metrics['rejected'] += 1
+            await self._send_error(writer, 429, 'Server busy, retry shortly', {'Retry-After': '1'})
+        except asyncio.TimeoutError:
+            self._metrics['timeouts'] += 1
+            await self._send_error(writer, 504, 'Analysis deadline exceeded')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except StreamAborted:
+            self._metrics['errors'] += 1
+        except Exception as e:
+            self._metrics['errors'] += 1
+            await self._send_error(writer, 500, f'Analysis failed: {e}')
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader, deadline: float):
+        loop = asyncio.get_running_loop()
+        header_deadline = min(deadline, loop.time() + HEADER_TIMEOUT)
+
+        async def read_until_deadline(coro, limit):
+            try:
+                return await asyncio.wait_for(coro, timeout=max(limit - loop.time(), 0))
+            except asyncio.TimeoutError:
+                raise HttpError(408, 'Request not received in time')
+
+        request_line = await read_until_deadline(reader.readline(), header_deadline)
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise HttpError(400, 'Malformed request line')
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = await read_until_deadline(reader.readline(), header_deadline)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'Invalid Content-Length')
+        if length > self.max_body_bytes:
+            raise HttpError(413, f'Body larger than {self.max_body_bytes} bytes')
+        body = await read_until_deadline(reader.readexactly(length), deadline) if length else b''
+
+        url = urlsplit(target)
+        return method.upper(), url.path, parse_qs(url.query), headers, body
+
+    async def _route(self, method: str, path: str, query: Dict, headers: Dict, body: bytes,
+                     writer: asyncio.StreamWriter, deadline: float) -> None:
+        if path == '/health':
+            if method != 'GET':
+                raise HttpError(405, 'Use GET')
+            await self._send(writer, 200, dumps(self.stats()), 'application/json')
+            return
+
+        if path == '/recommendations':
+            if method != 'POST':
+                raise HttpError(405, 'Use POST with a JSON body')
+            await self._send_json(writer, 200, dumps(self._recommend(body)), headers.get('accept-encoding'))
+            return
+
+        if path == '/ingest':
+            if method != 'POST':
+                raise HttpError(405, 'Use POST with a JSON body')
+            result = await self._ingest(body, query.get('analyze', ['0'])[0] in ('1', 'true'), deadline)
+            await self._send_json(writer, 200, dumps(result), headers.get('accept-encoding'))
+            return
+
+        if path not in ('/analyze', '/report'):
+            raise HttpError(404, f'Unknown path: {path}')
+        if method != 'POST':
+            raise HttpError(405, 'Use POST with a CSV body')
+        if headers.get('content-type', '').startswith('application/json'):
+            body = self._csv_from_json(body)
+        if not body:
+            raise HttpError(400, 'Empty CSV body')
+
+        if path == '/analyze':
+            result, payload = await self.analyze(body, deadline)
+            status = 400 if "error" in result else 200
+            await self._send_json(writer, status, payload, headers.get('accept-encoding'))
+            return
+
+        fmt = query.get('format', ['pdf'])[0]
+        if fmt not in REPORT_FORMATS:
+            raise HttpError(400, f'Unsupported report format: {fmt}')
+        if fmt == 'pdf' and not PDF_AVAILABLE:
+            raise HttpError(503, 'PDF reports unavailable (reportlab not installed)')
+        result, payload = await self.analyze(body, deadline)
+        if "error" in result:
+            await self._send_json(writer, 400, payload, headers.get('accept-encoding'))
+            return
+        await self._stream_report(writer, result, fmt, deadline)
+
+    def _recommend(self, body: bytes) -> Dict:
+        if self.recommender is None:
+            raise HttpError(503, 'Course recommendations unavailable')
+        try:
+            request = loads(body)
+            weak_subjects = request.get('weakSubjects')
+            hours = request.get('studyHoursPerWeek')
+            k = int(request.get('k', 5))
+        except (ValueError, AttributeError, TypeError):
+            raise HttpError(400, 'Invalid JSON body')
+        if not isinstance(weak_subjects, (list, dict)):
+            raise HttpError(400, 'JSON body needs a weakSubjects list or object')
+        try:
+            courses = self.recommender.recommend(weak_subjects, float(hours) if hours else None, max(1, min(k, 50)))
+        except (TypeError, ValueError):
+            raise HttpError(400, 'Invalid weakSubjects or studyHoursPerWeek')
+        return {"recommendations": courses}
+
+    async def _ingest(self, body: bytes, with_analysis: bool, deadline: float) -> Dict:
+        """Merge a delta upload; the analysis covers the stored window, not the upload"""
+        try:
+            request = loads(body)
+            user_id = request.get('userId')
+            watermark = request.get('watermark')
+            csv_data = request.get('csvData', '')
+        except (ValueError, AttributeError):
+            raise HttpError(400, 'Invalid JSON body')
+        if not isinstance(user_id, (str, int)) or isinstance(user_id, bool) or user_id == '':
+            raise HttpError(400, 'JSON body needs a userId')
+        if not isinstance(csv_data, str) or not (watermark is None or isinstance(watermark, str)):
+            raise HttpError(400, 'csvData and watermark must be strings')
+
+        loop = asyncio.get_running_loop()
+        # SQLite writes are short but blocking, so they stay off the loop
+        try:
+            result = await loop.run_in_executor(None, self.history.ingest, str(user_id), csv_data, watermark)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        if with_analysis and not result['resync']:
+            history_csv = await loop.run_in_executor(None, self.history.history_csv, str(user_id))
+            if history_csv:
+                # Unchanged windows hit the result cache, so polls without new rows cost nothing
+                result['analysis'], _ = await self.analyze(history_csv.encode('utf-8'), deadline)
+        return result
+
+    @staticmethod
+    def _csv_from_json(body: bytes) -> bytes:
+        """Unwrap the app's {"csvData": "..."} request body (MLAnalysisService.ts)"""
+        try:
+            csv_data = loads(body).get('csvData')
+        except (ValueError, AttributeError):
+            raise HttpError(400, 'Invalid JSON body')
+        if not isinstance(csv_data, str):
+            raise HttpError(400, 'JSON body needs a csvData string')
+        return csv_data.encode('utf-8')
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: bytes,
+                         accept_encoding: Optional[str]) -> None:
+        encoding = choose_encoding(accept_encoding)
+        extra = {}
+        if encoding is not None and len(payload) >= DEFAULT_MIN_COMPRESS_SIZE:
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(None, compress, payload, encoding)
+            extra['Content-Encoding'] = encoding
+            extra['Vary'] = 'Accept-Encoding'
+        await self._send(writer, status, payload, 'application/json', extra)
+
+    async def _stream_report(self, writer: asyncio.StreamWriter, analysis: Dict, fmt: str,
+                             deadline: float) -> None:
+        """Render a report through the job queue, then stream it chunked, pausing for slow clients"""
+        # Rendering is CPU work like analysis: queue limit (429) and deadline (504) apply,
+        # and any failure here still gets a proper error response
+        data = await self.run_cpu(render_report_bytes, analysis, fmt, deadline=deadline)
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {REPORT_CONTENT_TYPES[fmt]}\r\n"
+            f'Content-Disposition: attachment; filename="habitguard_report.{fmt}"\r\n'
+            "Transfer-Encoding: chunked\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode('latin-1'))
+            view = memoryview(data)
+            for start in range(0, len(data), DEFAULT_CHUNK_SIZE):
+                chunk = view[start:start + DEFAULT_CHUNK_SIZE]
+                writer.write(f"{len(chunk):X}\r\n".encode('latin-1') + bytes(chunk) + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # Includes other OSErrors: nothing more may be written on a started response
+            raise StreamAborted() from e
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                    extra_headers: Optional[Dict[str, str]] = None) -> None:
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (extra_headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: int, message: str,
+                          extra_headers: Optional[Dict[str, str]] = None) -> None:
+        try:
+            await self._send(writer, status, dumps({"error": message}), 'application/json', extra_headers)
+        except (ConnectionError, OSError):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='🚀 HabitGuard analysis server')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Listen port')
+    parser.add_argument('--workers', type=int, default=None, help='CPU pool size (default: CPU count)')
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE_SIZE, help='Max queued jobs before 429')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-request deadline in seconds')
+    parser.add_argument('--threads', action='store_true', help='Use a thread pool instead of processes')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Optional on-disk result cache')
+    parser.add_argument('--artifacts', type=str, default=None,
+                        help='Shared artifact file (see shared_artifacts.py) mapped by every worker')
+    parser.add_argument('--history', type=str, default=DEFAULT_HISTORY_PATH,
+                        help='Per-user usage history database for /ingest')
+    args = parser.parse_args()
+
+    server = AnalysisServer(
+        host=args.host, port=args.port, workers=args.workers, max_queue=args.queue,
+        request_timeout=args.timeout, use_processes=not args.threads,
+        cache=AnalysisResultCache(disk_dir=args.cache_dir), artifacts_path=args.artifacts,
+        history=UsageHistoryStore(args.history)
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Anomaly and Binge-Day Detection
+==========================================
+
+Flags individual abnormal days and usage regime shifts in daily screen time.
+
+- Robust rolling baseline: median/MAD z-score of each day against the user's
+  previous ``window`` days (the day itself is excluded from its baseline)
+- Day-of-week baseline: median/MAD z-score against the user's previous
+  ``DOW_HISTORY`` same-weekday days (past days only, like the rolling baseline)
+- The MAD is floored, so a flat or mostly-zero history doesn't turn a small
+  wobble into an infinite z-score
+- Change points: binary segmentation on mean shifts, with noise estimated
+  from day-to-day differences so the shift itself doesn't hide it
+- Everything is vectorized over a flat (userId, date) sorted array, so one
+  call handles every user at once
+- ``AnomalyState`` updates incrementally (one new day at a time) for the
+  server path, with an online CUSUM for regime shifts
+
+Input: a DataFrame with ``date`` and either ``screenTimeHours`` or
+``totalScreenTime`` (ms). A ``userId`` column is optional.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+USER_COLUMN = 'userId'
+DEFAULT_WINDOW = 28
+MIN_PERIODS = 7
+Z_THRESHOLD = 3.5
+# Scale factors that make MAD comparable to a standard deviation
+MAD_TO_SIGMA = 1.4826
+MODIFIED_Z = 0.6745
+# Smallest MAD a baseline may have: a fraction of its median, and never under 15 minutes
+MIN_MAD_FRACTION = 0.1
+MIN_MAD_HOURS = 0.25
+DOW_HISTORY = 8
+DOW_MIN_PERIODS = 3
+_CHUNK_ROWS = 200_000
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Sorted copy with userId and screenTimeHours columns"""
+    data = df.copy()
+    if USER_COLUMN not in data.columns:
+        data[USER_COLUMN] = 0
+    if 'screenTimeHours' not in data.columns:
+        data['screenTimeHours'] = data['totalScreenTime'] / (1000 * 60 * 60)
+    data['date'] = pd.to_datetime(data['date'])
+    return data.sort_values([USER_COLUMN, 'date'], kind='stable').reset_index(drop=True)
+
+
+def _mad_floor(median, mad):
+    """MAD with a floor, so flat baselines still give finite z-scores"""
+    return np.maximum(mad, np.maximum(MIN_MAD_FRACTION * np.abs(median), MIN_MAD_HOURS))
+
+
+def _modified_z(values: np.ndarray, median: np.ndarray, mad: np.ndarray) -> np.ndarray:
+    return MODIFIED_Z * (values - median) / _mad_floor(median, mad)
+
+
+def rolling_robust_z(values: np.ndarray, position: np.ndarray, window: int = DEFAULT_WINDOW,
+                     min_periods: int = MIN_PERIODS):
+    """
+    Median/MAD z-score of each value against the previous `window` values of the same user
+
+    Args:
+        values: Flat array of daily hours, sorted by (user, date)
+        position: Index of each row within its user (0 for a user's first day)
+
+    Returns:
+        (z, median, mad) arrays; NaN where fewer than min_periods prior days exist
+    """
+    n = len(values)
+    z = np.full(n, np.nan)
+    medians = np.full(n, np.nan)
+    mads = np.full(n, np.nan)
+    padded = np.concatenate([np.full(window, np.nan), values.astype(float)])
+    # Offset k in a window refers to the value (window - k) rows back
+    lookback = window - np.arange(window)
+
+    for start in range(0, n, _CHUNK_ROWS):
+        stop = min(start + _CHUNK_ROWS, n)
+        windows = sliding_window_view(padded[start:stop + window - 1], window)[:stop - start].copy()
+        # Drop values that belong to the previous user
+        windows[lookback[None, :] > position[start:stop, None]] = np.nan
+
+        enough = np.count_nonzero(~np.isnan(windows), axis=1) >= min_periods
+        if not enough.any():
+            continue
+        w = windows[enough]
+        med = np.nanmedian(w, axis=1)
+        mad = np.nanmedian(np.abs(w - med[:, None]), axis=1)
+
+        idx = np.arange(start, stop)[enough]
+        medians[idx] = med
+        mads[idx] = mad
+        z[idx] = _modified_z(values[idx], med, mad)
+
+    return z, medians, mads
+
+
+def _centered_median(values: np.ndarray, position: np.ndarray, length: np.ndarray, width: int = 5) -> np.ndarray:
+    """Centered rolling median within each user (flat array sorted by user, date)"""
+    half = width // 2
+    padded = np.concatenate([np.full(half, np.nan), values.astype(float), np.full(half, np.nan)])
+    windows = sliding_window_view(padded, width).copy()
+    offsets = np.arange(-half, half + 1)
+    target = position[:, None] + offsets[None, :]
+    windows[(target < 0) | (target >= length[:, None])] = np.nan
+    return np.nanmedian(windows, axis=1)
+
+
+def day_of_week_z(data: pd.DataFrame, history: int = DOW_HISTORY,
+                  min_periods: int = DOW_MIN_PERIODS) -> np.ndarray:
+    """
+    Median/MAD z-score of each day against the same user's previous `history`
+    days on the same weekday (NaN with fewer than min_periods of them)
+
+    Args:
+        data: Rows sorted by (userId, date), as from _prepare()
+    """
+    # Reorder so each (user, weekday) is a contiguous date-sorted run, then reuse the rolling scorer
+    weekday = data['date'].dt.dayofweek
+    order = np.lexsort((data['date'].to_numpy(), weekday.to_numpy(), data[USER_COLUMN].to_numpy()))
+    position = data.groupby([data[USER_COLUMN], weekday]).cumcount().to_numpy()[order]
+    hours = data['screenTimeHours'].to_numpy(dtype=float)[order]
+    z_sorted, _, _ = rolling_robust_z(hours, position, history, min_periods)
+    z = np.empty(len(data))
+    z[order] = z_sorted
+    return z
+
+
+def detect_anomalies(df: pd.DataFrame, window: int = DEFAULT_WINDOW, threshold: float = Z_THRESHOLD,
+                     min_periods: int = MIN_PERIODS) -> pd.DataFrame:
+    """
+    Score every user-day and flag anomalies
+
+    Returns:
+        DataFrame (sorted by userId, date) with rollingZ, dowZ, baselineHours,
+        isAnomaly and kind ('binge', 'low' or '') columns added
+    """
+    data = _prepare(df)
+    position = data.groupby(USER_COLUMN).cumcount().to_numpy()
+    hours = data['screenTimeHours'].to_numpy(dtype=float)
+
+    rolling_z, baseline, _ = rolling_robust_z(hours, position, window, min_periods)
+    dow_z = day_of_week_z(data)
+
+    data['rollingZ'] = rolling_z
+    data['dowZ'] = dow_z
+    data['baselineHours'] = baseline
+
+    # A day is anomalous if it is extreme against its recent history, or against its weekday
+    # when there isn't enough recent history yet
+    score = np.where(np.isnan(rolling_z), dow_z, rolling_z)
+    flagged = np.abs(np.nan_to_num(score)) > threshold
+    data['isAnomaly'] = flagged
+    data['kind'] = np.where(flagged & (score > 0), 'binge', np.where(flagged, 'low', ''))
+    return data
+
+
+def detect_change_points(df: pd.DataFrame, min_segment: int = 7, threshold: float = 5.0,
+                         max_depth: int = 3) -> pd.DataFrame:
+    """
+    Find usage regime shifts per user with vectorized binary segmentation
+
+    Each level scores every possible split of every current segment at once
+    (grouped cumulative sums) and keeps the best split per segment if its
+    standardized mean shift exceeds the threshold. Segmentation runs on a
+    centered 5-day rolling median so isolated binge days don't look like
+    regime shifts.
+
+    Returns:
+        DataFrame with userId, date (first day of the new regime), beforeMean,
+        afterMean, shiftHours and score columns
+    """
+    data = _prepare(df)
+    columns = [USER_COLUMN, 'date', 'beforeMean', 'afterMean', 'shiftHours', 'score']
+    if len(data) == 0:
+        return pd.DataFrame(columns=columns)
+
+    raw = data['screenTimeHours'].to_numpy(dtype=float)
+    users = data[USER_COLUMN]
+    position = data.groupby(USER_COLUMN).cumcount().to_numpy()
+    length = data.groupby(USER_COLUMN)[USER_COLUMN].transform('size').to_numpy()
+    hours = _centered_median(raw, position, length, width=5)
+
+    # Noise level per user from raw day-to-day differences (insensitive to level shifts)
+    diffs = users.to_frame().assign(d=raw).groupby(USER_COLUMN)['d'].diff().abs()
+    sigma = diffs.groupby(users).transform('median').to_numpy() * MAD_TO_SIGMA / np.sqrt(2)
+    sigma = np.where(sigma > 0, sigma, np.nan)
+
+    segment = users.factorize()[0].astype(np.int64)
+    found = []
+
+    for _ in range(max_depth):
+        seg = pd.Series(segment)
+        left_n = seg.groupby(seg).cumcount().to_numpy() + 1
+        seg_n = seg.groupby(seg).transform('size').to_numpy()
+        left_sum = pd.Series(hours).groupby(seg).cumsum().to_numpy()
+        seg_sum = pd.Series(hours).groupby(seg).transform('sum').to_numpy()
+
+        right_n = seg_n - left_n
+        valid = (left_n >= min_segment) & (right_n >= min_segment)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            left_mean = left_sum / left_n
+            right_mean = (seg_sum - left_sum) / right_n
+            stat = np.abs(right_mean - left_mean) / (sigma * np.sqrt(1.0 / left_n + 1.0 / right_n))
+        stat = np.where(valid & np.isfinite(stat), stat, 0.0)
+
+        best = pd.Series(stat).groupby(seg).idxmax().to_numpy()
+        best = best[stat[best] > threshold]
+        if len(best) == 0:
+            break
+
+        for i in best:
+            found.append((users.iat[i + 1], data['date'].iat[i + 1], left_mean[i], right_mean[i], stat[i]))
+
+        # Split the chosen segments: rows after the split point get a new segment id
+        split_after = np.zeros(len(hours), dtype=bool)
+        split_after[best + 1] = True
+        segment = segment * 2 + (pd.Series(split_after).groupby(seg).cumsum().to_numpy() > 0)
+
+    if not found:
+        return pd.DataFrame(columns=columns)
+    result = pd.DataFrame(found, columns=[USER_COLUMN, 'date', 'beforeMean', 'afterMean', 'score'])
+    result['shiftHours'] = result['afterMean'] - result['beforeMean']
+    return result.sort_values([USER_COLUMN, 'date']).reset_index(drop=True)[columns]
+
+
+def summarize_user_anomalies(df: pd.DataFrame, max_days: int = 10) -> Dict:
+    """Anomalous days and regime shifts for a single user's dataset (for analyze_patterns)"""
+    scored = detect_anomalies(df)
+    flagged = scored[scored['isAnomaly']].sort_values('date', ascending=False).head(max_days)
+    shifts = detect_change_points(df)
+
+    return {
+        "anomalousDays": [
+            {
+                "date": row.date.strftime("%Y-%m-%d"),
+                "screenTimeHours": float(row.screenTimeHours),
+                "baselineHours": None if np.isnan(row.baselineHours) else float(row.baselineHours),
+                "zScore": float(row.rollingZ if not np.isnan(row.rollingZ) else row.dowZ),
+                "kind": row.kind
+            }
+            for row in flagged.itertuples(index=False)
+        ],
+        "bingeDays": int((scored['kind'] == 'binge').sum()),
+        "regimeShifts": [
+            {
+                "date": row.date.strftime("%Y-%m-%d"),
+                "beforeHours": float(row.beforeMean),
+                "afterHours": float(row.afterMean),
+                "shiftHours": float(row.shiftHours)
+            }
+            for row in shifts.itertuples(index=False)
+        ]
+    }
+
+
+class AnomalyState:
+    """
+    Incremental per-user detector for the server path
+
+    Keeps the last `window` days, the last few values per weekday and an
+    online two-sided CUSUM, so scoring one new day costs O(window).
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, threshold: float = Z_THRESHOLD,
+                 min_periods: int = MIN_PERIODS, dow_history: int = DOW_HISTORY,
+                 cusum_drift: float = 0.5, cusum_threshold: float = 5.0):
+        self.window = window
+        self.threshold = threshold
+        self.min_periods = min_periods
+        self.cusum_drift = cusum_drift
+        self.cusum_threshold = cusum_threshold
+        self.recent: deque = deque(maxlen=window)
+        self.by_dow: List[deque] = [deque(maxlen=dow_history) for _ in range(7)]
+        self.cusum_high = 0.0
+        self.cusum_low = 0.0
+        self.last_date: Optional[str] = None
+
+    def update(self, day, hours: float) -> Dict:
+        """Score one new day against the current state, then add it to the state"""
+        day = pd.Timestamp(day)
+        result = {"date": day.strftime("%Y-%m-%d"), "screenTimeHours": float(hours),
+                  "zScore": None, "isAnomaly": False, "kind": "", "regimeShift": None}
+
+        z = None
+        if len(self.recent) >= self.min_periods:
+            values = np.fromiter(self.recent, dtype=float)
+            median = float(np.median(values))
+            mad = float(np.median(np.abs(values - median)))
+            z = float(_modified_z(np.array([hours]), np.array([median]), np.array([mad]))[0])
+
+            # Online CUSUM on standardized deviations from the rolling median
+            sigma = float(_mad_floor(median, mad)) * MAD_TO_SIGMA
+            deviation = (hours - median) / sigma
+            self.cusum_high = max(0.0, self.cusum_high + deviation - self.cusum_drift)
+            self.cusum_low = max(0.0, self.cusum_low - deviation - self.cusum_drift)
+            if self.cusum_high > self.cusum_threshold or self.cusum_low > self.cusum_threshold:
+                result["regimeShift"] = "increase" if self.cusum_high > self.cusum_low else "decrease"
+                self.cusum_high = self.cusum_low = 0.0
+        else:
+            dow_values = self.by_dow[day.dayofweek]
+            if len(dow_values) >= DOW_MIN_PERIODS:
+                values = np.fromiter(dow_values, dtype=float)
+                median = float(np.median(values))
+                mad = float(np.median(np.abs(values - median)))
+                z = float(_modified_z(np.array([hours]), np.array([median]), np.array([mad]))[0])
+
+        if z is not None:
+            result["zScore"] = z
+            if abs(z) > self.threshold:
+                result["isAnomaly"] = True
+                result["kind"] = "binge" if z > 0 else "low"
+
+        self.recent.append(float(hours))
+        self.by_dow[day.dayofweek].append(float(hours))
+        self.last_date = result["date"]
+        return result
+
+    def to_dict(self) -> Dict:
+        """Serializable state for persistence between requests"""
+        return {
+            "recent": list(self.recent),
+            "by_dow": [list(d) for d in self.by_dow],
+            "cusum_high": self.cusum_high,
+            "cusum_low": self.cusum_low,
+            "last_date": self.last_date,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict, **kwargs) -> "AnomalyState":
+        detector = cls(**kwargs)
+        detector.recent.extend(state.get("recent", []))
+        for d, values in zip(detector.by_dow, state.get("by_dow", [])):
+            d.extend(values)
+        detector.cusum_high = state.get("cusum_high", 0.0)
+        detector.cusum_low = state.get("cusum_low", 0.0)
+        detector.last_date = state.get("last_date")
+        return detector
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Behavior Rules
+=========================
+
+Behavior classification and mental-health risk scoring as one declarative
+table (``behavior_rules.json``) shared with the app's offline fallback in
+``services/MLAnalysisService.ts``.
+
+Every rule is a band table: sorted ``cutoffs`` plus one entry per band.
+``side`` says which band a value equal to a cutoff falls in, exactly like
+``np.searchsorted``:
+
+- ``"right"``: band i covers ``x < cutoffs[i]`` (the ``if x < 2`` ladders)
+- ``"left"``: band i covers ``x <= cutoffs[i]`` (the ``if x > 0.6`` ladders)
+
+NaN fails every comparison, so it lands in the last band unless the table
+sets ``missing``. ``compile_rules`` turns the table into numpy arrays once;
+``classify`` then scores any number of users with a few ``searchsorted``
+calls instead of an if/elif ladder per user.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'behavior_rules.json')
+USER_COLUMN = 'userId'
+
+
+class BandTable:
+    """One compiled band table"""
+
+    def __init__(self, spec: Dict, values: Optional[List] = None):
+        self.cutoffs = np.asarray(spec['cutoffs'], dtype=float)
+        self.side = spec.get('side', 'right')
+        self.values = np.asarray(spec['values'] if values is None else values)
+        self.missing = spec.get('missing', len(self.cutoffs))
+        if len(self.values) != len(self.cutoffs) + 1:
+            raise ValueError(f"Band table needs {len(self.cutoffs) + 1} values, got {len(self.values)}")
+        if np.any(np.diff(self.cutoffs) <= 0):
+            raise ValueError("Band cutoffs must be strictly increasing")
+
+    def index(self, x) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        return np.where(np.isnan(x), self.missing, np.searchsorted(self.cutoffs, x, side=self.side))
+
+    def lookup(self, x) -> np.ndarray:
+        return self.values[self.index(x)]
+
+
+class CompiledRules:
+    """Behavior rule table compiled into searchsorted lookups"""
+
+    def __init__(self, rules: Dict):
+        self.rules = rules
+        hour_bands = rules['hourBands']
+        bands = hour_bands['bands']
+        self.hour_bands = BandTable(hour_bands, values=list(range(len(bands))))
+        self.categories = np.array([band['category'] for band in bands], dtype=object)
+        self.severities = np.array([band['severity'] for band in bands], dtype=object)
+        self.actions = np.array([band['action'] for band in bands], dtype=object)
+        self.messages = np.array([band['message'] for band in bands], dtype=object)
+
+        escalation = rules['escalation']
+        self.escalate_above = float(escalation['consistencyAbove'])
+        self.escalates = np.array([band['severity'] in escalation['severities'] for band in bands])
+        self.escalated_severity = escalation['severity']
+        self.escalated_messages = self.messages + escalation['messageSuffix']
+
+        self.hour_points = BandTable(rules['riskHourPoints'])
+        self.consistency_points = BandTable(rules['riskConsistencyPoints'])
+        self.risk_levels = BandTable(rules['riskLevels'])
+
+    def risk_level(self, avg_hours, consistency) -> np.ndarray:
+        score = self.hour_points.lookup(avg_hours) + self.consistency_points.lookup(consistency)
+        return self.risk_levels.lookup(score)
+
+    def classify(self, avg_hours, consistency) -> Dict[str, np.ndarray]:
+        """Category, severity, action, message and risk level for arrays of users"""
+        band = self.hour_bands.lookup(avg_hours)
+        with np.errstate(invalid='ignore'):
+            escalate = self.escalates[band] & (np.asarray(consistency, dtype=float) > self.escalate_above)
+        return {
+            "category": self.categories[band],
+            "severity": np.where(escalate, self.escalated_severity, self.severities[band]),
+            "action": self.actions[band],
+            "message": np.where(escalate, self.escalated_messages[band], self.messages[band]),
+            "risk_level": self.risk_level(avg_hours, consistency)
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.rules, indent=2)
+
+
+def load_rules(path: str = RULES_PATH) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+_default_rules: Optional[CompiledRules] = None
+
+
+def get_rules() -> CompiledRules:
+    """The shipped rule table, compiled once per process"""
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = CompiledRules(load_rules())
+    return _default_rules
+
+
+def consistency_score(avg_hours, std_hours) -> np.ndarray:
+    """Coefficient of variation (1 when the average is 0)"""
+    avg_hours = np.asarray(avg_hours, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(avg_hours > 0, np.asarray(std_hours, dtype=float) / avg_hours, 1.0)
+
+
+def classify_users(df: pd.DataFrame, rules: Optional[CompiledRules] = None) -> pd.DataFrame:
+    """
+    Classify every user in a fleet export at once
+
+    Args:
+        df: Rows with userId and screenTimeHours (or totalScreenTime in ms)
+
+    Returns:
+        DataFrame indexed by userId with avg_hours, max_hours, consistency_score,
+        category, severity, action, message and risk_level
+    """
+    rules = rules or get_rules()
+    if 'screenTimeHours' in df.columns:
+        hours = df['screenTimeHours']
+    else:
+        hours = df['totalScreenTime'] / (1000 * 60 * 60)
+    stats = hours.groupby(df[USER_COLUMN]).agg(['mean', 'std', 'max'])
+    result = pd.DataFrame({
+        'avg_hours': stats['mean'],
+        'max_hours': stats['max'],
+        'consistency_score': consistency_score(stats['mean'], stats['std']),
+    })
+    for key, values in rules.classify(result['avg_hours'].to_numpy(), result['consistency_score'].to_numpy()).items():
+        result[key] = values
+    return result
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF reports with embedded charts
+===========================================
+
+Usage:
+    python benchmarks/bench_report_charts.py [--users 40] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_core import get_default_service
+from report_charts import get_chart_cache, render_charts, warm_chart_backend
+from report_renderer import BatchReportRenderer, render_pdf_bytes
+from usage_predictor import generate_sample_csv_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report chart benchmark')
+    parser.add_argument('--users', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    service = get_default_service()
+    analyses = [service.analyze_csv(generate_sample_csv_data(days=90)) for _ in range(args.users)]
+    print(f"📦 {args.users} analyses (90 days each)")
+
+    # Batch first, so the in-process timings below start from an empty chart cache
+    with tempfile.TemporaryDirectory() as chart_dir:
+        with BatchReportRenderer(max_workers=args.workers, chunksize=4, chart_cache_dir=chart_dir) as renderer:
+            # Start the workers (and their warm-up) before timing
+            list(renderer.render_many([('warm', {})] * args.workers * renderer.chunksize, fmt='pdf'))
+            jobs = [(str(i), a) for i, a in enumerate(analyses)]
+            for label in ('cold', 'cached'):
+                start = time.perf_counter()
+                list(renderer.render_many(jobs, fmt='pdf'))
+                elapsed = time.perf_counter() - start
+                print(f"🏭 batch, {args.workers} workers, {label} charts: {elapsed / args.users * 1000:6.1f} ms/report wall "
+                      f"({args.users / elapsed:.1f} reports/s)")
+
+    start = time.perf_counter()
+    warm_chart_backend()
+    print(f"🔥 backend warm-up:   {time.perf_counter() - start:6.2f}s")
+
+    start = time.perf_counter()
+    for analysis in analyses:
+        render_pdf_bytes(analysis, include_charts=False)
+    tables = (time.perf_counter() - start) / args.users
+    print(f"📄 tables only:       {tables * 1000:6.1f} ms/report")
+
+    # The process cache, which render_pdf_bytes uses too
+    cache = get_chart_cache()
+    start = time.perf_counter()
+    for analysis in analyses:
+        render_charts(analysis, cache)
+    print(f"📈 charts, cold:      {(time.perf_counter() - start) / args.users * 1000:6.1f} ms/report")
+
+    start = time.perf_counter()
+    for analysis in analyses:
+        render_charts(analysis, cache)
+    print(f"⚡ charts, cached:    {(time.perf_counter() - start) / args.users * 1000:6.1f} ms/report")
+
+    start = time.perf_counter()
+    for analysis in analyses:
+        render_pdf_bytes(analysis)
+    print(f"📄 PDF with charts:   {(time.perf_counter() - start) / args.users * 1000:6.1f} ms/report (charts cached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: analysis result serialization
+========================================
+
+Compares the old ``json.dumps(indent=2, default=str)`` export against the
+serialization layer (orjson fast path and stdlib fallback) on realistic
+90-day analysis payloads, plus gzip/brotli response sizes.
+
+Usage:
+    python benchmarks/bench_serialization.py [--days 90] [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import serialization
+from usage_predictor import HabitGuardMLAnalyzer, generate_sample_csv_data
+
+
+def build_payload(days: int) -> dict:
+    """A 90-day analyze_patterns() result plus the NumPy series the server attaches"""
+    analyzer = HabitGuardMLAnalyzer()
+    analyzer.load_csv_data(csv_content=generate_sample_csv_data(days))
+    analysis = analyzer.analyze_patterns()
+
+    hours = analyzer.df['totalScreenTime'].to_numpy() / 3_600_000
+    analysis["series"] = {
+        "dates": analyzer.df['date'].dt.date.tolist(),
+        "screenTimeHours": hours,
+        "rollingMean7": np.convolve(hours, np.ones(7) / 7, mode='same'),
+        "appCount": analyzer.df['appCount'].to_numpy(),
+    }
+    analysis["summary"] = {k: np.float64(v) for k, v in analysis["summary"].items()}
+    return analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serialization benchmark')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = build_payload(args.days)
+
+    cases = {
+        "json.dumps(indent=2, default=str)": lambda: json.dumps(payload, indent=2, default=str).encode('utf-8'),
+        "serialization stdlib (compact)": lambda: serialization._dumps_stdlib(payload, False),
+    }
+    if serialization.ORJSON_AVAILABLE:
+        cases["serialization orjson (compact)"] = lambda: serialization._dumps_fast(payload, False)
+        cases["serialization orjson (pretty)"] = lambda: serialization._dumps_fast(payload, True)
+
+    print(f"📦 Payload: {args.days} days, {len(serialization.dumps(payload))} bytes compact")
+    print(f"{'case':40} {'µs/op':>10} {'bytes':>8}")
+    print("-" * 60)
+    for name, fn in cases.items():
+        seconds = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        print(f"{name:40} {seconds * 1e6:10.1f} {len(fn()):8d}")
+
+    body = serialization.dumps(payload)
+    print("\n🗜️  Compression")
+    print("-" * 60)
+    encodings = ['gzip'] + (['br'] if serialization.BROTLI_AVAILABLE else [])
+    for encoding in encodings:
+        fn = lambda: serialization.compress(body, encoding)
+        seconds = min(timeit.repeat(fn, number=args.repeat // 10 or 1, repeat=3)) / (args.repeat // 10 or 1)
+        print(f"{encoding:40} {seconds * 1e6:10.1f} {len(fn()):8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fleet-wide streak backfill
+=====================================
+
+Usage:
+    python benchmarks/bench_streaks.py [--users 10000] [--days 365]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from streak_engine import compute_streaks, daily_streaks
+
+
+def synthesize(users: int, days: int, seed: int = 42) -> pd.DataFrame:
+    """Fleet with per-user goals and ~5% missing days"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=days)
+    minutes = rng.normal(rng.uniform(120, 360, users)[:, None], 60, (users, days))
+    goals = rng.choice([120, 180, 240, 300], users)
+    df = pd.DataFrame({
+        'userId': np.repeat(np.arange(users), days),
+        'date': np.tile(dates, users),
+        'totalScreenTime': np.clip(minutes, 0, None).ravel() * 60_000,
+        'dailyGoalMinutes': np.repeat(goals, days),
+    })
+    return df[rng.random(len(df)) > 0.05]
+
+
+def replay_one_user(rows: pd.DataFrame) -> int:
+    """Row-by-row streak update, as streakController.js does per request"""
+    current = longest = 0
+    last = None
+    for day, minutes, goal in zip(rows['date'], rows['totalScreenTime'] / 60_000, rows['dailyGoalMinutes']):
+        if minutes <= goal:
+            current = current + 1 if last is not None and (day - last).days == 1 and current else 1
+        else:
+            current = 0
+        longest = max(longest, current)
+        last = day
+    return longest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streak engine benchmark')
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    df = synthesize(args.users, args.days)
+    print(f"📦 {len(df):,} user-days ({args.users:,} users x {args.days} days)")
+
+    start = time.perf_counter()
+    stats = compute_streaks(df, as_of=df['date'].max())
+    elapsed = time.perf_counter() - start
+    print(f"🔥 compute_streaks: {elapsed:6.2f}s  ({len(df) / elapsed:,.0f} user-days/s, "
+          f"mean longest streak {stats['longest_streak'].mean():.1f} days)")
+
+    start = time.perf_counter()
+    history = daily_streaks(df)
+    elapsed = time.perf_counter() - start
+    print(f"📅 daily_streaks:   {elapsed:6.2f}s  ({len(history):,} streak_history rows)")
+
+    # Row-by-row baseline on a sample, extrapolated to the fleet
+    sample = min(args.users, 200)
+    rows = df[df['userId'] < sample]
+    start = time.perf_counter()
+    for _, user_rows in rows.groupby('userId'):
+        replay_one_user(user_rows)
+    per_user = (time.perf_counter() - start) / sample
+    print(f"🐢 row-by-row:      {per_user * args.users:6.2f}s  (extrapolated from {sample} users)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nightly study scheduling
+===================================
+
+Solve time per student for one LP per student, batched LPs and the greedy
+fallback, on a synthetic fleet with 1-5 plans per student and three weeks
+of hourly usage.
+
+Usage:
+    python benchmarks/bench_study_scheduler.py [--students 2000] [--batch-size 256]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from study_scheduler import SCIPY_AVAILABLE, plan_coverage, schedule_week
+
+
+def synthesize(students: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    n_plans = rng.integers(1, 6, students)
+    user = np.repeat(np.arange(students), n_plans)
+    daily = rng.choice([0.5, 1.0, 1.5, 2.0], len(user))
+    plans = pd.DataFrame({
+        'plan_id': np.arange(len(user)),
+        'user_id': user,
+        'subject_code': rng.choice(['CS101', 'CS202', 'MA201', 'PH101', 'EE101'], len(user)),
+        'target_daily_hours': daily,
+        'target_weekly_hours': np.round(daily * rng.uniform(3, 7, len(user)) * 2) / 2,
+        'priority': rng.choice(['High', 'Medium', 'Low'], len(user)),
+        'status': 'active',
+    })
+
+    # Per-student phone peak around a random evening hour
+    dates = pd.date_range('2025-10-13', periods=21)
+    hours = np.arange(24)
+    peak = rng.integers(17, 23, students)
+    minutes = 40 * np.exp(-0.5 * ((hours[None, :] - peak[:, None]) / 2.0) ** 2) + 3
+    minutes = minutes[:, None, :] * rng.uniform(0.6, 1.4, (students, len(dates), 1))
+    usage = pd.DataFrame({
+        'userId': np.repeat(np.arange(students), len(dates) * 24),
+        'date': np.tile(np.repeat(dates.strftime('%Y-%m-%d'), 24), students),
+        'hour': np.tile(hours, students * len(dates)),
+        'totalScreenTime': minutes.ravel() * 60_000,
+    })
+    return plans, usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Study scheduler benchmark')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    plans, usage = synthesize(args.students)
+    start = date(2025, 11, 3)
+    print(f"📊 {args.students:,} students, {len(plans):,} plans, {len(usage):,} hourly usage rows")
+
+    runs = [('greedy fallback', dict(solver='greedy', batch_size=args.batch_size))]
+    if SCIPY_AVAILABLE:
+        runs = [('LP per student', dict(batch_size=1)),
+                (f'LP batches of {args.batch_size}', dict(batch_size=args.batch_size))] + runs
+    for label, kwargs in runs:
+        started = time.perf_counter()
+        schedule = schedule_week(plans, usage, start, **kwargs)
+        elapsed = time.perf_counter() - started
+        coverage = plan_coverage(plans, schedule)
+        met = (coverage['scheduled_hours'] >= coverage['target_weekly_hours'] - 1e-9).mean()
+        print(f"  {label:<22} {elapsed:7.2f}s  {elapsed / args.students * 1000:6.2f} ms/student  "
+              f"{len(schedule):,} blocks, {met:.0%} of weekly targets met, "
+              f"{schedule['forecast_distraction_minutes'].sum() / args.students:.1f} distraction min/student")
+
+
+if __name__ == "__main__":
+    main()
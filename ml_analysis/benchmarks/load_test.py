@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Load test: replay MLAnalysisService traffic against the analysis server
+=======================================================================
+
+``services/MLAnalysisService.ts`` sends one ``POST /analyze`` per user with
+``{"csvData": ...}`` and keeps the answer for an hour. After that it resends
+the same history, plus any new day. This harness synthesizes per-user CSV
+bodies with that shape and drives ``analysis_server.py`` with them.
+
+- Closed loop: ``--concurrency`` clients, each sending its next request as
+  soon as the previous one returns (plus optional think time)
+- Open loop: Poisson arrivals at ``--rate`` requests/second regardless of how
+  fast the server answers; latency is measured from the scheduled send time
+  so a stalled server can't hide its queueing delay
+- ``--revisit``: share of requests that resend a user's unchanged body
+  (cache-expiry refresh with no new data); the rest append a new day
+- Reports p50/p95/p99 latency, throughput, error rate, status counts and the
+  server's RSS over time (pool workers included, read from /proc)
+- Results are stored as JSON; ``--compare`` flags regressions against a
+  previous run
+
+Usage:
+    python benchmarks/load_test.py --spawn --mode closed --concurrency 16 --duration 30
+    python benchmarks/load_test.py --url http://127.0.0.1:8765 --server-pid 1234 \\
+        --mode open --rate 50 --output benchmarks/results/open50.json \\
+        --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+ML_ANALYSIS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ML_ANALYSIS_DIR)
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+CSV_HEADER = "date,hour,totalScreenTime,topAppPackage,topAppTime,appCount,dayOfWeek,isWeekend"
+TOP_APPS = [
+    'com.instagram.android', 'com.whatsapp', 'com.google.android.youtube', 'com.android.chrome',
+    'com.spotify.music', 'com.zhiliaoapp.musically', 'com.snapchat.android', 'com.duolingo',
+    'com.netflix.mediaclient', 'com.supercell.clashofclans',
+]
+MS_PER_HOUR = 3_600_000
+
+# Metrics compared by --compare; True means higher is better
+COMPARED_METRICS = {
+    'latency_ms.p50': False,
+    'latency_ms.p95': False,
+    'latency_ms.p99': False,
+    'throughput_rps': True,
+    'error_rate': False,
+    'rss_mb.peak': False,
+}
+
+
+# ----------------------------------------------------------------------
+# Synthetic users
+# ----------------------------------------------------------------------
+
+class SyntheticUser:
+    """One app install: a usage profile and the CSV history it would upload"""
+
+    def __init__(self, user_id: int, rng: np.random.Generator, days: int, end: date):
+        self.user_id = user_id
+        self.rng = rng
+        # Heavy-tailed daily usage like a real fleet: most 2-6h, some 10h+
+        self.base_hours = float(np.clip(rng.lognormal(np.log(4.0), 0.45), 0.5, 14))
+        self.weekend_factor = float(rng.uniform(1.0, 1.6))
+        self.app_weights = rng.dirichlet(np.full(len(TOP_APPS), 0.6))
+        self.rows: List[str] = []
+        self.next_day = end - timedelta(days=days - 1)
+        for _ in range(days):
+            self.add_day()
+        self._body: Optional[bytes] = None
+
+    def add_day(self) -> None:
+        day = self.next_day
+        self.next_day += timedelta(days=1)
+        dow = (day.weekday() + 1) % 7  # Sunday = 0, like the app
+        weekend = dow in (0, 6)
+        hours = self.base_hours * (self.weekend_factor if weekend else 1.0) * self.rng.lognormal(0, 0.25)
+        total = int(min(hours, 20) * MS_PER_HOUR)
+        top_app = TOP_APPS[self.rng.choice(len(TOP_APPS), p=self.app_weights)]
+        top_time = int(total * self.rng.uniform(0.2, 0.5))
+        self.rows.append(f"{day},{self.rng.integers(9, 24)},{total},{top_app},{top_time},"
+                         f"{self.rng.integers(5, 25)},{dow},{str(weekend).lower()}")
+        self._body = None
+
+    def body(self, as_json: bool) -> bytes:
+        if self._body is None:
+            csv_data = "\n".join([CSV_HEADER] + self.rows)
+            self._body = json.dumps({'csvData': csv_data}).encode() if as_json else csv_data.encode()
+        return self._body
+
+
+class TrafficModel:
+    """Picks the next (user, body): an unchanged resend or a history with a new day"""
+
+    def __init__(self, users: int, days: int, revisit: float, as_json: bool, seed: int):
+        self.rng = np.random.default_rng(seed)
+        today = date.today()
+        self.users = [SyntheticUser(i, np.random.default_rng(seed + i + 1), days, today) for i in range(users)]
+        self.revisit = revisit
+        self.as_json = as_json
+        self._sent = set()
+
+    def next_request(self) -> bytes:
+        user = self.users[self.rng.integers(len(self.users))]
+        if user.user_id in self._sent and self.rng.random() >= self.revisit:
+            user.add_day()
+        self._sent.add(user.user_id)
+        return user.body(self.as_json)
+
+
+# ----------------------------------------------------------------------
+# HTTP client
+# ----------------------------------------------------------------------
+
+async def post(host: str, port: int, path: str, body: bytes, as_json: bool, timeout: float) -> Tuple[int, int]:
+    """One POST on a fresh connection (the server closes after each response); returns (status, bytes)"""
+    content_type = 'application/json' if as_json else 'text/csv'
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {content_type}\r\n"
+                f"Accept-Encoding: gzip\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        parts = head.split(None, 2)
+        return (int(parts[1]) if len(parts) > 1 else 0), len(payload)
+
+    return await asyncio.wait_for(exchange(), timeout=timeout)
+
+
+class Recorder:
+    """Per-request samples: (scheduled offset s, latency ms, status)"""
+
+    def __init__(self):
+        self.samples: List[Tuple[float, float, int]] = []
+        self.started = time.perf_counter()
+
+    async def send(self, args, model: TrafficModel, scheduled: Optional[float] = None) -> None:
+        body = model.next_request()
+        begin = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            status, _ = await post(args.host, args.port, args.path, body, args.payload == 'json', args.timeout)
+        except (OSError, asyncio.TimeoutError):
+            status = 0  # Connection error or client-side timeout
+        end = time.perf_counter()
+        self.samples.append((begin - self.started, (end - begin) * 1000, status))
+
+
+async def run_closed(args, model: TrafficModel, recorder: Recorder) -> None:
+    stop_at = time.perf_counter() + args.duration
+
+    async def client():
+        while time.perf_counter() < stop_at:
+            await recorder.send(args, model)
+            if args.think_time:
+                await asyncio.sleep(args.think_time)
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+
+
+async def run_open(args, model: TrafficModel, recorder: Recorder) -> None:
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    next_at = start
+    pending = set()
+    while next_at < start + args.duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(recorder.send(args, model, scheduled=next_at))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        next_at += rng.exponential(1.0 / args.rate)
+    if pending:
+        await asyncio.wait(pending)
+
+
+# ----------------------------------------------------------------------
+# Server RSS
+# ----------------------------------------------------------------------
+
+def _children(pid: int) -> List[int]:
+    children = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children') as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """RSS of a process and all its descendants (the pool workers), in MiB"""
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += _rss_kb(current)
+        stack.extend(_children(current))
+    return total / 1024
+
+
+async def sample_rss(pid: int, interval: float, started: float, out: List[Tuple[float, float]]) -> None:
+    while True:
+        out.append((round(time.perf_counter() - started, 2), round(process_tree_rss_mb(pid), 1)))
+        await asyncio.sleep(interval)
+
+
+# ----------------------------------------------------------------------
+# Results
+# ----------------------------------------------------------------------
+
+def summarize(samples: List[Tuple[float, float, int]], duration: float,
+              rss: List[Tuple[float, float]], config: Dict) -> Dict:
+    latencies = np.array([s[1] for s in samples]) if samples else np.zeros(0)
+    statuses = np.array([s[2] for s in samples], dtype=int)
+    ok = statuses == 200
+    codes, counts = np.unique(statuses, return_counts=True)
+    result = {
+        'config': config,
+        'requests': int(len(samples)),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(float(ok.sum()) / duration, 2) if duration else 0.0,
+        'error_rate': round(float((~ok).mean()), 4) if len(samples) else 0.0,
+        'status_counts': {str(code): int(count) for code, count in zip(codes, counts)},
+        'latency_ms': {},
+        'rss_mb': {},
+    }
+    if len(latencies):
+        ok_latencies = latencies[ok] if ok.any() else latencies
+        result['latency_ms'] = {
+            'p50': round(float(np.percentile(ok_latencies, 50)), 2),
+            'p95': round(float(np.percentile(ok_latencies, 95)), 2),
+            'p99': round(float(np.percentile(ok_latencies, 99)), 2),
+            'max': round(float(ok_latencies.max()), 2),
+            'mean': round(float(ok_latencies.mean()), 2),
+        }
+    if rss:
+        values = [mb for _, mb in rss]
+        result['rss_mb'] = {'start': values[0], 'end': values[-1], 'peak': max(values), 'timeline': rss}
+    return result
+
+
+def _metric(result: Dict, dotted: str) -> Optional[float]:
+    value = result
+    for part in dotted.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Print metric deltas; returns the metrics that regressed beyond tolerance"""
+    regressions = []
+    print(f"\n📊 Compared with baseline (tolerance {tolerance:.0%}):")
+    for name, higher_is_better in COMPARED_METRICS.items():
+        new, old = _metric(current, name), _metric(baseline, name)
+        if new is None or old is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = change < -tolerance if higher_is_better else change > tolerance
+        # Error rates start at 0: any new errors count as a regression
+        if name == 'error_rate' and old == 0:
+            worse = new > tolerance / 100
+        marker = '❌' if worse else '✅'
+        print(f"  {marker} {name:<18} {old:>10} -> {new:>10} ({change:+.1%})")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def print_summary(result: Dict) -> None:
+    latency = result['latency_ms']
+    print(f"\n📈 {result['requests']} requests in {result['duration_s']}s")
+    print(f"  Throughput: {result['throughput_rps']} req/s (200 only)")
+    print(f"  Error rate: {result['error_rate']:.2%}  statuses: {result['status_counts']}")
+    if latency:
+        print(f"  Latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    if result['rss_mb']:
+        rss = result['rss_mb']
+        print(f"  Server RSS MiB: start {rss['start']}  peak {rss['peak']}  end {rss['end']}")
+
+
+# ----------------------------------------------------------------------
+# Entry point
+# ----------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(args) -> subprocess.Popen:
+    args.host, args.port = '127.0.0.1', _free_port()
+    command = [sys.executable, os.path.join(ML_ANALYSIS_DIR, 'analysis_server.py'), '--port', str(args.port)]
+    if args.server_args:
+        command += args.server_args.split()
+    server = subprocess.Popen(command, cwd=ML_ANALYSIS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Wait for the listening socket
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection((args.host, args.port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("analysis_server.py exited during startup")
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("analysis_server.py did not start listening within 60s")
+
+
+async def run(args) -> Dict:
+    model = TrafficModel(args.users, args.days, args.revisit, args.payload == 'json', args.seed)
+    recorder = Recorder()
+    rss: List[Tuple[float, float]] = []
+    sampler = None
+    if args.server_pid:
+        sampler = asyncio.ensure_future(sample_rss(args.server_pid, args.rss_interval, recorder.started, rss))
+    try:
+        if args.mode == 'closed':
+            await run_closed(args, model, recorder)
+        else:
+            await run_open(args, model, recorder)
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+    duration = time.perf_counter() - recorder.started
+    config = {key: value for key, value in vars(args).items() if key not in ('compare', 'output')}
+    return summarize(recorder.samples, duration, rss, config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the HabitGuard analysis server')
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:8765', help='Server base URL')
+    parser.add_argument('--path', type=str, default='/analyze', help='Endpoint to drive')
+    parser.add_argument('--spawn', action='store_true', help='Start analysis_server.py on a free port')
+    parser.add_argument('--server-args', type=str, default='', help='Extra args for the spawned server')
+    parser.add_argument('--server-pid', type=int, default=None, help='PID to sample RSS from (set by --spawn)')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed')
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed loop: concurrent clients')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Closed loop: pause between requests (s)')
+    parser.add_argument('--rate', type=float, default=20.0, help='Open loop: mean arrivals per second')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of traffic')
+    parser.add_argument('--users', type=int, default=200, help='Distinct synthetic users')
+    parser.add_argument('--days', type=int, default=30, help='Days of history per user')
+    parser.add_argument('--revisit', type=float, default=0.5, help='Share of unchanged resends')
+    parser.add_argument('--payload', choices=['json', 'csv'], default='json', help='Request body shape')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Client-side timeout per request (s)')
+    parser.add_argument('--rss-interval', type=float, default=0.5, help='RSS sampling interval (s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None, help='Results JSON (default: benchmarks/results/)')
+    parser.add_argument('--compare', type=str, default=None, help='Baseline results JSON to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    args.host, args.port = url.hostname or '127.0.0.1', url.port or 80
+
+    server = None
+    if args.spawn:
+        server = spawn_server(args)
+        args.server_pid = server.pid
+        print(f"🚀 Spawned analysis server (pid {server.pid}) on port {args.port}")
+
+    print(f"🔥 {args.mode} loop, {args.duration}s, {args.users} users x {args.days} days, "
+          + (f"concurrency {args.concurrency}" if args.mode == 'closed' else f"rate {args.rate}/s"))
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            # SIGINT lets the server shut its worker pool down cleanly
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    print_summary(result)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load_{args.mode}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
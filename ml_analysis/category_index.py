@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Package Category Index
+=================================
+
+Persistent package -> category index shared by student restrictions,
+blocked-app suggestions and category feature extraction.
+
+- SQLite file (``models/package_categories.db``) holding packages with their
+  category and display label, plus publisher prefix rules
+- Bounded LRU in memory in front of SQLite: hot lookups are a dict hit
+- Prefix rules live in a trie in memory for packages not in the table
+- Bulk loading of tens of thousands of packages in one transaction
+- Per-category label lists are precomputed, so suggesting apps to block never
+  scans a list per request
+
+Usage:
+    python category_index.py --db models/package_categories.db --load packages.csv
+    (CSV columns: package,category[,label])
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import (
+    CATEGORIES, CATEGORY_CODES, DEFAULT_PACKAGE_CATEGORIES, DEFAULT_PREFIX_CATEGORIES, OTHER_CODE
+)
+
+DEFAULT_INDEX_PATH = os.path.join('models', 'package_categories.db')
+
+# Display labels used when suggesting apps to limit
+DEFAULT_PACKAGE_LABELS: Dict[str, str] = {
+    'com.instagram.android': 'Instagram',
+    'com.zhiliaoapp.musically': 'TikTok',
+    'com.snapchat.android': 'Snapchat',
+    'com.facebook.katana': 'Facebook',
+    'com.twitter.android': 'Twitter/X',
+    'com.bereal.ft': 'BeReal',
+    'com.pubg.imobile': 'PUBG',
+    'com.dts.freefireth': 'Free Fire',
+    'com.king.candycrushsaga': 'Candy Crush',
+    'com.roblox.client': 'Roblox',
+    'com.mojang.minecraftpe': 'Minecraft (except educational)',
+    'com.google.android.youtube': 'YouTube',
+    'com.netflix.mediaclient': 'Netflix',
+    'com.whatsapp': 'WhatsApp',
+    'com.discord': 'Discord (non-educational)',
+    'com.android.chrome': 'Chrome',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    package TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    label TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_packages_category ON packages (category);
+CREATE TABLE IF NOT EXISTS prefixes (
+    prefix TEXT PRIMARY KEY,
+    category TEXT NOT NULL
+);
+"""
+
+
+class PackageCategoryIndex:
+    """SQLite-backed package -> category index with an LRU front"""
+
+    def __init__(self, path: str = ':memory:', cache_size: int = 50_000, seed_defaults: bool = True):
+        self.path = path
+        self.cache_size = cache_size
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._trie: Dict = {}
+        self._labels_by_category: Dict[str, Tuple[str, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if seed_defaults and self.count() == 0:
+            self.bulk_load(
+                ((package, category, DEFAULT_PACKAGE_LABELS.get(package))
+                 for package, category in DEFAULT_PACKAGE_CATEGORIES.items()),
+                prefixes=DEFAULT_PREFIX_CATEGORIES.items()
+            )
+        else:
+            self._reload_memory_tables()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def bulk_load(self, rows: Iterable[Sequence], prefixes: Optional[Iterable[Tuple[str, str]]] = None) -> int:
+        """
+        Insert or replace many packages in one transaction
+
+        Args:
+            rows: (package, category) or (package, category, label) tuples
+            prefixes: Optional (prefix, category) rules
+
+        Returns:
+            int: Number of package rows written
+        """
+        records = [
+            (row[0], row[1] if row[1] in CATEGORY_CODES else 'other', row[2] if len(row) > 2 else None)
+            for row in rows
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO packages (package, category, label) VALUES (?, ?, ?)", records
+            )
+            if prefixes is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO prefixes (prefix, category) VALUES (?, ?)", list(prefixes)
+                )
+            # Reloaded rules may change earlier answers
+            self._cache.clear()
+        self._reload_memory_tables()
+        return len(records)
+
+    def bulk_load_csv(self, csv_file: str) -> int:
+        """Load a package,category[,label] CSV file"""
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            return self.bulk_load(
+                (row['package'], row['category'], row.get('label') or None) for row in reader
+            )
+
+    def _reload_memory_tables(self) -> None:
+        trie: Dict = {}
+        labels: Dict[str, List[str]] = {}
+        with self._lock:
+            for prefix, category in self._conn.execute("SELECT prefix, category FROM prefixes"):
+                node = trie
+                for segment in prefix.split('.'):
+                    node = node.setdefault(segment, {})
+                node[None] = CATEGORY_CODES.get(category, OTHER_CODE)
+            for category, label in self._conn.execute(
+                "SELECT category, label FROM packages WHERE label IS NOT NULL ORDER BY rowid"
+            ):
+                labels.setdefault(category, []).append(label)
+        self._trie = trie
+        self._labels_by_category = {category: tuple(names) for category, names in labels.items()}
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+
+    def code(self, package: str) -> int:
+        """Category code for a package (exact entry, else longest prefix rule, else other)"""
+        cache = self._cache
+        with self._lock:
+            code = cache.get(package)
+            if code is not None:
+                # Recently used entries move to the back, so eviction takes the least recently used
+                cache.move_to_end(package)
+                self.hits += 1
+                return code
+
+        self.misses += 1
+        with self._lock:
+            row = self._conn.execute("SELECT category FROM packages WHERE package = ?", (package,)).fetchone()
+        if row is not None:
+            code = CATEGORY_CODES.get(row[0], OTHER_CODE)
+        else:
+            code = self._prefix_code(package)
+
+        with self._lock:
+            cache[package] = code
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return code
+
+    def _prefix_code(self, package: str) -> int:
+        node = self._trie
+        code = OTHER_CODE
+        for segment in package.split('.'):
+            node = node.get(segment)
+            if node is None:
+                break
+            code = node.get(None, code)
+        return code
+
+    def category(self, package: str) -> str:
+        """Category name for a package"""
+        return CATEGORIES[self.code(package)]
+
+    def codes(self, packages) -> np.ndarray:
+        """Vectorized category codes; each distinct package is looked up once"""
+        uniques_idx, uniques = pd.factorize(pd.Series(packages, dtype=object).fillna(''), sort=False)
+        table = np.fromiter((self.code(p) for p in uniques), dtype=np.int8, count=len(uniques))
+        return table[uniques_idx]
+
+    def labels_for(self, category: str, limit: Optional[int] = None) -> List[str]:
+        """Display labels of known apps in a category (precomputed, no scanning)"""
+        labels = self._labels_by_category.get(category, ())
+        return list(labels if limit is None else labels[:limit])
+
+    def label(self, package: str) -> str:
+        """Display label for a package, falling back to the package id"""
+        with self._lock:
+            row = self._conn.execute("SELECT label FROM packages WHERE package = ?", (package,)).fetchone()
+        return row[0] if row and row[0] else package
+
+    def items(self) -> List[Tuple[str, str]]:
+        """All (package, category) rows, e.g. for exporting a shared lookup table"""
+        with self._lock:
+            return self._conn.execute("SELECT package, category FROM packages").fetchall()
+
+    def prefix_rules(self) -> Dict[str, str]:
+        """All prefix -> category rules"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT prefix, category FROM prefixes").fetchall())
+
+    def count(self) -> int:
+        """Number of packages in the index"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_default_index: Optional[PackageCategoryIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index(path: Optional[str] = None) -> PackageCategoryIndex:
+    """
+    Process-wide shared index
+
+    Uses HABITGUARD_CATEGORY_INDEX or models/package_categories.db when that
+    file exists, otherwise an in-memory index seeded with the default tables.
+    """
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                path = path or os.environ.get('HABITGUARD_CATEGORY_INDEX', DEFAULT_INDEX_PATH)
+                _default_index = PackageCategoryIndex(path if os.path.exists(path) else ':memory:')
+    return _default_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📇 HabitGuard package category index')
+    parser.add_argument('--db', type=str, default=DEFAULT_INDEX_PATH, help='Index database path')
+    parser.add_argument('--load', type=str, help='CSV of package,category[,label] to bulk load')
+    parser.add_argument('--lookup', type=str, nargs='*', help='Package ids to classify')
+    args = parser.parse_args()
+
+    index = PackageCategoryIndex(args.db)
+    if args.load:
+        loaded = index.bulk_load_csv(args.load)
+        print(f"✅ Loaded {loaded} packages into {args.db}")
+    print(f"📇 {index.count()} packages indexed")
+    for package in args.lookup or []:
+        print(f"  {package}: {index.category(package)}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
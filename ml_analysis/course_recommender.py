@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Course Recommender
+=============================
+
+Personalized course recommendations for students from the backend's static
+catalog (``backend/data/recommendations.json`` and ``courses.json``).
+
+The index is built once (at server startup) and queries only do array math:
+
+- TF-IDF vectors over each course's title, subject, platform, difficulty and
+  duration bucket (L2-normalized, so a dot product is cosine similarity)
+- Inverted index from subject code to its curated courses
+- Subject vectors for every subject in ``courses.json``, so weak subjects
+  without curated courses still match related ones (e.g. "Engineering
+  Mathematics II" -> the mathematics courses)
+- Course durations parsed to hours, scored against the student's weekly
+  study time
+
+``save``/``load`` write an ``.npz`` snapshot (no pickle) tagged with a hash
+of the source files, so startup skips tokenizing and rebuilds only when the
+catalog changes.
+
+Usage:
+    python course_recommender.py --weak CS102 MA102 --hours 6 [--k 5]
+    python course_recommender.py --build-snapshot models/course_index.npz
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+DATA_DIR = os.environ.get(
+    'HABITGUARD_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'data'))
+RECOMMENDATIONS_FILE = 'recommendations.json'
+COURSES_FILE = 'courses.json'
+DEFAULT_SNAPSHOT = os.path.join('models', 'course_index.npz')
+SNAPSHOT_VERSION = 1
+
+# Hours per week assumed for courses listed in weeks/months
+COURSE_HOURS_PER_WEEK = 4.0
+WEEKS_PER_MONTH = 4.3
+# Study-plan horizon a course should fit into at the student's pace
+HORIZON_WEEKS = 8.0
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+
+# Score weights
+CURATED_MATCH = 1.0
+DIFFICULTY_MATCH = 0.5
+
+# Includes words every subject shares ("Engineering Mathematics" should not match "Software Engineering")
+_STOPWORDS = {'and', 'of', 'the', 'in', 'for', 'to', 'a', 'an', 'with', 'i', 'ii', 'iii', 'iv', 'lab',
+              'engineering', 'introduction', 'basic', 'basics', 'complete', 'course'}
+_TOKEN = re.compile(r'[a-z0-9+#]+')
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)\s*(hour|week|month)', re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def parse_duration_hours(duration: str) -> float:
+    """'23 hours' -> 23, '12 weeks' -> 48, '3 months' -> ~52 (NaN if unknown)"""
+    match = _DURATION.search(duration or '')
+    if not match:
+        return math.nan
+    amount, unit = float(match.group(1)), match.group(2).lower()
+    if unit == 'hour':
+        return amount
+    weeks = amount if unit == 'week' else amount * WEEKS_PER_MONTH
+    return weeks * COURSE_HOURS_PER_WEEK
+
+
+def _duration_bucket(hours: float) -> str:
+    if math.isnan(hours):
+        return 'duration:unknown'
+    return 'duration:short' if hours <= 15 else 'duration:medium' if hours <= 40 else 'duration:long'
+
+
+def catalog_hash(data_dir: str = DATA_DIR) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for name in (RECOMMENDATIONS_FILE, COURSES_FILE):
+        with open(os.path.join(data_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_catalog(data_dir: str):
+    with open(os.path.join(data_dir, RECOMMENDATIONS_FILE)) as f:
+        curated = json.load(f)['recommendations']
+    with open(os.path.join(data_dir, COURSES_FILE)) as f:
+        programs = json.load(f)
+
+    courses = []
+    for entry in curated:
+        for course in entry['courses']:
+            courses.append(dict(course, subjectCode=entry['subjectCode'], subjectName=entry['subjectName']))
+
+    subjects = {entry['subjectCode']: entry['subjectName'] for entry in curated}
+    for level in programs.values():
+        for program in level.values():
+            for semester in program.get('semesters', {}).values():
+                for subject in semester:
+                    subjects.setdefault(subject['code'], subject['name'])
+    return courses, subjects
+
+
+class CourseRecommender:
+    """Immutable TF-IDF + inverted index over the course catalog (safe to share across threads)"""
+
+    def __init__(self, courses: List[Dict], course_vectors: np.ndarray, vocabulary: Dict[str, int],
+                 idf: np.ndarray, subjects: Dict[str, str], subject_vectors: np.ndarray,
+                 source_hash: str = ''):
+        self.courses = courses
+        self.course_vectors = course_vectors
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.subject_codes = list(subjects)
+        self.subject_names = subjects
+        self.subject_rows = {code: i for i, code in enumerate(self.subject_codes)}
+        self.subject_vectors = subject_vectors
+        self.source_hash = source_hash
+
+        self.duration_hours = np.array([course['durationHours'] for course in courses], dtype=float)
+        self.difficulty = np.array([DIFFICULTIES.index(c['difficulty']) if c.get('difficulty') in DIFFICULTIES
+                                    else -1 for c in courses])
+        # Inverted index: subject code -> course rows
+        self.by_subject: Dict[str, np.ndarray] = {}
+        for i, course in enumerate(courses):
+            self.by_subject.setdefault(course['subjectCode'], []).append(i)
+        self.by_subject = {code: np.asarray(rows) for code, rows in self.by_subject.items()}
+        # The same course can be curated for several subjects; rank each URL once
+        first_row: Dict[str, int] = {}
+        self.url_group = np.array([first_row.setdefault(c.get('url') or f'#{i}', i) for i, c in enumerate(courses)],
+                                  dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _course_terms(course: Dict) -> List[str]:
+        return (tokenize(course['title']) + tokenize(course['subjectName'])
+                + [f"platform:{course.get('platform', '').lower()}",
+                   f"difficulty:{course.get('difficulty', '').lower()}",
+                   _duration_bucket(course['durationHours'])])
+
+    @classmethod
+    def build(cls, data_dir: str = DATA_DIR) -> 'CourseRecommender':
+        """Tokenize the catalog and compute TF-IDF vectors"""
+        courses, subjects = _load_catalog(data_dir)
+        for course in courses:
+            course['durationHours'] = parse_duration_hours(course.get('duration', ''))
+
+        documents = [cls._course_terms(course) for course in courses]
+        vocabulary = {term: i for i, term in enumerate(sorted({t for doc in documents for t in doc}))}
+        counts = np.zeros((len(courses), len(vocabulary)))
+        for row, doc in enumerate(documents):
+            for term in doc:
+                counts[row, vocabulary[term]] += 1
+
+        # Smoothed IDF, as in sklearn's TfidfVectorizer
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(courses)) / (1 + document_frequency)) + 1
+        course_vectors = _normalize(counts * idf)
+
+        recommender = cls(courses, course_vectors, vocabulary, idf, subjects,
+                          np.zeros((0, len(vocabulary))), catalog_hash(data_dir))
+        recommender.subject_vectors = np.vstack([recommender.vectorize(name) for name in subjects.values()]) \
+            if subjects else np.zeros((0, len(vocabulary)))
+        return recommender
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """TF-IDF vector of free text in the catalog's vocabulary"""
+        vector = np.zeros(len(self.vocabulary))
+        for term in tokenize(text):
+            col = self.vocabulary.get(term)
+            if col is not None:
+                vector[col] += self.idf[col]
+        return _normalize(vector[None, :])[0]
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _subject_vector(self, subject: str) -> np.ndarray:
+        row = self.subject_rows.get(subject)
+        return self.subject_vectors[row] if row is not None else self.vectorize(subject)
+
+    def recommend(self, weak_subjects: Union[Sequence[str], Dict[str, float]],
+                  study_hours_per_week: Optional[float] = None, k: int = 5,
+                  exclude: Iterable[str] = ()) -> List[Dict]:
+        """
+        Top-k courses for a student's weak subjects
+
+        Args:
+            weak_subjects: Subject codes (or names), or {subject: weakness 0..1}
+                from quiz results; weaker subjects weigh more and favour
+                easier courses
+            study_hours_per_week: Available study time; courses that would not
+                finish within HORIZON_WEEKS at this pace rank lower
+            k: Number of courses
+            exclude: Course URLs the student has already taken
+
+        Returns:
+            list of course dicts with score and the subject they address
+        """
+        if not isinstance(weak_subjects, dict):
+            weak_subjects = {subject: 1.0 for subject in weak_subjects}
+        if not weak_subjects or not self.courses:
+            return []
+
+        subjects = list(weak_subjects)
+        weakness = np.clip(np.array([float(weak_subjects[s]) for s in subjects]), 0.0, 1.0)
+        # (subjects x courses) relevance: cosine similarity plus a boost for curated matches
+        relevance = np.vstack([self._subject_vector(s) for s in subjects]) @ self.course_vectors.T
+        for i, subject in enumerate(subjects):
+            rows = self.by_subject.get(subject)
+            if rows is not None:
+                relevance[i, rows] += CURATED_MATCH
+
+        # Weaker subjects want easier courses: 1 -> Beginner, 0 -> Advanced
+        target_difficulty = np.rint((1.0 - weakness) * (len(DIFFICULTIES) - 1))
+        difficulty_fit = np.where(
+            self.difficulty[None, :] < 0, 0.0,
+            DIFFICULTY_MATCH * (1.0 - np.abs(self.difficulty[None, :] - target_difficulty[:, None]) / 2))
+        scores = (relevance + difficulty_fit * (relevance > 0)) * (0.5 + weakness[:, None])
+
+        best_subject = scores.argmax(axis=0)
+        course_scores = scores[best_subject, np.arange(len(self.courses))]
+        if study_hours_per_week:
+            course_scores = course_scores * self._time_fit(float(study_hours_per_week))
+        excluded = set(exclude)
+        if excluded:
+            course_scores = np.where([c.get('url') in excluded for c in self.courses], 0.0, course_scores)
+        # Keep only the best-scoring listing of each URL
+        order = np.lexsort((-course_scores, self.url_group))
+        best_listing = order[np.r_[True, self.url_group[order][1:] != self.url_group[order][:-1]]]
+        best = np.zeros(len(course_scores), dtype=bool)
+        best[best_listing] = True
+        course_scores = np.where(best, course_scores, 0.0)
+
+        k = min(k, int((course_scores > 0).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-course_scores, k - 1)[:k]
+        top = top[np.argsort(-course_scores[top], kind='stable')]
+
+        results = []
+        for row in top:
+            course = self.courses[row]
+            subject = subjects[best_subject[row]]
+            results.append({
+                "subjectCode": course['subjectCode'],
+                "subjectName": course['subjectName'],
+                "platform": course.get('platform'),
+                "title": course['title'],
+                "url": course.get('url'),
+                "instructor": course.get('instructor'),
+                "difficulty": course.get('difficulty'),
+                "duration": course.get('duration'),
+                "score": round(float(course_scores[row]), 4),
+                "forSubject": subject
+            })
+        return results
+
+    def _time_fit(self, hours_per_week: float) -> np.ndarray:
+        """1 when a course fits the horizon at this pace, decaying as it runs over"""
+        weeks_needed = self.duration_hours / max(hours_per_week, 0.1)
+        overrun = np.maximum(weeks_needed - HORIZON_WEEKS, 0.0) / HORIZON_WEEKS
+        return np.where(np.isnan(weeks_needed), 0.8, 1.0 / (1.0 + overrun))
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def save(self, path: str = DEFAULT_SNAPSHOT) -> str:
+        """Write an .npz snapshot (atomic)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "sourceHash": self.source_hash,
+            "courses": self.courses,
+            "vocabulary": self.vocabulary,
+            "subjects": self.subject_names,
+        }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, course_vectors=self.course_vectors, idf=self.idf,
+                 subject_vectors=self.subject_vectors,
+                 meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SNAPSHOT) -> 'CourseRecommender':
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if meta.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported course index snapshot version: {meta.get('version')}")
+            return cls(meta['courses'], data['course_vectors'], meta['vocabulary'], data['idf'],
+                       meta['subjects'], data['subject_vectors'], meta['sourceHash'])
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def load_or_build(snapshot_path: Optional[str] = DEFAULT_SNAPSHOT, data_dir: str = DATA_DIR) -> CourseRecommender:
+    """Load the snapshot if it matches the current catalog, otherwise rebuild and rewrite it"""
+    source_hash = catalog_hash(data_dir)
+    if snapshot_path and os.path.exists(snapshot_path):
+        try:
+            recommender = CourseRecommender.load(snapshot_path)
+            if recommender.source_hash == source_hash:
+                return recommender
+            print("🔄 Course catalog changed, rebuilding the recommendation index")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not load course index snapshot, rebuilding: {e}")
+
+    recommender = CourseRecommender.build(data_dir)
+    if snapshot_path:
+        try:
+            recommender.save(snapshot_path)
+        except OSError as e:
+            print(f"⚠️ Could not write course index snapshot: {e}")
+    return recommender
+
+
+_default_recommender: Optional[CourseRecommender] = None
+_default_lock = threading.Lock()
+
+
+def get_default_recommender() -> CourseRecommender:
+    """
+    Process-wide recommender
+
+    Uses the snapshot at HABITGUARD_COURSE_INDEX or models/course_index.npz when
+    one exists (refreshing it if the catalog changed), else builds in memory.
+    """
+    global _default_recommender
+    if _default_recommender is None:
+        with _default_lock:
+            if _default_recommender is None:
+                path = os.environ.get('HABITGUARD_COURSE_INDEX', DEFAULT_SNAPSHOT)
+                _default_recommender = load_or_build(path if os.path.exists(path) else None)
+    return _default_recommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📚 HabitGuard course recommendations')
+    parser.add_argument('--weak', nargs='*', default=[], help='Weak subject codes or names')
+    parser.add_argument('--hours', type=float, default=None, help='Available study hours per week')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT)
+    parser.add_argument('--build-snapshot', metavar='PATH', help='Rebuild the index snapshot and exit')
+    args = parser.parse_args()
+
+    if args.build_snapshot:
+        path = CourseRecommender.build(args.data_dir).save(args.build_snapshot)
+        print(f"✅ Wrote course index snapshot to {path}")
+        return
+
+    recommender = load_or_build(args.snapshot, args.data_dir)
+    for i, course in enumerate(recommender.recommend(args.weak, args.hours, args.k), 1):
+        print(f"{i}. [{course['forSubject']}] {course['title']} ({course['platform']}, "
+              f"{course['difficulty']}, {course['duration']}) score={course['score']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Category Feature Pipeline
+====================================
+
+Turns raw app usage into the ``(N, 10)`` category-hours matrix that
+``NeuralUsagePredictor`` expects (``social_media_hours`` ... ``other_hours``).
+
+- ``CategoryLookup``: precompiled package -> category table; an exact dict for
+  known packages plus a dot-segment prefix trie (``com.supercell.*``) for
+  unknown ones, longest prefix wins
+- Packages are factorized first, so each distinct package is classified once
+  no matter how many rows mention it
+- Per (userId, date) category hours are accumulated with one ``np.bincount``
+
+Accepted inputs:
+    long format:  userId, date, packageName, usageTime (ms)
+    app CSV:      date, totalScreenTime, topAppPackage, topAppTime, ...
+                  (top app time goes to its category, the rest to other_hours)
+
+Usage:
+    features = build_category_features(df)
+    predictions = NeuralUsagePredictor().predict_batch(features.matrix)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+USER_COLUMN = 'userId'
+MS_PER_HOUR = 1000 * 60 * 60
+
+# Order matches NeuralUsagePredictor.feature_names
+CATEGORIES = [
+    'social_media',
+    'entertainment',
+    'productivity',
+    'communication',
+    'gaming',
+    'browsing',
+    'education',
+    'shopping',
+    'news',
+    'other',
+]
+FEATURE_NAMES = [f"{category}_hours" for category in CATEGORIES]
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+OTHER_CODE = CATEGORY_CODES['other']
+
+# Known packages: exact matches
+DEFAULT_PACKAGE_CATEGORIES: Dict[str, str] = {
+    'com.instagram.android': 'social_media',
+    'com.facebook.katana': 'social_media',
+    'com.facebook.lite': 'social_media',
+    'com.zhiliaoapp.musically': 'social_media',
+    'com.ss.android.ugc.trill': 'social_media',
+    'com.snapchat.android': 'social_media',
+    'com.twitter.android': 'social_media',
+    'com.reddit.frontpage': 'social_media',
+    'com.pinterest': 'social_media',
+    'com.linkedin.android': 'social_media',
+    'com.bereal.ft': 'social_media',
+    'com.google.android.youtube': 'entertainment',
+    'com.netflix.mediaclient': 'entertainment',
+    'com.spotify.music': 'entertainment',
+    'com.amazon.avod.thirdpartyclient': 'entertainment',
+    'in.startv.hotstar': 'entertainment',
+    'tv.twitch.android.app': 'entertainment',
+    'com.whatsapp': 'communication',
+    'com.whatsapp.w4b': 'communication',
+    'org.telegram.messenger': 'communication',
+    'com.facebook.orca': 'communication',
+    'com.discord': 'communication',
+    'com.google.android.gm': 'communication',
+    'com.google.android.apps.messaging': 'communication',
+    'com.skype.raider': 'communication',
+    'us.zoom.videomeetings': 'communication',
+    'com.android.chrome': 'browsing',
+    'org.mozilla.firefox': 'browsing',
+    'com.opera.browser': 'browsing',
+    'com.brave.browser': 'browsing',
+    'com.microsoft.emmx': 'browsing',
+    'com.sec.android.app.sbrowser': 'browsing',
+    'com.google.android.apps.docs': 'productivity',
+    'com.google.android.calendar': 'productivity',
+    'com.google.android.keep': 'productivity',
+    'com.microsoft.teams': 'productivity',
+    'com.notion.id': 'productivity',
+    'com.todoist': 'productivity',
+    'com.evernote': 'productivity',
+    'com.duolingo': 'education',
+    'org.khanacademy.android': 'education',
+    'com.coursera.android': 'education',
+    'com.udemy.android': 'education',
+    'co.gradeup.android': 'education',
+    'com.byjus.thelearningapp': 'education',
+    'com.google.android.apps.classroom': 'education',
+    'com.amazon.mShop.android.shopping': 'shopping',
+    'com.flipkart.android': 'shopping',
+    'com.myntra.android': 'shopping',
+    'com.ebay.mobile': 'shopping',
+    'com.google.android.apps.magazines': 'news',
+    'com.nytimes.android': 'news',
+    'bbc.mobile.news.ww': 'news',
+    'com.inshorts.app': 'news',
+    'com.tencent.ig': 'gaming',
+    'com.pubg.imobile': 'gaming',
+    'com.dts.freefireth': 'gaming',
+    'com.king.candycrushsaga': 'gaming',
+    'com.roblox.client': 'gaming',
+    'com.mojang.minecraftpe': 'gaming',
+}
+
+# Publisher / namespace prefixes for packages not in the exact table
+DEFAULT_PREFIX_CATEGORIES: Dict[str, str] = {
+    'com.facebook': 'social_media',
+    'com.instagram': 'social_media',
+    'com.snapchat': 'social_media',
+    'com.netflix': 'entertainment',
+    'com.spotify': 'entertainment',
+    'com.google.android.youtube': 'entertainment',
+    'com.whatsapp': 'communication',
+    'org.telegram': 'communication',
+    'com.microsoft.office': 'productivity',
+    'com.google.android.apps.docs': 'productivity',
+    'com.adobe': 'productivity',
+    'com.supercell': 'gaming',
+    'com.king': 'gaming',
+    'com.rovio': 'gaming',
+    'com.gameloft': 'gaming',
+    'com.miniclip': 'gaming',
+    'com.activision': 'gaming',
+    'com.ea': 'gaming',
+    'com.tencent.ig': 'gaming',
+    'com.amazon.mShop': 'shopping',
+    'com.flipkart': 'shopping',
+    'com.coursera': 'education',
+    'com.duolingo': 'education',
+    'com.nytimes': 'news',
+    'bbc.mobile.news': 'news',
+}
+
+
+class CategoryLookup:
+    """Precompiled package -> category code table (exact dict + prefix trie)"""
+
+    def __init__(self, packages: Optional[Dict[str, str]] = None, prefixes: Optional[Dict[str, str]] = None):
+        self._exact: Dict[str, int] = {}
+        self._trie: Dict = {}
+        self.update(DEFAULT_PACKAGE_CATEGORIES if packages is None else packages,
+                    DEFAULT_PREFIX_CATEGORIES if prefixes is None else prefixes)
+
+    def update(self, packages: Optional[Dict[str, str]] = None, prefixes: Optional[Dict[str, str]] = None) -> None:
+        """Add exact package and prefix rules"""
+        for package, category in (packages or {}).items():
+            self._exact[package] = CATEGORY_CODES.get(category, OTHER_CODE)
+        for prefix, category in (prefixes or {}).items():
+            node = self._trie
+            for segment in prefix.split('.'):
+                node = node.setdefault(segment, {})
+            node[None] = CATEGORY_CODES.get(category, OTHER_CODE)
+
+    def code(self, package: str) -> int:
+        """Category code for one package: exact match, else longest known prefix, else other"""
+        code = self._exact.get(package)
+        if code is not None:
+            return code
+        node = self._trie
+        code = OTHER_CODE
+        for segment in package.split('.'):
+            node = node.get(segment)
+            if node is None:
+                break
+            code = node.get(None, code)
+        return code
+
+    def category(self, package: str) -> str:
+        """Category name for one package"""
+        return CATEGORIES[self.code(package)]
+
+    def codes(self, packages) -> np.ndarray:
+        """Vectorized category codes; each distinct package is classified once"""
+        uniques_idx, uniques = pd.factorize(pd.Series(packages, dtype=object).fillna(''), sort=False)
+        table = np.fromiter((self.code(p) for p in uniques), dtype=np.int8, count=len(uniques))
+        return table[uniques_idx]
+
+
+@dataclass
+class CategoryFeatures:
+    """Category hours matrix with the (userId, date) key of each row"""
+    keys: pd.DataFrame
+    matrix: np.ndarray
+
+    @property
+    def feature_names(self) -> List[str]:
+        return FEATURE_NAMES
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.concat([self.keys.reset_index(drop=True),
+                          pd.DataFrame(self.matrix, columns=FEATURE_NAMES)], axis=1)
+
+    def row_dict(self, i: int) -> Dict[str, float]:
+        """One row as the dict NeuralUsagePredictor.predict() accepts"""
+        return {name: float(value) for name, value in zip(FEATURE_NAMES, self.matrix[i])}
+
+
+def get_default_lookup():
+    """
+    Process-wide lookup: the shared package category index
+
+    Student restrictions and blocked-app suggestions read the same index, so
+    packages bulk-loaded there are classified consistently everywhere.
+    """
+    # Imported lazily: category_index seeds itself from the tables above
+    from category_index import get_default_index
+    return get_default_index()
+
+
+def _accumulate(keys: pd.DataFrame, codes: np.ndarray, hours: np.ndarray) -> CategoryFeatures:
+    """Sum hours into a (unique key, category) matrix with a single bincount"""
+    # Group ids in order of first appearance, matching drop_duplicates() order
+    key_idx = keys.groupby(list(keys.columns), sort=False).ngroup().to_numpy()
+    unique_keys = keys.drop_duplicates().reset_index(drop=True)
+    n_keys = len(unique_keys)
+    flat = np.bincount(key_idx * len(CATEGORIES) + codes.astype(np.int64),
+                       weights=hours, minlength=n_keys * len(CATEGORIES))
+    return CategoryFeatures(keys=unique_keys, matrix=flat.reshape(n_keys, len(CATEGORIES)))
+
+
+def build_category_features(df: pd.DataFrame, lookup: Optional[CategoryLookup] = None) -> CategoryFeatures:
+    """
+    Aggregate raw usage into per (userId, date) category hours
+
+    Args:
+        df: Long-format usage (packageName/usageTime) or the app's daily CSV
+        lookup: CategoryLookup or PackageCategoryIndex (default: shared index)
+
+    Returns:
+        CategoryFeatures with an (N, 10) matrix in FEATURE_NAMES order
+    """
+    lookup = lookup or get_default_lookup()
+    data = df if USER_COLUMN in df.columns else df.assign(**{USER_COLUMN: 0})
+    keys = pd.DataFrame({USER_COLUMN: data[USER_COLUMN].to_numpy(),
+                         'date': pd.to_datetime(data['date']).dt.normalize().to_numpy()})
+
+    if 'packageName' in data.columns:
+        hours = pd.to_numeric(data['usageTime'], errors='coerce').fillna(0).to_numpy(dtype=float) / MS_PER_HOUR
+        return _accumulate(keys, lookup.codes(data['packageName']), hours)
+
+    # App CSV: only the top app is known; attribute the remaining time to 'other'
+    total = pd.to_numeric(data['totalScreenTime'], errors='coerce').fillna(0).to_numpy(dtype=float) / MS_PER_HOUR
+    top = pd.to_numeric(data['topAppTime'], errors='coerce').fillna(0).to_numpy(dtype=float) / MS_PER_HOUR
+    top = np.minimum(top, total)
+    codes = np.concatenate([lookup.codes(data['topAppPackage']), np.full(len(data), OTHER_CODE, dtype=np.int8)])
+    return _accumulate(pd.concat([keys, keys], ignore_index=True), codes, np.concatenate([top, total - top]))
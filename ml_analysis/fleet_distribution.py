@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Fleet Distribution
+=============================
+
+Where a user stands relative to peers: fleet-wide distributions of daily
+screen time per day of week and cohort, kept as mergeable quantile sketches.
+
+- ``TDigest``: a merging t-digest (k1 scale function) in numpy. A few hundred
+  centroids summarize any number of days with tight error in the tails; two
+  digests merge by concatenating centroids and recompressing
+- ``FleetDistribution``: one digest per ``cohort:dayOfWeek`` key (plus
+  ``cohort:all``); ``update`` adds new days incrementally, ``merge`` combines
+  shards built by different workers
+- ``percentile`` is one binary search over the centroids (O(log k)) and never
+  touches other users' rows
+
+Publish with ``python fleet_distribution.py build --csv fleet.csv``; the
+analysis service picks up ``models/fleet_distribution.json`` when present.
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from forecast_features import app_day_of_week
+
+USER_COLUMN = 'userId'
+COHORT_COLUMN = 'cohort'
+ALL = 'all'
+DEFAULT_COMPRESSION = 200
+DISTRIBUTION_FILE = 'fleet_distribution.json'
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+_loaded: Dict[str, tuple] = {}
+_loaded_lock = threading.Lock()
+
+
+class TDigest:
+    """Mergeable quantile sketch of a stream of values"""
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION, buffer_size: int = 4096):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer: List[tuple] = []
+        self._buffered = 0
+        self._points = None
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + sum(float(w.sum()) for _, w in self._buffer)
+
+    def update(self, values) -> 'TDigest':
+        """Add raw values (NaNs are ignored)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._add(values, np.ones(len(values)))
+        return self
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Fold another digest (e.g. another worker's shard) into this one"""
+        other._compress()
+        if len(other.means):
+            self._add(other.means, other.weights)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def _add(self, means: np.ndarray, weights: np.ndarray) -> None:
+        self._buffer.append((means, weights))
+        self._buffered += len(means)
+        self._points = None
+        self.min = min(self.min, float(means.min()))
+        self.max = max(self.max, float(means.max()))
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        """Merge buffered points into centroids so each spans at most one unit of k1 scale"""
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [m for m, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        # k1(q) = d / 2pi * asin(2q - 1): narrow clusters at the tails, wide in the middle
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        cluster = np.r_[0, np.cumsum(np.diff(cluster) != 0)]
+
+        merged_weights = np.bincount(cluster, weights)
+        self.means = np.bincount(cluster, weights * means) / merged_weights
+        self.weights = merged_weights
+
+    def _interpolation_points(self):
+        """(values, cumulative weights) knots, cached so lookups are a single binary search"""
+        self._compress()
+        if self._points is None:
+            cumulative = np.cumsum(self.weights)
+            xs = np.r_[self.min, self.means, self.max]
+            cs = np.r_[0.0, cumulative - self.weights / 2, cumulative[-1]]
+            self._points = (xs, cs)
+        return self._points
+
+    def cdf(self, x) -> np.ndarray:
+        """Fraction of values <= x"""
+        if not len(self.means) and not self._buffer:
+            return np.full(np.shape(x), np.nan)
+        xs, cs = self._interpolation_points()
+        return np.interp(x, xs, cs) / cs[-1]
+
+    def quantile(self, q) -> np.ndarray:
+        """Value at quantile q (0..1)"""
+        if not len(self.means) and not self._buffer:
+            return np.full(np.shape(q), np.nan)
+        xs, cs = self._interpolation_points()
+        return np.interp(np.asarray(q) * cs[-1], cs, xs)
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "min": self.min if len(self.means) else None,
+            "max": self.max if len(self.means) else None,
+            "means": self.means.round(6).tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'TDigest':
+        digest = cls(compression=state.get("compression", DEFAULT_COMPRESSION))
+        digest.means = np.asarray(state.get("means", []), dtype=float)
+        digest.weights = np.asarray(state.get("weights", []), dtype=float)
+        if len(digest.means):
+            digest.min, digest.max = float(state["min"]), float(state["max"])
+        return digest
+
+
+def _daily_hours(df: pd.DataFrame) -> pd.DataFrame:
+    """cohort, dayOfWeek and hours per row"""
+    if 'screenTimeHours' in df.columns:
+        hours = pd.to_numeric(df['screenTimeHours'], errors='coerce')
+    else:
+        hours = pd.to_numeric(df['totalScreenTime'], errors='coerce') / (1000 * 60 * 60)
+    dow = df['dayOfWeek'].to_numpy() if 'dayOfWeek' in df.columns else app_day_of_week(df['date'])
+    cohort = df[COHORT_COLUMN].astype(str).to_numpy() if COHORT_COLUMN in df.columns else ALL
+    return pd.DataFrame({'cohort': cohort, 'dayOfWeek': dow, 'hours': hours.to_numpy()}).dropna()
+
+
+class FleetDistribution:
+    """Per-cohort, per-day-of-week t-digests of daily screen time"""
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.sketches: Dict[str, TDigest] = {}
+
+    @staticmethod
+    def key(cohort: str = ALL, day_of_week: Optional[int] = None) -> str:
+        return f"{cohort}:{ALL if day_of_week is None else int(day_of_week)}"
+
+    def _sketch(self, key: str) -> TDigest:
+        if key not in self.sketches:
+            self.sketches[key] = TDigest(self.compression)
+        return self.sketches[key]
+
+    def update(self, df: pd.DataFrame) -> 'FleetDistribution':
+        """Add usage rows (any number of users; optional cohort column)"""
+        rows = _daily_hours(df)
+        for (cohort, dow), hours in rows.groupby(['cohort', 'dayOfWeek'])['hours']:
+            values = hours.to_numpy()
+            self._sketch(self.key(cohort, dow)).update(values)
+            self._sketch(self.key(cohort)).update(values)
+            # Named cohorts also feed the fleet-wide sketches
+            if cohort != ALL:
+                self._sketch(self.key(ALL, dow)).update(values)
+                self._sketch(self.key(ALL)).update(values)
+        return self
+
+    def merge(self, other: 'FleetDistribution') -> 'FleetDistribution':
+        for key, sketch in other.sketches.items():
+            self._sketch(key).merge(sketch)
+        return self
+
+    def percentile(self, hours: float, day_of_week: Optional[int] = None, cohort: str = ALL) -> Optional[float]:
+        """Share of the cohort's days (0-100) with at most this much screen time"""
+        sketch = self.sketches.get(self.key(cohort, day_of_week)) or self.sketches.get(self.key(ALL, day_of_week))
+        if sketch is None or np.isnan(hours):
+            return None
+        return float(sketch.cdf(hours) * 100)
+
+    def user_percentiles(self, df: pd.DataFrame, cohort: Optional[str] = None) -> Dict:
+        """The user's average daily and per-weekday screen time as fleet percentiles"""
+        rows = _daily_hours(df)
+        if len(rows) == 0:
+            return {"error": "No data available for percentiles"}
+        cohort = cohort or (rows['cohort'].iloc[0] if COHORT_COLUMN in df.columns else ALL)
+
+        by_day = {}
+        for dow, hours in rows.groupby('dayOfWeek')['hours'].mean().items():
+            percentile = self.percentile(hours, dow, cohort)
+            if percentile is not None:
+                by_day[DAY_NAMES[int(dow)]] = percentile
+
+        overall = self.sketches.get(self.key(cohort)) or self.sketches.get(self.key(ALL))
+        return {
+            "cohort": cohort,
+            "overall": self.percentile(rows['hours'].mean(), cohort=cohort),
+            "byDayOfWeek": by_day,
+            "fleetMedianHours": float(overall.quantile(0.5)) if overall is not None else None,
+            "fleetDays": int(overall.count) if overall is not None else 0
+        }
+
+    def to_dict(self) -> Dict:
+        return {"compression": self.compression,
+                "sketches": {key: sketch.to_dict() for key, sketch in sorted(self.sketches.items())}}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'FleetDistribution':
+        distribution = cls(state.get("compression", DEFAULT_COMPRESSION))
+        distribution.sketches = {key: TDigest.from_dict(sketch) for key, sketch in state.get("sketches", {}).items()}
+        return distribution
+
+    def save(self, path: str) -> str:
+        """Write atomically so readers never see a partial file"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'FleetDistribution':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_distribution(models_dir: str = 'models') -> Optional[FleetDistribution]:
+    """Load the published distribution once per process (reloaded when the file changes)"""
+    path = os.path.join(models_dir, DISTRIBUTION_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, FleetDistribution.load(path))
+            _loaded[path] = cached
+    return cached[1]
+
+
+def _build_shard(args) -> Dict:
+    df, compression = args
+    return FleetDistribution(compression).update(df).to_dict()
+
+
+def build_sharded(df: pd.DataFrame, shards: int = 1, compression: float = DEFAULT_COMPRESSION) -> FleetDistribution:
+    """Build per-shard sketches (partitioned by user) in worker processes and merge them"""
+    if shards <= 1 or USER_COLUMN not in df.columns:
+        return FleetDistribution(compression).update(df)
+    parts = [(part, compression) for _, part in df.groupby(df[USER_COLUMN].astype('int64') % shards)]
+    distribution = FleetDistribution(compression)
+    with ProcessPoolExecutor(max_workers=shards) as pool:
+        for state in pool.map(_build_shard, parts):
+            distribution.merge(FleetDistribution.from_dict(state))
+    return distribution
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or merge HabitGuard fleet distributions')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Sketch a fleet usage export')
+    build.add_argument('--csv', required=True)
+    build.add_argument('--shards', type=int, default=1)
+    build.add_argument('--compression', type=float, default=DEFAULT_COMPRESSION)
+    build.add_argument('--update', action='store_true', help='Add to the existing distribution instead of replacing it')
+    build.add_argument('--output', default=os.path.join('models', DISTRIBUTION_FILE))
+
+    merge = sub.add_parser('merge', help='Merge shard files')
+    merge.add_argument('inputs', nargs='+')
+    merge.add_argument('--output', default=os.path.join('models', DISTRIBUTION_FILE))
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        df = pd.read_csv(args.csv).rename(columns={'u_id': USER_COLUMN})
+        distribution = build_sharded(df, args.shards, args.compression)
+        if args.update and os.path.exists(args.output):
+            distribution = FleetDistribution.load(args.output).merge(distribution)
+    else:
+        distribution = FleetDistribution.load(args.inputs[0])
+        for path in args.inputs[1:]:
+            distribution.merge(FleetDistribution.load(path))
+
+    distribution.save(args.output)
+    overall = distribution.sketches.get(FleetDistribution.key())
+    print(f"✅ Wrote {len(distribution.sketches)} sketches to {args.output} "
+          f"({int(overall.count) if overall else 0:,} days, median {float(overall.quantile(0.5)) if overall else 0:.2f}h)")
+
+
+if __name__ == "__main__":
+    main()
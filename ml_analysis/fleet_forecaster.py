@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Fleet Forecaster
+===========================
+
+One screen-time forecasting model trained offline across all users, instead
+of a 100-tree forest fitted on a single user's 7+ rows inside every request.
+
+- Features are normalized per user (ratios to the user's own mean), so heavy
+  and light users share one model: day-of-week profile, lags 1/7/14, rolling
+  means/std and EWMA from ``forecast_features``, plus the target day's
+  dayOfWeek/isWeekend, the user's mean appCount and the forecast horizon
+- Direct multi-horizon: one row per future day, so a 7-day forecast is a
+  single ``predict`` call
+- Trained with ``HistGradientBoostingRegressor`` (handles missing day-of-week
+  history natively) and published through ``model_registry.publish_model``
+- Online requests only compute one user's features and call ``forecast``
+
+Usage:
+    python fleet_forecaster.py train --csv fleet_usage.csv --models-dir models --version 1
+    python fleet_forecaster.py compare --csv fleet_usage.csv
+    python fleet_forecaster.py compare --synthetic-users 300 --days 60
+"""
+
+import argparse
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from sklearn.preprocessing import StandardScaler
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+from forecast_features import app_day_of_week, build_features
+from model_registry import publish_model
+
+USER_COLUMN = 'userId'
+MODEL_NAME = 'fleet_forecaster'
+MS_PER_HOUR = 1000 * 60 * 60
+MAX_HORIZON = 7
+MIN_HISTORY_DAYS = 7
+
+# History features from forecast_features, normalized by the user's mean
+HOURS_LAGS = (1, 7, 14)
+HOURS_WINDOWS = (7, 14)
+HOURS_SPANS = (7,)
+
+FEATURE_COLUMNS = [
+    'horizon',
+    'dayOfWeek',
+    'isWeekend',
+    'userMeanHours',
+    'userMeanAppCount',
+    'dowRatio',
+    'lastRatio',
+    'lag7Ratio',
+    'lag14Ratio',
+    'recent7Ratio',
+    'recent14Ratio',
+    'std7Ratio',
+    'ewma7Ratio',
+]
+
+
+def prepare_usage(df: pd.DataFrame) -> pd.DataFrame:
+    """userId/date/hours/appCount frame sorted by user and date"""
+    data = df if USER_COLUMN in df.columns else df.assign(**{USER_COLUMN: 0})
+    if 'hours' in data.columns:
+        hours = data['hours']
+    elif 'screenTimeHours' in data.columns:
+        hours = data['screenTimeHours']
+    else:
+        hours = pd.to_numeric(data['totalScreenTime'], errors='coerce') / MS_PER_HOUR
+    usage = pd.DataFrame({
+        USER_COLUMN: data[USER_COLUMN].to_numpy(),
+        'date': pd.to_datetime(data['date']).dt.normalize().to_numpy(),
+        'hours': hours.to_numpy(dtype=float),
+        'appCount': pd.to_numeric(data['appCount'], errors='coerce').to_numpy(dtype=float),
+    }).dropna(subset=['hours'])
+    return usage.sort_values([USER_COLUMN, 'date'], kind='mergesort').reset_index(drop=True)
+
+
+def origin_state(usage: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per (user, day) history summary using only data up to and including that day
+
+    Lag/rolling/EWMA/day-of-week columns from the feature engine plus app_mean
+    """
+    state = build_features(usage, 'hours', lags=HOURS_LAGS, windows=HOURS_WINDOWS, spans=HOURS_SPANS)
+    state['app_mean'] = build_features(usage, 'appCount', lags=(), windows=(), spans=())['expanding_mean']
+    return state
+
+
+def horizon_features(state: pd.DataFrame, target_dates: np.ndarray, origin_rows: np.ndarray) -> pd.DataFrame:
+    """Feature rows for forecasting target_dates from the given origin rows of ``state``"""
+    origin = state.iloc[origin_rows]
+    target_dates = pd.DatetimeIndex(target_dates)
+    horizon = np.clip((target_dates - pd.DatetimeIndex(origin['date'])).days.to_numpy(), 1, MAX_HORIZON)
+    dow = app_day_of_week(target_dates)
+    dow_means = origin[[f'dow_mean_{d}' for d in range(7)]].to_numpy()
+    mean = origin['expanding_mean'].to_numpy()
+    safe_mean = np.where(mean > 0, mean, np.nan)
+
+    def ratio(column: str) -> np.ndarray:
+        return origin[column].to_numpy() / safe_mean
+
+    return pd.DataFrame({
+        'horizon': horizon,
+        'dayOfWeek': dow,
+        'isWeekend': np.isin(dow, (0, 6)).astype(int),
+        'userMeanHours': mean,
+        'userMeanAppCount': origin['app_mean'].to_numpy(),
+        'dowRatio': dow_means[np.arange(len(origin)), dow] / safe_mean,
+        'lastRatio': ratio('lag_1'),
+        'lag7Ratio': ratio('lag_7'),
+        'lag14Ratio': ratio('lag_14'),
+        'recent7Ratio': ratio('roll_mean_7'),
+        'recent14Ratio': ratio('roll_mean_14'),
+        'std7Ratio': ratio('roll_std_7'),
+        'ewma7Ratio': ratio('ewma_7'),
+    }, columns=FEATURE_COLUMNS)
+
+
+def build_training_set(usage: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Direct multi-horizon training rows: every origin day x every target 1..7 days later
+
+    Returns:
+        (features, normalized target, origin user mean, origin date) arrays
+    """
+    state = origin_state(usage)
+    users = usage[USER_COLUMN].to_numpy()
+    dates = usage['date'].to_numpy()
+    hours = usage['hours'].to_numpy()
+    n = len(usage)
+
+    origins, targets = [], []
+    for step in range(1, MAX_HORIZON + 1):
+        origin_rows = np.arange(n - step)
+        target_rows = origin_rows + step
+        days_ahead = (dates[target_rows] - dates[origin_rows]) / np.timedelta64(1, 'D')
+        valid = ((users[target_rows] == users[origin_rows]) & (days_ahead >= 1) & (days_ahead <= MAX_HORIZON)
+                 & (state['n_days'].to_numpy()[origin_rows] >= MIN_HISTORY_DAYS))
+        origins.append(origin_rows[valid])
+        targets.append(target_rows[valid])
+    origin_rows = np.concatenate(origins)
+    target_rows = np.concatenate(targets)
+
+    features = horizon_features(state, dates[target_rows], origin_rows)
+    mean = state['expanding_mean'].to_numpy()[origin_rows]
+    keep = mean > 0
+    return (features[keep].reset_index(drop=True), hours[target_rows][keep] / mean[keep],
+            mean[keep], dates[origin_rows][keep])
+
+
+class FleetForecaster:
+    """Global screen-time forecaster shared by every user"""
+
+    def __init__(self, max_iter: int = 300, learning_rate: float = 0.05, random_state: int = 42):
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.random_state = random_state
+        self.model = None
+        self.feature_columns: List[str] = []
+        self.metrics: Dict[str, float] = {}
+        self.trained_at: Optional[str] = None
+        self.n_users = 0
+        self.n_rows = 0
+
+    def _new_model(self):
+        return HistGradientBoostingRegressor(max_iter=self.max_iter, learning_rate=self.learning_rate,
+                                             random_state=self.random_state)
+
+    def fit(self, df: pd.DataFrame, validation_days: int = 14) -> 'FleetForecaster':
+        """
+        Train on a multi-user export; the last validation_days of origins are
+        held out to score the model before it is refit on everything
+        """
+        if not SKLEARN_AVAILABLE:
+            raise RuntimeError("scikit-learn not installed. Install with: pip install scikit-learn")
+        usage = prepare_usage(df)
+        X, y, mean, origin_dates = build_training_set(usage)
+        if len(X) == 0:
+            raise ValueError(f"Need users with more than {MIN_HISTORY_DAYS} days of history")
+
+        cutoff = origin_dates.max() - np.timedelta64(validation_days, 'D')
+        holdout = origin_dates > cutoff
+        if holdout.any() and (~holdout).any():
+            scorer = self._new_model().fit(X[~holdout], y[~holdout])
+            predicted = scorer.predict(X[holdout]) * mean[holdout]
+            actual = y[holdout] * mean[holdout]
+            self.metrics = {
+                'mean_absolute_error_hours': float(mean_absolute_error(actual, predicted)),
+                'r2_score': float(r2_score(actual, predicted)),
+                'validation_rows': int(holdout.sum()),
+            }
+
+        self.model = self._new_model().fit(X, y)
+        self.feature_columns = list(FEATURE_COLUMNS)
+        self.trained_at = datetime.now().isoformat()
+        self.n_users = int(usage[USER_COLUMN].nunique())
+        self.n_rows = int(len(X))
+        return self
+
+    def forecast(self, history: pd.DataFrame, dates: Sequence) -> np.ndarray:
+        """
+        Forecast screen time hours for one user's future dates in one predict
+
+        Args:
+            history: One user's rows (date, totalScreenTime or screenTimeHours, appCount)
+            dates: Future dates to forecast
+
+        Returns:
+            np.ndarray of non-negative hours, one per date
+        """
+        if self.model is None:
+            raise RuntimeError("FleetForecaster is not trained")
+        if self.feature_columns != FEATURE_COLUMNS:
+            raise RuntimeError("FleetForecaster was trained with different features; retrain it")
+        usage = prepare_usage(history.drop(columns=[USER_COLUMN], errors='ignore'))
+        state = origin_state(usage)
+        last = len(state) - 1
+        target_dates = pd.to_datetime(pd.Series(dates)).dt.normalize().to_numpy()
+        X = horizon_features(state, target_dates, np.full(len(target_dates), last))
+        return np.maximum(self.model.predict(X) * state['expanding_mean'].iloc[last], 0.0)
+
+    def backtest_residuals(self, history: pd.DataFrame,
+                           days: Optional[int] = 91) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Errors of 1..7-day forecasts made from each of the user's last `days` days
+        (all of them if None); recent errors matter most and the cost stays bounded
+
+        Returns:
+            (origin dates, horizons in days, actual - forecast hours) arrays
+        """
+        if self.model is None:
+            raise RuntimeError("FleetForecaster is not trained")
+        usage = prepare_usage(history.drop(columns=[USER_COLUMN], errors='ignore'))
+        X, y, mean, origin_dates = build_training_set(usage)
+        if days is not None and len(X):
+            recent = origin_dates > origin_dates.max() - np.timedelta64(days, 'D')
+            X, y, mean, origin_dates = X[recent], y[recent], mean[recent], origin_dates[recent]
+        if len(X) == 0:
+            return origin_dates, np.empty(0, dtype=np.int64), np.empty(0)
+        # Same clipping as forecast(), so residuals describe what the user is shown
+        predicted = np.maximum(self.model.predict(X), 0.0) * mean
+        return origin_dates, X['horizon'].to_numpy(), y * mean - predicted
+
+
+# ----------------------------------------------------------------------
+# Loading for online use
+# ----------------------------------------------------------------------
+
+_FILENAME = re.compile(rf'^{MODEL_NAME}(?:\.v(\d+))?\.pkl$')
+_loaded: Dict[str, Tuple[float, FleetForecaster]] = {}
+_loaded_lock = threading.Lock()
+
+
+def latest_model_path(models_dir: str = 'models') -> Optional[str]:
+    """Highest published version of the fleet forecaster, if any"""
+    try:
+        candidates = [(int(m.group(1) or 0), name) for name in os.listdir(models_dir)
+                      if (m := _FILENAME.match(name))]
+    except OSError:
+        return None
+    return os.path.join(models_dir, max(candidates)[1]) if candidates else None
+
+
+def load_latest(models_dir: str = 'models') -> Optional[FleetForecaster]:
+    """Load the newest published forecaster once per process (reloaded when the file changes)"""
+    path = latest_model_path(models_dir)
+    if path is None:
+        return None
+    import pickle
+    mtime = os.path.getmtime(path)
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, pickle.load(f))
+            _loaded[path] = cached
+    return cached[1]
+
+
+# ----------------------------------------------------------------------
+# Offline comparison against the per-request forest
+# ----------------------------------------------------------------------
+
+def per_request_forest(history: pd.DataFrame, dates: Sequence) -> np.ndarray:
+    """The analyzer's original approach: fit a forest on one user's rows, then predict"""
+    usage = prepare_usage(history)
+    dow = app_day_of_week(usage['date'])
+    start = usage['date'].min()
+    X = np.column_stack([dow, usage['appCount'], np.isin(dow, (0, 6)), (usage['date'] - start).dt.days])
+    scaler = StandardScaler()
+    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    model.fit(scaler.fit_transform(X), usage['hours'])
+
+    future = pd.to_datetime(pd.Series(dates)).dt.normalize()
+    future_dow = app_day_of_week(future)
+    future_X = np.column_stack([future_dow, np.full(len(future), usage['appCount'].mean()),
+                                np.isin(future_dow, (0, 6)), (future - start).dt.days])
+    return np.maximum(model.predict(scaler.transform(future_X)), 0.0)
+
+
+def synthesize_fleet(users: int, days: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic multi-user export: per-user level, weekday profile, trend and AR(1) noise"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days)
+    dow = (dates.dayofweek.to_numpy() + 1) % 7
+    frames = []
+    for user in range(users):
+        level = np.clip(rng.lognormal(np.log(4.0), 0.45), 0.5, 14)
+        profile = 1 + rng.normal(0, 0.15, 7)
+        profile[[0, 6]] *= rng.uniform(1.0, 1.5)
+        noise = np.zeros(days)
+        for i in range(1, days):
+            noise[i] = 0.5 * noise[i - 1] + rng.normal(0, 0.15)
+        trend = 1 + rng.normal(0, 0.003) * np.arange(days)
+        hours = np.clip(level * profile[dow] * trend * np.exp(noise), 0.1, 20)
+        frames.append(pd.DataFrame({
+            USER_COLUMN: user,
+            'date': dates,
+            'totalScreenTime': (hours * MS_PER_HOUR).astype(np.int64),
+            'appCount': rng.poisson(8 + level, days),
+            'dayOfWeek': dow,
+            'isWeekend': np.isin(dow, (0, 6)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def compare_models(df: pd.DataFrame, sample_users: int = 200, holdout_days: int = MAX_HORIZON,
+                   seed: int = 42) -> Dict:
+    """
+    Hold out each user's last days, train the fleet model on the rest, and
+    compare accuracy and per-request latency with the per-request forest
+    """
+    usage = prepare_usage(df)
+    last_date = usage.groupby(USER_COLUMN)['date'].transform('max')
+    is_holdout = usage['date'] > last_date - pd.Timedelta(days=holdout_days)
+    train, test = usage[~is_holdout], usage[is_holdout]
+
+    fit_started = time.perf_counter()
+    fleet = FleetForecaster().fit(train)
+    fit_seconds = time.perf_counter() - fit_started
+
+    rng = np.random.default_rng(seed)
+    eligible = train.groupby(USER_COLUMN).size()
+    eligible = eligible[eligible >= MIN_HISTORY_DAYS].index.to_numpy()
+    chosen = rng.choice(eligible, size=min(sample_users, len(eligible)), replace=False)
+
+    train_by_user = dict(tuple(train.groupby(USER_COLUMN)))
+    test_by_user = dict(tuple(test.groupby(USER_COLUMN)))
+    errors = {'fleet': [], 'forest': []}
+    latency = {'fleet': [], 'forest': []}
+    actual_all = []
+    for user in chosen:
+        history, future = train_by_user[user], test_by_user.get(user)
+        if future is None or len(future) == 0:
+            continue
+        actual = future['hours'].to_numpy()
+        actual_all.append(actual)
+        for name, fn in (('fleet', fleet.forecast), ('forest', per_request_forest)):
+            started = time.perf_counter()
+            predicted = fn(history, future['date'])
+            latency[name].append((time.perf_counter() - started) * 1000)
+            errors[name].append(predicted - actual)
+
+    actual = np.concatenate(actual_all)
+    report = {'users': len(actual_all), 'fleet_fit_seconds': round(fit_seconds, 2), 'models': {}}
+    for name in ('fleet', 'forest'):
+        err = np.concatenate(errors[name])
+        report['models'][name] = {
+            'mae_hours': round(float(np.abs(err).mean()), 3),
+            'r2': round(float(1 - (err ** 2).sum() / ((actual - actual.mean()) ** 2).sum()), 3),
+            'latency_ms_p50': round(float(np.percentile(latency[name], 50)), 2),
+            'latency_ms_p95': round(float(np.percentile(latency[name], 95)), 2),
+        }
+    return report
+
+
+def _load_input(args) -> Optional[pd.DataFrame]:
+    if args.synthetic_users:
+        return synthesize_fleet(args.synthetic_users, args.days, args.seed)
+    from weekly_reports import load_fleet_usage
+    return load_fleet_usage(csv_file=args.csv)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📈 HabitGuard fleet forecaster')
+    parser.add_argument('command', choices=['train', 'compare'])
+    parser.add_argument('--csv', type=str, help='Multi-user usage export (userId,date,totalScreenTime,appCount,...)')
+    parser.add_argument('--synthetic-users', type=int, default=0, help='Use a synthetic fleet of this many users')
+    parser.add_argument('--days', type=int, default=60, help='Days per synthetic user')
+    parser.add_argument('--models-dir', type=str, default='models', help='Where to publish the model')
+    parser.add_argument('--version', type=int, default=None, help='Version number to publish')
+    parser.add_argument('--sample-users', type=int, default=200, help='Users timed in the comparison')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not SKLEARN_AVAILABLE:
+        print("❌ scikit-learn not installed. Install with: pip install scikit-learn")
+        return
+    df = _load_input(args)
+    if df is None:
+        parser.error("Provide --csv or --synthetic-users")
+
+    if args.command == 'train':
+        print(f"🤖 Training fleet forecaster on {df[USER_COLUMN].nunique()} users...")
+        forecaster = FleetForecaster().fit(df)
+        path = publish_model(forecaster, args.models_dir, MODEL_NAME, args.version)
+        print(f"✅ Trained on {forecaster.n_rows} rows; validation {forecaster.metrics}")
+        print(f"💾 Published to {path}")
+    else:
+        report = compare_models(df, sample_users=args.sample_users, seed=args.seed)
+        print(f"📊 {report['users']} users, fleet model fit in {report['fleet_fit_seconds']}s")
+        for name, stats in report['models'].items():
+            print(f"  {name:<6} MAE {stats['mae_hours']}h  R² {stats['r2']}  "
+                  f"latency p50 {stats['latency_ms_p50']}ms  p95 {stats['latency_ms_p95']}ms")
+
+
+if __name__ == "__main__":
+    main()
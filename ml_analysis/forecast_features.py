@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Forecast Feature Engine
+==================================
+
+Lag, rolling-window and day-of-week baseline features for screen-time
+forecasting, computed for many users at once.
+
+Row ``t`` of the output describes a user's history up to and including day
+``t``, i.e. what is known when forecasting the days after ``t``:
+
+- ``lag_k``: the value ``k - 1`` calendar days back (``lag_1`` is day ``t``
+  itself, ``lag_7`` the same weekday last week; NaN if that day is missing)
+- ``roll_mean_w`` / ``roll_std_w``: over the last ``w`` calendar days
+  (partial windows at the start of a history or around gaps; std needs 2 values)
+- ``ewma_s``: exponentially weighted mean with span ``s`` over the observed days
+- ``expanding_mean`` / ``n_days`` and ``dow_mean_0..6`` (Sunday = 0, like the app)
+
+Missing values (NaN) are skipped: they count towards no sum or mean.
+
+Pass ``predictive=True`` to shift everything one row, giving leakage-free
+features for predicting row ``t`` itself.
+
+Batch mode works on the whole fleet with cumulative sums and sorted
+(user, day) lookups (no per-user Python loops); ``FeatureState`` updates one
+user's features from the previous state when a single new day arrives.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+USER_COLUMN = 'userId'
+DEFAULT_LAGS = (1, 7, 14)
+DEFAULT_WINDOWS = (3, 7, 14)
+DEFAULT_SPANS = (7,)
+
+
+def app_day_of_week(dates) -> np.ndarray:
+    """Day of week in the app's convention (Sunday = 0)"""
+    return ((pd.DatetimeIndex(dates).dayofweek.to_numpy() + 1) % 7).astype(np.int64)
+
+
+def feature_columns(lags: Sequence[int] = DEFAULT_LAGS, windows: Sequence[int] = DEFAULT_WINDOWS,
+                    spans: Sequence[int] = DEFAULT_SPANS) -> List[str]:
+    """Output column names for a configuration, in output order"""
+    columns = [f'lag_{k}' for k in lags]
+    for w in windows:
+        columns += [f'roll_mean_{w}', f'roll_std_{w}']
+    columns += [f'ewma_{s}' for s in spans]
+    columns += ['expanding_mean', 'n_days'] + [f'dow_mean_{d}' for d in range(7)]
+    return columns
+
+
+def _prefix_sum(x: np.ndarray) -> np.ndarray:
+    """Cumulative sum with a leading zero row: sum of rows [a, b) is c[b] - c[a]"""
+    return np.concatenate([np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)])
+
+
+def build_features(df: pd.DataFrame, value_column: str = 'hours', user_column: str = USER_COLUMN,
+                   lags: Sequence[int] = DEFAULT_LAGS, windows: Sequence[int] = DEFAULT_WINDOWS,
+                   spans: Sequence[int] = DEFAULT_SPANS, predictive: bool = False) -> pd.DataFrame:
+    """
+    Grouped lag/rolling/EWMA/day-of-week features for every row
+
+    Args:
+        df: Rows with user_column (optional for one user), 'date' and value_column
+        predictive: Shift one row so row t only uses rows before t
+
+    Returns:
+        DataFrame with user_column, 'date' and feature_columns(...), sorted by user and date
+    """
+    data = df if user_column in df.columns else df.assign(**{user_column: 0})
+    data = data.sort_values([user_column, 'date'], kind='mergesort')
+    users = data[user_column].to_numpy()
+    dates = pd.to_datetime(data['date']).to_numpy()
+    values = pd.to_numeric(data[value_column], errors='coerce').to_numpy(dtype=float)
+    n = len(values)
+
+    # Missing values add nothing to the sums and are left out of the counts,
+    # so they never spill into later rows or the next user
+    valid = np.isfinite(values)
+    filled = np.where(valid, values, 0.0)
+
+    # One sorted key per (user, calendar day); users are spaced further apart than
+    # the longest look-back, so a lookup never lands in the previous user
+    group = pd.factorize(users, sort=False)[0].astype(np.int64)
+    day = pd.DatetimeIndex(dates).normalize().to_numpy().astype('datetime64[D]').astype(np.int64)
+    first_day = day.min() if n else 0
+    reach = max(tuple(lags) + tuple(windows) + (1,))
+    key = group * (day.max() - first_day + reach + 1 if n else 1) + (day - first_day)
+    user_start = np.searchsorted(group, group, side='left')
+
+    def trailing_sum(prefix: np.ndarray, start: np.ndarray) -> np.ndarray:
+        return prefix[np.arange(1, n + 1)] - prefix[start]
+
+    sum_prefix = _prefix_sum(filled)
+    sq_prefix = _prefix_sum(filled ** 2)
+    count_prefix = _prefix_sum(valid.astype(float))
+    n_days = trailing_sum(count_prefix, user_start)
+
+    out = {user_column: users, 'date': dates}
+    for k in lags:
+        # Last row on the day k - 1 days back, if the user has one
+        back = np.searchsorted(key, key - (k - 1), side='right') - 1
+        found = (back >= 0) & (key[np.maximum(back, 0)] == key - (k - 1)) if n else valid
+        out[f'lag_{k}'] = values if k == 1 else np.where(found, values[np.maximum(back, 0)], np.nan)
+
+    for w in windows:
+        window_start = np.searchsorted(key, key - (w - 1), side='left')
+        count = trailing_sum(count_prefix, window_start)
+        total = trailing_sum(sum_prefix, window_start)
+        total_sq = trailing_sum(sq_prefix, window_start)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, np.nan)
+            variance = np.maximum(total_sq - count * mean ** 2, 0.0) / (count - 1)
+        out[f'roll_mean_{w}'] = mean
+        out[f'roll_std_{w}'] = np.where(count >= 2, np.sqrt(variance), np.nan)
+
+    series = pd.Series(values)
+    for s in spans:
+        out[f'ewma_{s}'] = (series.groupby(users, sort=False).ewm(span=s, adjust=False, ignore_na=True).mean()
+                            .reset_index(level=0, drop=True).sort_index().to_numpy())
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['expanding_mean'] = np.where(n_days > 0, trailing_sum(sum_prefix, user_start) / n_days, np.nan)
+    out['n_days'] = n_days.astype(np.int64)
+
+    dow = app_day_of_week(dates)
+    onehot = np.zeros((n, 7))
+    onehot[np.arange(n), dow] = 1.0
+    dow_sums = trailing_sum(_prefix_sum(onehot * filled[:, None]), user_start)
+    dow_counts = trailing_sum(_prefix_sum(onehot * valid[:, None]), user_start)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dow_means = np.where(dow_counts > 0, dow_sums / dow_counts, np.nan)
+    for d in range(7):
+        out[f'dow_mean_{d}'] = dow_means[:, d]
+
+    features = pd.DataFrame(out)
+    if predictive:
+        columns = feature_columns(lags, windows, spans)
+        shifted = features.groupby(user_column, sort=False)[columns].shift(1)
+        shifted['n_days'] = shifted['n_days'].fillna(0).astype(np.int64)
+        features[columns] = shifted
+    return features.reset_index(drop=True)
+
+
+class FeatureState:
+    """
+    Incremental features for one user
+
+    Holds the last max(lags, windows) calendar days (NaN for days without
+    data), EWMA levels and weekday sums/counts, so adding one day costs
+    O(window) instead of recomputing the whole history. ``update`` returns the
+    same features ``build_features`` gives for that day's row.
+    """
+
+    def __init__(self, lags: Sequence[int] = DEFAULT_LAGS, windows: Sequence[int] = DEFAULT_WINDOWS,
+                 spans: Sequence[int] = DEFAULT_SPANS):
+        self.lags = tuple(lags)
+        self.windows = tuple(windows)
+        self.spans = tuple(spans)
+        self.recent: deque = deque(maxlen=max(self.lags + self.windows))
+        self.ewma: Dict[int, float] = {}
+        self.dow_sums = [0.0] * 7
+        self.dow_counts = [0] * 7
+        self.total = 0.0
+        self.n_days = 0
+        self.last_date: Optional[str] = None
+
+    @classmethod
+    def from_history(cls, dates, values, **kwargs) -> 'FeatureState':
+        state = cls(**kwargs)
+        for day, value in zip(dates, values):
+            state.update(day, value)
+        return state
+
+    def update(self, day, value: float) -> Dict[str, float]:
+        """Add one day and return the features as of that day"""
+        day = pd.Timestamp(day).normalize()
+        value = float(value)
+        if self.last_date is not None:
+            # Skipped days hold NaN so lags and windows stay on calendar days
+            gap = (day - pd.Timestamp(self.last_date)).days - 1
+            self.recent.extend([np.nan] * min(max(gap, 0), self.recent.maxlen))
+        self.recent.append(value)
+        self.last_date = day.strftime("%Y-%m-%d")
+        if not np.isfinite(value):
+            return self.features()
+
+        for s in self.spans:
+            alpha = 2.0 / (s + 1.0)
+            self.ewma[s] = value if s not in self.ewma else alpha * value + (1 - alpha) * self.ewma[s]
+        dow = (day.dayofweek + 1) % 7
+        self.dow_sums[dow] += value
+        self.dow_counts[dow] += 1
+        self.total += value
+        self.n_days += 1
+        return self.features()
+
+    def features(self) -> Dict[str, float]:
+        """Features as of the last added day"""
+        recent = np.fromiter(self.recent, dtype=float)
+        result: Dict[str, float] = {}
+        for k in self.lags:
+            result[f'lag_{k}'] = float(recent[-k]) if len(recent) >= k else np.nan
+        for w in self.windows:
+            window = recent[-w:]
+            window = window[np.isfinite(window)]
+            result[f'roll_mean_{w}'] = float(window.mean()) if len(window) else np.nan
+            result[f'roll_std_{w}'] = float(window.std(ddof=1)) if len(window) >= 2 else np.nan
+        for s in self.spans:
+            result[f'ewma_{s}'] = self.ewma.get(s, np.nan)
+        result['expanding_mean'] = self.total / self.n_days if self.n_days else np.nan
+        result['n_days'] = self.n_days
+        for d in range(7):
+            result[f'dow_mean_{d}'] = self.dow_sums[d] / self.dow_counts[d] if self.dow_counts[d] else np.nan
+        return result
+
+    def to_dict(self) -> Dict:
+        """Serializable state for persistence between requests"""
+        return {
+            "recent": [value if np.isfinite(value) else None for value in self.recent],
+            "ewma": {str(s): level for s, level in self.ewma.items()},
+            "dow_sums": list(self.dow_sums),
+            "dow_counts": list(self.dow_counts),
+            "total": self.total,
+            "n_days": self.n_days,
+            "last_date": self.last_date,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict, **kwargs) -> 'FeatureState':
+        features = cls(**kwargs)
+        features.recent.extend(np.nan if value is None else value for value in state.get("recent", []))
+        features.ewma = {int(s): level for s, level in state.get("ewma", {}).items()}
+        features.dow_sums = list(state.get("dow_sums", [0.0] * 7))
+        features.dow_counts = list(state.get("dow_counts", [0] * 7))
+        features.total = state.get("total", 0.0)
+        features.n_days = state.get("n_days", 0)
+        features.last_date = state.get("last_date")
+        return features
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Goal Simulator
+=========================
+
+Monte Carlo outlook for the 7-day forecast: how likely a user is to stay
+under a daily screen-time goal next week, with prediction intervals.
+
+- Errors come from the user's own forecast residuals (actual - forecast):
+  backtests of the fleet model, or out-of-bag errors of the per-request forest
+- Block bootstrap by day of week: each simulated week reuses one whole
+  7-day residual block from a past forecast that started on the same weekday
+  as this one, so weekday-specific errors and within-week correlation (a bad
+  week tends to be bad throughout) are kept; gaps in a block are filled from
+  residuals of the same weekday
+- Thousands of trajectories are one fancy-indexing operation on a
+  (simulations, 7) array, and the statistics come from one sort; a
+  5,000-week outlook takes about 2 ms
+- Fixed seed, so the same inputs always give the same outlook
+
+Usage:
+    outlook = goal_outlook(point_hours, dates, blocks, goal_minutes=180)
+    outlook["goals"][0]["probWeekUnder"]
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from forecast_features import app_day_of_week
+
+DEFAULT_SIMULATIONS = 5000
+SIMULATION_SEED = 42
+INTERVAL_LEVEL = 0.8
+WEEKLY_INTERVAL_LEVELS = (0.8, 0.95)
+# Goals the goals screen offers, in minutes per day; the user's own goal is added
+GOAL_LADDER_MINUTES = (120, 180, 240, 300)
+# Fewer past errors per forecast weekday than this say nothing useful about the spread
+MIN_RESIDUALS_PER_DAY = 3
+HORIZON_DAYS = 7
+
+
+def residual_blocks(origin_dates, horizons, residuals, first_target_dow: int) -> np.ndarray:
+    """
+    Arrange backtest residuals into 7-day blocks aligned with the forecast
+
+    Args:
+        origin_dates: Date each backtest forecast was made from
+        horizons: Days ahead of the origin (1..7) of each residual
+        residuals: Actual minus forecast hours
+        first_target_dow: Day of week (Sunday = 0) of the first forecast day
+
+    Returns:
+        np.ndarray: (blocks, 7) residuals; row b column j is the error j+1 days
+        after an origin whose next day falls on first_target_dow (NaN if missing)
+    """
+    origin_days = pd.DatetimeIndex(origin_dates).normalize()
+    horizons = np.asarray(horizons, dtype=np.int64)
+    residuals = np.asarray(residuals, dtype=float)
+    keep = ((app_day_of_week(origin_days + pd.Timedelta(days=1)) == first_target_dow)
+            & (horizons >= 1) & (horizons <= HORIZON_DAYS) & np.isfinite(residuals))
+    if not keep.any():
+        return np.empty((0, HORIZON_DAYS))
+
+    _, block = np.unique(origin_days[keep].to_numpy(), return_inverse=True)
+    blocks = np.full((block.max() + 1, HORIZON_DAYS), np.nan)
+    blocks[block, horizons[keep] - 1] = residuals[keep]
+    return blocks
+
+
+def series_residual_blocks(dates, residuals, first_target_dow: int) -> np.ndarray:
+    """
+    Blocks from one residual per day (e.g. out-of-bag errors): each day
+    contributes to the 7 blocks whose window covers it
+    """
+    dates = pd.DatetimeIndex(dates).normalize()
+    residuals = np.asarray(residuals, dtype=float)
+    steps = np.arange(1, HORIZON_DAYS + 1)
+    origins = np.repeat(dates.to_numpy(), HORIZON_DAYS) - np.tile(steps, len(dates)).astype('timedelta64[D]')
+    return residual_blocks(origins, np.tile(steps, len(dates)), np.repeat(residuals, HORIZON_DAYS),
+                           first_target_dow)
+
+
+def simulate_weeks(point_hours: Sequence[float], blocks: np.ndarray,
+                   n_simulations: int = DEFAULT_SIMULATIONS, seed: int = SIMULATION_SEED) -> np.ndarray:
+    """
+    Draw weekly trajectories: point forecast plus one resampled residual block each
+
+    Returns:
+        np.ndarray: (n_simulations, days) non-negative hours
+    """
+    point = np.asarray(point_hours, dtype=float)
+    days = len(point)
+    blocks = np.asarray(blocks, dtype=float)[:, :days]
+    rng = np.random.default_rng(seed)
+    draws = blocks[rng.integers(0, len(blocks), n_simulations)]
+
+    missing = np.isnan(draws)
+    if missing.any():
+        # Same-weekday pool per column, flattened with offsets so one draw covers every column
+        valid = ~np.isnan(blocks)
+        counts = valid.sum(axis=0)
+        # Trailing zero stands in for a weekday with no residuals at all
+        pool = np.append(blocks.T[valid.T], 0.0)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        picks = np.where(counts > 0, offsets + (rng.random(draws.shape) * counts).astype(np.int64), len(pool) - 1)
+        draws = np.where(missing, pool[picks], draws)
+    return np.maximum(point + draws, 0.0)
+
+
+def _sorted_quantiles(sorted_values: np.ndarray, qs: Sequence[float]) -> np.ndarray:
+    """Linear-interpolated quantiles (numpy's default method) along axis 0 of sorted data"""
+    position = np.asarray(qs) * (len(sorted_values) - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, len(sorted_values) - 1)
+    fraction = (position - low).reshape((-1,) + (1,) * (sorted_values.ndim - 1))
+    return sorted_values[low] * (1 - fraction) + sorted_values[high] * fraction
+
+
+def _goal_list(goal_minutes: Optional[float], ladder: Iterable[float]) -> List[float]:
+    goals = {float(g) for g in ladder}
+    if goal_minutes is not None and goal_minutes > 0:
+        goals.add(float(goal_minutes))
+    return sorted(goals)
+
+
+def goal_outlook(point_hours: Sequence[float], dates: Sequence[str], blocks: np.ndarray,
+                 goal_minutes: Optional[float] = None, ladder: Iterable[float] = GOAL_LADDER_MINUTES,
+                 n_simulations: int = DEFAULT_SIMULATIONS, seed: int = SIMULATION_SEED) -> Dict:
+    """
+    Probability of staying under each daily goal next week, plus intervals
+
+    Args:
+        point_hours: Point forecast for each day
+        dates: Forecast dates (YYYY-MM-DD), for the daily intervals
+        blocks: Residual blocks from residual_blocks()/series_residual_blocks()
+        goal_minutes: The user's daily goal, added to the ladder
+
+    Returns:
+        dict with daily and weekly intervals and, per goal, the probability that
+        the week's total stays within 7x the goal, that every day does, and the
+        expected number of days under it; {"error": ...} with too little history
+    """
+    blocks = np.asarray(blocks, dtype=float).reshape(-1, HORIZON_DAYS)[:, :len(point_hours)]
+    if len(blocks) == 0 or (~np.isnan(blocks)).sum(axis=0).min() < MIN_RESIDUALS_PER_DAY:
+        return {"error": f"Need at least {MIN_RESIDUALS_PER_DAY} weeks of forecast residuals"}
+
+    weeks = simulate_weeks(point_hours, blocks, n_simulations, seed)
+    days = weeks.shape[1]
+    # Sort once; every quantile and probability below is then an index lookup
+    daily_sorted = np.sort(weeks, axis=0)
+    weekly_sorted = np.sort(weeks.sum(axis=1))
+    worst_day_sorted = np.sort(weeks.max(axis=1))
+    tail = (1 - INTERVAL_LEVEL) / 2
+    daily_q = _sorted_quantiles(daily_sorted, [tail, 0.5, 1 - tail])
+
+    weekly_levels = {}
+    for level in WEEKLY_INTERVAL_LEVELS:
+        low, high = _sorted_quantiles(weekly_sorted, [(1 - level) / 2, 1 - (1 - level) / 2])
+        weekly_levels[f"{int(round(level * 100))}"] = {"lowerHours": float(low), "upperHours": float(high)}
+
+    goal_list = _goal_list(goal_minutes, ladder)
+    limits = np.asarray(goal_list) / 60.0
+    n = len(weeks)
+    week_under = np.searchsorted(weekly_sorted, limits * days, side='right') / n
+    every_day_under = np.searchsorted(worst_day_sorted, limits, side='right') / n
+    days_under = sum(np.searchsorted(daily_sorted[:, i], limits, side='right') for i in range(days)) / n
+    goals = [{
+        "dailyGoalMinutes": goal,
+        "probWeekUnder": float(week_under[i]),
+        "probEveryDayUnder": float(every_day_under[i]),
+        "expectedDaysUnder": float(days_under[i]),
+        "isUserGoal": goal_minutes is not None and goal == float(goal_minutes),
+    } for i, goal in enumerate(goal_list)]
+
+    return {
+        "simulations": int(n_simulations),
+        "residualBlocks": int(len(blocks)),
+        "interval": INTERVAL_LEVEL,
+        "daily": [{
+            "date": date,
+            "lowerHours": float(daily_q[0, i]),
+            "medianHours": float(daily_q[1, i]),
+            "upperHours": float(daily_q[2, i]),
+        } for i, date in enumerate(dates)],
+        "weekly": {"medianHours": float(_sorted_quantiles(weekly_sorted, [0.5])[0]), "intervals": weekly_levels},
+        "goals": goals,
+    }
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Model Registry
+=========================
+
+Keeps trained models warm in memory and swaps in new versions without a restart.
+
+- Preloads every model found in the models directory at startup
+- Hands out immutable ``ModelEntry`` snapshots to concurrent request handlers
+- Watches the directory and hot-reloads changed or newer versions
+- Swaps atomically: a new version is fully loaded before anyone can see it
+
+File naming:
+    models/usage_nn_model.h5          -> name "usage_nn_model", version 0
+    models/usage_nn_model.v3.h5       -> name "usage_nn_model", version 3
+    models/fleet_forecaster.v2.pkl    -> name "fleet_forecaster", version 2
+    models/usage_nn_model.v4.art      -> NumPy DenseNetwork over a shared, mmap'd artifact file
+
+The highest version of each name wins. Rewriting a file in place is picked up
+too (new generation, same version). Use ``publish_model`` or write to a hidden
+temp file and ``os.replace`` it so the watcher never sees a partial file.
+"""
+
+import os
+import pickle
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+_VERSIONED_NAME = re.compile(r'^(?P<name>.+?)\.v(?P<version>\d+)$')
+
+
+def _load_keras_model(path: str) -> Any:
+    """Load a Keras model (.h5 / .keras)"""
+    import tensorflow as tf  # type: ignore
+    return tf.keras.models.load_model(path)
+
+
+def _load_pickle_model(path: str) -> Any:
+    """Load a pickled sklearn/forecaster model (.pkl / .pickle)"""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _load_artifact_network(path: str) -> Any:
+    """Map a shared artifact file (.art) as a NumPy DenseNetwork"""
+    from shared_artifacts import DenseNetwork, attach_artifacts
+    return DenseNetwork.from_bundle(attach_artifacts(path))
+
+
+DEFAULT_LOADERS: Dict[str, Callable[[str], Any]] = {
+    '.art': _load_artifact_network,
+    '.h5': _load_keras_model,
+    '.keras': _load_keras_model,
+    '.pkl': _load_pickle_model,
+    '.pickle': _load_pickle_model,
+}
+
+
+@dataclass(frozen=True)
+class ModelEntry:
+    """A fully loaded, read-only model version"""
+    name: str
+    version: int
+    generation: int
+    path: str
+    model: Any
+    mtime: float
+    loaded_at: str
+
+
+def parse_model_filename(filename: str) -> Optional[Tuple[str, int, str]]:
+    """Split a model filename into (name, version, extension), or None if not a model file"""
+    if filename.startswith('.') or '.tmp' in filename:
+        return None
+    stem, ext = os.path.splitext(filename)
+    if not ext:
+        return None
+    match = _VERSIONED_NAME.match(stem)
+    if match:
+        return match.group('name'), int(match.group('version')), ext.lower()
+    return stem, 0, ext.lower()
+
+
+def publish_model(model: Any, models_dir: str, name: str, version: Optional[int] = None) -> str:
+    """
+    Atomically write a picklable model into the models directory
+
+    The model is written to a hidden temp file and renamed into place, so a
+    watching registry can never load a half-written copy.
+
+    Returns:
+        str: Path of the published model file
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    filename = f"{name}.v{version}.pkl" if version is not None else f"{name}.pkl"
+    final_path = os.path.join(models_dir, filename)
+    tmp_path = os.path.join(models_dir, f".{filename}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+class ModelRegistry:
+    """Warm, hot-reloading store of trained models"""
+
+    def __init__(self, models_dir: str = 'models',
+                 loaders: Optional[Dict[str, Callable[[str], Any]]] = None,
+                 poll_interval: float = 2.0):
+        self.models_dir = models_dir
+        self.loaders = dict(DEFAULT_LOADERS if loaders is None else loaders)
+        self.poll_interval = poll_interval
+
+        # Copy-on-write mapping: readers grab the current reference without locking
+        self._entries: Mapping[str, ModelEntry] = MappingProxyType({})
+        # Signatures seen on the previous scan, used to wait for files to settle
+        self._pending: Dict[str, Tuple[str, float, int]] = {}
+        self._generation = 0
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.load_errors: Dict[str, str] = {}
+
+    # ------------------------------------------------------------------
+    # Read side (lock-free, safe from any request handler)
+    # ------------------------------------------------------------------
+
+    def get(self, name: str) -> Optional[ModelEntry]:
+        """Return the current entry for a model name, or None if not loaded"""
+        return self._entries.get(name)
+
+    def get_model(self, name: str) -> Any:
+        """Return the current model object for a name, or None if not loaded"""
+        entry = self._entries.get(name)
+        return entry.model if entry is not None else None
+
+    def snapshot(self) -> Mapping[str, ModelEntry]:
+        """Return a consistent read-only view of every loaded model"""
+        return self._entries
+
+    def versions(self) -> Dict[str, int]:
+        """Return {name: version} for every loaded model"""
+        return {name: entry.version for name, entry in self._entries.items()}
+
+    # ------------------------------------------------------------------
+    # Write side
+    # ------------------------------------------------------------------
+
+    def preload(self) -> Dict[str, int]:
+        """Load every model currently on disk (startup files are assumed complete)"""
+        self._refresh(wait_for_stable=False)
+        print(f"✅ Model registry warm: {self.versions()}")
+        return self.versions()
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Rescan the models directory and swap in changed versions
+
+        A changed file is only loaded once its size and mtime are unchanged
+        across two consecutive scans.
+
+        Returns:
+            dict: {name: version} of models swapped in by this call
+        """
+        return self._refresh(wait_for_stable=True)
+
+    def start_watching(self) -> None:
+        """Start a daemon thread that calls refresh() every poll_interval seconds"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, name='model-registry-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the watcher thread"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval * 2)
+            self._watcher = None
+
+    def _watch_loop(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Model registry refresh failed: {e}")
+
+    def _scan(self) -> Dict[str, Tuple[str, int, float, int]]:
+        """Return {name: (path, version, mtime, size)} for the newest file of each model"""
+        candidates: Dict[str, Tuple[str, int, float, int]] = {}
+        if not os.path.isdir(self.models_dir):
+            return candidates
+
+        for filename in os.listdir(self.models_dir):
+            parsed = parse_model_filename(filename)
+            if parsed is None:
+                continue
+            name, version, ext = parsed
+            if ext not in self.loaders:
+                continue
+            path = os.path.join(self.models_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            current = candidates.get(name)
+            if current is None or version > current[1] or (version == current[1] and stat.st_mtime > current[2]):
+                candidates[name] = (path, version, stat.st_mtime, stat.st_size)
+        return candidates
+
+    def _refresh(self, wait_for_stable: bool) -> Dict[str, int]:
+        # Only one refresh loads at a time; readers never wait on this lock
+        with self._refresh_lock:
+            swapped: Dict[str, ModelEntry] = {}
+            current = self._entries
+
+            for name, (path, version, mtime, size) in self._scan().items():
+                entry = current.get(name)
+                if entry is not None and entry.path == path and entry.mtime == mtime:
+                    self._pending.pop(name, None)
+                    continue
+                if entry is not None and version < entry.version:
+                    continue
+
+                signature = (path, mtime, size)
+                if wait_for_stable and self._pending.get(name) != signature:
+                    self._pending[name] = signature
+                    continue
+                self._pending.pop(name, None)
+
+                ext = os.path.splitext(path)[1].lower()
+                try:
+                    model = self.loaders[ext](path)
+                except Exception as e:
+                    # Keep serving the previous version
+                    self.load_errors[name] = str(e)
+                    print(f"❌ Failed to load model {path}: {e}")
+                    continue
+
+                self.load_errors.pop(name, None)
+                self._generation += 1
+                swapped[name] = ModelEntry(
+                    name=name,
+                    version=version,
+                    generation=self._generation,
+                    path=path,
+                    model=model,
+                    mtime=mtime,
+                    loaded_at=datetime.now().isoformat()
+                )
+
+            if swapped:
+                # Build the new mapping off to the side, then publish it in one assignment
+                merged = dict(current)
+                merged.update(swapped)
+                self._entries = MappingProxyType(merged)
+                for name, entry in swapped.items():
+                    print(f"🔄 Model '{name}' now at v{entry.version} (generation {entry.generation})")
+
+            return {name: entry.version for name, entry in swapped.items()}
+
+
+_default_registry: Optional[ModelRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry(models_dir: str = 'models', watch: bool = True) -> ModelRegistry:
+    """Return the process-wide registry, preloading (and watching) it on first use"""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                registry = ModelRegistry(models_dir)
+                registry.preload()
+                if watch:
+                    registry.start_watching()
+                _default_registry = registry
+    return _default_registry
+
+
+if __name__ == "__main__":
+    import sys
+
+    registry = ModelRegistry(sys.argv[1] if len(sys.argv) > 1 else 'models')
+    registry.preload()
+    for name, entry in registry.snapshot().items():
+        print(f"  {name}: v{entry.version} ({entry.path}, loaded {entry.loaded_at})")
+    if registry.load_errors:
+        print(f"⚠️ Load errors: {registry.load_errors}")
+    print("👀 Watching for new versions (Ctrl+C to stop)...")
+    registry.start_watching()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        registry.stop_watching()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Report Charts
+========================
+
+PNG charts for PDF reports: daily trend, day-of-week averages and a
+weekday x hour heatmap.
+
+- Drawn on standalone matplotlib ``Figure`` objects with the non-interactive
+  Agg canvas (no pyplot state) and saved to in-memory PNG buffers
+- Keyed by a hash of the plotted series, so a report whose data has not
+  changed reuses its PNGs: an LRU per process with an optional on-disk tier
+  shared between worker processes
+- ``warm_chart_backend`` pays the matplotlib import and font loading once;
+  report worker pools call it from their initializer
+
+Usage:
+    for kind, png in render_charts(analysis):
+        ...
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Try to import matplotlib; drawing uses the Agg canvas directly, so the global backend is left alone
+try:
+    from matplotlib.figure import Figure  # type: ignore
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # type: ignore
+    from PIL import Image  # type: ignore
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+
+# Bump whenever the drawing code changes so cached PNGs are invalidated
+CHART_STYLE_VERSION = "1"
+CHART_KINDS = ('trend', 'weekday', 'heatmap')
+CHART_SIZE_INCHES = (6.5, 2.4)
+CHART_DPI = 120
+
+DAY_LABELS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+PRIMARY_COLOR = '#2563eb'
+SECONDARY_COLOR = '#1e40af'
+FORECAST_COLOR = '#f59e0b'
+
+# matplotlib is not thread-safe; renders in one process are serialized
+_render_lock = threading.Lock()
+
+
+def chart_specs(analysis: Dict) -> List[Tuple[str, Dict]]:
+    """
+    Plotted data of each chart the analysis supports
+
+    Returns:
+        List of (kind, data) pairs; data holds only what is drawn, so its hash
+        identifies the PNG
+    """
+    specs = []
+    series = analysis.get("series", {})
+
+    daily = series.get("daily", {})
+    if len(daily.get("hours", [])) >= 2:
+        forecast = [[p.get('date', ''), round(float(p.get('predictedScreenTimeHours', 0)), 3)]
+                    for p in analysis.get("predictions", {}).get("next_7_days", [])]
+        specs.append(('trend', {"dates": daily["dates"], "hours": daily["hours"], "forecast": forecast}))
+
+    averages = analysis.get("patterns", {}).get("dailyAverages", {})
+    if averages:
+        days = [day for day in DAY_NAMES if day in averages]
+        specs.append(('weekday', {
+            "labels": [DAY_LABELS[DAY_NAMES.index(day)] for day in days],
+            "hours": [round(float(averages[day]), 3) for day in days]
+        }))
+
+    if series.get("hourly"):
+        specs.append(('heatmap', {"grid": series["hourly"]}))
+    return specs
+
+
+def chart_key(kind: str, data: Dict) -> str:
+    """Cache key for a chart: hash of its kind, plotted data and drawing version"""
+    payload = json.dumps([kind, data], sort_keys=True, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.blake2b(payload, digest_size=16, person=b'habitguard-chart')
+    digest.update(CHART_STYLE_VERSION.encode('utf-8'))
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Drawing
+# ----------------------------------------------------------------------
+
+def _draw_trend(ax, data: Dict) -> None:
+    hours = np.asarray(data["hours"], dtype=float)
+    x = np.arange(len(hours))
+    # One stepped polygon instead of a bar patch per day (bar() dominates render time at 90 days)
+    ax.fill_between(x, hours, step='mid', color=PRIMARY_COLOR, alpha=0.3, linewidth=0, label='Daily')
+    if len(hours) >= 7:
+        rolling = np.convolve(hours, np.ones(7) / 7, mode='valid')
+        ax.plot(x[6:], rolling, color=SECONDARY_COLOR, linewidth=2, label='7-day average')
+
+    labels = list(data["dates"])
+    if data["forecast"]:
+        fx = len(hours) + np.arange(len(data["forecast"]))
+        ax.plot(fx, [hours for _, hours in data["forecast"]], color=FORECAST_COLOR,
+                linewidth=2, linestyle='--', marker='o', markersize=3, label='Forecast')
+        labels += [date for date, _ in data["forecast"]]
+
+    step = max(1, len(labels) // 6)
+    ticks = np.arange(0, len(labels), step)
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([labels[i][5:] for i in ticks], fontsize=8)
+    ax.set_ylabel('Hours')
+    ax.set_title('Daily Screen Time', fontsize=10)
+    ax.set_ylim(0, max(hours.max(), max((h for _, h in data["forecast"]), default=0)) * 1.3 + 0.1)
+    ax.legend(fontsize=7, loc='upper left', ncol=3, frameon=False)
+
+
+def _draw_weekday(ax, data: Dict) -> None:
+    hours = np.asarray(data["hours"], dtype=float)
+    colors = [FORECAST_COLOR if label in ('Sat', 'Sun') else PRIMARY_COLOR for label in data["labels"]]
+    ax.bar(np.arange(len(hours)), hours, color=colors)
+    ax.set_xticks(np.arange(len(hours)))
+    ax.set_xticklabels(data["labels"], fontsize=8)
+    ax.set_ylabel('Avg hours')
+    ax.set_title('Average Screen Time by Day of Week', fontsize=10)
+
+
+def _draw_heatmap(ax, data: Dict) -> None:
+    grid = np.asarray(data["grid"], dtype=float)
+    image = ax.imshow(grid, aspect='auto', cmap='Blues', interpolation='nearest')
+    ax.set_yticks(np.arange(7))
+    ax.set_yticklabels(DAY_LABELS, fontsize=7)
+    ax.set_xticks(np.arange(0, 24, 3))
+    ax.set_xticklabels([f"{h:02d}:00" for h in range(0, 24, 3)], fontsize=7)
+    ax.set_title('Screen Time by Hour', fontsize=10)
+    colorbar = ax.figure.colorbar(image, ax=ax, pad=0.01)
+    colorbar.ax.tick_params(labelsize=7)
+    colorbar.set_label('Avg hours', fontsize=7)
+
+
+_DRAWERS = {
+    'trend': _draw_trend,
+    'weekday': _draw_weekday,
+    'heatmap': _draw_heatmap,
+}
+
+
+def render_chart(kind: str, data: Dict) -> bytes:
+    """Render one chart to PNG bytes (no caching)"""
+    if not MATPLOTLIB_AVAILABLE:
+        raise RuntimeError("matplotlib not installed. Install with: pip install matplotlib")
+    if kind not in _DRAWERS:
+        raise ValueError(f"Unknown chart kind: {kind}")
+
+    with _render_lock:
+        figure = Figure(figsize=CHART_SIZE_INCHES, dpi=CHART_DPI)
+        canvas = FigureCanvasAgg(figure)
+        ax = figure.add_subplot(1, 1, 1)
+        _DRAWERS[kind](ax, data)
+        for side in ('top', 'right'):
+            ax.spines[side].set_visible(False)
+        # Fixed margins: tight_layout would lay the figure out twice
+        figure.subplots_adjust(left=0.09, right=0.98, bottom=0.13, top=0.89)
+        canvas.draw()
+        rgba = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+    # Opaque RGB PNG: an alpha channel would make reportlab embed a second soft-mask image
+    buffer = BytesIO()
+    rgba.convert('RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def warm_chart_backend() -> None:
+    """Load matplotlib, the Agg canvas and fonts now instead of on the first report"""
+    if MATPLOTLIB_AVAILABLE:
+        render_chart('weekday', {"labels": DAY_LABELS, "hours": [1.0] * 7})
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+class ChartCache:
+    """LRU of rendered PNGs keyed by chart_key(), with an optional on-disk tier"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached PNG for a key, or None on a miss"""
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self._metrics['hits'] += 1
+                return png
+
+        png = self._read_disk(key)
+        with self._lock:
+            self._metrics['disk_hits' if png is not None else 'misses'] += 1
+        if png is not None:
+            self._store(key, png)
+        return png
+
+    def put(self, key: str, png: bytes) -> None:
+        self._store(key, png)
+        self._write_disk(key, png)
+
+    def stats(self) -> Dict:
+        """Hit/miss metrics and current size"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['entries'] = len(self._entries)
+            metrics['bytes'] = self._bytes
+        return metrics
+
+    def _store(self, key: str, png: bytes) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = png
+            self._bytes += len(png)
+            while len(self._entries) > 1 and self._bytes > self.max_bytes:
+                _, oldest = self._entries.popitem(last=False)
+                self._bytes -= len(oldest)
+                self._metrics['evictions'] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, png: bytes) -> None:
+        if not self.disk_dir:
+            return
+        tmp_path = os.path.join(self.disk_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"⚠️ Could not write chart to disk: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_process_cache: Optional[ChartCache] = None
+
+
+def get_chart_cache() -> ChartCache:
+    """This process's shared chart cache"""
+    global _process_cache
+    if _process_cache is None:
+        _process_cache = ChartCache()
+    return _process_cache
+
+
+def configure_chart_cache(disk_dir: Optional[str] = None, max_bytes: int = 32 * 1024 * 1024) -> ChartCache:
+    """Replace this process's chart cache (e.g. to share a disk tier across workers)"""
+    global _process_cache
+    _process_cache = ChartCache(max_bytes=max_bytes, disk_dir=disk_dir)
+    return _process_cache
+
+
+def render_charts(analysis: Dict, cache: Optional[ChartCache] = None) -> List[Tuple[str, bytes]]:
+    """
+    PNGs for every chart the analysis supports, from the cache where possible
+
+    Returns:
+        List of (kind, png bytes) in CHART_KINDS order; empty without matplotlib
+    """
+    if not MATPLOTLIB_AVAILABLE:
+        return []
+    cache = cache or get_chart_cache()
+    charts = []
+    for kind, data in chart_specs(analysis):
+        key = chart_key(kind, data)
+        png = cache.get(key)
+        if png is None:
+            png = render_chart(kind, data)
+            cache.put(key, png)
+        charts.append((kind, png))
+    return charts
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Report Renderer
+==========================
+
+Shared PDF/TXT report rendering for single reports and large batches.
+
+- reportlab modules are imported once and styles are built once per process
+- Reports can be written to any binary/text stream, or pulled as byte chunks
+  (sync or async) so the server can stream them into HTTP responses with no
+  disk I/O or filename races
+- ``BatchReportRenderer`` renders thousands of reports across a process pool,
+  with styles pre-built and the chart backend loaded in each worker's
+  initializer
+- PDFs embed trend, day-of-week and hourly heatmap charts (report_charts.py)
+  from in-memory PNGs, cached by a hash of the plotted series
+
+Usage:
+    renderer = BatchReportRenderer(max_workers=4)
+    for user_id, pdf_bytes in renderer.render_many(analyses_by_user.items(), fmt='pdf'):
+        ...
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from typing import AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from report_charts import CHART_SIZE_INCHES, configure_chart_cache, render_charts, warm_chart_backend
+
+REPORT_FORMATS = ('pdf', 'txt')
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Try to import PDF generation libraries
+try:
+    from reportlab.lib.pagesizes import letter  # type: ignore
+    from reportlab.lib import colors  # type: ignore
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle  # type: ignore
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer  # type: ignore
+    from reportlab.platypus import Image as RLImage  # type: ignore
+    from reportlab.lib.units import inch  # type: ignore
+    from reportlab.lib.enums import TA_CENTER  # type: ignore
+    from reportlab import rl_config  # type: ignore
+    # Binary image streams: pure-Python ASCII85 encoding made up most of the chart embedding time
+    rl_config.useA85 = 0
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+
+class ReportStyles:
+    """Paragraph and table styles for PDF reports, built once and reused"""
+
+    def __init__(self):
+        if not PDF_AVAILABLE:
+            raise RuntimeError("reportlab not installed. Install with: pip install reportlab")
+
+        sample = getSampleStyleSheet()
+        self.normal = sample['Normal']
+        self.italic = sample['Italic']
+
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=sample['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#2563eb'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        )
+
+        self.heading = ParagraphStyle(
+            'CustomHeading',
+            parent=sample['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=12,
+            spaceBefore=12
+        )
+
+        self.summary_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ])
+
+        self.prediction_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -2), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#fef3c7')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black)
+        ])
+
+
+_process_styles: Optional[ReportStyles] = None
+
+
+def get_report_styles() -> ReportStyles:
+    """Return this process's shared ReportStyles, building them on first use"""
+    global _process_styles
+    if _process_styles is None:
+        _process_styles = ReportStyles()
+    return _process_styles
+
+
+def behavior_label(patterns: Dict) -> str:
+    """Human readable behavior classification (accepts the dict or legacy string form)"""
+    behavior = patterns.get("behaviorClassification", "unknown")
+    if isinstance(behavior, dict):
+        behavior = behavior.get("category", "unknown")
+    return str(behavior).replace('_', ' ').title()
+
+
+def _total_screen_time(summary: Dict) -> float:
+    return summary.get('totalScreenTimeHours', summary.get('totalScreenTime', 0))
+
+
+def build_pdf_story(analysis: Dict, styles: ReportStyles, generated_at: Optional[datetime] = None,
+                    charts: Optional[List[Tuple[str, bytes]]] = None) -> List:
+    """Build the reportlab flowables for one analysis (charts: (kind, PNG bytes) from render_charts)"""
+    generated_at = generated_at or datetime.now()
+    story = []
+
+    # Title
+    story.append(Paragraph("📊 HabitGuard Usage Report", styles.title))
+    story.append(Paragraph(f"Generated on {generated_at.strftime('%B %d, %Y at %I:%M %p')}", styles.normal))
+    story.append(Spacer(1, 0.3 * inch))
+
+    # Summary Section
+    if "summary" in analysis:
+        story.append(Paragraph("📋 Usage Summary", styles.heading))
+        summary = analysis["summary"]
+
+        summary_data = [
+            ['Metric', 'Value'],
+            ['Total Days Analyzed', str(summary.get('totalDays', 0))],
+            ['Average Daily Screen Time', f"{summary.get('avgDailyScreenTime', 0):.1f} hours"],
+            ['Total Screen Time', f"{_total_screen_time(summary):.1f} hours"],
+            ['Average Apps Per Day', f"{summary.get('avgAppsPerDay', 0):.0f}"],
+            ['Peak Usage Day', summary.get('peakDay', 'N/A')]
+        ]
+
+        summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
+        summary_table.setStyle(styles.summary_table)
+
+        story.append(summary_table)
+        story.append(Spacer(1, 0.2 * inch))
+
+    # Behavior Classification
+    if "patterns" in analysis:
+        story.append(Paragraph("🏷️ Behavior Classification", styles.heading))
+        story.append(Paragraph(f"<b>Classification:</b> {behavior_label(analysis['patterns'])}", styles.normal))
+        story.append(Spacer(1, 0.2 * inch))
+
+        # Trends
+        if "trends" in analysis["patterns"]:
+            trend_info = analysis["patterns"]["trends"]
+            story.append(Paragraph(f"<b>Usage Trend:</b> {trend_info.get('trend', 'stable').title()}", styles.normal))
+            story.append(Spacer(1, 0.1 * inch))
+
+        # Weekend vs Weekday
+        if "weekdayVsWeekend" in analysis["patterns"]:
+            wvw = analysis["patterns"]["weekdayVsWeekend"]
+            story.append(Paragraph(
+                f"<b>Weekday Average:</b> {wvw.get('weekday', 0):.1f}h | "
+                f"<b>Weekend Average:</b> {wvw.get('weekend', 0):.1f}h",
+                styles.normal
+            ))
+
+        story.append(Spacer(1, 0.2 * inch))
+
+    # Charts
+    if charts:
+        story.append(Paragraph("📈 Usage Charts", styles.heading))
+        width, height = CHART_SIZE_INCHES
+        for _, png in charts:
+            story.append(RLImage(BytesIO(png), width=width * inch, height=height * inch))
+            story.append(Spacer(1, 0.15 * inch))
+
+    # Predictions
+    if "predictions" in analysis and "next_7_days" in analysis["predictions"]:
+        story.append(Paragraph("🔮 7-Day Predictions", styles.heading))
+
+        pred_data = [['Date', 'Day Type', 'Predicted Screen Time']]
+        for pred in analysis["predictions"]["next_7_days"]:
+            day_type = "🏖️ Weekend" if pred.get("isWeekend") else "💼 Weekday"
+            pred_data.append([
+                pred.get('date', 'N/A'),
+                day_type,
+                f"{pred.get('predictedScreenTimeHours', 0):.1f} hours"
+            ])
+
+        weekly_total = analysis["predictions"].get("weekly_prediction", 0)
+        pred_data.append(['', 'Weekly Total:', f"{weekly_total:.1f} hours"])
+
+        pred_table = Table(pred_data, colWidths=[2*inch, 2*inch, 2*inch])
+        pred_table.setStyle(styles.prediction_table)
+
+        story.append(pred_table)
+        story.append(Spacer(1, 0.2 * inch))
+
+    # Recommendations
+    story.append(Paragraph("💡 Personalized Recommendations", styles.heading))
+    for i, rec in enumerate(analysis.get("recommendations", []), 1):
+        story.append(Paragraph(f"{i}. {rec}", styles.normal))
+        story.append(Spacer(1, 0.1 * inch))
+
+    story.append(Spacer(1, 0.3 * inch))
+    story.append(Paragraph(
+        "<i>This report was generated by HabitGuard ML Analyzer. "
+        "Use these insights to improve your digital wellness.</i>",
+        styles.italic
+    ))
+
+    return story
+
+
+def render_pdf(analysis: Dict, output: Union[str, BinaryIO], styles: Optional[ReportStyles] = None,
+               include_charts: bool = True) -> Union[str, BinaryIO]:
+    """
+    Render a PDF report into a file path or a binary file-like object
+
+    Args:
+        analysis: Analysis dict from analyze_patterns()
+        output: Output path or writable binary stream (e.g. BytesIO)
+        styles: Pre-built styles (default: this process's shared styles)
+        include_charts: Embed charts (skipped without matplotlib)
+
+    Returns:
+        The output path or stream that was written
+    """
+    if not PDF_AVAILABLE:
+        raise RuntimeError("reportlab not installed. Install with: pip install reportlab")
+    styles = styles or get_report_styles()
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    charts = render_charts(analysis) if include_charts else None
+    doc.build(build_pdf_story(analysis, styles, charts=charts))
+    return output
+
+
+def render_pdf_bytes(analysis: Dict, styles: Optional[ReportStyles] = None, include_charts: bool = True) -> bytes:
+    """Render a PDF report entirely in memory"""
+    buffer = BytesIO()
+    render_pdf(analysis, buffer, styles, include_charts)
+    return buffer.getvalue()
+
+
+def iter_txt_lines(analysis: Dict, generated_at: Optional[datetime] = None) -> Iterator[str]:
+    """Yield the lines of a plain text report (each ending in a newline)"""
+    generated_at = generated_at or datetime.now()
+
+    # Header
+    yield "=" * 60 + "\n"
+    yield "📊 HABITGUARD USAGE REPORT\n"
+    yield "=" * 60 + "\n"
+    yield f"Generated: {generated_at.strftime('%B %d, %Y at %I:%M %p')}\n"
+    yield "=" * 60 + "\n\n"
+
+    # Summary
+    if "summary" in analysis:
+        yield "📋 USAGE SUMMARY\n"
+        yield "-" * 60 + "\n"
+        summary = analysis["summary"]
+        yield f"Total Days Analyzed:        {summary.get('totalDays', 0)}\n"
+        yield f"Average Daily Screen Time:  {summary.get('avgDailyScreenTime', 0):.1f} hours\n"
+        yield f"Total Screen Time:          {_total_screen_time(summary):.1f} hours\n"
+        yield f"Average Apps Per Day:       {summary.get('avgAppsPerDay', 0):.0f}\n"
+        yield f"Peak Usage Day:             {summary.get('peakDay', 'N/A')}\n"
+        yield "\n"
+
+    # Patterns
+    if "patterns" in analysis:
+        yield "🏷️ BEHAVIOR ANALYSIS\n"
+        yield "-" * 60 + "\n"
+        yield f"Classification: {behavior_label(analysis['patterns'])}\n"
+
+        if "trends" in analysis["patterns"]:
+            trend = analysis["patterns"]["trends"].get("trend", "stable")
+            yield f"Usage Trend:    {trend.title()}\n"
+
+        if "weekdayVsWeekend" in analysis["patterns"]:
+            wvw = analysis["patterns"]["weekdayVsWeekend"]
+            yield f"Weekday Avg:    {wvw.get('weekday', 0):.1f} hours\n"
+            yield f"Weekend Avg:    {wvw.get('weekend', 0):.1f} hours\n"
+
+        yield "\n"
+
+    # Predictions
+    if "predictions" in analysis and "next_7_days" in analysis["predictions"]:
+        yield "🔮 7-DAY PREDICTIONS\n"
+        yield "-" * 60 + "\n"
+        for pred in analysis["predictions"]["next_7_days"]:
+            day_emoji = "🏖️" if pred.get("isWeekend") else "💼"
+            yield (f"{day_emoji} {pred.get('date', 'N/A'):12} | "
+                   f"{pred.get('predictedScreenTimeHours', 0):5.1f} hours\n")
+
+        weekly_total = analysis["predictions"].get("weekly_prediction", 0)
+        yield "-" * 60 + "\n"
+        yield f"Predicted Weekly Total: {weekly_total:.1f} hours\n"
+        yield "\n"
+
+    # Recommendations
+    yield "💡 PERSONALIZED RECOMMENDATIONS\n"
+    yield "-" * 60 + "\n"
+    for i, rec in enumerate(analysis.get("recommendations", []), 1):
+        yield f"{i}. {rec}\n"
+
+    yield "\n" + "=" * 60 + "\n"
+    yield "This report was generated by HabitGuard ML Analyzer.\n"
+    yield "Use these insights to improve your digital wellness.\n"
+    yield "=" * 60 + "\n"
+
+
+def render_txt(analysis: Dict) -> str:
+    """Render a plain text report as a string"""
+    return "".join(iter_txt_lines(analysis))
+
+
+# ----------------------------------------------------------------------
+# Stream output
+# ----------------------------------------------------------------------
+
+def write_pdf_report(analysis: Dict, stream: BinaryIO, styles: Optional[ReportStyles] = None) -> None:
+    """Write a PDF report to any writable binary stream"""
+    render_pdf(analysis, stream, styles)
+
+
+def write_txt_report(analysis: Dict, stream: TextIO) -> None:
+    """Write a plain text report to any writable text stream"""
+    stream.writelines(iter_txt_lines(analysis))
+
+
+def render_report_bytes(analysis: Dict, fmt: str, encoding: str = 'utf-8') -> bytes:
+    """Render a report of the given format ('pdf' or 'txt') fully in memory"""
+    if fmt == 'pdf':
+        return render_pdf_bytes(analysis)
+    if fmt == 'txt':
+        return render_txt(analysis).encode(encoding)
+    raise ValueError(f"Unsupported report format: {fmt}")
+
+
+def _chunk_bytes(data: bytes, chunk_size: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(data), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def iter_report_chunks(analysis: Dict, fmt: str = 'pdf', chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       encoding: str = 'utf-8') -> Iterator[bytes]:
+    """
+    Yield a report as byte chunks of at most chunk_size
+
+    TXT reports are encoded and yielded as they are generated; PDFs need the
+    whole document laid out first, so they are rendered to memory and sliced.
+    """
+    if fmt == 'txt':
+        buffer = bytearray()
+        for line in iter_txt_lines(analysis):
+            buffer += line.encode(encoding)
+            if len(buffer) >= chunk_size:
+                yield from _chunk_bytes(bytes(buffer), chunk_size)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    elif fmt == 'pdf':
+        yield from _chunk_bytes(render_pdf_bytes(analysis), chunk_size)
+    else:
+        raise ValueError(f"Unsupported report format: {fmt}")
+
+
+async def aiter_report_chunks(analysis: Dict, fmt: str = 'pdf', chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              executor: Optional[Executor] = None) -> AsyncIterator[bytes]:
+    """
+    Async generator of report byte chunks for streaming HTTP responses
+
+    Rendering runs in ``executor`` (default: the loop's thread pool) so the
+    event loop is never blocked by reportlab layout.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report format: {fmt}")
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(executor, render_report_bytes, analysis, fmt)
+    for chunk in _chunk_bytes(data, chunk_size):
+        yield chunk
+        await asyncio.sleep(0)
+
+
+def unique_report_path(fmt: str, output_dir: str = '') -> str:
+    """Return a report filename that can't collide with a concurrent report from the same second"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"habitguard_report_{timestamp}_{uuid.uuid4().hex[:8]}.{fmt}")
+
+
+def write_report_file(analysis: Dict, path: str, fmt: str) -> str:
+    """Write a report to path atomically (temp file + rename) so readers never see a partial file"""
+    directory = os.path.dirname(path) or '.'
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            if fmt == 'pdf':
+                write_pdf_report(analysis, f)
+            else:
+                f.write(render_txt(analysis).encode('utf-8'))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+# ----------------------------------------------------------------------
+# Batch rendering
+# ----------------------------------------------------------------------
+
+def _init_worker(chart_cache_dir: Optional[str] = None) -> None:
+    """Process pool initializer: pay the reportlab, style and matplotlib cost once per worker"""
+    if PDF_AVAILABLE:
+        get_report_styles()
+        if chart_cache_dir:
+            # Workers share rendered charts through the disk tier
+            configure_chart_cache(disk_dir=chart_cache_dir)
+        warm_chart_backend()
+
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9_-]')
+
+
+def report_filename(key: str, fmt: str) -> str:
+    """
+    File name for a batch report: habitguard_report_<key>.<fmt>
+
+    Keys may only use letters, digits, '_' and '-' in file names; anything
+    else (path separators, dots) is replaced and a hash of the original key
+    is appended so distinct keys never share a file.
+    """
+    safe = _UNSAFE_FILENAME_CHARS.sub('_', key)
+    if safe != key or not safe:
+        safe = f"{safe}_{hashlib.blake2b(key.encode('utf-8'), digest_size=4).hexdigest()}"
+    return f"habitguard_report_{safe}.{fmt}"
+
+
+def _render_job(job: Tuple[str, Dict, str, Optional[str]]) -> Tuple[str, Union[bytes, str]]:
+    """Render one report in a worker; returns (key, bytes) or (key, path) when writing to disk"""
+    key, analysis, fmt, output_dir = job
+    if output_dir is None:
+        return key, render_report_bytes(analysis, fmt)
+    return key, write_report_file(analysis, os.path.join(output_dir, report_filename(key, fmt)), fmt)
+
+
+class BatchReportRenderer:
+    """Render many reports in parallel across a pool of warm worker processes"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunksize: int = 16,
+                 chart_cache_dir: Optional[str] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.chart_cache_dir = chart_cache_dir
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        self._ensure_pool()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the parent may already run threads and hold matplotlib/reportlab state
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                             initargs=(self.chart_cache_dir,),
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def render_many(self, analyses: Iterable[Tuple[str, Dict]], fmt: str = 'pdf',
+                    output_dir: Optional[str] = None) -> Iterator[Tuple[str, Union[bytes, str]]]:
+        """
+        Render reports for many users
+
+        Args:
+            analyses: Iterable of (key, analysis) pairs, e.g. (user_id, analyze_patterns() result)
+            fmt: 'pdf' or 'txt'
+            output_dir: Write files named by report_filename(key, fmt) here instead of returning bytes
+
+        Yields:
+            (key, bytes) pairs, or (key, path) pairs when output_dir is given, in input order
+        """
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unsupported report format: {fmt}")
+        if fmt == 'pdf' and not PDF_AVAILABLE:
+            raise RuntimeError("reportlab not installed. Install with: pip install reportlab")
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+
+        jobs = ((str(key), analysis, fmt, output_dir) for key, analysis in analyses)
+        pool = self._ensure_pool()
+        yield from pool.map(_render_job, jobs, chunksize=self.chunksize)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Analysis Result Cache
+================================
+
+Memoizes ``analyze_patterns`` results keyed by a hash of the raw CSV body.
+
+The app resends the same CSV every time its one-hour cache expires; with this
+cache in front of the analyzer an identical request is answered from memory
+in microseconds instead of re-parsing and re-fitting everything.
+
+- Key: BLAKE2b of the raw CSV bytes + ``ANALYZER_VERSION``
+- Memory tier: LRU bounded by entry count and serialized bytes, with TTL
+- Optional disk tier: one JSON file per key, shared between processes
+- Concurrent misses for the same key compute once (single flight)
+- Hit/miss/eviction metrics via ``stats()``
+
+Cached results are shared between callers and must be treated as read-only.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from serialization import dumps, loads
+from analysis_core import ANALYZER_VERSION, get_default_service
+
+
+def analyze_csv(csv_content: str) -> Dict:
+    """Run a full analysis on raw CSV content (shared warm service, safe from any thread)"""
+    return get_default_service().analyze_csv(csv_content)
+
+
+class AnalysisResultCache:
+    """LRU + TTL cache of analysis results with an optional on-disk tier"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 3600, disk_dir: Optional[str] = None,
+                 version: str = ANALYZER_VERSION):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.version = version
+
+        # key -> (expires_at, result, body)
+        self._entries: "OrderedDict[str, Tuple[float, Dict, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._metrics = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def key_for(self, csv_content: Union[str, bytes]) -> str:
+        """Cache key for a raw CSV body"""
+        if isinstance(csv_content, str):
+            csv_content = csv_content.encode('utf-8')
+        digest = hashlib.blake2b(csv_content, digest_size=16, person=b'habitguard-csv')
+        digest.update(self.version.encode('utf-8'))
+        return digest.hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        """Return (result, serialized JSON body) for a key, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._metrics['hits'] += 1
+                    return entry[1], entry[2]
+                self._remove(key)
+                self._metrics['expirations'] += 1
+
+        body = self._read_disk(key)
+        if body is not None:
+            try:
+                result = loads(body)
+                if not isinstance(result, dict):
+                    raise ValueError("cache entry is not an object")
+            except (ValueError, TypeError) as e:
+                # Truncated or corrupt file: drop it and recompute instead of failing every request
+                print(f"⚠️ Discarding unreadable cache entry {key}: {e}")
+                self._remove_disk(key)
+                body = None
+        if body is not None:
+            self._store(key, result, body)
+            with self._lock:
+                self._metrics['disk_hits'] += 1
+            return result, body
+
+        with self._lock:
+            self._metrics['misses'] += 1
+        return None
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for a key, or None on a miss"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, result: Dict) -> bytes:
+        """Cache a result; returns its serialized JSON body"""
+        body = dumps(result)
+        self._store(key, result, body)
+        self._write_disk(key, body)
+        return body
+
+    def get_or_compute(self, csv_content: Union[str, bytes],
+                       compute: Optional[Callable[[str], Dict]] = None) -> Tuple[Dict, bytes]:
+        """
+        Return (result, JSON body) for a CSV body, computing it on a miss
+
+        Error results are returned but never cached.
+        """
+        key = self.key_for(csv_content)
+        while True:
+            entry = self.get_entry(key)
+            if entry is not None:
+                return entry
+
+            with self._lock:
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            # Another thread is computing this key: wait, then re-check the cache
+            waiter.wait()
+
+        try:
+            if isinstance(csv_content, bytes):
+                csv_content = csv_content.decode('utf-8')
+            result = (compute or analyze_csv)(csv_content)
+            if "error" in result:
+                return result, dumps(result)
+            return result, self.put(key, result)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    # ------------------------------------------------------------------
+    # Maintenance and metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Hit/miss metrics and current size"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['entries'] = len(self._entries)
+            metrics['bytes'] = self._bytes
+        lookups = metrics['hits'] + metrics['disk_hits'] + metrics['misses']
+        metrics['hit_rate'] = (metrics['hits'] + metrics['disk_hits']) / lookups if lookups else 0.0
+        return metrics
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the disk tier is left alone)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key: str, result: Dict, body: bytes) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result, body)
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._metrics['evictions'] += 1
+
+    def _remove(self, key: str) -> None:
+        # Caller holds self._lock
+        _, _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remove_disk(self, key: str) -> None:
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    def _write_disk(self, key: str, body: bytes) -> None:
+        if not self.disk_dir:
+            return
+        tmp_path = os.path.join(self.disk_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"⚠️ Could not write cache entry to disk: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Result Serialization
+===============================
+
+Fast JSON encoding for analysis results returned by the server.
+
+- orjson fast path when installed, stdlib ``json`` fallback otherwise
+- Compact output by default (``pretty=True`` for humans)
+- Native NumPy scalars/arrays, pandas Timestamps and datetimes, no ``default=str``
+- Non-finite floats (NaN/inf) become ``null`` so the output is always valid JSON
+- Optional gzip/brotli response compression negotiated from Accept-Encoding
+
+Usage:
+    body = dumps(analysis)
+    body, content_encoding = encode_response(analysis, accept_encoding='gzip, br')
+"""
+
+import gzip
+import json
+import math
+from datetime import date, datetime, time
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+# Try to import the fast JSON encoder
+try:
+    import orjson  # type: ignore
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import brotli compression
+try:
+    import brotli  # type: ignore
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Responses smaller than this are not worth compressing
+DEFAULT_MIN_COMPRESS_SIZE = 1024
+
+
+def _default(obj: Any) -> Any:
+    """Convert types neither encoder handles natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # pandas objects (Timestamp, Timedelta, Series) without importing pandas
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _sanitize(obj: Any) -> Any:
+    """Recursively convert values for the stdlib encoder (NaN/inf -> None, NumPy -> Python)"""
+    if isinstance(obj, dict):
+        return {k if isinstance(k, str) else str(k): _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _sanitize(obj.tolist())
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _dumps_fast(obj: Any, pretty: bool) -> bytes:
+        option = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if pretty else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+def _dumps_stdlib(obj: Any, pretty: bool) -> bytes:
+    if pretty:
+        text = json.dumps(_sanitize(obj), default=_default, indent=2, ensure_ascii=False, allow_nan=False)
+    else:
+        text = json.dumps(_sanitize(obj), default=_default, separators=(',', ':'),
+                          ensure_ascii=False, allow_nan=False)
+    return text.encode('utf-8')
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize an analysis result to UTF-8 JSON bytes
+
+    Args:
+        obj: Result dict (may contain NumPy values, datetimes, pandas Timestamps)
+        pretty: Indent with 2 spaces instead of compact output
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        return _dumps_fast(obj, pretty)
+    return _dumps_stdlib(obj, pretty)
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON bytes or str"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a response body with 'gzip' or 'br'"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6 if level is None else level)
+    if encoding == 'br':
+        if not BROTLI_AVAILABLE:
+            raise RuntimeError("brotli not installed. Install with: pip install brotli")
+        return brotli.compress(body, quality=5 if level is None else level)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header (br > gzip)"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        accepted.add(token.strip().lower())
+    if BROTLI_AVAILABLE and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def encode_response(obj: Any, accept_encoding: Optional[str] = None,
+                    min_size: int = DEFAULT_MIN_COMPRESS_SIZE) -> Tuple[bytes, Optional[str]]:
+    """
+    Serialize a result for an HTTP response, compressing it if the client allows
+
+    Returns:
+        (body, content_encoding) where content_encoding is None for identity
+    """
+    body = dumps(obj)
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None or len(body) < min_size:
+        return body, None
+    return compress(body, encoding), encoding
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Shared Artifacts
+===========================
+
+Read-only model and reference data shared zero-copy between worker processes.
+
+Every worker in a process pool used to load its own Keras model, scaler and
+lookup tables, so memory grew linearly with the number of workers. Artifacts
+are now written once to a single ``.art`` file of raw NumPy arrays; workers
+``np.memmap`` it read-only, so every process maps the same page-cache pages
+and adding workers does not multiply RSS.
+
+- ``publish_artifacts``: write named arrays + JSON metadata atomically
+- ``attach_artifacts``: map a file and return zero-copy read-only array views
+- ``DenseNetwork``: NumPy forward pass for the usage NN (no TensorFlow needed
+  in workers); ``predict`` mirrors ``keras.Model.predict``
+- ``ArrayCategoryLookup``: package -> category codes via ``np.searchsorted``
+  over a sorted package array, with the prefix rules as fallback
+
+File layout:
+    b'HGART1\\n' | uint64 header length | JSON header | 64-byte aligned arrays
+
+A replaced file never disturbs running workers: they keep the old mapping
+until they attach again.
+
+Usage:
+    python shared_artifacts.py --model models/usage_nn_model.h5 --output models/habitguard.art
+"""
+
+import argparse
+import json
+import os
+import struct
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import CATEGORIES, CategoryLookup, OTHER_CODE
+
+MAGIC = b'HGART1\n'
+ALIGNMENT = 64
+DEFAULT_ARTIFACTS_PATH = os.path.join('models', 'habitguard.art')
+
+# Student-mode daily limits (hours), shared with check_student_restrictions
+STUDENT_THRESHOLDS: Dict[str, float] = {
+    'social_media_hours': 2.0,
+    'entertainment_hours': 3.0,
+    'gaming_hours': 1.5,
+    'browsing_hours': 2.0,
+}
+
+
+@dataclass
+class ArtifactBundle:
+    """Arrays mapped from an artifact file plus its JSON metadata"""
+    path: str
+    arrays: Mapping[str, np.ndarray]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def publish_artifacts(arrays: Mapping[str, np.ndarray], path: str = DEFAULT_ARTIFACTS_PATH,
+                      meta: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write arrays to an artifact file atomically (temp file + rename)
+
+    Args:
+        arrays: name -> array; object dtypes are not allowed (they can't be mapped)
+        path: Target .art file
+        meta: JSON-serializable metadata stored in the header
+
+    Returns:
+        str: The written path
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"Artifact '{name}' has object dtype and cannot be memory mapped")
+
+    # Offsets are relative to the start of the data section
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'arrays': entries, 'meta': meta or {}}).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + entries[name]['offset'])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def attach_artifacts(path: str = DEFAULT_ARTIFACTS_PATH) -> ArtifactBundle:
+    """Map an artifact file; returned arrays are read-only views into the shared mapping"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a HabitGuard artifact file")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+
+    arrays = {}
+    if header['arrays']:
+        mapping = np.memmap(path, dtype=np.uint8, mode='r')
+        for name, entry in header['arrays'].items():
+            dtype = np.dtype(entry['dtype'])
+            shape = tuple(entry['shape'])
+            start = data_start + entry['offset']
+            nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            arrays[name] = mapping[start:start + nbytes].view(dtype).reshape(shape)
+    return ArtifactBundle(path=path, arrays=arrays, meta=header['meta'])
+
+
+# ----------------------------------------------------------------------
+# Usage neural network
+# ----------------------------------------------------------------------
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'softmax': _softmax,
+    'linear': lambda x: x,
+}
+
+
+class DenseNetwork:
+    """NumPy inference for a stack of Dense layers (Dropout is identity at inference)"""
+
+    def __init__(self, layers: Sequence[Tuple[np.ndarray, np.ndarray]], activations: Sequence[str]):
+        if len(layers) != len(activations):
+            raise ValueError("Need one activation per layer")
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported activations: {sorted(unknown)}")
+        self.layers = list(layers)
+        self.activations = list(activations)
+
+    @classmethod
+    def from_keras(cls, model) -> 'DenseNetwork':
+        """Extract Dense layer weights from a Keras model"""
+        layers, activations = [], []
+        for layer in model.layers:
+            weights = layer.get_weights()
+            if len(weights) != 2:
+                continue  # Dropout and other weightless layers
+            layers.append((np.asarray(weights[0], dtype=np.float32), np.asarray(weights[1], dtype=np.float32)))
+            activations.append(layer.activation.__name__)
+        return cls(layers, activations)
+
+    @classmethod
+    def from_bundle(cls, bundle: ArtifactBundle, prefix: str = 'nn') -> 'DenseNetwork':
+        """Zero-copy network over arrays in an attached bundle"""
+        activations = bundle.meta[f'{prefix}.activations']
+        layers = [(bundle[f'{prefix}.W{i}'], bundle[f'{prefix}.b{i}']) for i in range(len(activations))]
+        return cls(layers, activations)
+
+    def to_arrays(self, prefix: str = 'nn') -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata for publish_artifacts"""
+        arrays = {}
+        for i, (weights, bias) in enumerate(self.layers):
+            arrays[f'{prefix}.W{i}'] = weights
+            arrays[f'{prefix}.b{i}'] = bias
+        return arrays, {f'{prefix}.activations': self.activations}
+
+    @property
+    def input_size(self) -> int:
+        return self.layers[0][0].shape[0]
+
+    def predict(self, features, batch_size: int = 1024, verbose: int = 0) -> np.ndarray:
+        """Class probabilities, same call shape as keras.Model.predict"""
+        features = np.asarray(features, dtype=np.float32)
+        outputs = []
+        for start in range(0, len(features), batch_size):
+            x = features[start:start + batch_size]
+            for (weights, bias), activation in zip(self.layers, self.activations):
+                x = ACTIVATIONS[activation](x @ weights + bias)
+            outputs.append(x)
+        if not outputs:
+            return np.zeros((0, self.layers[-1][0].shape[1]), dtype=np.float32)
+        return np.concatenate(outputs)
+
+
+# ----------------------------------------------------------------------
+# Category lookup table
+# ----------------------------------------------------------------------
+
+class ArrayCategoryLookup:
+    """Package -> category codes over sorted, mappable arrays"""
+
+    def __init__(self, packages: np.ndarray, codes: np.ndarray, prefixes: Optional[Dict[str, str]] = None):
+        self.packages = packages
+        self.package_codes = codes
+        self.prefixes = dict(prefixes or {})
+        # Prefix rules are few; a small in-process trie handles packages not in the table
+        self._fallback = CategoryLookup(packages={}, prefixes=self.prefixes)
+
+    @classmethod
+    def from_index(cls, index) -> 'ArrayCategoryLookup':
+        """Snapshot a PackageCategoryIndex into sorted arrays"""
+        rows = sorted(index.items())
+        packages = np.array([package for package, _ in rows], dtype=str)
+        codes = np.array([CATEGORIES.index(category) for _, category in rows], dtype=np.int8)
+        return cls(packages, codes, index.prefix_rules())
+
+    @classmethod
+    def from_bundle(cls, bundle: ArtifactBundle) -> 'ArrayCategoryLookup':
+        return cls(bundle['categories.packages'], bundle['categories.codes'], bundle.meta.get('categories.prefixes'))
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        arrays = {'categories.packages': np.asarray(self.packages), 'categories.codes': np.asarray(self.package_codes)}
+        return arrays, {'categories.prefixes': self.prefixes}
+
+    def codes(self, packages) -> np.ndarray:
+        """Vectorized category codes; each distinct package is looked up once"""
+        uniques_idx, uniques = pd.factorize(pd.Series(packages, dtype=object).fillna(''), sort=False)
+        uniques = np.asarray(uniques, dtype=str)
+        if len(self.packages) == 0:
+            table = np.full(len(uniques), OTHER_CODE, dtype=np.int8)
+        else:
+            positions = np.searchsorted(self.packages, uniques)
+            positions = np.minimum(positions, len(self.packages) - 1)
+            found = self.packages[positions] == uniques
+            table = np.where(found, self.package_codes[positions], OTHER_CODE).astype(np.int8)
+            for i in np.flatnonzero(~found):
+                table[i] = self._fallback.code(uniques[i])
+        return table[uniques_idx]
+
+    def code(self, package: str) -> int:
+        return int(self.codes([package])[0])
+
+    def category(self, package: str) -> str:
+        return CATEGORIES[self.code(package)]
+
+
+# ----------------------------------------------------------------------
+# Building and worker attachment
+# ----------------------------------------------------------------------
+
+def build_artifacts(network: Optional[DenseNetwork] = None, index=None,
+                    path: str = DEFAULT_ARTIFACTS_PATH) -> str:
+    """Publish the usage NN, the category table and the student thresholds to one file"""
+    arrays: Dict[str, np.ndarray] = {}
+    meta: Dict[str, Any] = {}
+    if network is not None:
+        net_arrays, net_meta = network.to_arrays()
+        arrays.update(net_arrays)
+        meta.update(net_meta)
+    if index is None:
+        from category_index import get_default_index
+        index = get_default_index()
+    table_arrays, table_meta = ArrayCategoryLookup.from_index(index).to_arrays()
+    arrays.update(table_arrays)
+    meta.update(table_meta)
+    arrays['student.thresholds'] = np.array(list(STUDENT_THRESHOLDS.values()), dtype=np.float64)
+    meta['student.threshold_names'] = list(STUDENT_THRESHOLDS)
+    return publish_artifacts(arrays, path, meta)
+
+
+_worker_bundle: Optional[ArtifactBundle] = None
+
+
+def attach_worker_artifacts(path: str) -> None:
+    """Process pool initializer: map the artifact file once per worker"""
+    global _worker_bundle
+    _worker_bundle = attach_artifacts(path)
+
+
+def get_worker_artifacts() -> Optional[ArtifactBundle]:
+    """Artifacts attached in this process, if any"""
+    return _worker_bundle
+
+
+def get_shared_network() -> Optional[DenseNetwork]:
+    """The usage NN from this process's attached artifacts, if it has one"""
+    if _worker_bundle is None or 'nn.activations' not in _worker_bundle.meta:
+        return None
+    return DenseNetwork.from_bundle(_worker_bundle)
+
+
+def student_thresholds() -> Dict[str, float]:
+    """Student limits from the attached artifacts, falling back to the defaults"""
+    if _worker_bundle is None or 'student.thresholds' not in _worker_bundle:
+        return dict(STUDENT_THRESHOLDS)
+    names: List[str] = _worker_bundle.meta['student.threshold_names']
+    return dict(zip(names, _worker_bundle['student.thresholds'].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📦 Build HabitGuard shared artifacts')
+    parser.add_argument('--model', type=str, default=None, help='Keras model to export (.h5/.keras)')
+    parser.add_argument('--output', type=str, default=DEFAULT_ARTIFACTS_PATH, help='Artifact file to write')
+    args = parser.parse_args()
+
+    network = None
+    if args.model:
+        try:
+            import tensorflow as tf  # type: ignore
+        except ImportError:
+            print("❌ TensorFlow is needed to export a Keras model. Install with: pip install tensorflow")
+            return
+        network = DenseNetwork.from_keras(tf.keras.models.load_model(args.model))
+
+    path = build_artifacts(network, path=args.output)
+    bundle = attach_artifacts(path)
+    print(f"✅ Wrote {len(bundle.arrays)} arrays ({bundle.nbytes / 1024:.1f} KiB) to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Streak Engine
+========================
+
+Current/longest streaks, streak start dates and active-day counts against
+per-user daily screen-time goals, for the whole fleet in one pass.
+
+- A day counts when the user's screen time is at or under their daily goal
+- Streaks follow ``streakController.js``: consecutive calendar days with the
+  goal met; a missed goal or a missing day breaks the streak
+- Days are run-length encoded over one flat (userId, date) sorted array:
+  a run starts wherever the user, the goal-met flag or date contiguity
+  changes, so every streak of every user comes out of a handful of numpy
+  operations instead of one SELECT and date check per user-day
+- Output rows match the ``user_statistics`` and ``streak_history`` tables
+
+Goals come from a ``dailyGoalMinutes`` column, a ``{userId: minutes}``
+mapping, or a default.
+
+Usage:
+    python streak_engine.py --csv fleet_usage.csv --output user_statistics.csv [--history streak_history.csv]
+"""
+
+import argparse
+from datetime import date
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+USER_COLUMN = 'userId'
+DEFAULT_GOAL_MINUTES = 240
+MS_PER_MINUTE = 60_000
+
+# Columns written by streakController.js
+STATISTICS_COLUMNS = ['u_id', 'current_streak', 'longest_streak', 'last_active_date',
+                      'streak_start_date', 'total_active_days']
+HISTORY_COLUMNS = ['u_id', 'streak_date', 'streak_count', 'goal_met',
+                   'screen_time_minutes', 'goal_limit_minutes']
+
+
+def daily_goals(df: pd.DataFrame, goals: Optional[Dict] = None,
+                default_goal_minutes: float = DEFAULT_GOAL_MINUTES) -> pd.DataFrame:
+    """
+    One row per user and calendar day with minutes, goal and goal_met
+
+    Args:
+        df: Usage rows with 'date' and 'totalScreenTime' (ms) or 'screenTimeHours';
+            'userId' (or 'u_id') is optional for a single user
+        goals: Optional {userId: daily goal minutes}, overriding dailyGoalMinutes
+        default_goal_minutes: Goal for users without one
+
+    Returns:
+        DataFrame sorted by userId and date; several rows for one day (the app
+        exports a row per hour) are summed, with that day's last goal
+    """
+    data = df.rename(columns={'u_id': USER_COLUMN}) if 'u_id' in df.columns else df
+    if USER_COLUMN not in data.columns:
+        data = data.assign(**{USER_COLUMN: 0})
+
+    if 'totalScreenTime' in data.columns:
+        minutes = pd.to_numeric(data['totalScreenTime'], errors='coerce') / MS_PER_MINUTE
+    else:
+        minutes = pd.to_numeric(data['screenTimeHours'], errors='coerce') * 60
+
+    daily = pd.DataFrame({
+        USER_COLUMN: data[USER_COLUMN].to_numpy(),
+        'date': pd.to_datetime(data['date']).dt.normalize().to_numpy(),
+        'minutes': minutes.to_numpy(dtype=float),
+    })
+
+    goal = pd.Series(float(default_goal_minutes), index=data.index)
+    if 'dailyGoalMinutes' in data.columns:
+        goal = pd.to_numeric(data['dailyGoalMinutes'], errors='coerce').fillna(goal)
+    if goals:
+        goal = data[USER_COLUMN].map(goals).astype(float).fillna(goal)
+    daily['goal'] = goal.to_numpy(dtype=float)
+
+    daily = daily.dropna(subset=['minutes'])
+    daily = daily.sort_values([USER_COLUMN, 'date'], kind='mergesort')
+    daily = daily.groupby([USER_COLUMN, 'date'], sort=True).agg(
+        minutes=('minutes', 'sum'),
+        goal=('goal', 'last'),
+    ).reset_index()
+    daily['goal_met'] = daily['minutes'] <= daily['goal']
+    return daily
+
+
+def _runs(daily: pd.DataFrame):
+    """Run-length encode the sorted daily frame into (run_start, run_length) per row"""
+    users = daily[USER_COLUMN].to_numpy()
+    days = daily['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    met = daily['goal_met'].to_numpy()
+    n = len(met)
+
+    starts = np.ones(n, dtype=bool)
+    if n > 1:
+        starts[1:] = (users[1:] != users[:-1]) | (np.diff(days) != 1) | (met[1:] != met[:-1])
+    start_index = np.flatnonzero(starts)
+    lengths = np.diff(np.r_[start_index, n])
+    return start_index, lengths
+
+
+def daily_streaks(df: pd.DataFrame, goals: Optional[Dict] = None,
+                  default_goal_minutes: float = DEFAULT_GOAL_MINUTES) -> pd.DataFrame:
+    """
+    Per-day goal adherence and the streak count as of each day (``streak_history`` rows)
+
+    Returns:
+        daily_goals() frame plus 'streak' (0 on days the goal was missed)
+    """
+    daily = daily_goals(df, goals, default_goal_minutes)
+    start_index, lengths = _runs(daily)
+    # Position within the run, +1, on goal-met days
+    run_start = np.repeat(start_index, lengths)
+    position = np.arange(len(daily)) - run_start + 1
+    daily['streak'] = np.where(daily['goal_met'].to_numpy(), position, 0)
+    return daily
+
+
+def compute_streaks(df: pd.DataFrame, goals: Optional[Dict] = None,
+                    default_goal_minutes: float = DEFAULT_GOAL_MINUTES,
+                    as_of: Union[str, date, None] = None) -> pd.DataFrame:
+    """
+    Streak statistics for every user
+
+    Args:
+        df: Usage rows (see daily_goals)
+        goals: Optional {userId: daily goal minutes}
+        as_of: Reference day; a streak is current if its last day is as_of or the
+            day before (today may not be logged yet). Default: each user's last day
+
+    Returns:
+        DataFrame with one row per user: userId, current_streak, longest_streak,
+        last_active_date, streak_start_date, longest_streak_start_date,
+        total_active_days, tracked_days, adherence_rate
+    """
+    daily = daily_goals(df, goals, default_goal_minutes)
+    start_index, lengths = _runs(daily)
+    runs = pd.DataFrame({
+        USER_COLUMN: daily[USER_COLUMN].to_numpy()[start_index],
+        'start': daily['date'].to_numpy()[start_index],
+        'end': daily['date'].to_numpy()[start_index + lengths - 1],
+        'length': lengths,
+        'met': daily['goal_met'].to_numpy()[start_index],
+    })
+
+    per_user = daily.groupby(USER_COLUMN, sort=True).agg(
+        last_active_date=('date', 'max'),
+        total_active_days=('goal_met', 'sum'),
+        tracked_days=('date', 'size'),
+    )
+
+    # Longest goal-met run per user (earliest one on ties)
+    met_runs = runs[runs['met']]
+    longest = (met_runs.sort_values([USER_COLUMN, 'length', 'start'], ascending=[True, False, True], kind='mergesort')
+               .drop_duplicates(USER_COLUMN).set_index(USER_COLUMN))
+
+    # The last run of each user is the current streak if it is goal-met and recent enough
+    last = runs.drop_duplicates(USER_COLUMN, keep='last').set_index(USER_COLUMN)
+    alive = last['met'].to_numpy().copy()
+    if as_of is not None:
+        alive &= (last['end'] >= pd.Timestamp(as_of).normalize() - pd.Timedelta(days=1)).to_numpy()
+
+    stats = pd.DataFrame(index=per_user.index)
+    stats['current_streak'] = np.where(alive, last['length'].to_numpy(), 0)
+    stats['longest_streak'] = longest['length'].reindex(stats.index).fillna(0).astype(np.int64)
+    stats['last_active_date'] = per_user['last_active_date']
+    stats['streak_start_date'] = last['start'].where(pd.Series(alive, index=last.index))
+    stats['longest_streak_start_date'] = longest['start'].reindex(stats.index)
+    stats['total_active_days'] = per_user['total_active_days'].astype(np.int64)
+    stats['tracked_days'] = per_user['tracked_days'].astype(np.int64)
+    stats['adherence_rate'] = stats['total_active_days'] / stats['tracked_days']
+    return stats.reset_index()
+
+
+def goal_adherence(df: pd.DataFrame, goal_minutes: Optional[float] = None,
+                   as_of: Union[str, date, None] = None) -> Dict:
+    """Streak summary for one user's analysis (uses dailyGoalMinutes unless goal_minutes is given)"""
+    data = df if goal_minutes is None else df.drop(columns=['dailyGoalMinutes'], errors='ignore')
+    stats = compute_streaks(data.drop(columns=[USER_COLUMN, 'u_id'], errors='ignore'),
+                            default_goal_minutes=goal_minutes or DEFAULT_GOAL_MINUTES, as_of=as_of)
+    if len(stats) == 0:
+        return {"error": "No data available for streaks"}
+
+    row = stats.iloc[0]
+
+    def _day(value) -> Optional[str]:
+        return None if pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+    return {
+        "currentStreak": int(row['current_streak']),
+        "longestStreak": int(row['longest_streak']),
+        "streakStartDate": _day(row['streak_start_date']),
+        "longestStreakStartDate": _day(row['longest_streak_start_date']),
+        "totalActiveDays": int(row['total_active_days']),
+        "trackedDays": int(row['tracked_days']),
+        "adherenceRate": float(row['adherence_rate'])
+    }
+
+
+def to_statistics_rows(stats: pd.DataFrame) -> pd.DataFrame:
+    """compute_streaks() output in ``user_statistics`` column order"""
+    rows = stats.rename(columns={USER_COLUMN: 'u_id'})
+    for column in ('last_active_date', 'streak_start_date'):
+        rows[column] = pd.to_datetime(rows[column]).dt.strftime('%Y-%m-%d')
+    return rows[STATISTICS_COLUMNS]
+
+
+def to_history_rows(daily: pd.DataFrame) -> pd.DataFrame:
+    """daily_streaks() output in ``streak_history`` column order"""
+    return pd.DataFrame({
+        'u_id': daily[USER_COLUMN].to_numpy(),
+        'streak_date': daily['date'].dt.strftime('%Y-%m-%d').to_numpy(),
+        'streak_count': daily['streak'].to_numpy(),
+        'goal_met': daily['goal_met'].astype(int).to_numpy(),
+        'screen_time_minutes': np.round(daily['minutes'].to_numpy()).astype(np.int64),
+        'goal_limit_minutes': np.round(daily['goal'].to_numpy()).astype(np.int64),
+    })[HISTORY_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill HabitGuard streak statistics')
+    parser.add_argument('--csv', required=True, help='Fleet usage export (userId/u_id, date, totalScreenTime)')
+    parser.add_argument('--output', required=True, help='user_statistics CSV to write')
+    parser.add_argument('--history', help='Also write streak_history rows to this CSV')
+    parser.add_argument('--goal-minutes', type=float, default=DEFAULT_GOAL_MINUTES)
+    parser.add_argument('--as-of', default=date.today().isoformat(),
+                        help='Reference day for current streaks (default: today)')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    stats = compute_streaks(df, default_goal_minutes=args.goal_minutes, as_of=args.as_of)
+    to_statistics_rows(stats).to_csv(args.output, index=False)
+    print(f"✅ Wrote streaks for {len(stats):,} users to {args.output}")
+
+    if args.history:
+        history = to_history_rows(daily_streaks(df, default_goal_minutes=args.goal_minutes))
+        history.to_csv(args.history, index=False)
+        print(f"✅ Wrote {len(history):,} streak_history rows to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
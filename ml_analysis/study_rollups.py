@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Study Statistics Rollups
+===================================
+
+Recomputes ``study_statistics`` from ``study_sessions`` in bulk, instead of
+trusting the per-request increments in ``studySessionController.js``.
+
+- A session counts on ``stat_date`` = the date of its end time (else start
+  time, else creation); sessions that never started are skipped
+- Per (user, profile, subject, stat_date): study minutes (whole minutes per
+  session, as the controller stores them), sessions, completed sessions,
+  average minutes per session and pauses, all from one grouped aggregation
+- Study minutes per user and day are correlated with same-day screen time
+  from the analyzer's usage export (days with usage but no study count as
+  0 minutes), using grouped sums so only the users asked for are recomputed
+- Incremental mode works on a SQLite stand-in database: only sessions
+  updated after the stored watermark are read, and only their (user, date)
+  groups are recomputed and replaced
+
+Usage:
+    python study_rollups.py --sessions study_sessions.csv --output study_statistics.csv [--usage fleet_usage.csv]
+    python study_rollups.py --db habitguard.db [--usage fleet_usage.csv]
+"""
+
+import argparse
+import sqlite3
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+USER_COLUMN = 'userId'
+WATERMARK_KEY = 'study_statistics'
+
+# Columns of the study_statistics table (minus auto columns)
+STATISTICS_COLUMNS = ['user_id', 'profile_id', 'subject_id', 'stat_date', 'total_study_minutes',
+                      'total_sessions', 'completed_sessions', 'average_session_minutes', 'total_pauses']
+CORRELATION_COLUMNS = ['user_id', 'days', 'study_days', 'avg_study_minutes', 'avg_screen_minutes',
+                       'correlation', 'study_minutes_per_screen_hour']
+
+# prepare_sessions' stat_date in SQL, for sessions aliased as s
+STAT_DATE_SQL = "date(COALESCE(s.end_time, s.start_time, s.created_at))"
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS study_sessions (
+    session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    profile_id INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL,
+    plan_id INTEGER,
+    subject_code TEXT NOT NULL,
+    subject_name TEXT NOT NULL,
+    planned_duration_minutes INTEGER NOT NULL DEFAULT 60,
+    actual_duration_seconds INTEGER DEFAULT 0,
+    status TEXT DEFAULT 'not_started',
+    start_time TEXT,
+    pause_time TEXT,
+    end_time TEXT,
+    total_paused_seconds INTEGER DEFAULT 0,
+    pause_count INTEGER DEFAULT 0,
+    notes TEXT,
+    completion_percentage REAL DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON study_sessions (updated_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON study_sessions (user_id);
+CREATE TABLE IF NOT EXISTS study_statistics (
+    stat_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    profile_id INTEGER NOT NULL,
+    subject_id INTEGER,
+    stat_date TEXT NOT NULL,
+    total_study_minutes INTEGER DEFAULT 0,
+    total_sessions INTEGER DEFAULT 0,
+    completed_sessions INTEGER DEFAULT 0,
+    average_session_minutes REAL DEFAULT 0,
+    total_pauses INTEGER DEFAULT 0,
+    UNIQUE (user_id, subject_id, stat_date)
+);
+CREATE TABLE IF NOT EXISTS study_screen_correlation (
+    user_id INTEGER PRIMARY KEY,
+    days INTEGER NOT NULL,
+    study_days INTEGER NOT NULL,
+    avg_study_minutes REAL,
+    avg_screen_minutes REAL,
+    correlation REAL,
+    study_minutes_per_screen_hour REAL
+);
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    watermark TEXT
+);
+"""
+
+
+def prepare_sessions(sessions: pd.DataFrame) -> pd.DataFrame:
+    """Started sessions with stat_date, whole study minutes and a completed flag"""
+    data = sessions[sessions['status'].fillna('not_started') != 'not_started']
+    stamps = {column: pd.to_datetime(data[column], errors='coerce') if column in data.columns
+              else pd.Series(pd.NaT, index=data.index)
+              for column in ('end_time', 'start_time', 'created_at')}
+    stat_date = stamps['end_time'].fillna(stamps['start_time']).fillna(stamps['created_at']).dt.normalize()
+    seconds = pd.to_numeric(data['actual_duration_seconds'], errors='coerce').fillna(0)
+    pauses = data['pause_count'] if 'pause_count' in data.columns else pd.Series(0, index=data.index)
+    return pd.DataFrame({
+        'user_id': data['user_id'].to_numpy(),
+        'profile_id': data['profile_id'].to_numpy(),
+        'subject_id': data['subject_id'].to_numpy(),
+        'stat_date': stat_date.to_numpy(),
+        'study_minutes': (seconds // 60).to_numpy(dtype=np.int64),
+        'completed': (data['status'] == 'completed').to_numpy(),
+        'pauses': pd.to_numeric(pauses, errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+    }).dropna(subset=['stat_date'])
+
+
+def compute_statistics(sessions: pd.DataFrame) -> pd.DataFrame:
+    """study_statistics rows for every (user, profile, subject, date) in the sessions"""
+    data = prepare_sessions(sessions)
+    stats = data.groupby(['user_id', 'profile_id', 'subject_id', 'stat_date'], sort=True).agg(
+        total_study_minutes=('study_minutes', 'sum'),
+        total_sessions=('study_minutes', 'size'),
+        completed_sessions=('completed', 'sum'),
+        total_pauses=('pauses', 'sum'),
+    ).reset_index()
+    stats['average_session_minutes'] = np.round(stats['total_study_minutes'] / stats['total_sessions'], 2)
+    stats['stat_date'] = stats['stat_date'].dt.strftime('%Y-%m-%d')
+    stats['completed_sessions'] = stats['completed_sessions'].astype(np.int64)
+    return stats[STATISTICS_COLUMNS]
+
+
+def daily_study_minutes(stats: pd.DataFrame) -> pd.DataFrame:
+    """Per-user daily totals across subjects (user_id, date, study_minutes)"""
+    daily = stats.groupby(['user_id', 'stat_date'], sort=True)['total_study_minutes'].sum().reset_index()
+    return pd.DataFrame({'user_id': daily['user_id'].to_numpy(),
+                         'date': pd.to_datetime(daily['stat_date']).to_numpy(),
+                         'study_minutes': daily['total_study_minutes'].to_numpy(dtype=float)})
+
+
+def daily_screen_minutes(usage: pd.DataFrame) -> pd.DataFrame:
+    """Per-user daily screen time (user_id, date, screen_minutes) from a load_fleet_usage frame"""
+    data = usage.rename(columns={'u_id': USER_COLUMN})
+    daily = pd.DataFrame({
+        'user_id': data[USER_COLUMN].to_numpy(),
+        'date': pd.to_datetime(data['date']).dt.normalize().to_numpy(),
+        'screen_minutes': pd.to_numeric(data['totalScreenTime'], errors='coerce').to_numpy(dtype=float) / 60_000,
+    })
+    # The app exports a row per hour, so a day's screen time is the sum of its rows
+    return (daily.dropna().groupby(['user_id', 'date'], sort=True)['screen_minutes'].sum()
+            .reset_index())
+
+
+def correlate_with_screen_time(study_daily: pd.DataFrame, screen_daily: pd.DataFrame,
+                               users: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Per-user Pearson correlation of study minutes with same-day screen time
+
+    Days with screen-time data but no study count as 0 study minutes; the
+    slope is extra study minutes per extra hour of screen time.
+    """
+    if users is not None:
+        study_daily = study_daily[study_daily['user_id'].isin(users)]
+        screen_daily = screen_daily[screen_daily['user_id'].isin(users)]
+    days = screen_daily.merge(study_daily, on=['user_id', 'date'], how='left').fillna({'study_minutes': 0.0})
+    x = days['screen_minutes'].to_numpy(dtype=float)
+    y = days['study_minutes'].to_numpy(dtype=float)
+
+    # Sufficient statistics per user, then closed-form r and slope
+    sums = pd.DataFrame({'user_id': days['user_id'].to_numpy(), 'n': 1.0, 'x': x, 'y': y,
+                         'xx': x * x, 'yy': y * y, 'xy': x * y, 'studied': y > 0})
+    totals = sums.groupby('user_id', sort=True).sum()
+    n = totals['n'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx = totals['xx'].to_numpy() - totals['x'].to_numpy() ** 2 / n
+        syy = totals['yy'].to_numpy() - totals['y'].to_numpy() ** 2 / n
+        sxy = totals['xy'].to_numpy() - totals['x'].to_numpy() * totals['y'].to_numpy() / n
+        correlation = np.where((sxx > 1e-9) & (syy > 1e-9), sxy / np.sqrt(sxx * syy), np.nan)
+        slope = np.where(sxx > 1e-9, sxy / sxx * 60, np.nan)
+    return pd.DataFrame({
+        'user_id': totals.index.to_numpy(),
+        'days': n.astype(np.int64),
+        'study_days': totals['studied'].to_numpy(dtype=np.int64),
+        'avg_study_minutes': np.round(totals['y'].to_numpy() / n, 1),
+        'avg_screen_minutes': np.round(totals['x'].to_numpy() / n, 1),
+        'correlation': np.round(correlation, 4),
+        'study_minutes_per_screen_hour': np.round(slope, 2),
+    }, columns=CORRELATION_COLUMNS)
+
+
+def load_sessions(path: str) -> pd.DataFrame:
+    """study_sessions export: CSV, or the table of a SQLite stand-in (.db/.sqlite)"""
+    if path.endswith(('.db', '.sqlite')):
+        with sqlite3.connect(path) as conn:
+            return pd.read_sql_query("SELECT * FROM study_sessions", conn)
+    return pd.read_csv(path)
+
+
+def _sql_values(rows: pd.DataFrame):
+    return [tuple(v.item() if isinstance(v, np.generic) else v for v in record)
+            for record in rows.itertuples(index=False, name=None)]
+
+
+def refresh_sqlite(db_path: str, usage: Optional[pd.DataFrame] = None, since: Optional[str] = None) -> Dict:
+    """
+    Incrementally refresh study_statistics (and the screen-time correlation) in a SQLite stand-in
+
+    Only sessions updated at or after the watermark are read (updated_at has
+    1-second resolution, so rows written later in the watermark's second are
+    not missed; recomputing a day twice is harmless). Their (user, date)
+    groups - the dates of their start, end and creation, so a session that
+    moved from its start date to its end date is removed from the old day -
+    are recomputed from all sessions on those days and replaced.
+
+    Args:
+        db_path: Database with a study_sessions table
+        usage: Optional analyzer usage frame (userId, date, totalScreenTime)
+        since: Override the stored watermark (updated_at of the last run)
+
+    Returns:
+        Dict with changed_sessions, recomputed_days, statistics_rows, users and watermark
+    """
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(SQLITE_SCHEMA)
+        if since is None:
+            row = conn.execute("SELECT watermark FROM rollup_state WHERE name = ?", (WATERMARK_KEY,)).fetchone()
+            since = row[0] if row else ''
+        changed = pd.read_sql_query(
+            "SELECT user_id, start_time, end_time, created_at, updated_at FROM study_sessions WHERE updated_at >= ?",
+            conn, params=(since,))
+        summary = {"changed_sessions": len(changed), "recomputed_days": 0, "statistics_rows": 0,
+                   "users": 0, "watermark": since}
+        if changed.empty:
+            return summary
+
+        dates = pd.concat([pd.to_datetime(changed[column], errors='coerce').dt.strftime('%Y-%m-%d')
+                           for column in ('start_time', 'end_time', 'created_at')])
+        keys = pd.DataFrame({'user_id': np.tile(changed['user_id'].to_numpy(), 3), 'stat_date': dates.to_numpy()})
+        keys = keys.dropna().drop_duplicates()
+
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_keys (user_id INTEGER, stat_date TEXT)")
+        conn.execute("DELETE FROM rollup_keys")
+        conn.executemany("INSERT INTO rollup_keys VALUES (?, ?)", _sql_values(keys))
+        sessions = pd.read_sql_query(
+            f"SELECT s.* FROM study_sessions s JOIN rollup_keys k "
+            f"ON s.user_id = k.user_id AND {STAT_DATE_SQL} = k.stat_date",
+            conn)
+        stats = compute_statistics(sessions)
+
+        conn.execute("DELETE FROM study_statistics WHERE EXISTS (SELECT 1 FROM rollup_keys k "
+                     "WHERE k.user_id = study_statistics.user_id AND k.stat_date = study_statistics.stat_date)")
+        conn.executemany(
+            f"INSERT INTO study_statistics ({', '.join(STATISTICS_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in STATISTICS_COLUMNS)})", _sql_values(stats))
+
+        users = keys['user_id'].unique()
+        if usage is not None:
+            study = pd.read_sql_query(
+                "SELECT user_id, stat_date, total_study_minutes FROM study_statistics "
+                "WHERE user_id IN (SELECT DISTINCT user_id FROM rollup_keys)", conn)
+            correlation = correlate_with_screen_time(daily_study_minutes(study), daily_screen_minutes(usage), users)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO study_screen_correlation ({', '.join(CORRELATION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in CORRELATION_COLUMNS)})",
+                _sql_values(correlation.astype(object).where(correlation.notna(), None)))
+
+        watermark = changed['updated_at'].max()
+        conn.execute("INSERT OR REPLACE INTO rollup_state (name, watermark) VALUES (?, ?)", (WATERMARK_KEY, watermark))
+    summary.update(recomputed_days=len(keys), statistics_rows=len(stats), users=len(users), watermark=watermark)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HabitGuard study statistics rollups')
+    parser.add_argument('--sessions', help='study_sessions export (CSV or SQLite) for a full recompute')
+    parser.add_argument('--output', default='study_statistics.csv', help='study_statistics CSV (full recompute)')
+    parser.add_argument('--db', help='SQLite stand-in to refresh incrementally')
+    parser.add_argument('--since', help='Override the stored watermark (incremental mode)')
+    parser.add_argument('--usage', help='Fleet usage CSV for the screen-time correlation')
+    parser.add_argument('--correlation', default='study_screen_correlation.csv',
+                        help='Correlation CSV (full recompute)')
+    args = parser.parse_args()
+    if not args.sessions and not args.db:
+        parser.error('one of --sessions or --db is required')
+
+    usage = None
+    if args.usage:
+        from weekly_reports import load_fleet_usage
+        usage = load_fleet_usage(csv_file=args.usage)
+        if usage is None:
+            print("❌ Failed to load fleet usage data")
+            return
+
+    if args.db:
+        summary = refresh_sqlite(args.db, usage, args.since)
+        print(f"✅ {summary['changed_sessions']} changed sessions -> {summary['recomputed_days']} user-days, "
+              f"{summary['statistics_rows']} study_statistics rows (watermark {summary['watermark']})")
+        return
+
+    stats = compute_statistics(load_sessions(args.sessions))
+    stats.to_csv(args.output, index=False, lineterminator='\n')
+    print(f"✅ {len(stats)} study_statistics rows for {stats['user_id'].nunique()} users written to {args.output}")
+    if usage is not None:
+        correlation = correlate_with_screen_time(daily_study_minutes(stats), daily_screen_minutes(usage))
+        correlation.to_csv(args.correlation, index=False, lineterminator='\n')
+        print(f"📈 Screen-time correlation for {len(correlation)} users written to {args.correlation}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Study Scheduler
+==========================
+
+Places next week's study blocks for every active ``study_plans`` row,
+steering them away from the hours a student is forecast to spend on their
+phone.
+
+- Distraction forecast: each student's hourly usage gives a per-weekday
+  share of screen time per hour of the day (shrunk towards their whole-week
+  profile), scaled by the forecast daily total (the fleet forecaster when
+  one is published, else the student's weekday mean)
+- Schedule: a linear program over quarter-hours of plan x day x hour slot,
+  maximizing ``priority weight - DISTRACTION_PENALTY * forecast distraction``
+  subject to each plan's daily and weekly targets, one hour of study per
+  slot and ``MAX_DAILY_STUDY_HOURS`` per day. The plan caps and the slot caps
+  are two nested (laminar) families, so the constraint matrix is totally
+  unimodular and the simplex solution is already in whole quarter-hours
+- Batching: students are independent, so a batch of them is one sparse,
+  block-diagonal LP built with array indexing and solved in one HiGHS call
+
+Inputs:
+    plans: study_plans rows (plan_id, user_id, subject_code, target_daily_hours,
+           target_weekly_hours, priority[, status])
+    usage: userId, date, hour, totalScreenTime (ms in that hour)
+
+Usage:
+    python study_scheduler.py --plans study_plans.csv --usage hourly_usage.csv --output schedule.csv
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from forecast_features import app_day_of_week
+
+USER_COLUMN = 'userId'
+MS_PER_HOUR = 1000 * 60 * 60
+DAYS = 7
+STUDY_HOURS = np.arange(6, 23)  # slots start 06:00 .. 22:00
+UNITS_PER_HOUR = 4  # quarter-hours
+MAX_DAILY_STUDY_HOURS = 6.0
+PRIORITY_WEIGHTS = {'High': 3.0, 'Medium': 2.0, 'Low': 1.0}
+# Cost of a forecast hour of phone use in a slot; Low plans skip slots above
+# 15 minutes of forecast use, Medium above 30 and High above 45
+DISTRACTION_PENALTY = 4.0
+PROFILE_PRIOR_DAYS = 2.0
+# Breaks ties between equally good schedules (earlier slots, plans in
+# priority order) so a student's schedule does not depend on their batch
+TIE_BREAK = 1e-5
+BATCH_SIZE = 256
+
+SCHEDULE_COLUMNS = ['user_id', 'plan_id', 'subject_code', 'date', 'start_time', 'duration_minutes',
+                    'forecast_distraction_minutes']
+
+
+def _week(start: date) -> pd.DatetimeIndex:
+    return pd.date_range(pd.Timestamp(start), periods=DAYS)
+
+
+def hourly_profiles(usage: pd.DataFrame, users: np.ndarray) -> np.ndarray:
+    """
+    Share of each weekday's screen time per hour, (users, 7, 24)
+
+    Weekdays with few observed days lean on the user's whole-week profile;
+    users without hourly data get a flat profile.
+    """
+    profiles = np.full((len(users), 7, 24), 1.0 / 24)
+    if usage is None or len(usage) == 0 or 'hour' not in usage.columns:
+        return profiles
+    user_index = pd.Index(users).get_indexer(usage[USER_COLUMN])
+    known = user_index >= 0
+    data = usage[known]
+    user_index = user_index[known]
+    dates = pd.to_datetime(data['date']).dt.normalize()
+    dow = app_day_of_week(dates)
+    hour = data['hour'].to_numpy(dtype=np.int64) % 24
+    hours = data['totalScreenTime'].to_numpy(dtype=float) / MS_PER_HOUR
+
+    totals = np.bincount((user_index * 7 + dow) * 24 + hour, hours, len(users) * 7 * 24).reshape(len(users), 7, 24)
+    day_keys = pd.DataFrame({'u': user_index, 'd': dates.to_numpy()}).drop_duplicates()
+    observed = np.bincount(day_keys['u'].to_numpy() * 7 + app_day_of_week(day_keys['d']),
+                           minlength=len(users) * 7).reshape(len(users), 7)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        week = totals.sum(axis=1)
+        week_share = np.where(week.sum(axis=1, keepdims=True) > 0, week / week.sum(axis=1, keepdims=True), 1.0 / 24)
+        day_total = totals.sum(axis=2, keepdims=True)
+        day_share = np.where(day_total > 0, totals / day_total, week_share[:, None, :])
+    weight = observed[:, :, None] / (observed[:, :, None] + PROFILE_PRIOR_DAYS)
+    return weight * day_share + (1 - weight) * week_share[:, None, :]
+
+
+def daily_totals(usage: pd.DataFrame) -> pd.DataFrame:
+    """Hourly (or daily) usage rows to userId/date/screenTimeHours/appCount"""
+    data = usage.assign(screenTimeHours=usage['totalScreenTime'] / MS_PER_HOUR,
+                        date=pd.to_datetime(usage['date']).dt.normalize())
+    if 'appCount' not in data.columns:
+        data['appCount'] = np.nan
+    return (data.groupby([USER_COLUMN, 'date'], sort=True)
+            .agg(screenTimeHours=('screenTimeHours', 'sum'), appCount=('appCount', 'max'))
+            .reset_index())
+
+
+def forecast_daily_hours(usage: pd.DataFrame, users: np.ndarray, week: pd.DatetimeIndex,
+                         forecaster=None) -> np.ndarray:
+    """Forecast screen-time hours per user and day of ``week``, (users, 7)"""
+    forecast = np.zeros((len(users), DAYS))
+    if usage is None or len(usage) == 0:
+        return forecast
+    daily = daily_totals(usage)
+    daily = daily[daily[USER_COLUMN].isin(users)]
+    target_dow = app_day_of_week(week)
+
+    # Weekday means, falling back to the user's overall mean
+    dow = app_day_of_week(daily['date'])
+    means = daily.groupby([daily[USER_COLUMN], dow])['screenTimeHours'].mean().unstack().reindex(
+        index=users, columns=range(7))
+    overall = daily.groupby(USER_COLUMN)['screenTimeHours'].mean().reindex(users)
+    forecast = means.to_numpy()[:, target_dow]
+    forecast = np.where(np.isnan(forecast), overall.to_numpy()[:, None], forecast)
+
+    if forecaster is not None:
+        try:
+            forecast = _fleet_forecast(forecaster, daily, users, week, forecast)
+        except Exception as e:
+            print(f"⚠️ Fleet forecast failed, using weekday means: {e}")
+    return np.nan_to_num(np.maximum(forecast, 0.0))
+
+
+def _fleet_forecast(forecaster, daily: pd.DataFrame, users: np.ndarray, week: pd.DatetimeIndex,
+                    fallback: np.ndarray) -> np.ndarray:
+    """All users' 7-day forecasts from the fleet model in one predict"""
+    from fleet_forecaster import FEATURE_COLUMNS, horizon_features, origin_state, prepare_usage
+    if forecaster.feature_columns != FEATURE_COLUMNS:
+        raise RuntimeError("FleetForecaster was trained with different features; retrain it")
+    state = origin_state(prepare_usage(daily))
+    last = state.groupby(USER_COLUMN).tail(1)
+    rows = np.repeat(last.index.to_numpy(), DAYS)
+    X = horizon_features(state, np.tile(week.to_numpy(), len(last)), rows)
+    predicted = np.maximum(forecaster.model.predict(X) * state['expanding_mean'].to_numpy()[rows], 0.0)
+
+    forecast = fallback.copy()
+    positions = pd.Index(users).get_indexer(last[USER_COLUMN])
+    forecast[positions] = predicted.reshape(len(last), DAYS)
+    return forecast
+
+
+def distraction_forecast(usage: pd.DataFrame, users: np.ndarray, start: date, forecaster=None) -> np.ndarray:
+    """Forecast hours of phone use per user, day and study slot, (users, 7, len(STUDY_HOURS))"""
+    week = _week(start)
+    profiles = hourly_profiles(usage, users)[:, app_day_of_week(week), :][:, :, STUDY_HOURS]
+    daily = forecast_daily_hours(usage, users, week, forecaster)
+    return np.clip(profiles * daily[:, :, None], 0.0, 1.0)
+
+
+def _active_plans(plans: pd.DataFrame) -> pd.DataFrame:
+    data = plans if 'status' not in plans.columns else plans[plans['status'].fillna('active') == 'active']
+    data = data.rename(columns={'userId': 'user_id', 'subjectCode': 'subject_code'})
+    return data.assign(
+        weight=data['priority'].map(PRIORITY_WEIGHTS).fillna(PRIORITY_WEIGHTS['Medium']).to_numpy(),
+        daily_units=np.floor(data['target_daily_hours'].astype(float).to_numpy() * UNITS_PER_HOUR + 1e-9),
+        weekly_units=np.floor(data['target_weekly_hours'].astype(float).to_numpy() * UNITS_PER_HOUR + 1e-9),
+    ).sort_values(['user_id', 'weight', 'plan_id'], ascending=[True, False, True],
+                  kind='mergesort').reset_index(drop=True)
+
+
+def _solve_lp(plan_student: np.ndarray, weight: np.ndarray, daily_units: np.ndarray, weekly_units: np.ndarray,
+              distraction: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One LP for a batch of students
+
+    A unit's value is separable (plan weight minus slot distraction), so
+    which plan sits in which chosen slot does not change the optimum: the LP
+    only picks units per plan and day and per day and slot, balanced per
+    student-day. That is a min-cost flow (plan -> plan-day -> student-day ->
+    slot), so dual simplex returns integral units.
+
+    Args:
+        plan_student: Batch-local student index of every plan (sorted)
+        distraction: Forecast phone hours per batch student, day and slot
+
+    Returns:
+        (units per plan and day, units per student, day and slot)
+    """
+    n_plans, n_students, n_slots = len(plan_student), len(distraction), distraction.shape[2]
+    plan_rank = np.arange(n_plans) - np.searchsorted(plan_student, plan_student)
+    n_y, n_u = n_plans * DAYS, n_students * DAYS * n_slots
+    y_plan, y_day = np.divmod(np.arange(n_y), DAYS)
+    u_student, u_day, u_slot = np.unravel_index(np.arange(n_u), (n_students, DAYS, n_slots))
+    y_group = plan_student[y_plan] * DAYS + y_day
+    u_group = u_student * DAYS + u_day
+
+    A_ub = coo_matrix((np.ones(n_y + n_u), (np.r_[y_plan, n_plans + u_group], np.r_[np.arange(n_y), n_y + np.arange(n_u)])),
+                      shape=(n_plans + n_students * DAYS, n_y + n_u)).tocsr()
+    b_ub = np.r_[weekly_units, np.full(n_students * DAYS, np.floor(MAX_DAILY_STUDY_HOURS * UNITS_PER_HOUR))]
+    A_eq = coo_matrix((np.r_[np.ones(n_y), -np.ones(n_u)], (np.r_[y_group, u_group], np.arange(n_y + n_u))),
+                      shape=(n_students * DAYS, n_y + n_u)).tocsr()
+    bounds = np.column_stack([np.zeros(n_y + n_u), np.r_[daily_units[y_plan], np.full(n_u, UNITS_PER_HOUR)]])
+    cost = np.r_[-weight[y_plan] + TIE_BREAK * (plan_rank[y_plan] + 1) * y_day,
+                 DISTRACTION_PENALTY * distraction.ravel() + TIE_BREAK * (u_day * n_slots + u_slot)]
+
+    result = linprog(cost, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=np.zeros(n_students * DAYS),
+                     bounds=bounds, method='highs-ds')
+    if result.status != 0:
+        raise RuntimeError(f"Study schedule LP failed: {result.message}")
+    x = np.round(result.x)
+    return x[:n_y].reshape(n_plans, DAYS), x[n_y:].reshape(n_students, DAYS, n_slots)
+
+
+def _solve_greedy(plan_student: np.ndarray, weight: np.ndarray, daily_units: np.ndarray, weekly_units: np.ndarray,
+                  distraction: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Fallback without scipy: fill the most valuable (plan, day, slot) cells first"""
+    n_slots = distraction.shape[2]
+    units = np.zeros((len(plan_student), DAYS, n_slots))
+    value = weight[:, None, None] - DISTRACTION_PENALTY * distraction[plan_student]
+    slot_left = np.full(distraction.shape, float(UNITS_PER_HOUR))
+    day_left = np.full(distraction.shape[:2], np.floor(MAX_DAILY_STUDY_HOURS * UNITS_PER_HOUR))
+    plan_day_left = np.repeat(daily_units[:, None], DAYS, axis=1)
+    plan_left = weekly_units.copy()
+    for flat in np.argsort(-value, axis=None, kind='stable'):
+        p, d, s = np.unravel_index(flat, value.shape)
+        if value[p, d, s] <= 0:
+            break
+        st = plan_student[p]
+        take = min(slot_left[st, d, s], day_left[st, d], plan_day_left[p, d], plan_left[p])
+        if take > 0:
+            units[p, d, s] = take
+            slot_left[st, d, s] -= take
+            day_left[st, d] -= take
+            plan_day_left[p, d] -= take
+            plan_left[p] -= take
+
+    slot_units = np.zeros(distraction.shape)
+    np.add.at(slot_units, plan_student, units)
+    return units.sum(axis=2), slot_units
+
+
+def _blocks(plans: pd.DataFrame, plan_units: np.ndarray, slot_units: np.ndarray, distraction: np.ndarray,
+            plan_student: np.ndarray, week: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Lay each student-day's plan units into its chosen slots
+
+    Plans take the day's slots in priority order. Every student-day has as
+    many plan units as slot units, so laying all plan-days and all slots on
+    one shared axis (ordered student, day) lines them up, and one
+    searchsorted finds each overlapping (plan, slot) segment. Consecutive
+    segments of one plan-day with no gap become one block.
+    """
+    n_slots = slot_units.shape[2]
+    p_idx, d_idx = np.nonzero(plan_units)
+    order = np.lexsort((p_idx, d_idx, plan_student[p_idx]))
+    p_idx, d_idx = p_idx[order], d_idx[order]
+    plan_ends = np.cumsum(plan_units[p_idx, d_idx])
+
+    s_idx, sd_idx, slot_idx = np.nonzero(slot_units)
+    slot_amounts = slot_units[s_idx, sd_idx, slot_idx]
+    slot_ends = np.cumsum(slot_amounts)
+    if len(plan_ends) == 0:
+        return pd.DataFrame(columns=SCHEDULE_COLUMNS)
+
+    ends = np.union1d(plan_ends, slot_ends)
+    starts = np.r_[0.0, ends[:-1]]
+    entry = np.searchsorted(plan_ends, ends, side='left')
+    slot = np.searchsorted(slot_ends, ends, side='left')
+    minutes = (ends - starts) * (60 // UNITS_PER_HOUR)
+    start_minute = (STUDY_HOURS[slot_idx[slot]] * 60
+                    + (starts - (slot_ends[slot] - slot_amounts[slot])) * (60 // UNITS_PER_HOUR))
+    distraction_minutes = distraction[s_idx[slot], sd_idx[slot], slot_idx[slot]] * minutes
+
+    new_block = np.r_[True, (entry[1:] != entry[:-1]) | (start_minute[1:] != start_minute[:-1] + minutes[:-1])]
+    first = np.flatnonzero(new_block)
+    block_entry = entry[first]
+    block_plan = p_idx[block_entry]
+    block_start = start_minute[first].astype(int)
+    dates = week.strftime('%Y-%m-%d').to_numpy()
+    return pd.DataFrame({
+        'user_id': plans['user_id'].to_numpy()[block_plan],
+        'plan_id': plans['plan_id'].to_numpy()[block_plan],
+        'subject_code': plans['subject_code'].to_numpy()[block_plan],
+        'date': dates[d_idx[block_entry]],
+        'start_time': [f"{m // 60:02d}:{m % 60:02d}" for m in block_start.tolist()],
+        'duration_minutes': np.add.reduceat(minutes, first).astype(int),
+        'forecast_distraction_minutes': np.round(np.add.reduceat(distraction_minutes, first), 1),
+    }, columns=SCHEDULE_COLUMNS)
+
+
+def schedule_week(plans: pd.DataFrame, usage: Optional[pd.DataFrame] = None, start: Optional[date] = None,
+                  forecaster=None, batch_size: int = BATCH_SIZE, solver: Optional[str] = None) -> pd.DataFrame:
+    """
+    Study blocks for every student with active plans, for the 7 days from ``start``
+
+    Args:
+        plans: study_plans rows
+        usage: Hourly usage rows (userId, date, hour, totalScreenTime)
+        start: First scheduled day (default: tomorrow)
+        forecaster: Optional FleetForecaster for the daily totals
+        batch_size: Students per LP
+        solver: 'lp' or 'greedy' (default: 'lp' when scipy is available)
+
+    Returns:
+        DataFrame with SCHEDULE_COLUMNS, sorted by user, date and start time
+    """
+    start = start or (date.today() + timedelta(days=1))
+    solver = solver or ('lp' if SCIPY_AVAILABLE else 'greedy')
+    solve = _solve_lp if solver == 'lp' else _solve_greedy
+    active = _active_plans(plans)
+    if active.empty:
+        return pd.DataFrame(columns=SCHEDULE_COLUMNS)
+
+    week = _week(start)
+    users = active['user_id'].unique()
+    if usage is not None:
+        usage = usage.rename(columns={'user_id': USER_COLUMN})
+    distraction = distraction_forecast(usage, users, start, forecaster)
+    plan_user = pd.Index(users).get_indexer(active['user_id'])
+
+    batches = []
+    for first in range(0, len(users), batch_size):
+        in_batch = (plan_user >= first) & (plan_user < first + batch_size)
+        batch_plans = active[in_batch].reset_index(drop=True)
+        plan_student = plan_user[in_batch] - first
+        batch_distraction = distraction[first:first + batch_size]
+        plan_units, slot_units = solve(plan_student, batch_plans['weight'].to_numpy(),
+                                       batch_plans['daily_units'].to_numpy(),
+                                       batch_plans['weekly_units'].to_numpy(), batch_distraction)
+        batches.append(_blocks(batch_plans, plan_units, slot_units, batch_distraction, plan_student, week))
+
+    schedule = pd.concat(batches, ignore_index=True)
+    return schedule.sort_values(['user_id', 'date', 'start_time'], kind='mergesort').reset_index(drop=True)
+
+
+def plan_coverage(plans: pd.DataFrame, schedule: pd.DataFrame) -> pd.DataFrame:
+    """Scheduled vs target weekly hours per active plan"""
+    active = _active_plans(plans)
+    scheduled = schedule.groupby('plan_id')['duration_minutes'].sum() / 60
+    return pd.DataFrame({
+        'plan_id': active['plan_id'],
+        'user_id': active['user_id'],
+        'priority': active['priority'],
+        'target_weekly_hours': active['target_weekly_hours'].astype(float),
+        'scheduled_hours': scheduled.reindex(active['plan_id']).fillna(0.0).to_numpy(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HabitGuard nightly study scheduler')
+    parser.add_argument('--plans', required=True, help='CSV export of study_plans')
+    parser.add_argument('--usage', help='CSV of hourly usage (userId, date, hour, totalScreenTime)')
+    parser.add_argument('--output', default='study_schedule.csv')
+    parser.add_argument('--start', help='First scheduled day (YYYY-MM-DD, default tomorrow)')
+    parser.add_argument('--models-dir', default='models', help='Directory with the published fleet forecaster')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    plans = pd.read_csv(args.plans)
+    usage = pd.read_csv(args.usage) if args.usage else None
+    start = date.fromisoformat(args.start) if args.start else None
+    forecaster = None
+    try:
+        from fleet_forecaster import load_latest
+        forecaster = load_latest(args.models_dir)
+    except Exception as e:
+        print(f"⚠️ Fleet forecaster unavailable: {e}")
+
+    started = time.perf_counter()
+    schedule = schedule_week(plans, usage, start, forecaster, args.batch_size)
+    elapsed = time.perf_counter() - started
+    schedule.to_csv(args.output, index=False)
+    students = schedule['user_id'].nunique()
+    print(f"✅ Scheduled {len(schedule):,} study blocks for {students:,} students in {elapsed:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
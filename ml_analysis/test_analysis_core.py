@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Quick test of the stateless HabitGuard analysis core
+"""
+
+import os
+import sys
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from analysis_core import AnalysisService, analyze, parse_usage_csv
+from serialization import dumps
+from usage_predictor import HabitGuardMLAnalyzer, generate_sample_csv_data
+
+NOW = datetime(2025, 10, 6, 12, 0)
+
+
+def test_analyze_is_pure_and_deterministic():
+    dataset = parse_usage_csv(csv_content=generate_sample_csv_data(days=21))
+    before = dataset.df.copy()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')  # analysis must be clean without a global filter
+        first = analyze(dataset, now=NOW)
+    second = analyze(dataset, now=NOW)
+
+    assert 'error' not in first
+    pd.testing.assert_frame_equal(dataset.df, before)
+    assert dumps(first) == dumps(second)
+    assert first['predictions']['next_7_days'][0]['date'] == '2025-10-06'
+
+
+def test_shared_service_across_threads():
+    csv_content = generate_sample_csv_data(days=30)
+    with tempfile.TemporaryDirectory() as tmp:
+        service = AnalysisService(models_dir=tmp)
+        dataset = parse_usage_csv(csv_content=csv_content)
+        expected = dumps(service.analyze(dataset, now=NOW))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: dumps(service.analyze(dataset, now=NOW)), range(16)))
+        assert all(result == expected for result in results)
+
+        # The legacy wrapper returns the same analysis
+        analyzer = HabitGuardMLAnalyzer(models_dir=tmp)
+        assert analyzer.load_csv_data(csv_content=csv_content)
+        legacy = analyzer.analyze_patterns()
+        assert legacy['summary'] == service.analyze(dataset, now=NOW)['summary']
+
+    assert service.analyze_csv('') == {"error": "Failed to load CSV data"}
+    assert 'error' in service.analyze_csv("date,appCount\n2025-10-01,3\n")
+
+
+if __name__ == "__main__":
+    test_analyze_is_pure_and_deterministic()
+    test_shared_service_across_threads()
+    print("✅ Analysis core tests passed!")
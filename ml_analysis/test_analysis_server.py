@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard asyncio analysis server
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analysis_server
+from analysis_server import AnalysisServer
+from result_cache import AnalysisResultCache
+from usage_predictor import generate_sample_csv_data
+
+
+def _slow_compute(csv_text):
+    time.sleep(0.3)
+    return {"rows": csv_text.count("\n")}
+
+
+async def _request(port, method, path, body=b'', content_type='text/csv'):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), head.decode('latin-1'), payload
+
+
+def test_analyze_and_cache():
+    async def scenario():
+        csv = generate_sample_csv_data(days=14).encode()
+        async with AnalysisServer(port=0, workers=2, use_processes=False,
+                                  cache=AnalysisResultCache()) as server:
+            status, _, payload = await _request(server.port, 'POST', '/analyze', csv)
+            assert status == 200
+            assert 'summary' in json.loads(payload)
+
+            # The app's {"csvData": ...} body hits the same cache entry
+            status, _, _ = await _request(server.port, 'POST', '/analyze',
+                                          json.dumps({'csvData': csv.decode()}).encode(), 'application/json')
+            assert status == 200
+            assert server.cache.stats()['hits'] == 1
+
+            status, head, report = await _request(server.port, 'POST', '/report?format=txt', csv)
+            assert status == 200 and 'chunked' in head
+            assert b'HABITGUARD' in report.upper()
+
+            status, _, payload = await _request(server.port, 'GET', '/health')
+            assert status == 200 and json.loads(payload)['completed'] == 3
+
+            assert (await _request(server.port, 'GET', '/analyze'))[0] == 405
+            assert (await _request(server.port, 'POST', '/nope', b'x'))[0] == 404
+
+            body = json.dumps({'weakSubjects': {'CS202': 0.9}, 'studyHoursPerWeek': 5, 'k': 2}).encode()
+            status, _, payload = await _request(server.port, 'POST', '/recommendations', body, 'application/json')
+            assert status == 200 and len(json.loads(payload)['recommendations']) == 2
+            assert (await _request(server.port, 'POST', '/recommendations', b'{}', 'application/json'))[0] == 400
+    asyncio.run(scenario())
+
+
+def test_delta_ingest():
+    async def scenario():
+        header, *rows = generate_sample_csv_data(days=21).strip().split('\n')
+        async with AnalysisServer(port=0, workers=2, use_processes=False,
+                                  cache=AnalysisResultCache()) as server:
+            body = json.dumps({'userId': 'u1', 'csvData': '\n'.join([header] + rows[:14])}).encode()
+            status, _, payload = await _request(server.port, 'POST', '/ingest', body, 'application/json')
+            result = json.loads(payload)
+            assert status == 200 and result['accepted'] == 14 and 'analysis' not in result
+
+            delta = '\n'.join([header] + rows[13:])
+            body = json.dumps({'userId': 'u1', 'watermark': result['watermark'], 'csvData': delta}).encode()
+            status, _, payload = await _request(server.port, 'POST', '/ingest?analyze=1', body, 'application/json')
+            result = json.loads(payload)
+            assert status == 200 and result['days'] == 21
+            assert result['analysis']['summary']['totalDays'] == 21
+
+            # Nothing new: the stored window's analysis comes from the cache
+            body = json.dumps({'userId': 'u1', 'watermark': result['watermark'], 'csvData': ''}).encode()
+            status, _, payload = await _request(server.port, 'POST', '/ingest?analyze=1', body, 'application/json')
+            assert status == 200 and json.loads(payload)['accepted'] == 0
+            assert server.cache.stats()['hits'] == 1
+
+            assert (await _request(server.port, 'POST', '/ingest', b'{}', 'application/json'))[0] == 400
+            body = json.dumps({'userId': 'u1', 'csvData': 'date\n2026-01-01\n'}).encode()
+            assert (await _request(server.port, 'POST', '/ingest', body, 'application/json'))[0] == 400
+    asyncio.run(scenario())
+
+
+def test_backpressure_and_deadlines():
+    async def scenario():
+        async with AnalysisServer(port=0, workers=1, max_queue=1, use_processes=False,
+                                  request_timeout=1.0, compute=_slow_compute) as server:
+            # 1 running + 1 queued; the rest are rejected immediately
+            bodies = [f"date\n{i}\n".encode() for i in range(5)]
+            statuses = await asyncio.gather(*(_request(server.port, 'POST', '/analyze', b) for b in bodies))
+            codes = sorted(s[0] for s in statuses)
+            assert codes.count(429) >= 3 and codes.count(200) >= 1
+            assert server.stats()['rejected'] == codes.count(429)
+
+        async with AnalysisServer(port=0, workers=1, max_queue=4, use_processes=False,
+                                  request_timeout=0.4, compute=_slow_compute) as server:
+            # Second job would only start after the first one's 0.3s, then run past its deadline
+            first, second, third = await asyncio.gather(
+                *(_request(server.port, 'POST', '/analyze', f"date\n{i}\n".encode()) for i in range(3)))
+            assert first[0] == 200
+            assert 504 in (second[0], third[0])
+            assert server.stats()['timeouts'] >= 1
+    asyncio.run(scenario())
+
+
+def test_report_errors_before_headers():
+    def failing_render(analysis, fmt):
+        raise RuntimeError("layout failed")
+
+    def slow_render(analysis, fmt):
+        time.sleep(0.5)
+        return b"late"
+
+    async def scenario():
+        original = analysis_server.render_report_bytes
+        try:
+            async with AnalysisServer(port=0, workers=1, use_processes=False, request_timeout=0.3,
+                                      compute=lambda csv_text: {"rows": 1}) as server:
+                # Failures and deadlines while rendering get one clean error response, not a broken 200
+                analysis_server.render_report_bytes = failing_render
+                status, head, payload = await _request(server.port, 'POST', '/report?format=txt', b"date\n1\n")
+                assert status == 500 and 'chunked' not in head and b'layout failed' in payload
+
+                analysis_server.render_report_bytes = slow_render
+                status, head, _ = await _request(server.port, 'POST', '/report?format=txt', b"date\n2\n")
+                assert status == 504 and 'chunked' not in head
+                assert server.stats()['timeouts'] == 1
+        finally:
+            analysis_server.render_report_bytes = original
+    asyncio.run(scenario())
+
+
+def test_shared_job_uses_latest_deadline():
+    def slow(csv_text):
+        time.sleep(0.5)
+        return {"rows": 1}
+
+    async def scenario():
+        async with AnalysisServer(port=0, workers=1, use_processes=False, request_timeout=0.4,
+                                  compute=slow) as server:
+            first = asyncio.ensure_future(_request(server.port, 'POST', '/analyze', b"date\n1\n"))
+            await asyncio.sleep(0.2)
+            # Joins the running job; its own deadline (0.6s) outlasts the first caller's (0.4s)
+            second = await _request(server.port, 'POST', '/analyze', b"date\n1\n")
+            assert (await first)[0] == 504
+            assert second[0] == 200 and json.loads(second[2]) == {"rows": 1}
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_analyze_and_cache()
+    test_delta_ingest()
+    test_backpressure_and_deadlines()
+    test_report_errors_before_headers()
+    test_shared_job_uses_latest_deadline()
+    print("✅ Analysis server tests passed!")
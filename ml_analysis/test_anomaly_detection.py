@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard anomaly and binge-day detection
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from anomaly_detection import AnomalyState, detect_anomalies, detect_change_points
+
+
+def _fleet(days=60):
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2025-08-01', periods=days)
+    frames = []
+    for user, level in ((1, 3.0), (2, 5.0)):
+        hours = level + rng.normal(0, 0.3, days)
+        frames.append(pd.DataFrame({'userId': user, 'date': dates, 'screenTimeHours': hours}))
+    df = pd.concat(frames, ignore_index=True)
+    # User 1 binges on day 40; user 2 shifts to a heavier regime from day 30
+    df.loc[(df.userId == 1) & (df.date == dates[40]), 'screenTimeHours'] = 11.0
+    df.loc[(df.userId == 2) & (df.date >= dates[30]), 'screenTimeHours'] += 3.0
+    return df, dates
+
+
+def test_binge_day_flagged_per_user():
+    df, dates = _fleet()
+    scored = detect_anomalies(df)
+    binges = scored[(scored.userId == 1) & (scored.kind == 'binge')]
+    assert list(binges.date) == [dates[40]]
+    # Baselines never leak across users
+    assert scored[scored.userId == 2].head(7)['rollingZ'].isna().all()
+
+
+def test_change_point_found():
+    df, dates = _fleet()
+    shifts = detect_change_points(df)
+    user2 = shifts[shifts.userId == 2]
+    assert len(user2) >= 1
+    assert abs((user2.iloc[0].date - dates[30]).days) <= 1
+    assert user2.iloc[0].shiftHours > 2
+    assert shifts[shifts.userId == 1].empty
+
+
+def test_incremental_state_matches_batch():
+    df, dates = _fleet()
+    user1 = df[df.userId == 1]
+    state = AnomalyState()
+    results = [state.update(row.date, row.screenTimeHours) for row in user1.itertuples()]
+    assert [r['date'] for r in results if r['kind'] == 'binge'] == [dates[40].strftime('%Y-%m-%d')]
+
+    restored = AnomalyState.from_dict(state.to_dict())
+    assert restored.update(dates[-1] + pd.Timedelta(days=1), 12.0)['kind'] == 'binge'
+
+
+def test_flat_history_and_weekday_baseline():
+    dates = pd.date_range('2025-08-01', periods=40)
+    hours = np.full(40, 2.0)
+    hours[20] = 2.25  # a small wobble on a flat history is not a binge
+    hours[30] = 6.0
+    df = pd.DataFrame({'date': dates, 'screenTimeHours': hours})
+    scored = detect_anomalies(df)
+    assert np.isfinite(scored['rollingZ'].dropna()).all() and np.isfinite(scored['dowZ'].dropna()).all()
+    assert list(scored.loc[scored.isAnomaly, 'date']) == [dates[30]]
+
+    # Weekday baselines use past days only, so batch and streaming agree row by row
+    # (min_periods=28 makes the first 4 weeks fall back to the weekday baseline)
+    df, _ = _fleet()
+    user1 = df[df.userId == 1]
+    batch = detect_anomalies(user1, min_periods=28)
+    expected = np.where(batch['rollingZ'].isna(), batch['dowZ'], batch['rollingZ'])
+    state = AnomalyState(min_periods=28)
+    streamed = [state.update(row.date, row.screenTimeHours)['zScore'] for row in user1.itertuples()]
+    streamed = np.array([np.nan if z is None else z for z in streamed])
+    assert np.allclose(streamed, expected, equal_nan=True)
+    assert np.isfinite(expected[21:]).all()
+
+
+if __name__ == "__main__":
+    test_binge_day_flagged_per_user()
+    test_change_point_found()
+    test_incremental_state_matches_batch()
+    test_flat_history_and_weekday_baseline()
+    print("✅ Anomaly detection tests passed!")
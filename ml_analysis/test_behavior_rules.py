@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Quick test of the compiled behavior rule table
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from analysis_core import calculate_risk_level, classify_behavior, dataset_from_frame
+from behavior_rules import CompiledRules, classify_users, get_rules, load_rules
+
+
+def _ladder(avg_hours, consistency):
+    """The analyzer's original if/elif ladders"""
+    if avg_hours < 2:
+        category, severity = "light_user", "low"
+    elif avg_hours < 4:
+        category, severity = "moderate_user", "low"
+    elif avg_hours < 6:
+        category, severity = "heavy_user", "medium"
+    elif avg_hours < 8:
+        category, severity = "very_heavy_user", "high"
+    else:
+        category, severity = "excessive_user", "critical"
+    if consistency > 0.5 and severity in ["medium", "high"]:
+        severity = "critical"
+
+    score = 0 if avg_hours < 3 else 1 if avg_hours < 5 else 3 if avg_hours < 7 else 5
+    score += 3 if consistency > 0.6 else 2 if consistency > 0.4 else 1 if consistency > 0.2 else 0
+    risk = "low" if score <= 1 else "moderate" if score <= 3 else "high" if score <= 5 else "critical"
+    return category, severity, risk
+
+
+def test_compiled_rules_match_ladders_on_boundaries():
+    hours = np.r_[np.arange(0, 10.01, 0.5), [1.999, 2.001, 7.999]]
+    consistency = np.r_[np.arange(0, 1.01, 0.1), [0.2, 0.4, 0.5, 0.6, 0.6001], [np.nan]]
+    grid_hours, grid_consistency = [a.ravel() for a in np.meshgrid(hours, consistency)]
+
+    labels = get_rules().classify(grid_hours, grid_consistency)
+    for i, (h, c) in enumerate(zip(grid_hours, grid_consistency)):
+        assert (labels["category"][i], labels["severity"][i], labels["risk_level"][i]) == _ladder(h, c), (h, c)
+        assert calculate_risk_level(h, c) == _ladder(h, c)[2]
+
+
+def test_rules_json_round_trip_and_fleet_classification():
+    rules = CompiledRules(json.loads(get_rules().to_json()))
+    assert rules.rules == load_rules()
+
+    rng = np.random.default_rng(0)
+    fleet = pd.DataFrame({'userId': np.repeat(np.arange(1000), 14),
+                          'screenTimeHours': rng.gamma(4, 1.2, 14_000)})
+    classified = classify_users(fleet, rules)
+    assert len(classified) == 1000
+
+    user = fleet[fleet['userId'] == 3]
+    single = classify_behavior(dataset_from_frame(pd.DataFrame({
+        'date': pd.date_range('2025-10-01', periods=14).strftime('%Y-%m-%d'),
+        'totalScreenTime': user['screenTimeHours'].to_numpy() * 3_600_000,
+        'appCount': 10, 'dayOfWeek': 1, 'isWeekend': False,
+    })))
+    row = classified.loc[3]
+    for key in ('category', 'severity', 'action', 'message', 'risk_level'):
+        assert single[key] == row[key]
+    assert abs(single['consistency_score'] - row['consistency_score']) < 1e-9
+
+
+if __name__ == "__main__":
+    test_compiled_rules_match_ladders_on_boundaries()
+    test_rules_json_round_trip_and_fleet_classification()
+    print("✅ Behavior rules tests passed!")
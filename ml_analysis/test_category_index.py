@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard package category index
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from category_index import PackageCategoryIndex, get_default_index
+from feature_pipeline import CATEGORY_CODES, build_category_features
+
+
+def test_lookup_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'categories.db')
+        index = PackageCategoryIndex(db_path, cache_size=4)
+        assert index.category('com.instagram.android') == 'social_media'
+        assert index.category('com.supercell.clashofclans') == 'gaming'  # prefix rule
+        assert index.category('org.unknown.app') == 'other'
+
+        loaded = index.bulk_load((f'com.vendor.app{i}', 'education', None) for i in range(20_000))
+        assert loaded == 20_000
+        assert index.code('com.vendor.app123') == CATEGORY_CODES['education']
+        assert index.codes(['com.vendor.app1', 'com.whatsapp', 'com.vendor.app1']).tolist() == [
+            CATEGORY_CODES['education'], CATEGORY_CODES['communication'], CATEGORY_CODES['education']]
+        # LRU front stays bounded
+        assert len(index._cache) <= 4
+        # A package read between one-off lookups is never the one evicted
+        index.code('com.whatsapp')
+        misses = index.misses
+        for i in range(10):
+            index.code('com.whatsapp')
+            index.code(f'com.vendor.app{1000 + i}')
+        assert index.misses - misses == 10 and 'com.vendor.app1000' not in index._cache
+        index.close()
+
+        reopened = PackageCategoryIndex(db_path)
+        assert reopened.count() > 20_000
+        assert reopened.category('com.vendor.app19999') == 'education'
+        assert reopened.labels_for('gaming')[0] == 'PUBG'
+        reopened.close()
+
+
+def test_shared_by_restrictions_and_features():
+    from usage_predictor import NeuralUsagePredictor
+
+    restrictions = NeuralUsagePredictor().check_student_restrictions(
+        {'social_media_hours': 4.0, 'gaming_hours': 3.0},
+        app_packages=['com.reddit.frontpage', 'com.whatsapp']
+    )
+    blocked = restrictions['blocked_apps']
+    assert blocked[0] == 'com.reddit.frontpage'  # student's own app, no label known
+    assert 'Instagram' in blocked and 'PUBG' in blocked
+    assert 'com.whatsapp' not in blocked and len(blocked) == 10
+
+    df = pd.DataFrame({'userId': [1], 'date': ['2025-10-06'],
+                       'packageName': ['com.reddit.frontpage'], 'usageTime': [3_600_000]})
+    features = build_category_features(df)
+    assert features.row_dict(0)['social_media_hours'] == 1.0
+    assert get_default_index().category('com.reddit.frontpage') == 'social_media'
+
+
+if __name__ == "__main__":
+    test_lookup_and_persistence()
+    test_shared_by_restrictions_and_features()
+    print("✅ Category index tests passed!")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard course recommender
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from course_recommender import DATA_DIR, CourseRecommender, load_or_build, parse_duration_hours
+
+
+def test_durations_and_curated_matches():
+    assert parse_duration_hours('23 hours') == 23
+    assert parse_duration_hours('12 weeks') == 48
+    assert np.isnan(parse_duration_hours('self-paced'))
+
+    recommender = CourseRecommender.build()
+    results = recommender.recommend(['CS202'], k=3)
+    assert results[0]['subjectCode'] == 'CS202'
+    assert {r['subjectCode'] for r in results[:2]} == {'CS202'}
+
+    # Very weak subjects prefer beginner courses
+    weak = recommender.recommend({'CS202': 1.0}, k=2)
+    strong = recommender.recommend({'CS202': 0.0}, k=2)
+    assert weak[0]['difficulty'] == 'Beginner' and strong[0]['difficulty'] == 'Intermediate'
+
+    # A course curated for two subjects is listed once
+    urls = [r['url'] for r in recommender.recommend(['Machine Learning', 'CS301', 'CS302'], k=20)]
+    assert len(urls) == len(set(urls))
+
+    # Short courses win when study time is scarce
+    pace = recommender.recommend(['CS101'], study_hours_per_week=1, k=2)
+    assert pace[0]['duration'] == '23 hours'
+    assert recommender.recommend([], k=3) == []
+
+    start = time.perf_counter()
+    for _ in range(200):
+        recommender.recommend({'CS102': 0.8, 'CS202': 0.3}, 6, k=5)
+    assert (time.perf_counter() - start) / 200 < 0.005
+
+
+def test_snapshot_round_trip_and_refresh():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        shutil.copytree(DATA_DIR, data_dir)
+        snapshot = os.path.join(tmp, 'course_index.npz')
+
+        built = load_or_build(snapshot, data_dir)
+        assert os.path.exists(snapshot)
+        loaded = CourseRecommender.load(snapshot)
+        assert loaded.source_hash == built.source_hash
+        query = {'CS102': 0.7, 'MA201': 0.5}
+        assert loaded.recommend(query, 5) == built.recommend(query, 5)
+
+        # Editing the catalog invalidates the snapshot
+        path = os.path.join(data_dir, 'recommendations.json')
+        with open(path) as f:
+            catalog = json.load(f)
+        catalog['recommendations'][0]['courses'].append({
+            'platform': 'YouTube', 'title': 'Pointers in C Crash Course', 'url': 'https://example.com/c',
+            'instructor': 'Test', 'difficulty': 'Beginner', 'duration': '2 hours'})
+        with open(path, 'w') as f:
+            json.dump(catalog, f)
+        refreshed = load_or_build(snapshot, data_dir)
+        assert refreshed.source_hash != built.source_hash
+        assert CourseRecommender.load(snapshot).source_hash == refreshed.source_hash
+        assert any(r['title'] == 'Pointers in C Crash Course' for r in refreshed.recommend(['CS101'], 3))
+
+
+if __name__ == "__main__":
+    test_durations_and_curated_matches()
+    test_snapshot_round_trip_and_refresh()
+    print("✅ Course recommender tests passed!")
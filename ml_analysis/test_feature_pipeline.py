@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard category feature pipeline
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import FEATURE_NAMES, CategoryLookup, build_category_features
+from usage_predictor import NeuralUsagePredictor
+
+
+def test_lookup_exact_prefix_and_unknown():
+    lookup = CategoryLookup()
+    assert lookup.category('com.instagram.android') == 'social_media'
+    assert lookup.category('com.supercell.clashofclans') == 'gaming'
+    assert lookup.category('com.facebook.orca') == 'communication'
+    assert lookup.category('com.example.unknown') == 'other'
+    assert list(lookup.codes(['com.whatsapp', None, 'com.whatsapp'])) == [3, 9, 3]
+
+
+def test_long_format_features():
+    ms = 3_600_000
+    df = pd.DataFrame({
+        'userId': [1, 1, 1, 2],
+        'date': ['2025-10-01', '2025-10-01', '2025-10-02', '2025-10-01'],
+        'packageName': ['com.instagram.android', 'com.king.candycrushsaga', 'com.duolingo', 'com.android.chrome'],
+        'usageTime': [2 * ms, ms, ms // 2, 3 * ms],
+    })
+    features = build_category_features(df)
+    assert features.matrix.shape == (3, len(FEATURE_NAMES))
+
+    frame = features.to_frame().set_index(['userId', 'date'])
+    first = frame.loc[(1, pd.Timestamp('2025-10-01'))]
+    assert first['social_media_hours'] == 2 and first['gaming_hours'] == 1
+    assert frame.loc[(2, pd.Timestamp('2025-10-01'))]['browsing_hours'] == 3
+
+
+def test_app_csv_features_and_batch_predict():
+    df = pd.DataFrame({
+        'date': ['2025-10-01', '2025-10-02'],
+        'totalScreenTime': [14_400_000, 36_000_000],
+        'topAppPackage': ['com.instagram.android', 'com.whatsapp'],
+        'topAppTime': [7_200_000, 3_600_000],
+    })
+    features = build_category_features(df)
+    np.testing.assert_allclose(features.matrix.sum(axis=1), [4.0, 10.0])
+    assert features.row_dict(0)['social_media_hours'] == 2.0
+
+    predictions = NeuralUsagePredictor(model_path='missing/usage_nn_model.h5').predict_batch(features.matrix)
+    assert predictions['prediction_class'].shape == (2,)
+    assert predictions['probabilities'].shape == (2, 3)
+
+
+if __name__ == "__main__":
+    test_lookup_exact_prefix_and_unknown()
+    test_long_format_features()
+    test_app_csv_features_and_batch_predict()
+    print("✅ Feature pipeline tests passed!")
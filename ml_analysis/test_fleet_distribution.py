@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard fleet distribution sketches
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from analysis_core import AnalysisService, parse_usage_csv
+from fleet_distribution import DISTRIBUTION_FILE, FleetDistribution, TDigest
+from usage_predictor import generate_sample_csv_data
+
+
+def _fleet(users=300, days=28, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-09-01', periods=days)
+    hours = rng.lognormal(1.2, 0.4, (users, 1)) * rng.lognormal(0, 0.25, (users, days))
+    return pd.DataFrame({
+        'userId': np.repeat(np.arange(users), days),
+        'date': np.tile(dates, users),
+        'dayOfWeek': np.tile((dates.dayofweek + 1) % 7, users),
+        'screenTimeHours': hours.ravel(),
+        'cohort': np.repeat(np.where(np.arange(users) % 3 == 0, 'student', 'adult'), days),
+    })
+
+
+def test_tdigest_ranks_and_merges():
+    values = np.random.default_rng(1).lognormal(1, 0.6, 200_000)
+    whole = TDigest().update(values)
+    left, right = TDigest().update(values[::2]), TDigest().update(values[1::2])
+    merged = left.merge(right)
+    assert len(whole.means) <= 200
+
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99):
+        exact = np.quantile(values, q)
+        assert abs(whole.cdf(exact) - q) < 0.005
+        assert abs(merged.cdf(exact) - q) < 0.005
+
+    restored = TDigest.from_dict(whole.to_dict())
+    assert abs(restored.quantile(0.5) - whole.quantile(0.5)) < 1e-4
+
+
+def test_distribution_shards_and_user_percentiles():
+    fleet = _fleet()
+    whole = FleetDistribution().update(fleet)
+    shards = [FleetDistribution().update(part) for _, part in fleet.groupby(fleet['userId'] % 4)]
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+    assert set(merged.sketches) == set(whole.sketches)
+    assert 'student:0' in merged.sketches and 'all:all' in merged.sketches
+    assert merged.sketches['all:all'].count == len(fleet)
+
+    exact = (fleet['screenTimeHours'] <= 4.0).mean() * 100
+    assert abs(merged.percentile(4.0) - exact) < 1.0
+
+    user = fleet[fleet['userId'] == 7].drop(columns=['userId'])
+    result = merged.user_percentiles(user)
+    assert result['cohort'] == 'adult' and set(result['byDayOfWeek']) == {
+        'Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'}
+    assert 0 <= result['overall'] <= 100
+
+
+def test_analysis_service_reports_percentiles():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = AnalysisService(models_dir=tmp)
+        dataset = parse_usage_csv(csv_content=generate_sample_csv_data(days=14))
+        assert 'fleetPercentiles' not in service.analyze(dataset, now=datetime(2025, 10, 6))['patterns']
+
+        FleetDistribution().update(_fleet()).save(os.path.join(tmp, DISTRIBUTION_FILE))
+        percentiles = service.analyze(dataset, now=datetime(2025, 10, 6))['patterns']['fleetPercentiles']
+        assert percentiles['cohort'] == 'all' and 0 <= percentiles['overall'] <= 100
+
+
+if __name__ == "__main__":
+    test_tdigest_ranks_and_merges()
+    test_distribution_shards_and_user_percentiles()
+    test_analysis_service_reports_percentiles()
+    print("✅ Fleet distribution tests passed!")
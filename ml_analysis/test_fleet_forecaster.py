@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard fleet forecaster
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from fleet_forecaster import (
+    MODEL_NAME, FleetForecaster, build_training_set, latest_model_path, prepare_usage, synthesize_fleet
+)
+from model_registry import publish_model
+from usage_predictor import HabitGuardMLAnalyzer, generate_sample_csv_data
+
+
+def test_training_rows_use_only_past_data():
+    fleet = synthesize_fleet(users=3, days=20, seed=1)
+    X, y, mean, origin_dates = build_training_set(prepare_usage(fleet))
+    # 3 users x (20 - 7 + 1 origins) x up to 7 horizons, minus targets past the end
+    assert len(X) == 3 * sum(min(7, 20 - origin) for origin in range(7, 20))
+    assert X['horizon'].between(1, 7).all()
+    assert np.all(mean > 0) and np.all(np.isfinite(y))
+
+
+def test_fit_forecast_and_analyzer_integration():
+    fleet = synthesize_fleet(users=40, days=40, seed=2)
+    forecaster = FleetForecaster(max_iter=50).fit(fleet)
+    assert forecaster.n_users == 40
+    assert 'mean_absolute_error_hours' in forecaster.metrics
+
+    history = fleet[fleet['userId'] == 5]
+    dates = pd.date_range(history['date'].max() + pd.Timedelta(days=1), periods=7)
+    hours = forecaster.forecast(history, dates)
+    assert hours.shape == (7,) and np.all(hours >= 0)
+    # Forecasts stay on the user's own scale
+    user_mean = history['totalScreenTime'].mean() / 3_600_000
+    assert 0.3 * user_mean < hours.mean() < 3 * user_mean
+
+    # Backtest residuals cover only the recent origins, each 1-7 days ahead
+    origins, horizons, residuals = forecaster.backtest_residuals(history, days=14)
+    assert len(residuals) > 0 and np.all(np.isfinite(residuals))
+    assert origins.max() - origins.min() < np.timedelta64(14, 'D')
+    assert set(np.unique(horizons)) <= set(range(1, 8))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        analyzer = HabitGuardMLAnalyzer(models_dir=tmp)
+        analyzer.load_csv_data(csv_content=generate_sample_csv_data(days=21))
+        assert 'model' not in analyzer.analyze_patterns()['predictions']  # per-request forest
+
+        publish_model(forecaster, tmp, MODEL_NAME, version=2)
+        assert latest_model_path(tmp).endswith('fleet_forecaster.v2.pkl')
+        predictions = analyzer.analyze_patterns()['predictions']
+        assert predictions['model'] == MODEL_NAME
+        assert len(predictions['next_7_days']) == 7
+
+
+if __name__ == "__main__":
+    test_training_rows_use_only_past_data()
+    test_fit_forecast_and_analyzer_integration()
+    print("✅ Fleet forecaster tests passed!")
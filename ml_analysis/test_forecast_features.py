@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard forecast feature engine
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from forecast_features import FeatureState, build_features, feature_columns
+
+
+def _fleet():
+    rng = np.random.default_rng(0)
+    frames = []
+    for user, days in ((1, 30), (2, 5), (3, 20)):
+        frames.append(pd.DataFrame({'userId': user,
+                                    'date': pd.date_range('2025-09-01', periods=days),
+                                    'hours': rng.uniform(1, 9, days)}))
+    # Shuffled input: the engine sorts by user and date itself
+    return pd.concat(frames).sample(frac=1, random_state=0)
+
+
+def test_batch_matches_pandas_windows():
+    df = _fleet()
+    features = build_features(df)
+    assert list(features.columns[2:]) == feature_columns()
+
+    ordered = df.sort_values(['userId', 'date'])
+    groups = ordered.groupby('userId')['hours']
+    expected = {
+        'lag_7': groups.shift(6),
+        'roll_mean_7': groups.transform(lambda s: s.rolling(7, min_periods=1).mean()),
+        'roll_std_3': groups.transform(lambda s: s.rolling(3, min_periods=2).std()),
+        'ewma_7': groups.transform(lambda s: s.ewm(span=7, adjust=False).mean()),
+        'expanding_mean': groups.transform(lambda s: s.expanding().mean()),
+    }
+    for column, values in expected.items():
+        assert np.allclose(features[column], values.to_numpy(), equal_nan=True), column
+
+    # The 5-day user never has a 7th lag; the first rows of each user never see the previous user
+    assert features.loc[features['userId'] == 2, 'lag_7'].isna().all()
+    predictive = build_features(df, predictive=True)
+    first_rows = predictive.groupby('userId').head(1)
+    assert first_rows['lag_1'].isna().all() and (first_rows['n_days'] == 0).all()
+
+
+def test_incremental_matches_batch():
+    df = _fleet()
+    user = df[df['userId'] == 1].sort_values('date')
+    batch = build_features(user).iloc[-1]
+
+    state = FeatureState.from_history(user['date'].iloc[:-1], user['hours'].iloc[:-1])
+    # Persist and restore between requests, then add the new day
+    state = FeatureState.from_dict(state.to_dict())
+    incremental = state.update(user['date'].iloc[-1], user['hours'].iloc[-1])
+    for column in feature_columns():
+        assert np.isclose(incremental[column], batch[column], equal_nan=True), column
+
+
+def test_missing_values_and_days():
+    df = _fleet()
+    ordered = df.sort_values(['userId', 'date'])
+    # A NaN in user 1 must not leak into user 1's later sums or into later users
+    df.loc[(df['userId'] == 1) & (df['date'] == '2025-09-10'), 'hours'] = np.nan
+    features = build_features(df)
+    for user in (2, 3):
+        alone = build_features(ordered[ordered['userId'] == user])
+        mine = features[features['userId'] == user].reset_index(drop=True)
+        assert np.allclose(mine[feature_columns()], alone[feature_columns()], equal_nan=True), user
+    user1 = features[features['userId'] == 1]
+    assert user1[['expanding_mean', 'roll_mean_7', 'dow_mean_3']].iloc[-1].notna().all()
+    assert user1['n_days'].iloc[-1] == 29
+
+    # A skipped day keeps lag_7 on the same weekday and shrinks the window
+    user = ordered[(ordered['userId'] == 1) & (ordered['date'] != '2025-09-20')]
+    last = build_features(user).iloc[-1]
+    week_ago = user.loc[user['date'] == '2025-09-24', 'hours'].iloc[0]
+    assert last['lag_7'] == week_ago
+    assert np.isclose(last['roll_mean_14'], ordered[(ordered['userId'] == 1) & (ordered['date'] >= '2025-09-17')
+                                                    & (ordered['date'] != '2025-09-20')]['hours'].mean())
+    skipped = build_features(user).set_index('date')
+    assert np.isnan(skipped.loc['2025-09-26', 'lag_7'])  # lands on the skipped day
+    assert skipped.loc['2025-09-30', 'lag_14'] == user.loc[user['date'] == '2025-09-17', 'hours'].iloc[0]
+
+    # The incremental state agrees across gaps and missing values
+    user = user.assign(hours=user['hours'].where(user['date'] != '2025-09-25'))
+    state = FeatureState.from_history(user['date'].iloc[:-1], user['hours'].iloc[:-1])
+    state = FeatureState.from_dict(state.to_dict())
+    incremental = state.update(user['date'].iloc[-1], user['hours'].iloc[-1])
+    batch = build_features(user).iloc[-1]
+    for column in feature_columns():
+        assert np.isclose(incremental[column], batch[column], equal_nan=True), column
+
+
+if __name__ == "__main__":
+    test_batch_matches_pandas_windows()
+    test_incremental_matches_batch()
+    test_missing_values_and_days()
+    print("✅ Forecast feature engine tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard goal simulator
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+from io import StringIO
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from analysis_core import generate_predictions, parse_usage_csv
+from goal_simulator import goal_outlook, residual_blocks, series_residual_blocks, simulate_weeks
+from usage_predictor import generate_sample_csv_data
+
+DATES = [f"2026-03-{d:02d}" for d in range(2, 9)]
+
+
+def test_blocks_align_with_forecast_weekday():
+    # Origins on Sunday 2026-03-01 and Monday 2026-03-02; the forecast starts on a Monday (1)
+    origins = pd.to_datetime(['2026-03-01'] * 7 + ['2026-03-02'] * 7)
+    horizons = np.tile(np.arange(1, 8), 2)
+    blocks = residual_blocks(origins, horizons, np.arange(14.0), first_target_dow=1)
+    assert blocks.shape == (1, 7) and blocks[0].tolist() == list(range(7))
+
+    # One residual per day: the block starting each Monday holds that week's residuals
+    dates = pd.date_range('2026-03-02', periods=21)
+    blocks = series_residual_blocks(dates, np.arange(21.0), first_target_dow=1)
+    assert blocks[0].tolist() == list(range(7)) and blocks[2].tolist() == list(range(14, 21))
+    # Monday windows overlapping the start or end of the series are partial
+    assert np.isnan(series_residual_blocks(dates, np.arange(21.0), first_target_dow=3)).any()
+
+
+def test_simulation_and_probabilities():
+    point = np.full(7, 3.0)
+    # Constant blocks: every week is point + one of two known offsets
+    blocks = np.array([[0.5] * 7, [-0.5] * 7, [0.5] * 7])
+    weeks = simulate_weeks(point, blocks, n_simulations=3000, seed=1)
+    assert weeks.shape == (3000, 7)
+    assert set(np.round(weeks.sum(axis=1), 6)) == {24.5, 17.5}
+
+    outlook = goal_outlook(point, DATES, blocks, goal_minutes=200)
+    by_goal = {g['dailyGoalMinutes']: g for g in outlook['goals']}
+    # Under 200 min/day only in -0.5 weeks (1 block of 3)
+    assert abs(by_goal[200.0]['probWeekUnder'] - 1 / 3) < 0.03 and by_goal[200.0]['isUserGoal']
+    assert by_goal[240.0]['probEveryDayUnder'] == 1.0 and by_goal[120.0]['expectedDaysUnder'] == 0.0
+    assert goal_outlook(point, DATES, blocks, goal_minutes=200) == outlook
+
+    # Missing cells are filled from the same weekday, never left as NaN
+    gappy = np.array([[np.nan, 1, 1, 1, 1, 1, 1], [2, 2, np.nan, 2, 2, 2, 2], [3, 3, 3, 3, 3, 3, 3]])
+    weeks = simulate_weeks(point, gappy, n_simulations=2000)
+    assert not np.isnan(weeks).any() and set(np.unique(weeks[:, 0])) <= {5.0, 6.0}
+
+    assert 'error' in goal_outlook(point, DATES, blocks[:1])
+
+
+def test_calibrated_on_known_noise():
+    # 52 weeks of N(0, 1) daily errors: the weekly total's spread is sqrt(7)
+    rng = np.random.default_rng(7)
+    blocks = rng.normal(0, 1, (52, 7))
+    point = np.full(7, 4.0)
+    outlook = goal_outlook(point, DATES, blocks, goal_minutes=240)
+    interval = outlook['weekly']['intervals']['80']
+    assert abs((interval['upperHours'] - interval['lowerHours']) / 2 - 1.2816 * np.sqrt(7)) < 0.8
+
+    future = point + rng.normal(0, 1, (20000, 7))
+    for goal in outlook['goals']:
+        actual = np.mean(future.sum(axis=1) <= goal['dailyGoalMinutes'] * 7 / 60)
+        assert abs(goal['probWeekUnder'] - actual) < 0.12
+
+    start = time.perf_counter()
+    for _ in range(20):
+        goal_outlook(point, DATES, blocks, goal_minutes=240)
+    assert (time.perf_counter() - start) / 20 < 0.02
+
+
+def test_predictions_include_goal_outlook():
+    csv = generate_sample_csv_data(days=60)
+    df = pd.read_csv(StringIO(csv)).assign(dailyGoalMinutes=150)
+    dataset = parse_usage_csv(csv_content=df.to_csv(index=False))
+    predictions = generate_predictions(dataset, now=datetime(2026, 3, 2))
+    outlook = predictions['goal_outlook']
+    assert [d['date'] for d in outlook['daily']] == [p['date'] for p in predictions['next_7_days']]
+    assert any(g['isUserGoal'] and g['dailyGoalMinutes'] == 150 for g in outlook['goals'])
+    probs = [g['probWeekUnder'] for g in outlook['goals']]
+    assert probs == sorted(probs)
+    assert all(d['lowerHours'] <= d['medianHours'] <= d['upperHours'] for d in outlook['daily'])
+
+
+if __name__ == "__main__":
+    test_blocks_align_with_forecast_weekday()
+    test_simulation_and_probabilities()
+    test_calibrated_on_known_noise()
+    test_predictions_include_goal_outlook()
+    print("✅ Goal simulator tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard model registry hot reload
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import ModelRegistry, parse_model_filename, publish_model
+
+
+def test_parse_model_filename():
+    assert parse_model_filename('usage_nn_model.h5') == ('usage_nn_model', 0, '.h5')
+    assert parse_model_filename('fleet_forecaster.v12.pkl') == ('fleet_forecaster', 12, '.pkl')
+    assert parse_model_filename('.usage_nn_model.tmp.h5') is None
+
+
+def test_registry_hot_swap():
+    with tempfile.TemporaryDirectory() as models_dir:
+        publish_model({'weights': 1}, models_dir, 'forecaster', version=1)
+
+        registry = ModelRegistry(models_dir)
+        assert registry.preload() == {'forecaster': 1}
+        old_entry = registry.get('forecaster')
+        assert old_entry.model == {'weights': 1}
+
+        publish_model({'weights': 2}, models_dir, 'forecaster', version=2)
+
+        # First scan only records the new file; the swap happens once it is stable
+        assert registry.refresh() == {}
+        assert registry.get_model('forecaster') == {'weights': 1}
+        assert registry.refresh() == {'forecaster': 2}
+
+        new_entry = registry.get('forecaster')
+        assert new_entry.model == {'weights': 2}
+        assert new_entry.generation > old_entry.generation
+        # Handlers still holding the old entry keep a complete copy
+        assert old_entry.model == {'weights': 1}
+
+
+def test_registry_keeps_old_version_on_bad_file():
+    with tempfile.TemporaryDirectory() as models_dir:
+        publish_model({'weights': 1}, models_dir, 'forecaster', version=1)
+        registry = ModelRegistry(models_dir)
+        registry.preload()
+
+        with open(os.path.join(models_dir, 'forecaster.v2.pkl'), 'wb') as f:
+            f.write(b'not a pickle')
+        registry.refresh()
+        registry.refresh()
+
+        assert registry.get('forecaster').version == 1
+        assert 'forecaster' in registry.load_errors
+
+
+if __name__ == "__main__":
+    test_parse_model_filename()
+    test_registry_hot_swap()
+    test_registry_keeps_old_version_on_bad_file()
+    print("✅ Model registry tests passed!")
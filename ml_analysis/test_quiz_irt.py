@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Quick test of the quiz IRT calibration
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from quiz_irt import QuizCalibration, item_key, load_item_bank, simulate_responses
+
+
+def test_fit_recovers_parameters_and_selects_informative_questions():
+    bank = load_item_bank()
+    responses, truth = simulate_responses(students=600, seed=1, item_bank=bank)
+    model = QuizCalibration(bank).fit(responses)
+
+    rows = [model.items[item_key(s, q)] for s, q in zip(bank['subject_code'], bank['question_id'])]
+    assert np.corrcoef(model.difficulty[rows], truth['difficulty'])[0, 1] > 0.9
+
+    subject = truth['subjects'][0]
+    users = responses.loc[responses['subject_code'] == subject, 'user_id'].unique()
+    estimated = [model.ability_of(u, subject) for u in users]
+    assert np.corrcoef(estimated, truth['ability'][users, 0])[0, 1] > 0.7
+
+    # A new student in the subject gets the question closest to average difficulty
+    candidates = bank[bank['subject_code'] == subject]
+    question = model.next_question('new-student', subject)
+    assert question in candidates['question_id'].tolist()
+    first = model.next_question('new-student', subject, exclude=[question])
+    assert first != question
+    # Students who answered everything have nothing left
+    assert model.next_question(users[0], subject) is None
+
+    table = model.item_table()
+    assert len(table) == len(bank) and set(table['suggested_label']) <= {'Easy', 'Medium', 'Hard'}
+    assert set(model.weakness_by_subject(users[0])) >= {subject}
+
+
+def test_incremental_updates_track_batch_fit_and_round_trip():
+    bank = load_item_bank()
+    responses, _ = simulate_responses(students=600, seed=2, item_bank=bank)
+    batch = QuizCalibration(bank).fit(responses)
+
+    half = len(responses) // 2
+    streamed = QuizCalibration(bank).fit(responses.iloc[:half])
+    for chunk in np.array_split(np.arange(half, len(responses)), 4):
+        streamed.update(responses.iloc[chunk])
+    rows = [streamed.items[k] for k in batch.items]
+    assert np.corrcoef(streamed.difficulty[rows], batch.difficulty)[0, 1] > 0.95
+    assert np.abs(streamed.difficulty[rows] - batch.difficulty).mean() < 0.25
+    assert streamed.item_responses.sum() == len(responses)
+    keys = list(batch.students)
+    assert np.corrcoef(streamed.ability[[streamed.students[k] for k in keys]],
+                       batch.ability[[batch.students[k] for k in keys]])[0, 1] > 0.95
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = streamed.save(os.path.join(tmp, 'quiz_irt.json'))
+        loaded = QuizCalibration.load(path)
+    assert np.allclose(loaded.difficulty, streamed.difficulty)
+    assert np.allclose(loaded.ability, streamed.ability, atol=1e-5)
+    user, subject = responses.iloc[0]['user_id'], responses.iloc[0]['subject_code']
+    assert loaded.next_question(user, subject) == streamed.next_question(user, subject)
+
+
+if __name__ == "__main__":
+    test_fit_recovers_parameters_and_selects_informative_questions()
+    test_incremental_updates_track_batch_fit_and_round_trip()
+    print("✅ Quiz IRT tests passed!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard report charts
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from analysis_core import chart_series, get_default_service, parse_usage_csv
+from report_charts import (
+    MATPLOTLIB_AVAILABLE, ChartCache, chart_key, chart_specs, render_chart, render_charts
+)
+from usage_predictor import generate_sample_csv_data
+
+
+def _sample_analysis(days=30):
+    return get_default_service().analyze_csv(generate_sample_csv_data(days=days))
+
+
+def test_series_and_specs():
+    csv = generate_sample_csv_data(days=120)
+    dataset = parse_usage_csv(csv_content=csv)
+    series = chart_series(dataset, days=90)
+    assert len(series['daily']['dates']) == 90 and series['daily']['dates'][-1] == dataset.df['date'].max().strftime('%Y-%m-%d')
+    assert len(series['hourly']) == 7 and all(len(row) == 24 for row in series['hourly'])
+    # Each weekday's cells average to its mean daily hours (one row per day)
+    means = dataset.hours.groupby(dataset.df['dayOfWeek']).mean()
+    assert abs(sum(series['hourly'][1]) - means[1]) < 0.01
+
+    analysis = _sample_analysis()
+    kinds = [kind for kind, _ in chart_specs(analysis)]
+    assert kinds == ['trend', 'weekday', 'heatmap']
+    assert len(dict(chart_specs(analysis))['trend']['forecast']) == 7
+    assert chart_specs({}) == []
+
+    # Keys depend on the plotted data only
+    assert chart_key('weekday', {"labels": ['Sun'], "hours": [1.0]}) == chart_key('weekday', {"hours": [1.0], "labels": ['Sun']})
+    assert chart_key('weekday', {"labels": ['Sun'], "hours": [1.0]}) != chart_key('weekday', {"labels": ['Sun'], "hours": [1.5]})
+
+
+@pytest.mark.skipif(not MATPLOTLIB_AVAILABLE, reason="matplotlib not installed")
+def test_render_and_cache():
+    analysis = _sample_analysis()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ChartCache(disk_dir=tmp)
+        charts = render_charts(analysis, cache)
+        assert [kind for kind, _ in charts] == ['trend', 'weekday', 'heatmap']
+        assert all(png.startswith(b'\x89PNG') for _, png in charts)
+        assert cache.stats()['misses'] == 3
+
+        assert render_charts(analysis, cache) == charts
+        assert cache.stats()['hits'] == 3
+
+        # Another process's cache finds the PNGs on disk
+        other = ChartCache(disk_dir=tmp)
+        assert render_charts(analysis, other) == charts
+        assert other.stats()['disk_hits'] == 3
+
+    # Eviction keeps the cache within its byte budget
+    small = ChartCache(max_bytes=len(charts[0][1]) + 1)
+    render_charts(analysis, small)
+    assert small.stats()['entries'] == 1 and small.stats()['evictions'] == 2
+
+    with pytest.raises(ValueError):
+        render_chart('pie', {})
+
+
+if __name__ == "__main__":
+    test_series_and_specs()
+    if MATPLOTLIB_AVAILABLE:
+        test_render_and_cache()
+    print("✅ Report chart tests passed!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard report renderer
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from io import BytesIO, StringIO
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from report_charts import MATPLOTLIB_AVAILABLE
+from report_renderer import (
+    PDF_AVAILABLE, BatchReportRenderer, aiter_report_chunks, iter_report_chunks,
+    render_pdf_bytes, render_txt, write_txt_report
+)
+from usage_predictor import HabitGuardMLAnalyzer, generate_sample_csv_data
+
+
+def _sample_analysis():
+    analyzer = HabitGuardMLAnalyzer()
+    assert analyzer.load_csv_data(csv_content=generate_sample_csv_data())
+    return analyzer.analyze_patterns()
+
+
+def test_render_txt():
+    text = render_txt(_sample_analysis())
+    assert "HABITGUARD USAGE REPORT" in text
+    assert "Classification:" in text
+    assert "PERSONALIZED RECOMMENDATIONS" in text
+
+
+@pytest.mark.skipif(not PDF_AVAILABLE, reason="reportlab not installed")
+def test_render_pdf_in_memory():
+    analysis = _sample_analysis()
+    pdf = render_pdf_bytes(analysis)
+    assert pdf.startswith(b'%PDF')
+    # Trend, day-of-week and heatmap charts are embedded as images
+    assert pdf.count(b'/Subtype /Image') == (3 if MATPLOTLIB_AVAILABLE else 0)
+    assert b'/Subtype /Image' not in render_pdf_bytes(analysis, include_charts=False)
+
+
+@pytest.mark.skipif(not PDF_AVAILABLE, reason="reportlab not installed")
+def test_batch_renderer():
+    analysis = _sample_analysis()
+    jobs = [(f"user{i}", analysis) for i in range(5)]
+
+    with BatchReportRenderer(max_workers=2, chunksize=2) as renderer:
+        results = list(renderer.render_many(jobs, fmt='pdf'))
+        assert [key for key, _ in results] == [key for key, _ in jobs]
+        assert all(data.startswith(b'%PDF') for _, data in results)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            paths = dict(renderer.render_many(jobs[:2] + [('../escape', analysis), ('a/b', analysis)],
+                                              fmt='txt', output_dir=output_dir))
+            assert os.path.exists(paths['user0'])
+            assert paths['user0'].endswith('habitguard_report_user0.txt')
+            # Keys never leave the output directory and never collide
+            assert all(os.path.dirname(path) == output_dir for path in paths.values())
+            assert len(set(os.listdir(output_dir))) == 4
+
+
+def test_stream_and_chunked_txt():
+    analysis = _sample_analysis()
+    stream = StringIO()
+    write_txt_report(analysis, stream)
+    assert "HABITGUARD USAGE REPORT" in stream.getvalue()
+
+    chunks = list(iter_report_chunks(analysis, fmt='txt', chunk_size=128))
+    assert all(len(chunk) <= 128 for chunk in chunks)
+    assert b"".join(chunks).decode('utf-8').startswith("=" * 60)
+
+
+@pytest.mark.skipif(not PDF_AVAILABLE, reason="reportlab not installed")
+def test_async_pdf_chunks_and_stream_output():
+    analysis = _sample_analysis()
+
+    async def collect():
+        return [chunk async for chunk in aiter_report_chunks(analysis, fmt='pdf', chunk_size=1024)]
+
+    pdf = b"".join(asyncio.run(collect()))
+    assert pdf.startswith(b'%PDF')
+
+    buffer = BytesIO()
+    assert HabitGuardMLAnalyzer().generate_pdf_report(analysis, buffer) == "<stream>"
+    assert buffer.getvalue().startswith(b'%PDF')
+
+
+if __name__ == "__main__":
+    test_render_txt()
+    test_render_pdf_in_memory()
+    test_batch_renderer()
+    test_stream_and_chunked_txt()
+    test_async_pdf_chunks_and_stream_output()
+    print("✅ Report renderer tests passed!")
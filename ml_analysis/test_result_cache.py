@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard analysis result cache
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import AnalysisResultCache
+from usage_predictor import generate_sample_csv_data
+
+
+def test_cache_hit_and_version_key():
+    csv = generate_sample_csv_data()
+    cache = AnalysisResultCache()
+
+    first, body = cache.get_or_compute(csv)
+    assert "summary" in first
+    second, cached_body = cache.get_or_compute(csv)
+    assert second is first and cached_body == body
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+    assert AnalysisResultCache(version="other").key_for(csv) != cache.key_for(csv)
+
+
+def test_lru_and_ttl_eviction():
+    cache = AnalysisResultCache(max_entries=2, ttl_seconds=0.05)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {"value": key})
+    assert cache.get('a') is None
+    assert cache.get('c') == {"value": "c"}
+    assert cache.stats()['evictions'] == 1
+
+    time.sleep(0.06)
+    assert cache.get('c') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_disk_tier_and_single_flight():
+    calls = []
+
+    def compute(csv_content):
+        calls.append(csv_content)
+        time.sleep(0.05)
+        return {"rows": len(csv_content.splitlines())}
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cache = AnalysisResultCache(disk_dir=disk_dir)
+        threads = [threading.Thread(target=cache.get_or_compute, args=("a,b\n1,2", compute)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+
+        # A fresh process-level cache finds the result on disk
+        fresh = AnalysisResultCache(disk_dir=disk_dir)
+        result, _ = fresh.get_or_compute("a,b\n1,2", compute)
+        assert result == {"rows": 2} and len(calls) == 1
+        assert fresh.stats()['disk_hits'] == 1
+
+        # A corrupt file on disk is a miss: removed, recomputed and rewritten
+        key = fresh.key_for("a,b\n1,2")
+        with open(os.path.join(disk_dir, f"{key}.json"), 'wb') as f:
+            f.write(b'{"rows": ')
+        corrupt = AnalysisResultCache(disk_dir=disk_dir)
+        assert corrupt.get_entry(key) is None
+        assert not os.path.exists(os.path.join(disk_dir, f"{key}.json"))
+        result, _ = corrupt.get_or_compute("a,b\n1,2", compute)
+        assert result == {"rows": 2} and len(calls) == 2
+        assert corrupt.stats()['misses'] == 2 and corrupt.stats()['disk_hits'] == 0
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_version_key()
+    test_lru_and_ttl_eviction()
+    test_disk_tier_and_single_flight()
+    print("✅ Result cache tests passed!")
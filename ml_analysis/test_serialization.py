@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard result serialization layer
+"""
+
+import gzip
+import json
+import os
+import sys
+from datetime import date, datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import serialization
+from serialization import choose_encoding, dumps, encode_response
+
+
+PAYLOAD = {
+    "summary": {"avgDailyScreenTime": np.float64(4.25), "totalDays": np.int64(90)},
+    "series": np.array([1.5, 2.0, np.nan]),
+    "flags": np.array([True, False]),
+    "generated": datetime(2025, 10, 1, 12, 30),
+    "day": date(2025, 10, 1),
+    "weekend": float('nan'),
+}
+
+EXPECTED = {
+    "summary": {"avgDailyScreenTime": 4.25, "totalDays": 90},
+    "series": [1.5, 2.0, None],
+    "flags": [True, False],
+    "generated": "2025-10-01T12:30:00",
+    "day": "2025-10-01",
+    "weekend": None,
+}
+
+
+def test_dumps_handles_numpy_and_datetimes():
+    body = dumps(PAYLOAD)
+    assert b"\n" not in body
+    assert json.loads(body) == EXPECTED
+
+
+def test_stdlib_fallback_matches():
+    assert json.loads(serialization._dumps_stdlib(PAYLOAD, False)) == EXPECTED
+    assert b"\n" in serialization._dumps_stdlib(PAYLOAD, True)
+
+
+def test_response_compression():
+    assert choose_encoding(None) is None
+    assert choose_encoding('gzip;q=0, deflate') is None
+    assert choose_encoding('gzip, deflate') == 'gzip'
+
+    big = {"values": list(range(2000))}
+    body, encoding = encode_response(big, accept_encoding='gzip')
+    assert encoding == 'gzip'
+    assert json.loads(gzip.decompress(body)) == big
+
+    small_body, small_encoding = encode_response({"ok": True}, accept_encoding='gzip')
+    assert small_encoding is None and json.loads(small_body) == {"ok": True}
+
+
+if __name__ == "__main__":
+    test_dumps_handles_numpy_and_datetimes()
+    test_stdlib_fallback_matches()
+    test_response_compression()
+    print("✅ Serialization tests passed!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard shared artifact files
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import shared_artifacts
+from category_index import PackageCategoryIndex
+from feature_pipeline import CATEGORY_CODES
+from shared_artifacts import (
+    ArrayCategoryLookup, DenseNetwork, attach_artifacts, attach_worker_artifacts, build_artifacts,
+    publish_artifacts
+)
+
+
+def _network(seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = [10, 8, 3]
+    layers = [(rng.normal(size=(a, b)).astype(np.float32), rng.normal(size=b).astype(np.float32))
+              for a, b in zip(sizes[:-1], sizes[1:])]
+    return DenseNetwork(layers, ['relu', 'softmax'])
+
+
+def test_publish_and_attach_zero_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = publish_artifacts({'a': np.arange(10, dtype=np.int64), 'b': np.eye(3)},
+                                 os.path.join(tmp, 'x.art'), meta={'k': 1})
+        bundle = attach_artifacts(path)
+        assert bundle.meta == {'k': 1}
+        assert bundle['a'].tolist() == list(range(10))
+        assert np.array_equal(bundle['b'], np.eye(3))
+        # Views into the mapping, not copies, and read-only
+        assert isinstance(bundle['a'].base, np.memmap) or isinstance(bundle['a'].base.base, np.memmap)
+        assert not bundle['a'].flags.writeable
+
+
+def test_network_and_lookup_round_trip():
+    network = _network()
+    features = np.random.default_rng(1).uniform(0, 5, size=(50, 10))
+    expected = network.predict(features)
+    assert np.allclose(expected.sum(axis=1), 1.0, atol=1e-5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = PackageCategoryIndex()
+        index.bulk_load([('com.vendor.study', 'education')])
+        path = build_artifacts(network, index=index, path=os.path.join(tmp, 'habitguard.art'))
+        bundle = attach_artifacts(path)
+
+        shared = DenseNetwork.from_bundle(bundle)
+        assert np.allclose(shared.predict(features, batch_size=7), expected, atol=1e-6)
+
+        lookup = ArrayCategoryLookup.from_bundle(bundle)
+        codes = lookup.codes(['com.vendor.study', 'com.supercell.brawl', 'x.y', 'com.vendor.study'])
+        assert codes.tolist() == [CATEGORY_CODES['education'], CATEGORY_CODES['gaming'],
+                                  CATEGORY_CODES['other'], CATEGORY_CODES['education']]
+
+        # A worker that attached the file predicts without TensorFlow
+        from usage_predictor import NeuralUsagePredictor
+        attach_worker_artifacts(path)
+        try:
+            predictor = NeuralUsagePredictor(model_path=os.path.join(tmp, 'missing.h5'))
+            batch = predictor.predict_batch(features)
+            assert 'note' not in batch
+            assert np.array_equal(batch['prediction_class'], expected.argmax(axis=1))
+        finally:
+            shared_artifacts._worker_bundle = None
+
+
+if __name__ == "__main__":
+    test_publish_and_attach_zero_copy()
+    test_network_and_lookup_round_trip()
+    print("✅ Shared artifact tests passed!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard streak engine
+"""
+
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from analysis_core import analyze, dataset_from_frame
+from streak_engine import compute_streaks, daily_goals, daily_streaks, goal_adherence, to_history_rows, to_statistics_rows
+
+
+def _fleet():
+    rng = np.random.default_rng(3)
+    frames = []
+    for user in range(1, 21):
+        dates = pd.date_range('2025-08-01', periods=60)
+        keep = rng.random(60) > 0.1  # missing days break streaks
+        frames.append(pd.DataFrame({
+            'userId': user,
+            'date': dates[keep],
+            'totalScreenTime': rng.uniform(60, 400, keep.sum()) * 60_000,
+            'dailyGoalMinutes': 180 + 10 * user,
+        }))
+    return pd.concat(frames).sample(frac=1, random_state=1)
+
+
+def _reference(df: pd.DataFrame, as_of: str):
+    """Day-by-day replay of streakController.updateStreak for each user"""
+    result = {}
+    for user, rows in df.sort_values('date').groupby('userId'):
+        current = longest = active = 0
+        last = start = None
+        for _, row in rows.iterrows():
+            day = row['date'].normalize()
+            met = row['totalScreenTime'] / 60_000 <= row['dailyGoalMinutes']
+            if met:
+                continued = last is not None and (day - last).days == 1 and current > 0
+                current, start = (current + 1, start) if continued else (1, day)
+                active += 1
+            else:
+                current, start = 0, None
+            longest = max(longest, current)
+            last = day
+        if last < pd.Timestamp(as_of) - pd.Timedelta(days=1):
+            current, start = 0, None
+        result[user] = (current, longest, active, start)
+    return result
+
+
+def test_fleet_streaks_match_row_by_row_replay():
+    df = _fleet()
+    df['date'] = pd.to_datetime(df['date'])
+    stats = compute_streaks(df, as_of='2025-09-29').set_index('userId')
+    for user, (current, longest, active, start) in _reference(df, '2025-09-29').items():
+        row = stats.loc[user]
+        assert (row['current_streak'], row['longest_streak'], row['total_active_days']) == (current, longest, active)
+        assert (pd.isna(row['streak_start_date']) and start is None) or row['streak_start_date'] == start
+
+    # A stale last day means the current streak has lapsed
+    assert compute_streaks(df, as_of='2025-12-01')['current_streak'].eq(0).all()
+
+    rows = to_statistics_rows(stats.reset_index())
+    assert list(rows.columns)[:3] == ['u_id', 'current_streak', 'longest_streak']
+    history = to_history_rows(daily_streaks(df))
+    assert len(history) == len(df)
+    assert history.groupby('u_id')['streak_count'].max().to_dict() == stats['longest_streak'].to_dict()
+
+
+def test_hourly_rows_are_summed_per_day():
+    # Two hours of 2h each on the 1st exceed a 3h goal even though each row alone is under it
+    df = pd.DataFrame({'userId': 1, 'date': ['2025-08-01 09:00', '2025-08-01 20:00', '2025-08-02 10:00'],
+                       'totalScreenTime': [120 * 60_000, 120 * 60_000, 60 * 60_000], 'dailyGoalMinutes': 180})
+    daily = daily_goals(df)
+    assert daily['minutes'].tolist() == [240.0, 60.0] and daily['goal_met'].tolist() == [False, True]
+
+
+def test_goal_adherence_in_analysis():
+    df = pd.DataFrame({
+        'date': pd.date_range('2025-10-01', periods=10).strftime('%Y-%m-%d'),
+        'totalScreenTime': [h * 3_600_000 for h in [2, 2, 5, 2, 2, 2, 3, 3, 2, 2]],
+        'appCount': 12,
+        'dayOfWeek': 0,
+        'isWeekend': False,
+    })
+    summary = goal_adherence(df, goal_minutes=240, as_of='2025-10-10')
+    assert summary['currentStreak'] == 7 and summary['streakStartDate'] == '2025-10-04'
+    assert summary['longestStreak'] == 7 and summary['totalActiveDays'] == 9
+
+    analysis = analyze(dataset_from_frame(df), now=datetime(2025, 10, 11), goal_minutes=240)
+    assert analysis['patterns']['goalAdherence'] == dict(summary)
+    assert 'goalAdherence' not in analyze(dataset_from_frame(df), now=datetime(2025, 10, 11))['patterns']
+
+
+if __name__ == "__main__":
+    test_fleet_streaks_match_row_by_row_replay()
+    test_hourly_rows_are_summed_per_day()
+    test_goal_adherence_in_analysis()
+    print("✅ Streak engine tests passed!")
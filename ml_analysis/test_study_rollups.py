@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Quick test of the study statistics rollups
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from study_rollups import (SQLITE_SCHEMA, compute_statistics, correlate_with_screen_time, daily_screen_minutes,
+                           daily_study_minutes, refresh_sqlite)
+from weekly_reports import load_fleet_usage
+
+SESSION_COLUMNS = ['session_id', 'user_id', 'profile_id', 'subject_id', 'subject_code', 'subject_name',
+                   'actual_duration_seconds', 'status', 'start_time', 'end_time', 'pause_count',
+                   'created_at', 'updated_at']
+
+
+def _sessions():
+    rows = [
+        (1, 1, 10, 100, 'CS101', 'Programming', 3000, 'completed',
+         '2025-10-06 09:00:00', '2025-10-06 09:50:00', 1, '2025-10-06 08:59:00', '2025-10-06 09:50:00'),
+        (2, 1, 10, 100, 'CS101', 'Programming', 1830, 'completed',
+         '2025-10-06 18:00:00', '2025-10-06 18:30:30', 2, '2025-10-06 17:59:00', '2025-10-06 18:30:30'),
+        (3, 1, 10, 101, 'MA201', 'Calculus', 600, 'cancelled',
+         '2025-10-06 20:00:00', '2025-10-06 20:10:00', 0, '2025-10-06 19:59:00', '2025-10-06 20:10:00'),
+        (4, 1, 10, 101, 'MA201', 'Calculus', 0, 'in_progress',
+         '2025-10-07 23:30:00', None, 0, '2025-10-07 23:29:00', '2025-10-07 23:30:00'),
+        (5, 2, 20, 200, 'CS101', 'Programming', 0, 'not_started',
+         None, None, 0, '2025-10-07 10:00:00', '2025-10-07 10:00:00'),
+    ]
+    return pd.DataFrame(rows, columns=SESSION_COLUMNS)
+
+
+def _usage_csv():
+    rows = ["userId,date,totalScreenTime,appCount,dayOfWeek,isWeekend"]
+    # More screen time, less study
+    for day, hours in zip(range(6, 13), [2, 7, 3, 6, 4, 5, 1]):
+        rows.append(f"1,2025-10-{day:02d},{hours * 3_600_000},10,{(day + 1) % 7},false")
+    return "\n".join(rows)
+
+
+def test_full_rollup_and_screen_time_correlation():
+    stats = compute_statistics(_sessions())
+    assert len(stats) == 3  # the never-started session is skipped
+    cs = stats[stats['subject_id'] == 100].iloc[0]
+    assert (cs['stat_date'], cs['total_study_minutes'], cs['total_sessions'], cs['completed_sessions'],
+            cs['average_session_minutes'], cs['total_pauses']) == ('2025-10-06', 80, 2, 2, 40.0, 3)
+    ma = stats[stats['subject_id'] == 101].set_index('stat_date')
+    assert ma.loc['2025-10-06', 'completed_sessions'] == 0 and ma.loc['2025-10-06', 'total_study_minutes'] == 10
+    assert ma.loc['2025-10-07', 'total_sessions'] == 1 and ma.loc['2025-10-07', 'total_study_minutes'] == 0
+
+    study = pd.DataFrame({'user_id': 1, 'date': pd.date_range('2025-10-06', periods=7),
+                          'study_minutes': [150.0, 20, 120, 40, 90, 60, 200]})
+    screen = daily_screen_minutes(load_fleet_usage(csv_content=_usage_csv()))
+    correlation = correlate_with_screen_time(study, screen).iloc[0]
+    expected = np.corrcoef(screen['screen_minutes'], study['study_minutes'])[0, 1]
+    assert correlation['days'] == 7 and abs(correlation['correlation'] - expected) < 1e-4
+    assert correlation['correlation'] < -0.9 and correlation['study_minutes_per_screen_hour'] < 0
+
+    # Days with screen time but no study count as zero study minutes
+    partial = correlate_with_screen_time(study.iloc[:3], screen).iloc[0]
+    assert partial['days'] == 7 and partial['study_days'] == 3
+
+
+def test_screen_minutes_sum_hourly_rows():
+    csv = _usage_csv() + "\n1,2025-10-06,3600000,4,1,false\n1,2025-10-06,1800000,2,1,false"
+    screen = daily_screen_minutes(load_fleet_usage(csv_content=csv))
+    assert len(screen) == 7
+    assert screen.loc[screen['date'] == '2025-10-06', 'screen_minutes'].tolist() == [120 + 60 + 30]
+
+
+def test_sessions_without_pause_count():
+    stats = compute_statistics(_sessions().drop(columns=['pause_count']))
+    assert len(stats) == 3 and (stats['total_pauses'] == 0).all()
+
+
+def test_incremental_sqlite_refresh_matches_full_recompute():
+    sessions = _sessions()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'habitguard.db')
+        with sqlite3.connect(db) as conn:
+            conn.executescript(SQLITE_SCHEMA)
+            sessions.to_sql('study_sessions', conn, if_exists='append', index=False)
+
+        usage = load_fleet_usage(csv_content=_usage_csv())
+        first = refresh_sqlite(db, usage)
+        assert first['changed_sessions'] == 5 and first['watermark'] == '2025-10-07 23:30:00'
+        # Only the watermark's own second is read again
+        assert refresh_sqlite(db, usage)['changed_sessions'] == 1
+
+        # A session written later in the watermark's second is still picked up
+        late = pd.DataFrame([(6, 1, 10, 100, 'CS101', 'Programming', 900, 'completed', '2025-10-07 23:10:00',
+                              '2025-10-07 23:30:00', 0, '2025-10-07 23:09:00', '2025-10-07 23:30:00')],
+                            columns=SESSION_COLUMNS)
+        with sqlite3.connect(db) as conn:
+            late.to_sql('study_sessions', conn, if_exists='append', index=False)
+        assert refresh_sqlite(db, usage)['changed_sessions'] == 2
+
+        # The late-night session finishes after midnight: it moves from the 7th to the 8th
+        with sqlite3.connect(db) as conn:
+            conn.execute("UPDATE study_sessions SET status = 'completed', actual_duration_seconds = 2700, "
+                         "end_time = '2025-10-08 00:15:00', updated_at = '2025-10-08 00:15:00' WHERE session_id = 4")
+        second = refresh_sqlite(db, usage)
+        assert second['changed_sessions'] == 2 and second['recomputed_days'] == 2
+
+        with sqlite3.connect(db) as conn:
+            stored = pd.read_sql_query("SELECT * FROM study_statistics", conn)
+            correlation = pd.read_sql_query("SELECT * FROM study_screen_correlation", conn)
+            all_sessions = pd.read_sql_query("SELECT * FROM study_sessions", conn)
+        full = compute_statistics(all_sessions)
+        stored = stored[full.columns].sort_values(['user_id', 'subject_id', 'stat_date']).reset_index(drop=True)
+        pd.testing.assert_frame_equal(stored, full.reset_index(drop=True), check_dtype=False)
+        assert stored.loc[stored['stat_date'] == '2025-10-07', 'total_study_minutes'].tolist() == [15]
+
+        expected = correlate_with_screen_time(daily_study_minutes(full), daily_screen_minutes(usage))
+        assert list(correlation['user_id']) == [1]
+        assert abs(correlation['correlation'].iloc[0] - expected['correlation'].iloc[0]) < 1e-9
+
+
+if __name__ == "__main__":
+    test_full_rollup_and_screen_time_correlation()
+    test_screen_minutes_sum_hourly_rows()
+    test_sessions_without_pause_count()
+    test_incremental_sqlite_refresh_matches_full_recompute()
+    print("✅ Study rollup tests passed!")
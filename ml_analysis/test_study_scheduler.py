@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Quick test of the study scheduler
+"""
+
+import os
+import sys
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from study_scheduler import (MAX_DAILY_STUDY_HOURS, SCHEDULE_COLUMNS, distraction_forecast, plan_coverage,
+                             schedule_week)
+
+START = date(2025, 11, 3)
+
+
+def _usage(users, evening_hours=range(18, 23), peak_minutes=50):
+    """Three weeks of hourly usage with an evening phone peak"""
+    rows = []
+    for user in users:
+        for day in pd.date_range('2025-10-13', '2025-11-02'):
+            for hour in range(24):
+                minutes = peak_minutes if hour in evening_hours else 5 if 8 <= hour < 18 else 0
+                rows.append((user, day.strftime('%Y-%m-%d'), hour, minutes * 60_000))
+    return pd.DataFrame(rows, columns=['userId', 'date', 'hour', 'totalScreenTime'])
+
+
+def _plans():
+    return pd.DataFrame({
+        'plan_id': [1, 2, 3, 4, 5],
+        'user_id': [10, 10, 10, 11, 11],
+        'subject_code': ['CS101', 'MA201', 'PH101', 'CS101', 'CS202'],
+        'target_daily_hours': [2.0, 1.5, 1.0, 3.0, 1.0],
+        'target_weekly_hours': [10.0, 7.0, 3.0, 14.0, 5.0],
+        'priority': ['High', 'Medium', 'Low', 'High', 'Medium'],
+        'status': ['active', 'active', 'active', 'active', 'paused'],
+    })
+
+
+def test_schedule_meets_targets_and_avoids_distraction_peaks():
+    usage = _usage([10, 11])
+    plans = _plans()
+    schedule = schedule_week(plans, usage, START)
+    assert list(schedule.columns) == SCHEDULE_COLUMNS
+    assert 5 not in schedule['plan_id'].tolist()  # paused plan
+
+    # Enough quiet hours exist, so every weekly target is met and no block touches the evening peak
+    coverage = plan_coverage(plans, schedule).set_index('plan_id')
+    assert np.allclose(coverage['scheduled_hours'], coverage['target_weekly_hours'])
+    start_hour = schedule['start_time'].str[:2].astype(int)
+    end_minutes = start_hour * 60 + schedule['start_time'].str[3:].astype(int) + schedule['duration_minutes']
+    assert (end_minutes <= 18 * 60).all()
+    # Quiet early-morning hours are preferred over the 5-minute daytime hours
+    assert (start_hour < 8).mean() > 0.5
+
+    per_day = schedule.groupby(['plan_id', 'date'])['duration_minutes'].sum()
+    daily_cap = plans.set_index('plan_id')['target_daily_hours'] * 60
+    assert (per_day <= daily_cap.reindex(per_day.index.get_level_values(0)).to_numpy()).all()
+    assert (schedule.groupby(['user_id', 'date'])['duration_minutes'].sum() <= MAX_DAILY_STUDY_HOURS * 60).all()
+    assert (schedule['duration_minutes'] % 15 == 0).all()
+
+    # Batching students into one LP does not change anyone's schedule
+    one_by_one = schedule_week(plans, usage, START, batch_size=1)
+    pd.testing.assert_frame_equal(schedule, one_by_one)
+
+
+def test_low_priority_skips_busy_slots_and_greedy_fallback():
+    # 35 minutes of phone use every hour: only the High plan is worth it
+    usage = _usage([10], evening_hours=range(24), peak_minutes=35)
+    plans = _plans()[lambda df: df['user_id'] == 10]
+    forecast = distraction_forecast(usage, np.array([10]), START)
+    assert forecast.shape == (1, 7, 17) and np.allclose(forecast, 35 / 60)
+
+    schedule = schedule_week(plans, usage, START)
+    assert set(schedule['plan_id']) == {1}
+    greedy = schedule_week(plans, usage, START, solver='greedy')
+    assert greedy['duration_minutes'].sum() == schedule['duration_minutes'].sum()
+
+    # No usage history: flat distraction, targets met in priority order
+    fresh = schedule_week(plans, None, START)
+    assert plan_coverage(plans, fresh)['scheduled_hours'].tolist() == [10.0, 7.0, 3.0]
+    assert schedule_week(plans.assign(status='completed'), usage, START).empty
+
+
+if __name__ == "__main__":
+    test_schedule_meets_targets_and_avoids_distraction_peaks()
+    test_low_priority_skips_busy_slots_and_greedy_fallback()
+    print("✅ Study scheduler tests passed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Quick test of the HabitGuard per-user usage history
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from analysis_core import parse_usage_csv
+from usage_history import UsageHistoryStore
+from usage_predictor import generate_sample_csv_data
+
+
+def _split(csv, first_days):
+    header, *rows = csv.strip().split('\n')
+    return header + '\n' + '\n'.join(rows[:first_days]) + '\n', header, rows
+
+
+def test_delta_ingest_matches_full_upload():
+    csv = generate_sample_csv_data(days=30)
+    first, header, rows = _split(csv, 20)
+    store = UsageHistoryStore()
+
+    result = store.ingest('u1', first)
+    assert result['accepted'] == 20 and result['days'] == 20 and not result['resync']
+    watermark = result['watermark']
+    assert watermark == rows[19].split(',')[0]
+
+    # Client re-sends the watermark day (possibly updated) plus the new days
+    delta = header + '\n' + '\n'.join(rows[19:]) + '\n'
+    result = store.ingest('u1', delta, watermark)
+    assert result['accepted'] == 11 and result['days'] == 30 and result['revision'] == 2
+    assert result['watermark'] == rows[-1].split(',')[0]
+
+    # Stored history analyzes like the full upload
+    stored = parse_usage_csv(csv_content=store.history_csv('u1', days=None)).df
+    full = parse_usage_csv(csv_content=csv).df
+    pd.testing.assert_series_equal(stored['screenTimeHours'].reset_index(drop=True),
+                                   full['screenTimeHours'].reset_index(drop=True))
+    assert stored['isWeekend'].tolist() == full['isWeekend'].tolist()
+    assert len(store.history('u1', days=7)) == 7
+    assert store.history('u2').empty and store.history_csv('u2') == ''
+
+
+def test_dedup_watermark_and_resync():
+    header = 'date,hour,totalScreenTime,topAppPackage,topAppTime,appCount,dayOfWeek,isWeekend'
+    store = UsageHistoryStore()
+    store.ingest('u1', f"{header}\n2026-03-02,9,1000,a,10,3,1,false\n2026-03-03,9,2000,a,10,3,2,false\n")
+
+    # Last row of a day wins, rows before the watermark and bad rows are dropped
+    result = store.ingest('u1', f"{header}\n2026-03-01,9,999,a,10,3,0,true\n"
+                                f"2026-03-03,9,2500,a,10,3,2,false\n2026-03-03,9,3000,a,10,3,2,false\n"
+                                f"2026-03-04,9,oops,a,10,3,3,false\n", '2026-03-03')
+    assert (result['accepted'], result['skipped'], result['invalid'], result['days']) == (1, 1, 1, 2)
+    assert store.history('u1')['totalScreenTime'].tolist() == [1000, 3000]
+
+    # Empty delta is a no-op
+    assert store.ingest('u1', '', '2026-03-03')['revision'] == result['revision']
+
+    # Client ahead of the server: nothing merged, resend from the stored watermark
+    result = store.ingest('u1', f"{header}\n2026-03-09,9,1,a,1,1,1,false\n", '2026-03-08')
+    assert result['resync'] and result['watermark'] == '2026-03-03' and result['days'] == 2
+    assert store.ingest('u9', f"{header}\n2026-03-09,9,1,a,1,1,1,false\n", '2026-03-08')['resync']
+
+    try:
+        store.ingest('u1', 'date,foo\n2026-03-01,1\n')
+        assert False, 'missing columns accepted'
+    except ValueError:
+        pass
+
+
+def test_persists_across_reopen():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data', 'history.db')
+        store = UsageHistoryStore(path)
+        store.ingest('u1', generate_sample_csv_data(days=5))
+        state = store.state('u1')
+        store.close()
+
+        reopened = UsageHistoryStore(path)
+        assert reopened.state('u1') == state
+        reopened.delete_user('u1')
+        assert reopened.state('u1')['days'] == 0
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_delta_ingest_matches_full_upload()
+    test_dedup_watermark_and_resync()
+    test_persists_across_reopen()
+    print("✅ Usage history tests passed!")
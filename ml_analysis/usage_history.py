@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Usage History
+========================
+
+Persisted per-user usage history fed by delta uploads, so the app no longer
+re-sends its whole history with every analysis request.
+
+- SQLite file (``data/usage_history.db``) keyed by (user, date): one row per
+  day, later uploads of a day replace earlier ones
+- Each user has a watermark, the newest stored date. The client sends only
+  rows dated on or after it (that day may still have been in progress) and
+  gets the new watermark back
+- Ingest cost is proportional to the uploaded rows: they are parsed with the
+  csv module and upserted in one transaction; of the stored history only
+  the re-sent days are looked at
+- A client watermark newer than the stored one means rows are missing on the
+  server (e.g. a fresh database); nothing is merged and the client is told to
+  resync from the stored watermark
+- Analysis reads a bounded recent window (``ANALYSIS_WINDOW_DAYS``) straight
+  from the primary key range, so analyzer work does not grow with account age
+
+Usage:
+    python usage_history.py --db data/usage_history.db --user u1 --ingest delta.csv
+    python usage_history.py --db data/usage_history.db --user u1 --show
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from analysis_core import REQUIRED_COLUMNS
+
+DEFAULT_HISTORY_PATH = os.path.join('data', 'usage_history.db')
+ANALYSIS_WINDOW_DAYS = 90
+
+# Column order of MLAnalysisService.convertToCSV
+HISTORY_COLUMNS = ['date', 'hour', 'totalScreenTime', 'topAppPackage', 'topAppTime',
+                   'appCount', 'dayOfWeek', 'isWeekend']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_days (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    hour INTEGER,
+    totalScreenTime REAL NOT NULL,
+    topAppPackage TEXT,
+    topAppTime REAL,
+    appCount REAL NOT NULL,
+    dayOfWeek INTEGER NOT NULL,
+    isWeekend INTEGER NOT NULL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_watermarks (
+    user_id TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    days INTEGER NOT NULL
+);
+"""
+
+_TRUE_STRINGS = {'true', '1', 'yes', 't'}
+
+
+def _parse_date(value: Optional[str]) -> Optional[str]:
+    """ISO date (YYYY-MM-DD) of a date or timestamp string, or None if unparseable"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def _parse_rows(csv_content: str) -> Tuple[Dict[str, Tuple], int]:
+    """
+    Parse uploaded CSV rows into {date: record}; the last row of a day wins
+
+    Returns:
+        Tuple: (records by date, number of unusable rows)
+
+    Raises:
+        ValueError: required columns are missing
+    """
+    reader = csv.DictReader(StringIO(csv_content))
+    if reader.fieldnames is None:
+        # Nothing new since the last upload
+        return {}, 0
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in (reader.fieldnames or [])]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    records: Dict[str, Tuple] = {}
+    invalid = 0
+    for row in reader:
+        day = _parse_date(row.get('date'))
+        total = _parse_number(row.get('totalScreenTime'))
+        app_count = _parse_number(row.get('appCount'))
+        day_of_week = _parse_number(row.get('dayOfWeek'))
+        # Same rows analysis_core drops, plus undated ones that cannot be keyed
+        if day is None or total is None or app_count is None or day_of_week is None:
+            invalid += 1
+            continue
+        hour = _parse_number(row.get('hour'))
+        records[day] = (
+            day,
+            int(hour) if hour is not None else None,
+            total,
+            row.get('topAppPackage') or None,
+            _parse_number(row.get('topAppTime')),
+            app_count,
+            int(day_of_week),
+            int(str(row.get('isWeekend', '')).strip().lower() in _TRUE_STRINGS),
+        )
+    return records, invalid
+
+
+class UsageHistoryStore:
+    """SQLite-backed per-user daily usage history with delta ingestion"""
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def ingest(self, user_id: str, csv_content: str, watermark: Optional[str] = None) -> Dict:
+        """
+        Merge uploaded rows dated on or after the client's watermark
+
+        Args:
+            user_id: Owner of the rows
+            csv_content: CSV in the app's format, ideally only the new rows
+            watermark: Watermark the client got from its previous upload
+                (None for a first upload)
+
+        Returns:
+            Dict: new watermark, revision, accepted/skipped/invalid row counts,
+            stored day count and a resync flag
+
+        Raises:
+            ValueError: required columns are missing or the watermark is not a date
+        """
+        client_watermark = None
+        if watermark:
+            client_watermark = _parse_date(watermark)
+            if client_watermark is None:
+                raise ValueError(f"Invalid watermark: {watermark}")
+
+        records, invalid = _parse_rows(csv_content)
+        fresh = [record for day, record in records.items()
+                 if client_watermark is None or day >= client_watermark]
+        skipped = len(records) - len(fresh)
+
+        with self._lock, self._conn:
+            state = self._state(user_id)
+            if client_watermark is not None and (state is None or client_watermark > state[0]):
+                # Client believes the server holds days it does not have
+                return self._result(user_id, state, 0, len(records), invalid, resync=True)
+            if fresh:
+                days = (state[2] if state is not None else 0) + self._new_days(user_id, fresh)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO usage_days (user_id, date, hour, totalScreenTime, topAppPackage, "
+                    "topAppTime, appCount, dayOfWeek, isWeekend) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(user_id,) + record for record in fresh]
+                )
+                newest = max(record[0] for record in fresh)
+                if state is not None:
+                    newest = max(newest, state[0])
+                revision = state[1] + 1 if state is not None else 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_watermarks (user_id, watermark, revision, days) VALUES (?, ?, ?, ?)",
+                    (user_id, newest, revision, days)
+                )
+                state = (newest, revision, days)
+        return self._result(user_id, state, len(fresh), skipped, invalid)
+
+    def _new_days(self, user_id: str, fresh: List[Tuple]) -> int:
+        """Uploaded days not stored yet; only the re-sent range is scanned"""
+        stored = {day for (day,) in self._conn.execute(
+            "SELECT date FROM usage_days WHERE user_id = ? AND date >= ?",
+            (user_id, min(record[0] for record in fresh))
+        )}
+        return sum(record[0] not in stored for record in fresh)
+
+    def _state(self, user_id: str) -> Optional[Tuple[str, int, int]]:
+        return self._conn.execute(
+            "SELECT watermark, revision, days FROM user_watermarks WHERE user_id = ?", (user_id,)
+        ).fetchone()
+
+    @staticmethod
+    def _result(user_id: str, state: Optional[Tuple], accepted: int, skipped: int, invalid: int,
+                resync: bool = False) -> Dict:
+        return {
+            "userId": user_id,
+            "watermark": state[0] if state is not None else None,
+            "revision": state[1] if state is not None else 0,
+            "days": state[2] if state is not None else 0,
+            "accepted": accepted,
+            "skipped": skipped,
+            "invalid": invalid,
+            "resync": resync,
+        }
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def state(self, user_id: str) -> Dict:
+        """Watermark, revision and stored day count for a user"""
+        with self._lock:
+            return self._result(user_id, self._state(user_id), 0, 0, 0)
+
+    def _window_rows(self, user_id: str, days: Optional[int]) -> List[Tuple]:
+        with self._lock:
+            state = self._state(user_id)
+            if state is None:
+                return []
+            since = '0000-00-00'
+            if days is not None:
+                since = (date.fromisoformat(state[0]) - timedelta(days=days - 1)).isoformat()
+            return self._conn.execute(
+                "SELECT date, hour, totalScreenTime, topAppPackage, topAppTime, appCount, dayOfWeek, isWeekend "
+                "FROM usage_days WHERE user_id = ? AND date >= ? ORDER BY date",
+                (user_id, since)
+            ).fetchall()
+
+    def history(self, user_id: str, days: Optional[int] = ANALYSIS_WINDOW_DAYS) -> pd.DataFrame:
+        """
+        Stored rows of the last `days` days up to the watermark (all rows if None)
+
+        Returns:
+            pd.DataFrame: rows in the app's CSV columns, oldest first
+        """
+        frame = pd.DataFrame(self._window_rows(user_id, days), columns=HISTORY_COLUMNS)
+        frame['isWeekend'] = frame['isWeekend'].astype(bool)
+        return frame
+
+    def history_csv(self, user_id: str, days: Optional[int] = ANALYSIS_WINDOW_DAYS) -> str:
+        """Stored window as CSV in the app's format (empty string for an unknown user)"""
+        rows = self._window_rows(user_id, days)
+        if not rows:
+            return ''
+        out = StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(HISTORY_COLUMNS)
+        writer.writerows(row[:-1] + ('true' if row[-1] else 'false',) for row in rows)
+        return out.getvalue()
+
+    def delete_user(self, user_id: str) -> None:
+        """Drop a user's history and watermark"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM usage_days WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM user_watermarks WHERE user_id = ?", (user_id,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📥 HabitGuard usage history')
+    parser.add_argument('--db', type=str, default=DEFAULT_HISTORY_PATH, help='History database')
+    parser.add_argument('--user', type=str, required=True, help='User id')
+    parser.add_argument('--ingest', type=str, default=None, help='CSV file of new rows to merge')
+    parser.add_argument('--watermark', type=str, default=None, help='Watermark from the previous upload')
+    parser.add_argument('--show', action='store_true', help='Print the stored analysis window')
+    args = parser.parse_args()
+
+    store = UsageHistoryStore(args.db)
+    try:
+        if args.ingest:
+            with open(args.ingest) as f:
+                result = store.ingest(args.user, f.read(), args.watermark)
+            if result['resync']:
+                print(f"⚠️ Server history ends at {result['watermark']}, resend rows from there")
+            else:
+                print(f"✅ Merged {result['accepted']} rows ({result['skipped']} before watermark, "
+                      f"{result['invalid']} invalid); watermark {result['watermark']}")
+        if args.show:
+            print(store.history(args.user).to_string(index=False))
+        state = store.state(args.user)
+        print(f"📊 {state['days']} days stored, watermark {state['watermark']}, revision {state['revision']}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -28,13 +28,9 @@ Usage:
 
 import pandas as pd
 import numpy as np
-import json
-import sys
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
-import warnings
-warnings.filterwarnings('ignore')
+from datetime import datetime
+from typing import BinaryIO, Dict, Optional, TextIO, Union
 
 # Try to import ML libraries
 try:
@@ -45,48 +41,41 @@ except ImportError:
     print("⚠️  TensorFlow not installed. Install with: pip install tensorflow")
     TF_AVAILABLE = False
 
-try:
-    from sklearn.linear_model import LinearRegression
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import mean_absolute_error, r2_score
-    SKLEARN_AVAILABLE = True
-except ImportError:
+# Pattern analysis lives in the stateless core; ANALYZER_VERSION is re-exported for the result cache
+from analysis_core import ANALYZER_VERSION, SKLEARN_AVAILABLE, AnalysisService, UsageDataset, parse_usage_csv
+if not SKLEARN_AVAILABLE:
     print("⚠️  scikit-learn not installed. Install with: pip install scikit-learn pandas numpy")
-    SKLEARN_AVAILABLE = False
 
-# Try to import PDF generation libraries
-try:
-    from reportlab.lib.pagesizes import letter  # type: ignore
-    from reportlab.lib import colors  # type: ignore
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle  # type: ignore
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak  # type: ignore
-    from reportlab.lib.units import inch  # type: ignore
-    PDF_AVAILABLE = True
-except ImportError:
+from category_index import get_default_index
+from feature_pipeline import FEATURE_NAMES, build_category_features
+from serialization import dumps
+from shared_artifacts import get_shared_network, student_thresholds
+
+# PDF generation libraries are imported once by the shared report renderer
+from report_renderer import (
+    PDF_AVAILABLE, behavior_label, unique_report_path, write_report_file,
+    write_pdf_report, write_txt_report
+)
+if not PDF_AVAILABLE:
     print("⚠️  reportlab not installed. Install with: pip install reportlab")
-    PDF_AVAILABLE = False
+
+# Categories whose apps are suggested for blocking in student mode
+STUDENT_BLOCKED_CATEGORIES = ('social_media', 'gaming')
 
 
 class NeuralUsagePredictor:
     """Neural Network-based usage predictor using TensorFlow"""
     
-    def __init__(self, model_path='models/usage_nn_model.h5'):
+    def __init__(self, model_path='models/usage_nn_model.h5', registry=None, network=None):
         self.model_path = model_path
         self.model = None
-        self.feature_names = [
-            'social_media_hours',
-            'entertainment_hours', 
-            'productivity_hours',
-            'communication_hours',
-            'gaming_hours',
-            'browsing_hours',
-            'education_hours',
-            'shopping_hours',
-            'news_hours',
-            'other_hours'
-        ]
+        # Optional ModelRegistry: when set, the warm registry copy is used instead of lazy loading
+        self.registry = registry
+        # Optional shared_artifacts.DenseNetwork: NumPy inference without TensorFlow
+        self.network = network
+        self.model_name = os.path.splitext(os.path.basename(model_path))[0]
+        # social_media_hours ... other_hours, shared with the category feature pipeline
+        self.feature_names = list(FEATURE_NAMES)
         self.class_names = ['No Change ✅', 'Reduce Usage ⚠️', 'Take More Breaks 🌟']
         
     def build_model(self, input_shape=10):
@@ -142,8 +131,14 @@ class NeuralUsagePredictor:
         """Save trained model to disk"""
         if not TF_AVAILABLE or self.model is None:
             return
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        self.model.save(self.model_path)
+        model_dir = os.path.dirname(self.model_path)
+        os.makedirs(model_dir or '.', exist_ok=True)
+        # Write to a hidden temp file first so a watching ModelRegistry never sees a partial model
+        filename = os.path.basename(self.model_path)
+        stem, ext = os.path.splitext(filename)
+        tmp_path = os.path.join(model_dir, f".{stem}.tmp{ext}")
+        self.model.save(tmp_path)
+        os.replace(tmp_path, self.model_path)
         print(f"💾 Model saved to {self.model_path}")
     
     def load_model(self):
@@ -166,14 +161,14 @@ class NeuralUsagePredictor:
         Returns:
             dict with prediction details
         """
-        if not TF_AVAILABLE:
-            return {"error": "TensorFlow not available"}
-            
-        if self.model is None:
-            if not self.load_model():
-                # Try to create and train a basic model
-                print("⚠️ No trained model found. Using baseline predictions.")
-                return self._baseline_prediction(usage_data)
+        # Hold one reference for the whole request so a hot swap can't change it mid-prediction
+        model = self._resolve_model()
+        if model is None:
+            if not TF_AVAILABLE:
+                return {"error": "TensorFlow not available"}
+            # Try to create and train a basic model
+            print("⚠️ No trained model found. Using baseline predictions.")
+            return self._baseline_prediction(usage_data)
         
         # Convert dict to array if needed
         if isinstance(usage_data, dict):
@@ -185,7 +180,7 @@ class NeuralUsagePredictor:
             usage_array = np.array([usage_data])
         
         # Make prediction
-        predictions = self.model.predict(usage_array, verbose=0)
+        predictions = model.predict(usage_array, verbose=0)
         predicted_class = np.argmax(predictions[0])
         confidence = float(predictions[0][predicted_class])
         
@@ -208,6 +203,51 @@ class NeuralUsagePredictor:
             'timestamp': datetime.now().isoformat()
         }
     
+    def predict_batch(self, features: np.ndarray, batch_size: int = 1024) -> Dict:
+        """
+        Predict suggestion classes for many users at once
+        
+        Args:
+            features: (N, 10) category hours matrix in feature_names order,
+                      e.g. feature_pipeline.build_category_features(df).matrix
+        
+        Returns:
+            dict with prediction_class (N,), confidence (N,) and probabilities (N, 3) arrays
+        """
+        features = np.asarray(features, dtype=np.float32)
+        model = self._resolve_model()
+        
+        if model is not None:
+            probabilities = model.predict(features, batch_size=batch_size, verbose=0)
+            note = None
+        else:
+            # Same rules as _baseline_prediction, applied to every row
+            total_hours = features.sum(axis=1)
+            baseline_class = np.where(total_hours < 4, 0, np.where(total_hours < 8, 2, 1))
+            probabilities = np.zeros((len(features), 3), dtype=np.float32)
+            probabilities[np.arange(len(features)), baseline_class] = 0.7
+            note = 'Using baseline prediction (ML model not available)'
+        
+        predicted_class = probabilities.argmax(axis=1)
+        result = {
+            'prediction_class': predicted_class,
+            'class_names': [self.class_names[c] for c in predicted_class],
+            'confidence': probabilities[np.arange(len(features)), predicted_class],
+            'probabilities': probabilities
+        }
+        if note:
+            result['note'] = note
+        return result
+    
+    def _resolve_model(self):
+        """Registry copy, else the Keras model on disk, else a NumPy network from shared artifacts"""
+        model = self.registry.get_model(self.model_name) if self.registry is not None else None
+        if model is not None:
+            return model
+        if TF_AVAILABLE and (self.model is not None or self.load_model()):
+            return self.model
+        return self.network or get_shared_network()
+    
     def _baseline_prediction(self, usage_data):
         """Fallback prediction without ML model"""
         if isinstance(usage_data, dict):
@@ -286,13 +326,15 @@ class NeuralUsagePredictor:
         
         return suggestions[predicted_class]
     
-    def check_student_restrictions(self, usage_data, is_student=True):
+    def check_student_restrictions(self, usage_data, is_student=True, app_packages=None):
         """
         Check if student is overusing social media and provide restrictions
         
         Args:
             usage_data: dict with usage hours by category
             is_student: boolean indicating if user is a student
+            app_packages: optional package ids the student actually uses;
+                those in violated categories are suggested first
         
         Returns:
             dict with restriction recommendations
@@ -300,13 +342,8 @@ class NeuralUsagePredictor:
         if not is_student:
             return {'restricted': False, 'message': 'Not in student mode'}
         
-        # Student-specific thresholds (hours per day)
-        thresholds = {
-            'social_media_hours': 2.0,  # Max 2 hours
-            'entertainment_hours': 3.0,  # Max 3 hours
-            'gaming_hours': 1.5,         # Max 1.5 hours
-            'browsing_hours': 2.0        # Max 2 hours
-        }
+        # Student-specific thresholds (hours per day), from shared artifacts when attached
+        thresholds = student_thresholds()
         
         violations = []
         recommendations = []
@@ -317,6 +354,7 @@ class NeuralUsagePredictor:
                 excess = actual - limit
                 violations.append({
                     'category': category.replace('_', ' ').title(),
+                    'category_key': category.replace('_hours', ''),
                     'actual': round(actual, 2),
                     'limit': limit,
                     'excess': round(excess, 2),
@@ -339,7 +377,7 @@ class NeuralUsagePredictor:
                     'Set up bedtime restrictions (10 PM - 7 AM)',
                     'Request parent/guardian monitoring if under 18'
                 ],
-                'blocked_apps': self._get_student_blocked_apps(violations)
+                'blocked_apps': self._get_student_blocked_apps(violations, app_packages)
             }
         else:
             return {
@@ -349,25 +387,22 @@ class NeuralUsagePredictor:
                 'productivity_score': self._calculate_productivity_score(usage_data)
             }
     
-    def _get_student_blocked_apps(self, violations):
+    def _get_student_blocked_apps(self, violations, app_packages=None):
         """Get list of apps that should be blocked for students"""
-        blocked = []
-        social_media_apps = [
-            'Instagram', 'TikTok', 'Snapchat', 'Facebook', 
-            'Twitter/X', 'BeReal', 'Discord (non-educational)'
-        ]
-        gaming_apps = [
-            'Mobile Games', 'PUBG', 'Free Fire', 'Candy Crush',
-            'Roblox', 'Minecraft (except educational)'
+        index = get_default_index()
+        blocked_categories = [
+            v['category_key'] for v in violations if v['category_key'] in STUDENT_BLOCKED_CATEGORIES
         ]
         
-        for v in violations:
-            if 'social media' in v['category'].lower():
-                blocked.extend(social_media_apps)
-            elif 'gaming' in v['category'].lower():
-                blocked.extend(gaming_apps)
+        blocked = []
+        # The student's own apps in a violated category come first
+        for package in app_packages or []:
+            if index.category(package) in blocked_categories:
+                blocked.append(index.label(package))
+        for category in blocked_categories:
+            blocked.extend(index.labels_for(category))
         
-        return list(set(blocked))[:10]  # Return unique, max 10
+        return list(dict.fromkeys(blocked))[:10]  # Return unique, max 10
     
     def _calculate_productivity_score(self, usage_data):
         """Calculate productivity score for students"""
@@ -382,552 +417,65 @@ class NeuralUsagePredictor:
 
 
 class HabitGuardMLAnalyzer:
-    """ML Analyzer for mobile usage patterns"""
+    """ML Analyzer for mobile usage patterns (stateful wrapper over ``analysis_core``)"""
     
-    def __init__(self):
+    def __init__(self, registry=None, models_dir: str = 'models'):
         self.df: Optional[pd.DataFrame] = None
-        self.scaler = StandardScaler() if SKLEARN_AVAILABLE else None
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42) if SKLEARN_AVAILABLE else None
+        self.dataset: Optional[UsageDataset] = None
+        self.service = AnalysisService(registry=registry, models_dir=models_dir)
         
     def load_csv_data(self, csv_content: str = None, csv_file: str = None) -> bool:
         """Load usage data from CSV content or file"""
         try:
-            if csv_content:
-                # Load from string content (from React Native app)
-                from io import StringIO
-                self.df = pd.read_csv(StringIO(csv_content))
-                print("✅ Loaded data from CSV content")
-            elif csv_file and os.path.exists(csv_file):
-                # Load from file
-                self.df = pd.read_csv(csv_file)
-                print(f"✅ Loaded data from {csv_file}")
-            else:
-                print("❌ No valid CSV data provided")
-                return False
-                
-            # Validate required columns
-            required_cols = ['date', 'totalScreenTime', 'appCount', 'dayOfWeek', 'isWeekend']
-            missing_cols = [col for col in required_cols if col not in self.df.columns]
-            
-            if missing_cols:
-                print(f"❌ Missing required columns: {missing_cols}")
-                return False
-                
-            # Convert data types
-            self.df['date'] = pd.to_datetime(self.df['date'])
-            self.df['totalScreenTime'] = pd.to_numeric(self.df['totalScreenTime'], errors='coerce')
-            self.df['appCount'] = pd.to_numeric(self.df['appCount'], errors='coerce')
-            self.df['isWeekend'] = self.df['isWeekend'].astype(bool)
-            
-            # Remove rows with invalid data
-            self.df = self.df.dropna(subset=['totalScreenTime', 'appCount'])
-            
-            print(f"📊 Dataset loaded: {len(self.df)} records from {self.df['date'].min()} to {self.df['date'].max()}")
-            return True
-            
+            self.dataset = parse_usage_csv(csv_content=csv_content, csv_file=csv_file)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
         except Exception as e:
             print(f"❌ Error loading CSV data: {e}")
             return False
+            
+        self.df = self.dataset.df
+        print("✅ Loaded data from CSV content" if csv_content else f"✅ Loaded data from {csv_file}")
+        print(f"📊 Dataset loaded: {len(self.df)} records from {self.df['date'].min()} to {self.df['date'].max()}")
+        return True
     
     def analyze_patterns(self) -> Dict:
         """Analyze usage patterns and generate insights"""
-        if self.df is None or len(self.df) == 0:
+        if self.dataset is None:
             return {"error": "No data available for analysis"}
-            
-        try:
-            # Convert screen time from milliseconds to hours
-            self.df['screenTimeHours'] = self.df['totalScreenTime'] / (1000 * 60 * 60)
-            
-            analysis = {
-                "summary": {
-                    "totalDays": len(self.df),
-                    "avgDailyScreenTime": float(self.df['screenTimeHours'].mean()),
-                    "maxDailyScreenTime": float(self.df['screenTimeHours'].max()),
-                    "minDailyScreenTime": float(self.df['screenTimeHours'].min()),
-                    "avgAppsPerDay": float(self.df['appCount'].mean()),
-                    "totalScreenTimeHours": float(self.df['screenTimeHours'].sum())
-                },
-                "patterns": {
-                    "weekdayVsWeekend": {
-                        "weekday": float(self.df[~self.df['isWeekend']]['screenTimeHours'].mean()),
-                        "weekend": float(self.df[self.df['isWeekend']]['screenTimeHours'].mean())
-                    },
-                    "dailyAverages": {},
-                    "trends": self._calculate_trends(),
-                    "behaviorClassification": self._classify_behavior()
-                },
-                "predictions": {},
-                "recommendations": []
-            }
-            
-            # Daily averages by day of week
-            day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-            for day in range(7):
-                day_data = self.df[self.df['dayOfWeek'] == day]['screenTimeHours']
-                if len(day_data) > 0:
-                    analysis["patterns"]["dailyAverages"][day_names[day]] = float(day_data.mean())
-            
-            # Generate ML predictions if possible
-            if SKLEARN_AVAILABLE and len(self.df) >= 7:
-                analysis["predictions"] = self._generate_predictions()
-            
-            # Generate recommendations
-            analysis["recommendations"] = self._generate_recommendations(analysis)
-            
-            return analysis
-            
-        except Exception as e:
-            return {"error": f"Analysis failed: {e}"}
+        return self.service.analyze(self.dataset)
     
-    def _calculate_risk_level(self, avg_hours: float, consistency: float) -> str:
-        """Calculate overall risk level for mental health impact"""
-        # Risk scoring based on research:
-        # - >6h daily associated with depression/anxiety
-        # - High inconsistency indicates compulsive behavior
-        # - Combined factors increase risk
-        
-        risk_score = 0
-        
-        # Hours contribution (0-5 points)
-        if avg_hours < 3:
-            risk_score += 0
-        elif avg_hours < 5:
-            risk_score += 1
-        elif avg_hours < 7:
-            risk_score += 3
-        else:
-            risk_score += 5
-        
-        # Consistency contribution (0-3 points)
-        if consistency > 0.6:
-            risk_score += 3
-        elif consistency > 0.4:
-            risk_score += 2
-        elif consistency > 0.2:
-            risk_score += 1
-        
-        # Risk classification
-        if risk_score <= 1:
-            return "low"
-        elif risk_score <= 3:
-            return "moderate"
-        elif risk_score <= 5:
-            return "high"
-        else:
-            return "critical"
-    
-    def _calculate_trends(self) -> Dict:
-        """Calculate usage trends over time"""
-        try:
-            if len(self.df) < 3:
-                return {"trend": "insufficient_data"}
-                
-            # Sort by date and calculate rolling average
-            df_sorted = self.df.sort_values('date').copy()
-            df_sorted['rolling_avg'] = df_sorted['screenTimeHours'].rolling(window=3, min_periods=1).mean()
-            
-            # Calculate trend (simple linear regression on time)
-            x = np.arange(len(df_sorted)).reshape(-1, 1)
-            y = df_sorted['screenTimeHours'].values
-            
-            if SKLEARN_AVAILABLE:
-                trend_model = LinearRegression().fit(x, y)
-                slope = trend_model.coef_[0]
-                
-                if slope > 0.1:
-                    trend = "increasing"
-                elif slope < -0.1:
-                    trend = "decreasing"
-                else:
-                    trend = "stable"
-            else:
-                # Simple trend calculation without sklearn
-                first_half = df_sorted['screenTimeHours'].iloc[:len(df_sorted)//2].mean()
-                second_half = df_sorted['screenTimeHours'].iloc[len(df_sorted)//2:].mean()
-                
-                if second_half > first_half * 1.1:
-                    trend = "increasing"
-                elif second_half < first_half * 0.9:
-                    trend = "decreasing"
-                else:
-                    trend = "stable"
-            
-            return {
-                "trend": trend,
-                "recent_avg": float(df_sorted['screenTimeHours'].tail(7).mean()) if len(df_sorted) >= 7 else float(df_sorted['screenTimeHours'].mean()),
-                "overall_avg": float(df_sorted['screenTimeHours'].mean())
-            }
-            
-        except Exception as e:
-            return {"trend": "error", "message": str(e)}
-    
-    def _classify_behavior(self) -> Dict:
-        """Classify user behavior pattern with detailed insights"""
-        if self.df is None or len(self.df) == 0:
-            return {"category": "unknown", "severity": "low", "action": "insufficient_data"}
-            
-        avg_hours = self.df['screenTimeHours'].mean()
-        std_hours = self.df['screenTimeHours'].std()
-        max_hours = self.df['screenTimeHours'].max()
-        
-        # Calculate consistency score (lower is better)
-        consistency = (std_hours / avg_hours) if avg_hours > 0 else 1
-        
-        # Classify based on average with more nuanced categories
-        category = ""
-        severity = ""
-        action = ""
-        message = ""
-        
-        if avg_hours < 2:
-            category = "light_user"
-            severity = "low"
-            action = "maintain"
-            message = "Excellent digital wellness! Keep up the healthy habits."
-        elif avg_hours < 4:
-            category = "moderate_user"
-            severity = "low"
-            action = "monitor"
-            message = "Good balance. Stay mindful of your usage patterns."
-        elif avg_hours < 6:
-            category = "heavy_user"
-            severity = "medium"
-            action = "reduce"
-            message = "Consider setting app time limits and taking regular breaks."
-        elif avg_hours < 8:
-            category = "very_heavy_user"
-            severity = "high"
-            action = "immediate_action"
-            message = "High screen time detected. Set strict limits and establish phone-free zones."
-        else:
-            category = "excessive_user"
-            severity = "critical"
-            action = "urgent_intervention"
-            message = "Critical screen time levels. Seek support and implement digital detox strategies."
-        
-        # Adjust severity based on consistency
-        if consistency > 0.5 and severity in ["medium", "high"]:
-            severity = "critical"
-            message += " Highly inconsistent usage patterns detected - this may indicate compulsive behavior."
-        
-        return {
-            "category": category,
-            "severity": severity,
-            "action": action,
-            "message": message,
-            "avg_hours": float(avg_hours),
-            "max_hours": float(max_hours),
-            "consistency_score": float(consistency),
-            "risk_level": self._calculate_risk_level(avg_hours, consistency)
-        }
-    
-    def _generate_predictions(self) -> Dict:
-        """Generate ML-based predictions"""
-        if not SKLEARN_AVAILABLE or self.df is None or len(self.df) < 7:
-            return {"error": "Insufficient data or ML libraries not available"}
-            
-        try:
-            # Prepare features
-            features = ['dayOfWeek', 'appCount']
-            X = self.df[features].copy()
-            
-            # Add engineered features
-            X['isWeekend'] = self.df['isWeekend'].astype(int)
-            X['daysSinceStart'] = (self.df['date'] - self.df['date'].min()).dt.days
-            
-            y = self.df['screenTimeHours']
-            
-            # Split data
-            if len(X) >= 10:
-                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-            else:
-                X_train, X_test, y_train, y_test = X, X, y, y
-            
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            # Train model
-            self.model.fit(X_train_scaled, y_train)
-            
-            # Make predictions
-            y_pred = self.model.predict(X_test_scaled)
-            
-            # Calculate metrics
-            mae = mean_absolute_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            
-            # Predict next 7 days
-            future_predictions = []
-            today = datetime.now()
-            
-            for i in range(7):
-                future_date = today + timedelta(days=i)
-                day_of_week = future_date.weekday() + 1  # Convert to 1-7 format
-                if day_of_week == 7:
-                    day_of_week = 0  # Sunday = 0
-                    
-                is_weekend = day_of_week in [0, 6]  # Sunday or Saturday
-                avg_app_count = self.df['appCount'].mean()
-                days_since_start = (future_date.date() - self.df['date'].min().date()).days
-                
-                future_X = np.array([[day_of_week, avg_app_count, int(is_weekend), days_since_start]])
-                future_X_scaled = self.scaler.transform(future_X)
-                
-                prediction = self.model.predict(future_X_scaled)[0]
-                
-                future_predictions.append({
-                    "date": future_date.strftime("%Y-%m-%d"),
-                    "dayOfWeek": day_of_week,
-                    "predictedScreenTimeHours": float(max(0, prediction)),
-                    "isWeekend": is_weekend
-                })
-            
-            return {
-                "model_performance": {
-                    "mean_absolute_error_hours": float(mae),
-                    "r2_score": float(r2),
-                    "accuracy": "good" if r2 > 0.5 else "fair" if r2 > 0.2 else "poor"
-                },
-                "next_7_days": future_predictions,
-                "weekly_prediction": float(sum(p["predictedScreenTimeHours"] for p in future_predictions))
-            }
-            
-        except Exception as e:
-            return {"error": f"Prediction failed: {e}"}
-    
-    def _generate_recommendations(self, analysis: Dict) -> List[str]:
-        """Generate personalized recommendations"""
-        recommendations = []
-        
-        try:
-            if "summary" not in analysis:
-                return ["Unable to generate recommendations due to insufficient data"]
-                
-            avg_hours = analysis["summary"]["avgDailyScreenTime"]
-            behavior = analysis["patterns"]["behaviorClassification"]
-            
-            # General recommendations based on usage level
-            if behavior == "excessive_user":
-                recommendations.extend([
-                    "🚨 Your screen time is very high. Consider setting app time limits.",
-                    "📱 Try the 20-20-20 rule: Every 20 minutes, look at something 20 feet away for 20 seconds.",
-                    "🛌 Establish a phone-free bedtime routine to improve sleep quality.",
-                    "🎯 Set a daily screen time goal and track your progress."
-                ])
-            elif behavior == "heavy_user":
-                recommendations.extend([
-                    "⚠️ Your screen time is above average. Consider reducing by 30 minutes daily.",
-                    "📵 Try implementing 'phone-free' periods during meals and family time.",
-                    "🔔 Review your notification settings to reduce unnecessary interruptions."
-                ])
-            elif behavior == "moderate_user":
-                recommendations.extend([
-                    "✅ Your usage is moderate. Focus on mindful usage quality over quantity.",
-                    "🎯 Try batching similar activities to reduce context switching.",
-                    "⏰ Use focus modes during work or study periods."
-                ])
-            else:  # light_user
-                recommendations.extend([
-                    "🌟 Great job maintaining low screen time!",
-                    "📚 Consider using your extra time for offline activities you enjoy.",
-                    "👥 Share your digital wellness tips with friends and family."
-                ])
-            
-            # Weekend vs weekday recommendations
-            if "weekdayVsWeekend" in analysis["patterns"]:
-                weekend_avg = analysis["patterns"]["weekdayVsWeekend"]["weekend"]
-                weekday_avg = analysis["patterns"]["weekdayVsWeekend"]["weekday"]
-                
-                if weekend_avg > weekday_avg * 1.5:
-                    recommendations.append(
-                        "📅 Your weekend usage is significantly higher. Plan offline weekend activities."
-                    )
-                elif weekday_avg > weekend_avg * 1.5:
-                    recommendations.append(
-                        "💼 High weekday usage detected. Consider work-life balance and productivity apps."
-                    )
-            
-            # Trend-based recommendations
-            if "trends" in analysis["patterns"]:
-                trend = analysis["patterns"]["trends"]["trend"]
-                if trend == "increasing":
-                    recommendations.append(
-                        "📈 Your usage is trending upward. Now might be a good time to set boundaries."
-                    )
-                elif trend == "decreasing":
-                    recommendations.append(
-                        "📉 Great progress! Your usage is decreasing. Keep up the good habits."
-                    )
-            
-            return recommendations[:6]  # Limit to 6 recommendations
-            
-        except Exception as e:
-            return [f"Error generating recommendations: {e}"]
-    
-    def generate_pdf_report(self, analysis: Dict, output_file: str = None) -> str:
+    def generate_pdf_report(self, analysis: Dict, output_file: Union[str, BinaryIO, None] = None) -> str:
         """
         Generate a comprehensive PDF report of usage analysis
         
         Args:
             analysis: Analysis dict from analyze_patterns()
-            output_file: Output PDF filename (default: habitguard_report_YYYYMMDD.pdf)
+            output_file: Output PDF filename or writable binary stream
+                         (default: unique habitguard_report_YYYYMMDD_HHMMSS_<id>.pdf)
         
         Returns:
-            str: Path to generated PDF file or error message
+            str: Path to generated PDF file ("<stream>" for streams) or error message
         """
         if not PDF_AVAILABLE:
             return "❌ Error: reportlab not installed. Install with: pip install reportlab"
         
         try:
-            from reportlab.lib.pagesizes import letter, A4  # type: ignore
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image as RLImage  # type: ignore
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle  # type: ignore
-            from reportlab.lib.units import inch  # type: ignore
-            from reportlab.lib import colors  # type: ignore
-            from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT  # type: ignore
+            # Stream output: no filesystem access at all
+            if output_file is not None and not isinstance(output_file, str):
+                write_pdf_report(analysis, output_file)
+                return "<stream>"
             
-            # Generate filename if not provided
+            # Generate a collision-free filename if not provided
             if output_file is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = f"habitguard_report_{timestamp}.pdf"
+                output_file = unique_report_path('pdf')
             
             # Ensure .pdf extension
             if not output_file.endswith('.pdf'):
                 output_file += '.pdf'
             
-            # Create PDF document
-            doc = SimpleDocTemplate(output_file, pagesize=letter)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#2563eb'),
-                spaceAfter=30,
-                alignment=TA_CENTER
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor('#1e40af'),
-                spaceAfter=12,
-                spaceBefore=12
-            )
-            
-            # Title
-            story.append(Paragraph("📊 HabitGuard Usage Report", title_style))
-            story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal']))
-            story.append(Spacer(1, 0.3 * inch))
-            
-            # Summary Section
-            if "summary" in analysis:
-                story.append(Paragraph("📋 Usage Summary", heading_style))
-                summary = analysis["summary"]
-                
-                summary_data = [
-                    ['Metric', 'Value'],
-                    ['Total Days Analyzed', str(summary.get('totalDays', 0))],
-                    ['Average Daily Screen Time', f"{summary.get('avgDailyScreenTime', 0):.1f} hours"],
-                    ['Total Screen Time', f"{summary.get('totalScreenTime', 0):.1f} hours"],
-                    ['Average Apps Per Day', f"{summary.get('avgAppsPerDay', 0):.0f}"],
-                    ['Peak Usage Day', summary.get('peakDay', 'N/A')]
-                ]
-                
-                summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
-                summary_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-                ]))
-                
-                story.append(summary_table)
-                story.append(Spacer(1, 0.2 * inch))
-            
-            # Behavior Classification
-            if "patterns" in analysis:
-                story.append(Paragraph("🏷️ Behavior Classification", heading_style))
-                behavior = analysis["patterns"].get("behaviorClassification", "unknown").replace('_', ' ').title()
-                story.append(Paragraph(f"<b>Classification:</b> {behavior}", styles['Normal']))
-                story.append(Spacer(1, 0.2 * inch))
-                
-                # Trends
-                if "trends" in analysis["patterns"]:
-                    trend_info = analysis["patterns"]["trends"]
-                    story.append(Paragraph(f"<b>Usage Trend:</b> {trend_info.get('trend', 'stable').title()}", styles['Normal']))
-                    story.append(Spacer(1, 0.1 * inch))
-                
-                # Weekend vs Weekday
-                if "weekdayVsWeekend" in analysis["patterns"]:
-                    wvw = analysis["patterns"]["weekdayVsWeekend"]
-                    story.append(Paragraph(
-                        f"<b>Weekday Average:</b> {wvw.get('weekday', 0):.1f}h | "
-                        f"<b>Weekend Average:</b> {wvw.get('weekend', 0):.1f}h", 
-                        styles['Normal']
-                    ))
-                
-                story.append(Spacer(1, 0.2 * inch))
-            
-            # Predictions
-            if "predictions" in analysis and "next_7_days" in analysis["predictions"]:
-                story.append(Paragraph("🔮 7-Day Predictions", heading_style))
-                
-                pred_data = [['Date', 'Day Type', 'Predicted Screen Time']]
-                for pred in analysis["predictions"]["next_7_days"]:
-                    day_type = "🏖️ Weekend" if pred.get("isWeekend") else "💼 Weekday"
-                    pred_data.append([
-                        pred.get('date', 'N/A'),
-                        day_type,
-                        f"{pred.get('predictedScreenTimeHours', 0):.1f} hours"
-                    ])
-                
-                weekly_total = analysis["predictions"].get("weekly_prediction", 0)
-                pred_data.append(['', 'Weekly Total:', f"{weekly_total:.1f} hours"])
-                
-                pred_table = Table(pred_data, colWidths=[2*inch, 2*inch, 2*inch])
-                pred_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 11),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('GRID', (0, 0), (-1, -2), 1, colors.black),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
-                    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#fef3c7')),
-                    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                    ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black)
-                ]))
-                
-                story.append(pred_table)
-                story.append(Spacer(1, 0.2 * inch))
-            
-            # Recommendations
-            story.append(Paragraph("💡 Personalized Recommendations", heading_style))
-            for i, rec in enumerate(analysis.get("recommendations", []), 1):
-                story.append(Paragraph(f"{i}. {rec}", styles['Normal']))
-                story.append(Spacer(1, 0.1 * inch))
-            
-            story.append(Spacer(1, 0.3 * inch))
-            story.append(Paragraph(
-                "<i>This report was generated by HabitGuard ML Analyzer. "
-                "Use these insights to improve your digital wellness.</i>",
-                styles['Italic']
-            ))
-            
-            # Build PDF
-            doc.build(story)
+            write_report_file(analysis, output_file, 'pdf')
             
             print(f"✅ PDF report generated: {output_file}")
             return output_file
@@ -937,89 +485,32 @@ class HabitGuardMLAnalyzer:
             print(error_msg)
             return error_msg
     
-    def generate_txt_report(self, analysis: Dict, output_file: str = None) -> str:
+    def generate_txt_report(self, analysis: Dict, output_file: Union[str, TextIO, None] = None) -> str:
         """
         Generate a plain text report of usage analysis
         
         Args:
             analysis: Analysis dict from analyze_patterns()
-            output_file: Output TXT filename (default: habitguard_report_YYYYMMDD.txt)
+            output_file: Output TXT filename or writable text stream
+                         (default: unique habitguard_report_YYYYMMDD_HHMMSS_<id>.txt)
         
         Returns:
-            str: Path to generated TXT file or error message
+            str: Path to generated TXT file ("<stream>" for streams) or error message
         """
         try:
-            # Generate filename if not provided
+            if output_file is not None and not isinstance(output_file, str):
+                write_txt_report(analysis, output_file)
+                return "<stream>"
+            
+            # Generate a collision-free filename if not provided
             if output_file is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = f"habitguard_report_{timestamp}.txt"
+                output_file = unique_report_path('txt')
             
             # Ensure .txt extension
             if not output_file.endswith('.txt'):
                 output_file += '.txt'
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                # Header
-                f.write("=" * 60 + "\n")
-                f.write("📊 HABITGUARD USAGE REPORT\n")
-                f.write("=" * 60 + "\n")
-                f.write(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n")
-                f.write("=" * 60 + "\n\n")
-                
-                # Summary
-                if "summary" in analysis:
-                    f.write("📋 USAGE SUMMARY\n")
-                    f.write("-" * 60 + "\n")
-                    summary = analysis["summary"]
-                    f.write(f"Total Days Analyzed:        {summary.get('totalDays', 0)}\n")
-                    f.write(f"Average Daily Screen Time:  {summary.get('avgDailyScreenTime', 0):.1f} hours\n")
-                    f.write(f"Total Screen Time:          {summary.get('totalScreenTime', 0):.1f} hours\n")
-                    f.write(f"Average Apps Per Day:       {summary.get('avgAppsPerDay', 0):.0f}\n")
-                    f.write(f"Peak Usage Day:             {summary.get('peakDay', 'N/A')}\n")
-                    f.write("\n")
-                
-                # Patterns
-                if "patterns" in analysis:
-                    f.write("🏷️ BEHAVIOR ANALYSIS\n")
-                    f.write("-" * 60 + "\n")
-                    behavior = analysis["patterns"].get("behaviorClassification", "unknown")
-                    f.write(f"Classification: {behavior.replace('_', ' ').title()}\n")
-                    
-                    if "trends" in analysis["patterns"]:
-                        trend = analysis["patterns"]["trends"].get("trend", "stable")
-                        f.write(f"Usage Trend:    {trend.title()}\n")
-                    
-                    if "weekdayVsWeekend" in analysis["patterns"]:
-                        wvw = analysis["patterns"]["weekdayVsWeekend"]
-                        f.write(f"Weekday Avg:    {wvw.get('weekday', 0):.1f} hours\n")
-                        f.write(f"Weekend Avg:    {wvw.get('weekend', 0):.1f} hours\n")
-                    
-                    f.write("\n")
-                
-                # Predictions
-                if "predictions" in analysis and "next_7_days" in analysis["predictions"]:
-                    f.write("🔮 7-DAY PREDICTIONS\n")
-                    f.write("-" * 60 + "\n")
-                    for pred in analysis["predictions"]["next_7_days"]:
-                        day_emoji = "🏖️" if pred.get("isWeekend") else "💼"
-                        f.write(f"{day_emoji} {pred.get('date', 'N/A'):12} | "
-                               f"{pred.get('predictedScreenTimeHours', 0):5.1f} hours\n")
-                    
-                    weekly_total = analysis["predictions"].get("weekly_prediction", 0)
-                    f.write("-" * 60 + "\n")
-                    f.write(f"Predicted Weekly Total: {weekly_total:.1f} hours\n")
-                    f.write("\n")
-                
-                # Recommendations
-                f.write("💡 PERSONALIZED RECOMMENDATIONS\n")
-                f.write("-" * 60 + "\n")
-                for i, rec in enumerate(analysis.get("recommendations", []), 1):
-                    f.write(f"{i}. {rec}\n")
-                
-                f.write("\n" + "=" * 60 + "\n")
-                f.write("This report was generated by HabitGuard ML Analyzer.\n")
-                f.write("Use these insights to improve your digital wellness.\n")
-                f.write("=" * 60 + "\n")
+            write_report_file(analysis, output_file, 'txt')
             
             print(f"✅ Text report generated: {output_file}")
             return output_file
@@ -1039,6 +530,7 @@ def main():
     parser.add_argument('--pdf', action='store_true', help='Generate PDF report')
     parser.add_argument('--txt', action='store_true', help='Generate TXT report')
     parser.add_argument('--output', type=str, help='Output filename for report')
+    parser.add_argument('--json-output', type=str, help='Save analysis JSON to this file')
     parser.add_argument('--student-mode', action='store_true', help='Check student usage restrictions')
     parser.add_argument('--predict', action='store_true', help='Use neural network predictor')
     parser.add_argument('--train-nn', action='store_true', help='Train neural network model')
@@ -1080,23 +572,30 @@ def main():
             
             print("✅ Training complete! Model saved.")
         
-        # Make prediction with sample data
-        sample_usage = {
-            'social_media_hours': 3.5,
-            'entertainment_hours': 2.0,
-            'productivity_hours': 1.5,
-            'communication_hours': 1.0,
-            'gaming_hours': 2.5,
-            'browsing_hours': 1.5,
-            'education_hours': 0.5,
-            'shopping_hours': 0.3,
-            'news_hours': 0.5,
-            'other_hours': 0.7
-        }
+        # Category features from real usage data when a CSV is given, sample data otherwise
+        sample_usage = None
+        if args.csv and analyzer.load_csv_data(csv_file=args.csv):
+            features = build_category_features(analyzer.df)
+            sample_usage = features.row_dict(int(features.keys['date'].values.argmax()))
+            print("📂 Using category features from the latest day in the CSV")
+        
+        if sample_usage is None:
+            sample_usage = {
+                'social_media_hours': 3.5,
+                'entertainment_hours': 2.0,
+                'productivity_hours': 1.5,
+                'communication_hours': 1.0,
+                'gaming_hours': 2.5,
+                'browsing_hours': 1.5,
+                'education_hours': 0.5,
+                'shopping_hours': 0.3,
+                'news_hours': 0.5,
+                'other_hours': 0.7
+            }
         
         print("\n📊 Sample Usage Data:")
         for category, hours in sample_usage.items():
-            print(f"  {category.replace('_', ' ').title()}: {hours}h")
+            print(f"  {category.replace('_', ' ').title()}: {hours:.1f}h")
         
         print(f"\n  Total: {sum(sample_usage.values()):.1f}h")
         
@@ -1179,7 +678,7 @@ def main():
     print(f"📊 Total Days Analyzed: {summary['totalDays']}")
     print(f"⏱️  Average Daily Screen Time: {summary['avgDailyScreenTime']:.1f} hours")
     print(f"📱 Average Apps Per Day: {summary['avgAppsPerDay']:.0f}")
-    print(f"🏷️  Behavior Classification: {analysis['patterns']['behaviorClassification'].replace('_', ' ').title()}")
+    print(f"🏷️  Behavior Classification: {behavior_label(analysis['patterns'])}")
     
     # Trends
     if "trends" in analysis["patterns"]:
@@ -1223,27 +722,29 @@ def main():
         if not txt_file.startswith('❌'):
             print(f"✅ Text Report: {txt_file}")
     
-    # Export JSON results
-    try:
-        output_file = "habitguard_ml_analysis.json"
-        with open(output_file, 'w') as f:
-            json.dump(analysis, f, indent=2, default=str)
-        print(f"\n💾 Analysis saved to: {output_file}")
-    except Exception as e:
-        print(f"⚠️ Could not save analysis: {e}")
+    # Export JSON results (only when asked, never implicitly into the CWD)
+    if args.json_output:
+        try:
+            tmp_file = f"{args.json_output}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(dumps(analysis, pretty=True))
+            os.replace(tmp_file, args.json_output)
+            print(f"\n💾 Analysis saved to: {args.json_output}")
+        except Exception as e:
+            print(f"⚠️ Could not save analysis: {e}")
 
-def generate_sample_csv_data() -> str:
+def generate_sample_csv_data(days: int = 30) -> str:
     """Generate sample CSV data for testing"""
     import random
     from datetime import date, timedelta
     
-    # Generate 30 days of sample data
+    # Generate `days` days of sample data
     headers = "date,hour,totalScreenTime,topAppPackage,topAppTime,appCount,dayOfWeek,isWeekend"
     rows = [headers]
     
-    start_date = date.today() - timedelta(days=30)
+    start_date = date.today() - timedelta(days=days)
     
-    for i in range(30):
+    for i in range(days):
         current_date = start_date + timedelta(days=i)
         day_of_week = current_date.weekday() + 1
         if day_of_week == 7:
@@ -1267,7 +768,7 @@ def generate_sample_csv_data() -> str:
         row = f"{current_date},{random.randint(9, 23)},{total_screen_time},{top_app},{top_app_time},{app_count},{day_of_week},{is_weekend}"
         rows.append(row)
     
-    return "\\n".join(rows)
+    return "\n".join(rows)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+HabitGuard Weekly Report Precomputation
+=======================================
+
+Nightly batch job that computes every user's ``weekly_reports`` row in one
+pass over a fleet-wide usage export, instead of one request per user.
+
+- Loads and validates the export with ``HabitGuardMLAnalyzer.load_csv_data``
+- Buckets days into Monday-start weeks and aggregates with grouped,
+  vectorized pandas operations (no per-user Python loops)
+- Mirrors the scoring and insights of ``weeklyReportController.js``
+- Emits rows ready for bulk insert: CSV (for MySQL ``LOAD DATA``), JSONL,
+  or a SQLite stand-in database for tests
+
+Input CSV: the app's usage columns plus a ``userId`` (or ``u_id``) column and
+an optional ``dailyGoalMinutes`` column.
+
+Usage:
+    python weekly_reports.py --csv fleet_usage.csv --format csv --output weekly_reports.csv
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from serialization import dumps
+from usage_predictor import HabitGuardMLAnalyzer
+
+USER_COLUMN = 'userId'
+DEFAULT_GOAL_MINUTES = 240
+TOP_APPS_PER_WEEK = 10
+
+# Column order of the weekly_reports table (minus auto columns)
+WEEKLY_REPORT_COLUMNS = [
+    'u_id', 'report_title', 'week_start_date', 'week_end_date', 'total_screen_time',
+    'daily_average', 'total_app_opens', 'most_used_apps', 'streak_data',
+    'goal_achievement', 'productivity_score', 'insights', 'report_status'
+]
+
+LOAD_DATA_TEMPLATE = (
+    "LOAD DATA LOCAL INFILE '{path}' REPLACE INTO TABLE weekly_reports\n"
+    "CHARACTER SET utf8mb4\n"
+    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY ''\n"
+    "LINES TERMINATED BY '\\n'\n"
+    "IGNORE 1 LINES\n"
+    "({columns});"
+)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS weekly_reports (
+    report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    u_id INTEGER NOT NULL,
+    report_title TEXT NOT NULL,
+    week_start_date TEXT NOT NULL,
+    week_end_date TEXT NOT NULL,
+    total_screen_time INTEGER NOT NULL,
+    daily_average REAL,
+    total_app_opens INTEGER DEFAULT 0,
+    most_used_apps TEXT,
+    streak_data TEXT,
+    goal_achievement TEXT,
+    productivity_score REAL,
+    insights TEXT,
+    report_status TEXT DEFAULT 'completed',
+    generated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (u_id, week_start_date)
+)
+"""
+
+
+def load_fleet_usage(csv_file: Optional[str] = None, csv_content: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Load a multi-user usage export using the analyzer's validation and type conversion"""
+    analyzer = HabitGuardMLAnalyzer()
+    if not analyzer.load_csv_data(csv_content=csv_content, csv_file=csv_file):
+        return None
+
+    df = analyzer.df
+    if USER_COLUMN not in df.columns and 'u_id' in df.columns:
+        df = df.rename(columns={'u_id': USER_COLUMN})
+    if USER_COLUMN not in df.columns:
+        print(f"❌ Missing required column: {USER_COLUMN}")
+        return None
+    return df
+
+
+def _band_points(values: np.ndarray, cutoffs: List[float], points: List[int]) -> np.ndarray:
+    """Vectorized 'if value >= cutoff: points' ladder (cutoffs ascending, points has one extra entry)"""
+    return np.asarray(points)[np.searchsorted(cutoffs, values, side='right')]
+
+
+def daily_usage(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (userId, date)
+
+    The app exports a row per hour (``date,hour,...``), so screen time and app
+    counts are summed over the day, the goal is the day's last one, and the
+    top app is the package with the most top-app time that day.
+    """
+    data = df.assign(date=pd.to_datetime(df['date']).dt.normalize())
+    data = data.sort_values([USER_COLUMN, 'date'], kind='mergesort')
+    keys = [USER_COLUMN, 'date']
+    grouped = data.groupby(keys, sort=True)
+    daily = grouped[['totalScreenTime', 'appCount']].sum(min_count=1)
+    if 'dailyGoalMinutes' in data.columns:
+        daily['dailyGoalMinutes'] = grouped['dailyGoalMinutes'].last()
+    daily = daily.reset_index()
+
+    if 'topAppPackage' in data.columns and 'topAppTime' in data.columns:
+        apps = data.dropna(subset=['topAppPackage']).assign(
+            topAppTime=pd.to_numeric(data['topAppTime'], errors='coerce').fillna(0)
+        ).groupby(keys + ['topAppPackage'], sort=False)['topAppTime'].sum().reset_index()
+        top = apps.sort_values('topAppTime', ascending=False, kind='mergesort').drop_duplicates(keys)
+        daily = daily.merge(top, on=keys, how='left')
+    return daily
+
+
+def compute_weekly_rollups(df: pd.DataFrame, default_goal_minutes: float = DEFAULT_GOAL_MINUTES) -> pd.DataFrame:
+    """
+    Compute per-user weekly statistics for every week in the dataset
+
+    Args:
+        df: Fleet usage data from load_fleet_usage()
+        default_goal_minutes: Daily screen time goal for users without dailyGoalMinutes
+
+    Returns:
+        DataFrame with one row per (userId, week_start) and raw numeric columns
+    """
+    daily = daily_usage(df)
+    daily['minutes'] = daily['totalScreenTime'] / 60000.0
+    daily['week_start'] = daily['date'] - pd.to_timedelta(daily['date'].dt.weekday, unit='D')
+
+    if 'dailyGoalMinutes' in daily.columns:
+        daily['goal'] = pd.to_numeric(daily['dailyGoalMinutes'], errors='coerce').fillna(default_goal_minutes)
+    else:
+        daily['goal'] = float(default_goal_minutes)
+    daily['goal_met'] = daily['minutes'] <= daily['goal']
+
+    # Length of the goal-met run ending on each day, reset at every week boundary
+    week_keys = [daily[USER_COLUMN], daily['week_start']]
+    run_id = (~daily['goal_met']).groupby(week_keys).cumsum()
+    daily['streak'] = np.where(
+        daily['goal_met'],
+        daily.groupby(week_keys + [run_id]).cumcount() + 1,
+        0
+    )
+
+    weekly = daily.groupby([USER_COLUMN, 'week_start'], sort=True).agg(
+        total_minutes=('minutes', 'sum'),
+        daily_average=('minutes', 'mean'),
+        total_app_opens=('appCount', 'sum'),
+        active_days=('date', 'nunique'),
+        goals_met=('goal_met', 'sum'),
+        goal_minutes=('goal', 'mean'),
+        trailing_streak=('streak', 'last'),
+    ).reset_index()
+
+    weekly['success_rate'] = np.round(weekly['goals_met'] / weekly['active_days'] * 100).astype(int)
+    weekly['productivity_score'] = (
+        _band_points(weekly['success_rate'].to_numpy(), [40, 60, 80], [10, 20, 30, 40])
+        + _band_points(weekly['trailing_streak'].to_numpy(), [1, 3, 7], [0, 10, 20, 30])
+        + _band_points(weekly['active_days'].to_numpy(), [3, 5, 7], [0, 10, 20, 30])
+    ).astype(float)
+
+    weekly['most_used_apps'] = _most_used_apps(daily).reindex(
+        pd.MultiIndex.from_frame(weekly[[USER_COLUMN, 'week_start']])
+    ).fillna('[]').to_numpy()
+    return weekly
+
+
+def _most_used_apps(daily: pd.DataFrame) -> pd.Series:
+    """JSON array of the top apps per (userId, week_start), indexed by those keys"""
+    if 'topAppPackage' not in daily.columns or 'topAppTime' not in daily.columns:
+        return pd.Series(dtype=object)
+
+    apps = daily.dropna(subset=['topAppPackage']).assign(
+        topAppMinutes=pd.to_numeric(daily['topAppTime'], errors='coerce').fillna(0) / 60000.0
+    ).groupby([USER_COLUMN, 'week_start', 'topAppPackage']).agg(
+        totalTime=('topAppMinutes', 'sum'),
+        daysUsed=('date', 'nunique'),
+    ).reset_index()
+
+    apps = apps.sort_values([USER_COLUMN, 'week_start', 'totalTime'], ascending=[True, True, False])
+    apps = apps.groupby([USER_COLUMN, 'week_start']).head(TOP_APPS_PER_WEEK)
+    apps['json'] = [
+        json.dumps({'appName': package, 'packageName': package, 'totalTime': round(total, 1), 'daysUsed': int(days)})
+        for package, total, days in zip(apps['topAppPackage'], apps['totalTime'], apps['daysUsed'])
+    ]
+    return '[' + apps.groupby([USER_COLUMN, 'week_start'])['json'].agg(','.join) + ']'
+
+
+def _insights(row) -> str:
+    """Insight text for one weekly rollup, matching weeklyReportController.generateInsights"""
+    insights = []
+    avg_hours = row.daily_average / 60
+    if row.daily_average > 300:
+        insights.append(f"📱 Your average daily screen time was {avg_hours:.1f} hours. Consider setting a lower daily goal to improve your digital wellbeing.")
+    elif row.daily_average > 180:
+        insights.append(f"📊 Your average daily screen time was {avg_hours:.1f} hours. You're doing well! Try to maintain or reduce this further.")
+    else:
+        insights.append(f"🎯 Excellent! Your average daily screen time was only {avg_hours:.1f} hours. Keep up the great work!")
+
+    if row.goals_met == row.active_days and row.active_days >= 7:
+        insights.append(f"🔥 Perfect week! You met your goal every single day. Your current streak is {row.trailing_streak} days!")
+    elif row.success_rate >= 70:
+        insights.append(f"💪 Great consistency! You met your goal {row.goals_met} out of {row.active_days} days ({row.success_rate}%).")
+    elif row.success_rate < 50:
+        insights.append(f"📈 Room for improvement: You met your goal {row.goals_met} out of {row.active_days} days. Let's aim higher next week!")
+
+    if row.active_days >= 7:
+        insights.append("✅ You were active all 7 days this week. Consistency is key to building better habits!")
+    elif row.active_days < 5:
+        insights.append(f"📅 You were active {row.active_days} days this week. Try to log your usage daily for better insights.")
+
+    if row.success_rate >= 80:
+        insights.append("🌟 You're crushing your goals! Keep this momentum going into next week!")
+    else:
+        insights.append("💡 Remember: Small improvements each day lead to big results over time. You've got this!")
+    return "\n\n".join(insights)
+
+
+def build_report_rows(weekly: pd.DataFrame) -> pd.DataFrame:
+    """Shape weekly rollups into weekly_reports table rows"""
+    week_start = weekly['week_start'].dt.strftime('%Y-%m-%d')
+    week_end = (weekly['week_start'] + pd.Timedelta(days=6)).dt.strftime('%Y-%m-%d')
+
+    goals_met = weekly['goals_met'].astype(int)
+    active_days = weekly['active_days'].astype(int)
+    avg_minutes = weekly['daily_average']
+
+    rows = pd.DataFrame({
+        'u_id': weekly[USER_COLUMN].to_numpy(),
+        'report_title': 'Weekly Report: ' + week_start + ' to ' + week_end,
+        'week_start_date': week_start,
+        'week_end_date': week_end,
+        'total_screen_time': np.round(weekly['total_minutes']).astype(int),
+        'daily_average': np.round(avg_minutes, 2),
+        'total_app_opens': weekly['total_app_opens'].astype(int),
+        'most_used_apps': weekly['most_used_apps'],
+        'streak_data': [
+            json.dumps({'totalDays': int(days), 'goalsMet': int(met), 'avgScreenTime': f"{avg:.2f}",
+                        'successRate': int(rate), 'weekStreak': int(streak)})
+            for days, met, avg, rate, streak in zip(active_days, goals_met, avg_minutes,
+                                                    weekly['success_rate'], weekly['trailing_streak'])
+        ],
+        'goal_achievement': [
+            json.dumps([{'type': 'daily_screen_time', 'target': round(goal, 1), 'current': round(avg, 1),
+                         'status': 'achieved' if avg <= goal else 'active',
+                         'progress': min(round(goal / avg * 100), 100) if avg > 0 else 100}])
+            for goal, avg in zip(weekly['goal_minutes'], avg_minutes)
+        ],
+        'productivity_score': weekly['productivity_score'],
+        'insights': [_insights(row) for row in weekly.itertuples(index=False)],
+        'report_status': 'completed',
+    })
+    return rows[WEEKLY_REPORT_COLUMNS]
+
+
+def write_csv(rows: pd.DataFrame, path: str) -> str:
+    """Write rows for MySQL LOAD DATA (see LOAD_DATA_TEMPLATE)"""
+    rows.to_csv(path, index=False, lineterminator='\n', encoding='utf-8')
+    return path
+
+
+def write_jsonl(rows: pd.DataFrame, path: str) -> str:
+    """Write one JSON object per line, one line per weekly_reports row"""
+    with open(path, 'wb') as f:
+        for record in rows.to_dict(orient='records'):
+            f.write(dumps(record))
+            f.write(b'\n')
+    return path
+
+
+def write_sqlite(rows: pd.DataFrame, path: str) -> str:
+    """Upsert rows into a SQLite stand-in for the weekly_reports table"""
+    placeholders = ', '.join('?' for _ in WEEKLY_REPORT_COLUMNS)
+    sql = f"INSERT OR REPLACE INTO weekly_reports ({', '.join(WEEKLY_REPORT_COLUMNS)}) VALUES ({placeholders})"
+    values = [
+        tuple(v.item() if isinstance(v, np.generic) else v for v in record)
+        for record in rows.itertuples(index=False, name=None)
+    ]
+    with sqlite3.connect(path) as conn:
+        conn.execute(SQLITE_SCHEMA)
+        conn.executemany(sql, values)
+    return path
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'sqlite': write_sqlite}
+
+
+def generate_weekly_reports(df: pd.DataFrame, default_goal_minutes: float = DEFAULT_GOAL_MINUTES,
+                            week: Optional[date] = None) -> pd.DataFrame:
+    """Full job: rollups -> table rows, optionally restricted to one week (any date inside it)"""
+    weekly = compute_weekly_rollups(df, default_goal_minutes)
+    if week is not None:
+        target = pd.Timestamp(week).normalize()
+        target -= pd.Timedelta(days=target.weekday())
+        weekly = weekly[weekly['week_start'] == target]
+    return build_report_rows(weekly.reset_index(drop=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='📊 HabitGuard weekly report precomputation')
+    parser.add_argument('--csv', type=str, required=True, help='Fleet usage CSV (with userId column)')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv', help='Output format')
+    parser.add_argument('--output', type=str, help='Output path (default: weekly_reports.<format>)')
+    parser.add_argument('--goal-minutes', type=float, default=DEFAULT_GOAL_MINUTES,
+                        help='Daily goal for users without dailyGoalMinutes')
+    parser.add_argument('--week', type=str, help='Only emit the week containing this date (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    df = load_fleet_usage(csv_file=args.csv)
+    if df is None:
+        print("❌ Failed to load fleet usage data")
+        return
+
+    week = date.fromisoformat(args.week) if args.week else None
+    rows = generate_weekly_reports(df, args.goal_minutes, week)
+
+    extension = 'db' if args.format == 'sqlite' else args.format
+    output = args.output or f"weekly_reports.{extension}"
+    WRITERS[args.format](rows, output)
+    print(f"✅ {len(rows)} weekly report rows for {rows['u_id'].nunique()} users written to {output}")
+
+    if args.format == 'csv':
+        print("\n📥 Bulk load with:")
+        print(LOAD_DATA_TEMPLATE.format(path=os.path.abspath(output), columns=', '.join(WEEKLY_REPORT_COLUMNS)))
+
+
+if __name__ == "__main__":
+    main()
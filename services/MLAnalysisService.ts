@@ -1,5 +1,7 @@
 import { API_CONFIG } from '@/config/api.config';
 import AsyncStorage from '@react-native-async-storage/async-storage';
+// Same rule table the Python analyzer compiles (ml_analysis/behavior_rules.py)
+import behaviorRules from '@/ml_analysis/behavior_rules.json';
 
 const ML_ANALYSIS_CACHE_KEY = '@habitguard_ml_analysis';
 const ML_ANALYSIS_TIMESTAMP_KEY = '@habitguard_ml_analysis_timestamp';
@@ -49,8 +51,31 @@ export interface MLAnalysisResult {
       isWeekend: boolean;
     }>;
     weekly_prediction: number;
+    // Monte Carlo outlook from the user's past forecast errors (absent with under ~3 weeks of data)
+    goal_outlook?: {
+      simulations: number;
+      residualBlocks: number;
+      interval: number;
+      daily: Array<{ date: string; lowerHours: number; medianHours: number; upperHours: number }>;
+      weekly: {
+        medianHours: number;
+        intervals: Record<string, { lowerHours: number; upperHours: number }>;
+      };
+      goals: Array<{
+        dailyGoalMinutes: number;
+        probWeekUnder: number;
+        probEveryDayUnder: number;
+        expectedDaysUnder: number;
+        isUserGoal: boolean;
+      }>;
+    } | { error: string };
   };
   recommendations: string[];
+  // Plotted in report charts: recent daily hours and a weekday x hour heatmap (Sunday first)
+  series?: {
+    daily: { dates: string[]; hours: number[] };
+    hourly?: number[][];
+  };
   timestamp?: string;
 }
 
@@ -65,6 +90,55 @@ export interface MLInsight {
   data?: any;
 }
 
+type BehaviorClassification = MLAnalysisResult['patterns']['behaviorClassification'];
+
+interface BandTable {
+  side?: string;
+  cutoffs: number[];
+  missing?: number;
+}
+
+/**
+ * Band index of a value, matching np.searchsorted(cutoffs, x, side) in behavior_rules.py
+ */
+function bandIndex(table: BandTable, x: number): number {
+  if (Number.isNaN(x)) return table.missing ?? table.cutoffs.length;
+  let lo = 0;
+  let hi = table.cutoffs.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    const below = table.side === 'left' ? table.cutoffs[mid] < x : table.cutoffs[mid] <= x;
+    if (below) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+/**
+ * Classify behavior and risk from the shared rule table
+ */
+function classifyBehavior(avgHours: number, consistency: number): Pick<
+  BehaviorClassification, 'category' | 'severity' | 'action' | 'message' | 'risk_level'
+> {
+  const band = behaviorRules.hourBands.bands[bandIndex(behaviorRules.hourBands, avgHours)];
+  const { escalation } = behaviorRules;
+  const escalate = consistency > escalation.consistencyAbove && escalation.severities.includes(band.severity);
+
+  const score =
+    behaviorRules.riskHourPoints.values[bandIndex(behaviorRules.riskHourPoints, avgHours)] +
+    behaviorRules.riskConsistencyPoints.values[bandIndex(behaviorRules.riskConsistencyPoints, consistency)];
+
+  return {
+    category: band.category as BehaviorClassification['category'],
+    severity: (escalate ? escalation.severity : band.severity) as BehaviorClassification['severity'],
+    action: band.action,
+    message: escalate ? band.message + escalation.messageSuffix : band.message,
+    risk_level: behaviorRules.riskLevels.values[
+      bandIndex(behaviorRules.riskLevels, score)
+    ] as BehaviorClassification['risk_level'],
+  };
+}
+
 class MLAnalysisServiceClass {
   private baseUrl: string;
 
@@ -334,33 +408,12 @@ class MLAnalysisServiceClass {
     const maxScreenTime = Math.max(...screenTimes);
     const minScreenTime = Math.min(...screenTimes);
 
-    // Simple classification
-    let category: any = 'moderate_user';
-    let severity: any = 'low';
-    let action = 'monitor';
-    let message = 'Continue monitoring your usage.';
-
-    if (avgScreenTime < 2) {
-      category = 'light_user';
-      severity = 'low';
-      action = 'maintain';
-      message = 'Great digital wellness!';
-    } else if (avgScreenTime < 4) {
-      category = 'moderate_user';
-      severity = 'low';
-      action = 'monitor';
-      message = 'Good balance maintained.';
-    } else if (avgScreenTime < 6) {
-      category = 'heavy_user';
-      severity = 'medium';
-      action = 'reduce';
-      message = 'Consider reducing screen time.';
-    } else {
-      category = 'excessive_user';
-      severity = 'high';
-      action = 'immediate_action';
-      message = 'Take immediate action to reduce usage.';
-    }
+    // Sample standard deviation over the mean, as in the Python analyzer
+    const variance = screenTimes.length > 1
+      ? screenTimes.reduce((a, b) => a + (b - avgScreenTime) ** 2, 0) / (screenTimes.length - 1)
+      : NaN;
+    const consistencyScore = avgScreenTime > 0 ? Math.sqrt(variance) / avgScreenTime : 1;
+    const classification = classifyBehavior(avgScreenTime, consistencyScore);
 
     return {
       summary: {
@@ -383,14 +436,10 @@ class MLAnalysisServiceClass {
           overall_avg: avgScreenTime,
         },
         behaviorClassification: {
-          category,
-          severity,
-          action,
-          message,
+          ...classification,
           avg_hours: avgScreenTime,
           max_hours: maxScreenTime,
-          consistency_score: 0.3,
-          risk_level: severity === 'high' ? 'high' : 'moderate',
+          consistency_score: Number.isNaN(consistencyScore) ? 0 : consistencyScore,
         },
       },
       recommendations: [